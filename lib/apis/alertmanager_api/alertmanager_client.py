@@ -0,0 +1,301 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from apis.alertmanager_api.silence import VALID_SILENCE_STATES
+from apis.alertmanager_api.silence_index import SilenceIndex
+from apis.alertmanager_api.structs.alertmanager_account import AlertManagerAccount
+from apis.alertmanager_api.structs.silence_details import SilenceDetails
+
+logger = logging.getLogger("AlertManagerAPI")
+
+# How long (in seconds) a listing of silences is reused for
+SILENCE_LISTING_TTL = 30
+
+
+class AlertmanagerClient:
+    """
+    Client for the AlertManager silences API which reuses one session, and its connections,
+    for every request. Silences can be created and removed in bulk, and the listing of
+    silences is cached and indexed by matcher so many lookups only download it once
+    """
+
+    def __init__(
+        self,
+        alertmanager_account: AlertManagerAccount,
+        max_concurrent_requests: int = 8,
+        listing_ttl: int = SILENCE_LISTING_TTL,
+    ):
+        """
+        :param alertmanager_account: dataclass for holding alertmanager connection specs
+        :param max_concurrent_requests: Maximum number of requests to make at the same time
+        :param listing_ttl: Seconds a listing of silences is reused for
+        """
+        self.api_url = f"{alertmanager_account.alertmanager_endpoint}/api/v2"
+        self.max_concurrent_requests = max_concurrent_requests
+        self.listing_ttl = listing_ttl
+        self.session = requests.Session()
+        self.session.auth = alertmanager_account.auth
+        self.session.headers.update({"Accept": "application/json"})
+        adapter = HTTPAdapter(pool_maxsize=max_concurrent_requests)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # (expiry time, silences from the API, states -> SilenceIndex)
+        self._listing = None
+        # bumped by every invalidation, so a listing downloaded during one isn't cached
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the session and its connections
+        """
+        self.session.close()
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Make a request to the AlertManager API
+        :param method: HTTP method
+        :param path: path of the endpoint under /api/v2
+        :param kwargs: further arguments to pass to the request
+        :raises requests.RequestException or requests.HTTPError:
+            when the request to the AlertManager failed
+        """
+        try:
+            response = self.session.request(
+                method, f"{self.api_url}/{path}", timeout=10, **kwargs
+            )
+            response.raise_for_status()
+        except (requests.HTTPError, requests.RequestException) as req_ex:
+            logger.critical(
+                "Failed to %s %s in Alertmanager: %s\n\tResponse status code: %s\n\tResponse text: %s",
+                method,
+                path,
+                req_ex,
+                req_ex.response.status_code if req_ex.response else "null",
+                req_ex.response.text if req_ex.response else "null",
+            )
+            raise req_ex
+        return response
+
+    def invalidate(self) -> None:
+        """
+        Forget the cached listing of silences, and any listing still being downloaded
+        """
+        with self._lock:
+            self._listing = None
+            self._generation += 1
+
+    def schedule_silence(self, silence_details: SilenceDetails) -> str:
+        """
+        Schedules a silence in alertmanager
+        :param silence_details: object with the specs to create a silence
+        :return: ID of new silence created in Alertmanager
+        :raises requests.RequestException or requests.HTTPError:
+            when the request to the AlertManager failed
+        """
+        payload = {
+            "matchers": silence_details.matchers_raw,
+            "startsAt": silence_details.start_time_str,
+            "endsAt": silence_details.end_time_str,
+            "createdBy": silence_details.author,
+            "comment": silence_details.comment,
+        }
+        try:
+            return self._request("POST", "silences", json=payload).json()["silenceID"]
+        finally:
+            self.invalidate()
+
+    def schedule_silences(self, silences: List[SilenceDetails]) -> List[str]:
+        """
+        Schedules many silences in alertmanager at the same time. If any can't be scheduled,
+        the ones that were are removed again, so either all the silences are set or none are
+        :param silences: objects with the specs to create each silence
+        :return: IDs of the new silences, in the order given
+        :raises RuntimeError: when any of the silences couldn't be scheduled
+        """
+        results = self._map(self.schedule_silence, silences)
+        failed = [str(result) for result in results if isinstance(result, Exception)]
+        if failed:
+            created = [result for result in results if isinstance(result, str)]
+            if created:
+                self.remove_silences(created)
+            raise RuntimeError(
+                f"Failed to schedule {len(failed)} of {len(silences)} silences: "
+                + "; ".join(failed)
+            )
+        return results
+
+    def remove_silence(self, silence_id: str) -> None:
+        """
+        Removes a previously scheduled silence in alertmanager
+        :param silence_id: ID of silence to remove
+        :raises requests.RequestException or requests.HTTPError:
+            when the request to the AlertManager failed
+        """
+        try:
+            self._request("DELETE", f"silence/{silence_id}")
+        finally:
+            self.invalidate()
+
+    def remove_silences(self, silence_ids: Iterable[str]) -> None:
+        """
+        Removes many previously scheduled silences in alertmanager at the same time
+        :param silence_ids: IDs of the silences to remove
+        :raises RuntimeError: when any of the silences couldn't be removed, after trying them all
+        """
+        silence_ids = list(silence_ids)
+        results = self._map(self.remove_silence, silence_ids)
+        failed = [
+            f"{silence_id}: {result}"
+            for silence_id, result in zip(silence_ids, results)
+            if isinstance(result, Exception)
+        ]
+        if failed:
+            raise RuntimeError(
+                f"Failed to remove {len(failed)} of {len(silence_ids)} silences: "
+                + "; ".join(failed)
+            )
+
+    def _map(self, func, items: List) -> List:
+        """
+        Call a function on each item at the same time, returning its result or the exception
+        it raised for each item
+        :param func: function making a request for one item
+        :param items: items to call the function on
+        """
+
+        def _call(item):
+            try:
+                return func(item)
+            except Exception as exc:  # pylint:disable=broad-exception-caught
+                return exc
+
+        if not items:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_concurrent_requests, len(items))
+        ) as executor:
+            return list(executor.map(_call, items))
+
+    def get_silence_index(
+        self, states: Optional[Iterable[str]] = None, refresh: bool = False
+    ) -> SilenceIndex:
+        """
+        Get the silences indexed by matcher, downloading them if the cached listing has expired.
+        Each set of states is indexed once per listing
+        :param states: (Optional) only index silences in these states, i.e. active and pending
+        :param refresh: If True, download the silences even if they are cached
+        :raises requests.RequestException or requests.HTTPError:
+            when the request to the AlertManager failed
+        """
+        states_key = tuple(sorted(states)) if states is not None else None
+        with self._lock:
+            listing = self._listing
+            generation = self._generation
+        if refresh or listing is None or listing[0] <= time.monotonic():
+            raw_silences = self._request("GET", "silences").json()
+            listing = (time.monotonic() + self.listing_ttl, raw_silences, {})
+            with self._lock:
+                # a silence changed while downloading, so the listing may already be stale
+                if self._generation == generation:
+                    self._listing = listing
+        _, raw_silences, indexes = listing
+        with self._lock:
+            if states_key not in indexes:
+                indexes[states_key] = SilenceIndex(raw_silences, states)
+            return indexes[states_key]
+
+    def get_silences(self, refresh: bool = False) -> dict:
+        """
+        get all silence events recorded in AlertManager
+        :param refresh: If True, download the silences even if they are cached
+        :return: the dictionary of Silence events currently recorded in AlertManager:
+            {
+                id: {
+                    "state":"<active>/<pending>/<expired>,
+                    "details":SilenceDetails()
+                }
+            }
+        :raises requests.RequestException or requests.HTTPError:
+            when the request to the AlertManager failed
+        """
+        return self.get_silence_index(refresh=refresh).silences()
+
+    def get_silences_matching(self, name: str, value: str) -> dict:
+        """
+        get silence events with a matcher of the given name and value
+        :param name: name of the matcher, i.e. instance
+        :param value: value of the matcher, i.e. a hostname
+        :return: the dictionary of matching Silence events, in the same format as get_silences
+        """
+        return self.get_silence_index().matching(name, value)
+
+    def get_hv_silences(self, hostname: str) -> dict:
+        """
+        get silences pertaining to a hv, where the silence has a matcher with a name in
+        HV_MATCHER_NAMES and a value matching the given hostname
+        :param hostname: hypervisor hostname to get silences for
+        :return: the dictionary of matching Silence events, in the same format as get_silences
+        """
+        return self.get_hvs_silences([hostname])[hostname]
+
+    def get_hvs_silences(
+        self, hostnames: Iterable[str], states: Optional[Iterable[str]] = None
+    ) -> Dict[str, dict]:
+        """
+        get silences pertaining to many hvs from one listing
+        :param hostnames: hypervisor hostnames to get silences for
+        :param states: (Optional) only get silences in these states, i.e. active and pending
+        :return: a dictionary mapping each hostname to the dictionary of its Silence events,
+            in the same format as get_silences
+        """
+        return self.get_silence_index(states).hv_silences(hostnames)
+
+    def remove_hv_silences(self, hostnames: Iterable[str]) -> List[str]:
+        """
+        Removes the active and pending silences pertaining to many hypervisors at the same time
+        :param hostnames: hypervisor hostnames to remove silences for
+        :return: IDs of the silences removed
+        :raises RuntimeError: when any of the silences couldn't be removed, after trying them all
+        """
+        # expired silences can't be removed again
+        index = self.get_silence_index(VALID_SILENCE_STATES)
+        silence_ids = sorted(set().union(*index.hv_silence_ids(hostnames).values()))
+        self.remove_silences(silence_ids)
+        return silence_ids
+
+
+_clients: Dict[Tuple[str, str, str], AlertmanagerClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_alertmanager_client(
+    alertmanager_account: AlertManagerAccount,
+) -> AlertmanagerClient:
+    """
+    Returns the client shared by every caller using this alertmanager account
+    :param alertmanager_account: dataclass for holding alertmanager connection specs
+    """
+    key = (
+        alertmanager_account.alertmanager_endpoint,
+        alertmanager_account.username,
+        alertmanager_account.password,
+    )
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = AlertmanagerClient(alertmanager_account)
+            _clients[key] = client
+        return client
@@ -1,15 +1,19 @@
 import logging
 from datetime import datetime
-from typing import List
+from typing import Dict, Iterable, List, Optional
 
 import requests
 
+from apis.alertmanager_api.silence_index import HV_MATCHER_NAMES, SilenceIndex
 from apis.alertmanager_api.structs.alert_matcher_details import AlertMatcherDetails
 from apis.alertmanager_api.structs.alertmanager_account import AlertManagerAccount
 from apis.alertmanager_api.structs.silence_details import SilenceDetails
 
 logger = logging.getLogger("AlertManagerAPI")
 
+# States of silences which have not expired yet
+VALID_SILENCE_STATES = ["active", "pending"]
+
 
 def schedule_silence(
     alertmanager_account: AlertManagerAccount, silence_details: SilenceDetails
@@ -99,19 +103,17 @@ def remove_silences(
         remove_silence(alertmanager_account, silence_id)
 
 
-def get_silences(alertmanager_account: AlertManagerAccount) -> dict:
+def get_silence_index(
+    alertmanager_account: AlertManagerAccount, states: Optional[Iterable[str]] = None
+) -> SilenceIndex:
     """
-    get all silence events recorded in AlertManager
+    get all silence events recorded in AlertManager, indexed by matcher
     :param alertmanager_account: dataclass for holding alertmanager connection specs
     :type alertmanager_account: AlertManagerAccount datclass object
-    :return: the dictionary of Silence events currently recorded in AlertManager:
-        {
-            id: {
-                "state":"<active>/<pending>/<expired>,
-                "details":SilenceDetails()
-            }
-        }
-    :rtype: dict
+    :param states: (Optional) only index silences in these states, i.e. active and pending
+    :type states: list of strings, optional
+    :return: index of the silences
+    :rtype: SilenceIndex
     :raises requests.RequestException or requests.HTTPError:
         when the request to the AlertManager failed
     """
@@ -127,32 +129,26 @@ def get_silences(alertmanager_account: AlertManagerAccount) -> dict:
             req_ex.response.text if req_ex.response else "null",
         )
         raise req_ex
+    return SilenceIndex(response.json(), states)
 
-    silences = {}
-    for silence in response.json():
-        # Create SilenceDetails instance
-        silence_details = SilenceDetails(
-            # Convert ISO format strings to datetime objects
-            start_time_dt=datetime.fromisoformat(
-                silence["startsAt"].replace("Z", "+00:00")
-            ),
-            end_time_dt=datetime.fromisoformat(
-                silence["endsAt"].replace("Z", "+00:00")
-            ),
-            author=silence["createdBy"],
-            comment=silence["comment"],
-            matchers=[
-                AlertMatcherDetails.from_dict(matcher)
-                for matcher in silence["matchers"]
-            ],
-        )
 
-        # Add to dictionary with ID as key
-        silences[silence["id"]] = {
-            "details": silence_details,
-            "state": silence["status"]["state"],
+def get_silences(alertmanager_account: AlertManagerAccount) -> dict:
+    """
+    get all silence events recorded in AlertManager
+    :param alertmanager_account: dataclass for holding alertmanager connection specs
+    :type alertmanager_account: AlertManagerAccount datclass object
+    :return: the dictionary of Silence events currently recorded in AlertManager:
+        {
+            id: {
+                "state":"<active>/<pending>/<expired>,
+                "details":SilenceDetails()
+            }
         }
-    return silences
+    :rtype: dict
+    :raises requests.RequestException or requests.HTTPError:
+        when the request to the AlertManager failed
+    """
+    return get_silence_index(alertmanager_account).silences()
 
 
 def get_active_silences(alertmanager_account: AlertManagerAccount) -> dict:
@@ -170,11 +166,7 @@ def get_active_silences(alertmanager_account: AlertManagerAccount) -> dict:
         }
     :rtype: dict
     """
-    return {
-        k: v
-        for k, v in get_silences(alertmanager_account).items()
-        if v["state"] == "active"
-    }
+    return get_silence_index(alertmanager_account, ["active"]).silences()
 
 
 def get_valid_silences(alertmanager_account: AlertManagerAccount) -> dict:
@@ -193,17 +185,14 @@ def get_valid_silences(alertmanager_account: AlertManagerAccount) -> dict:
         }
     :rtype: dict
     """
-    return {
-        k: v
-        for k, v in get_silences(alertmanager_account).items()
-        if v["state"] in ["active", "pending"]
-    }
+    return get_silence_index(alertmanager_account, VALID_SILENCE_STATES).silences()
 
 
 def get_hv_silences(alertmanager_account: AlertManagerAccount, hostname: str):
     """
     get silences pertaining to a hv, where:
-    - the silence has a "matcher" where the "name" is "instance" and the "value" matches the given hostname
+    - the silence has a "matcher" where the "name" is "instance" or "hostname"
+      and the "value" matches the given hostname
     :param alertmanager_account: dataclass for holding alertmanager connection specs
     :type alertmanager_account: AlertManagerAccount datclass object
     :param hostname: hypervisor hostname to get silences for
@@ -217,35 +206,60 @@ def get_hv_silences(alertmanager_account: AlertManagerAccount, hostname: str):
         }
     :rtype: dict
     """
-    hv_silences = {}
-    # format of a set of:
-    # [("name1", "value1"), ("name2", "value2")] - must match these 2 matchers (logical AND)
-    # [("name3", "value3"), ("name4", "value4")] - OR this other set of matchers
-    hv_matcher_conditions = [
-        [("instance", hostname)],
-        [("hostname", hostname)],
-    ]
+    return get_hvs_silences(alertmanager_account, [hostname])[hostname]
 
-    def check_matchers(matchers: List[AlertMatcherDetails]) -> bool:
-        """
-        check alert matchers against a set of conditions to see if they are ones pertaining to HVs
-        :param matchers: list of AlertMatcherDetails objects
-        :type matchers: list
-        :return: True - alert matchers are HV related, False - they are not
-        :rtype: boolean
-        """
-        return any(
-            all(
-                any(
-                    matcher.name == name and matcher.value == value
-                    for matcher in matchers
-                )
-                for name, value in condition_set
-            )
-            for condition_set in hv_matcher_conditions
-        )
 
-    for silence_id, silence_values in get_silences(alertmanager_account).items():
-        if check_matchers(silence_values["details"].matchers):
-            hv_silences[silence_id] = silence_values
-    return hv_silences
+def get_hvs_silences(
+    alertmanager_account: AlertManagerAccount,
+    hostnames: Iterable[str],
+    states: Optional[Iterable[str]] = None,
+) -> Dict[str, dict]:
+    """
+    get silences pertaining to many hvs, downloading the silences from AlertManager once
+    :param alertmanager_account: dataclass for holding alertmanager connection specs
+    :type alertmanager_account: AlertManagerAccount datclass object
+    :param hostnames: hypervisor hostnames to get silences for
+    :type hostnames: list of strings
+    :param states: (Optional) only get silences in these states, i.e. active and pending
+    :type states: list of strings, optional
+    :return: a dictionary mapping each hostname to the dictionary of its Silence events,
+        in the same format as get_hv_silences
+    :rtype: dict
+    """
+    return get_silence_index(alertmanager_account, states).hv_silences(hostnames)
+
+
+def hv_silence_details(
+    hostnames: List[str],
+    comment: str,
+    start_time_dt: datetime,
+    duration_hours: int,
+    author: str = "stackstorm",
+) -> List[SilenceDetails]:
+    """
+    Build the silences needed to silence alerts for hypervisors, one for each matcher in
+    HV_MATCHER_NAMES for each hypervisor
+    :param hostnames: hostnames of the hypervisors to silence
+    :type hostnames: list
+    :param comment: comment of why the silences were added
+    :type comment: string
+    :param start_time_dt: start time for the silences
+    :type start_time_dt: datetime
+    :param duration_hours: duration of the silences in hours
+    :type duration_hours: integer
+    :param author: name to assign to the silences
+    :type author: string
+    :return: list of SilenceDetails objects
+    :rtype: list
+    """
+    return [
+        SilenceDetails(
+            matchers=[AlertMatcherDetails(name=name, value=hostname)],
+            author=author,
+            comment=comment,
+            start_time_dt=start_time_dt,
+            duration_hours=duration_hours,
+        )
+        for hostname in hostnames
+        for name in HV_MATCHER_NAMES
+    ]
@@ -0,0 +1,140 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from apis.alertmanager_api.structs.alert_matcher_details import AlertMatcherDetails
+from apis.alertmanager_api.structs.silence_details import SilenceDetails
+
+# Names of the matchers used to silence alerts for a hypervisor, each is matched on its hostname
+HV_MATCHER_NAMES = ["instance", "hostname"]
+
+
+class SilenceIndex:
+    """
+    Index of silences as returned by the AlertManager API, mapping each matcher
+    (name, value) to the IDs of the silences that have it. Silences are only parsed into
+    SilenceDetails when they are looked up, so finding the silences for a few hosts doesn't
+    mean parsing every silence in AlertManager
+    """
+
+    def __init__(
+        self, raw_silences: List[dict], states: Optional[Iterable[str]] = None
+    ):
+        """
+        :param raw_silences: list of silences from the AlertManager API
+        :param states: (Optional) only index silences in these states, i.e. active and pending.
+            If not given, silences in every state are indexed
+        """
+        states = set(states) if states is not None else None
+        self._raw: Dict[str, dict] = {}
+        # position of each silence in the listing, so lookups keep the listing's order
+        self._position: Dict[str, int] = {}
+        self._parsed: Dict[str, dict] = {}
+        self._by_matcher: Dict[Tuple[str, str], Set[str]] = {}
+        for silence in raw_silences:
+            if states is not None and silence["status"]["state"] not in states:
+                continue
+            self._raw[silence["id"]] = silence
+            self._position[silence["id"]] = len(self._position)
+            for matcher in silence["matchers"]:
+                self._by_matcher.setdefault(
+                    (matcher["name"], matcher["value"]), set()
+                ).add(silence["id"])
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __contains__(self, silence_id: str) -> bool:
+        return silence_id in self._raw
+
+    def get(self, silence_id: str) -> dict:
+        """
+        Get an indexed silence by ID
+        :param silence_id: ID of the silence
+        :return: the silence, as {"state": "<active>/<pending>/<expired>", "details": SilenceDetails()}
+        :raises KeyError: when the silence is not in the index
+        """
+        if silence_id not in self._parsed:
+            silence = self._raw[silence_id]
+            self._parsed[silence_id] = {
+                "details": SilenceDetails(
+                    # Convert ISO format strings to datetime objects
+                    start_time_dt=datetime.fromisoformat(
+                        silence["startsAt"].replace("Z", "+00:00")
+                    ),
+                    end_time_dt=datetime.fromisoformat(
+                        silence["endsAt"].replace("Z", "+00:00")
+                    ),
+                    author=silence["createdBy"],
+                    comment=silence["comment"],
+                    matchers=[
+                        AlertMatcherDetails.from_dict(matcher)
+                        for matcher in silence["matchers"]
+                    ],
+                ),
+                "state": silence["status"]["state"],
+            }
+        return self._parsed[silence_id]
+
+    def silences(self, silence_ids: Optional[Iterable[str]] = None) -> dict:
+        """
+        Get indexed silences by ID
+        :param silence_ids: (Optional) IDs of the silences to get, if not given get every silence
+        :return: the dictionary of Silence events:
+            {
+                id: {
+                    "state":"<active>/<pending>/<expired>,
+                    "details":SilenceDetails()
+                }
+            }
+        """
+        if silence_ids is None:
+            silence_ids = self._raw
+        else:
+            silence_ids = sorted(silence_ids, key=self._position.__getitem__)
+        return {silence_id: self.get(silence_id) for silence_id in silence_ids}
+
+    def ids_matching(self, name: str, value: str) -> Set[str]:
+        """
+        Get the IDs of silences with a matcher of the given name and value
+        :param name: name of the matcher, i.e. instance
+        :param value: value of the matcher, i.e. a hostname
+        """
+        return set(self._by_matcher.get((name, value), ()))
+
+    def matching(self, name: str, value: str) -> dict:
+        """
+        Get silences with a matcher of the given name and value
+        :param name: name of the matcher, i.e. instance
+        :param value: value of the matcher, i.e. a hostname
+        :return: the dictionary of matching Silence events, in the same format as silences()
+        """
+        return self.silences(self.ids_matching(name, value))
+
+    def hv_silence_ids(self, hostnames: Iterable[str]) -> Dict[str, Set[str]]:
+        """
+        Get the IDs of silences pertaining to many hypervisors, where the silence has a matcher
+        with a name in HV_MATCHER_NAMES and a value matching the hypervisor's hostname
+        :param hostnames: hypervisor hostnames to get silences for
+        :return: a dictionary mapping each hostname to the IDs of its silences
+        """
+        return {
+            hostname: set().union(
+                *(
+                    self._by_matcher.get((name, hostname), ())
+                    for name in HV_MATCHER_NAMES
+                )
+            )
+            for hostname in hostnames
+        }
+
+    def hv_silences(self, hostnames: Iterable[str]) -> Dict[str, dict]:
+        """
+        Get silences pertaining to many hypervisors
+        :param hostnames: hypervisor hostnames to get silences for
+        :return: a dictionary mapping each hostname to the dictionary of its Silence events,
+            in the same format as silences()
+        """
+        return {
+            hostname: self.silences(silence_ids)
+            for hostname, silence_ids in self.hv_silence_ids(hostnames).items()
+        }
@@ -1,8 +1,15 @@
 import time
 import ssl
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from pathlib import Path
-from smtplib import SMTP
+from smtplib import (
+    SMTP,
+    SMTPDataError,
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPSenderRefused,
+)
 import logging
 
 from email.header import Header
@@ -11,16 +18,16 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formatdate
 
-from apis.email_api.template_handler import TemplateHandler
+from apis.email_api.template_handler import (
+    TemplateHandler,
+    get_default_template_handler,
+)
 
 from apis.email_api.structs.email_params import EmailParams
+from apis.email_api.structs.email_send_result import EmailSendResult
 from apis.email_api.structs.smtp_account import SMTPAccount
 from apis.email_api.structs.email_template_details import EmailTemplateDetails
 
-# weird issue where pylint can't find the module - works fine though
-# pylint:disable=no-name-in-module
-from css_inline import CSSInliner
-
 logger = logging.getLogger(__name__)
 
 
@@ -34,61 +41,196 @@ class Emailer:
         Path(__file__).resolve().parent.parent.parent / "email_attachments"
     )
 
-    def __init__(self, smtp_account: SMTPAccount, template_handler=TemplateHandler()):
+    def __init__(
+        self,
+        smtp_account: SMTPAccount,
+        template_handler: Optional[TemplateHandler] = None,
+    ):
         self.smtp_account = smtp_account
-        self._template_handler = template_handler
+        self._template_handler = (
+            template_handler if template_handler else get_default_template_handler()
+        )
 
     def send_email(self, email_params: EmailParams):
         """Send a single email via the configured SMTP relay."""
 
         logger.debug("connecting to SMTP server")
-        context = ssl.create_default_context()
-        context.check_hostname = False
-        context.verify_mode = ssl.CERT_NONE
         with SMTP(
             self.smtp_account.server, self.smtp_account.port, timeout=60
         ) as server:
-            server.ehlo()
-            server.starttls(context=context)
-            logger.info("SMTP server connection established")
-            logger.debug(
-                "sending email: "
-                "\n\tto: %s"
-                "\n\tcc'd: %s"
-                "\n\tfrom: %s"
-                "\n\twith templates: %s\n",
-                ", ".join(email_params.email_to),
-                ", ".join(
-                    email_params.email_cc if email_params.email_cc else ["<none>"]
-                ),
-                email_params.email_from,
-                ", ".join(
-                    [f"{tmp.template_name}" for tmp in email_params.email_templates]
-                ),
+            self._start_session(server)
+            self._send_on_session(
+                server, email_params, self.build_email(email_params).as_string()
             )
 
-            send_to = list(email_params.email_to)
-            if email_params.email_cc:
-                send_to.extend(email_params.email_cc)
+    def send_emails(
+        self,
+        emails: List[EmailParams],
+        max_connections: Optional[int] = None,
+        max_retries: int = 1,
+        raise_on_failure: bool = True,
+    ) -> List[EmailSendResult]:
+        """
+        send emails via SMTP server relay, reusing each SMTP connection for many emails
+        :param emails: A list of email param config objects
+        :param max_connections: Number of SMTP connections to send over in parallel,
+            defaults to max_connections of the SMTP account
+        :param max_retries: Number of times to reconnect and resend an email if the connection fails
+        :param raise_on_failure: If True, raise once all emails are attempted if any could not be sent
+        :return: The outcome of sending each email, in the same order as emails
+        """
+        if max_connections is None:
+            max_connections = self.smtp_account.max_connections
+        max_connections = max(1, min(max_connections, len(emails)))
 
-            server.sendmail(
-                email_params.email_from,
-                tuple(send_to),
-                self.build_email(email_params).as_string(),
+        logger.info(
+            "sending %s email(s) over %s connection(s)", len(emails), max_connections
+        )
+        start = time.time()
+
+        # each connection sends an interleaved share of the emails, so results can be put back in order
+        results: List[Optional[EmailSendResult]] = [None] * len(emails)
+        with ThreadPoolExecutor(max_workers=max_connections) as executor:
+            batches = [
+                list(range(i, len(emails), max_connections))
+                for i in range(max_connections)
+            ]
+            futures = [
+                executor.submit(
+                    self._send_batch, [emails[idx] for idx in batch], max_retries
+                )
+                for batch in batches
+            ]
+            for batch, future in zip(batches, futures):
+                for idx, result in zip(batch, future.result()):
+                    results[idx] = result
+
+        failed = [result for result in results if not result.success]
+        logger.info(
+            "sending complete - %s sent, %s failed - time elapsed: %s seconds",
+            len(results) - len(failed),
+            len(failed),
+            time.time() - start,
+        )
+        if failed and raise_on_failure:
+            raise RuntimeError(
+                f"Failed to send {len(failed)} of {len(results)} email(s): "
+                + "; ".join(
+                    f"{', '.join(result.email_to)} - {result.error}"
+                    for result in failed
+                )
             )
+        return results
 
-    def send_emails(self, emails: List[EmailParams]):
+    def _send_batch(
+        self, emails: List[EmailParams], max_retries: int
+    ) -> List[EmailSendResult]:
         """
-        send emails via SMTP server relay
+        Send a list of emails over a single SMTP connection, reconnecting if the connection drops
         :param emails: A list of email param config objects
+        :param max_retries: Number of times to reconnect and resend an email if the connection fails
         """
+        results = []
+        server = None
+        try:
+            for email_params in emails:
+                try:
+                    message = self.build_email(email_params).as_string()
+                except RuntimeError as exp:
+                    results.append(
+                        EmailSendResult(email_params.email_to, False, str(exp))
+                    )
+                    continue
 
-        logger.info("sending %s email(s)", len(emails))
-        start = time.time()
-        for email_params in emails:
-            self.send_email(email_params)
+                for attempt in range(max_retries + 1):
+                    try:
+                        if server is None:
+                            logger.debug("connecting to SMTP server")
+                            server = SMTP(
+                                self.smtp_account.server,
+                                self.smtp_account.port,
+                                timeout=60,
+                            )
+                            self._start_session(server)
+                        self._send_on_session(server, email_params, message)
+                        results.append(EmailSendResult(email_params.email_to, True))
+                        break
+                    except (
+                        SMTPRecipientsRefused,
+                        SMTPSenderRefused,
+                        SMTPDataError,
+                    ) as exp:
+                        # the relay rejected this email, but the connection is still usable
+                        logger.error("email rejected by SMTP server: %s", exp)
+                        results.append(
+                            EmailSendResult(email_params.email_to, False, str(exp))
+                        )
+                        break
+                    except (SMTPException, OSError) as exp:
+                        logger.warning(
+                            "SMTP connection failed (attempt %s): %s", attempt + 1, exp
+                        )
+                        self._close_session(server)
+                        server = None
+                        if attempt == max_retries:
+                            results.append(
+                                EmailSendResult(email_params.email_to, False, str(exp))
+                            )
+        finally:
+            self._close_session(server)
+        return results
 
-        logger.info("sending complete - time elapsed: %s seconds", time.time() - start)
+    @staticmethod
+    def _start_session(server: SMTP):
+        """
+        Greet the SMTP server and upgrade the connection to TLS
+        :param server: A connected SMTP object
+        """
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        server.ehlo()
+        server.starttls(context=context)
+        logger.info("SMTP server connection established")
+
+    @staticmethod
+    def _close_session(server: Optional[SMTP]):
+        """
+        Close an SMTP connection, ignoring errors from connections that have already dropped
+        :param server: A connected SMTP object
+        """
+        if server is None:
+            return
+        try:
+            server.quit()
+        except (SMTPException, OSError):
+            server.close()
+
+    @staticmethod
+    def _send_on_session(server: SMTP, email_params: EmailParams, message: str):
+        """
+        Send an email over an already established SMTP connection
+        :param server: A connected SMTP object
+        :param email_params: A dataclass holding parameters for building an email
+        :param message: The built email as a string
+        """
+        logger.debug(
+            "sending email: "
+            "\n\tto: %s"
+            "\n\tcc'd: %s"
+            "\n\tfrom: %s"
+            "\n\twith templates: %s\n",
+            ", ".join(email_params.email_to),
+            ", ".join(email_params.email_cc if email_params.email_cc else ["<none>"]),
+            email_params.email_from,
+            ", ".join([f"{tmp.template_name}" for tmp in email_params.email_templates]),
+        )
+
+        send_to = list(email_params.email_to)
+        if email_params.email_cc:
+            send_to.extend(email_params.email_cc)
+
+        server.sendmail(email_params.email_from, tuple(send_to), message)
 
     def build_email(self, email_params: EmailParams) -> MIMEMultipart:
         """
@@ -126,15 +268,8 @@ class Emailer:
                     template_details
                 )
         if as_html:
-            # wrap the email in our own styling
-            wrapper_template = EmailTemplateDetails(
-                template_name="wrapper", template_params={"body": msg_body}
-            )
-            html_body = self._template_handler.render_html_template(wrapper_template)
-
-            # convert style tags to inline styles for emails
-            inliner = CSSInliner(keep_style_tags=True)
-            html_body = inliner.inline(html_body)
+            # wrap the email in our own styling, with styles inlined for email clients
+            html_body = self._template_handler.render_html_email(msg_body)
             return MIMEText(html_body, "html")
         return MIMEText(msg_body, "plain", "utf-8")
 
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from apis.email_api.aliases import EmailAddresses
+
+
+@dataclass
+class EmailSendResult:
+    """
+    Outcome of sending a single email as part of a batch
+    :param email_to: (Tuple[String]): The addresses the email was sent to
+    :param success: bool: True if the SMTP relay accepted the email
+    :param error: (String): An Optional description of why the email could not be sent
+    """
+
+    email_to: EmailAddresses
+    success: bool
+    error: Optional[str] = None
@@ -12,6 +12,7 @@ class SMTPAccount:
     :param port: Port to connect to server on
     :param secure: Whether to enable secure protocol. Default value is True.
     :param smtp_auth: Whether to enable Authentication of username and password to send email. Default True
+    :param max_connections: How many SMTP connections can be open at once when sending a batch of emails. Default 1
     """
 
     username: str
@@ -20,6 +21,7 @@ class SMTPAccount:
     port: int
     secure: bool
     smtp_auth: bool
+    max_connections: int = 1
 
     @staticmethod
     def from_dict(dictionary: Dict):
@@ -1,6 +1,8 @@
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 from apis.email_api.exceptions.email_template_error import EmailTemplateError
 from apis.email_api.structs.email_template_details import EmailTemplateDetails
@@ -8,6 +10,10 @@ from jinja2 import Environment, FileSystemLoader, Template
 from jinja2.exceptions import TemplateError, TemplateNotFound
 from yaml import YAMLError, safe_load
 
+# weird issue where pylint can't find the module - works fine though
+# pylint:disable=no-name-in-module
+from css_inline import CSSInliner, inline_fragment
+
 
 class TemplateHandler:
     """
@@ -25,10 +31,21 @@ class TemplateHandler:
     # .../st2-cloud-pack/lib/apis/email_api/templates
     EMAIL_TEMPLATE_ROOT_DIR = Path(__file__).resolve().parent / "templates"
 
+    # Name of the template that html emails are wrapped in
+    WRAPPER_TEMPLATE_NAME = "wrapper"
+
+    # Stands in for the email body when the wrapper is rendered and inlined ahead of time
+    _BODY_PLACEHOLDER = "@@EMAIL_BODY@@"
+
     def __init__(self, template_metadata=None):
+        # templates ship with the pack so don't need to be checked for changes on every render
         self._template_env = Environment(
-            loader=FileSystemLoader(self.EMAIL_TEMPLATE_ROOT_DIR)
+            loader=FileSystemLoader(self.EMAIL_TEMPLATE_ROOT_DIR), auto_reload=False
         )
+        # rendered output of templates which take no parameters, keyed by (template name, filepath key)
+        self._static_renders: Dict[Tuple[str, str], str] = {}
+        # the wrapper split around the body (with styles already inlined) and its stylesheet
+        self._wrapper: Optional[Tuple[str, str, str]] = None
 
         self._template_metadata = (
             template_metadata
@@ -116,6 +133,38 @@ class TemplateHandler:
             file_path_key="html_filepath",
         ).replace("\n", "")
 
+    def render_html_email(self, body: str) -> str:
+        """
+        Method to wrap a rendered html body in the wrapper template and convert the wrapper's
+        style tags to inline styles, as many email clients ignore style tags.
+        The wrapper is rendered and inlined once, so only the body is inlined for each email
+        :param body: rendered html templates making up the body of the email
+        """
+        head, tail, css = self._get_wrapper()
+        # css_inline drops anything after the first element in a fragment that starts with text,
+        # so the body is inlined inside a container which is removed afterwards
+        inlined = inline_fragment(f"<div>{body}</div>", css)
+        return head + inlined[len("<div>") : -len("</div>")] + tail
+
+    def _get_wrapper(self) -> Tuple[str, str, str]:
+        """
+        Helper method to render and inline the wrapper template on first use
+        :return: a tuple of the inlined wrapper html before the body, after the body,
+        and the css from the wrapper's style tags
+        """
+        if self._wrapper is None:
+            wrapper_html = self.render_html_template(
+                EmailTemplateDetails(
+                    template_name=self.WRAPPER_TEMPLATE_NAME,
+                    template_params={"body": self._BODY_PLACEHOLDER},
+                )
+            )
+            css = "".join(re.findall(r"<style>(.*?)</style>", wrapper_html, re.DOTALL))
+            inlined = CSSInliner(keep_style_tags=True).inline(wrapper_html)
+            head, tail = inlined.split(self._BODY_PLACEHOLDER, 1)
+            self._wrapper = (head, tail, css)
+        return self._wrapper
+
     def render_plaintext_template(self, template_details: EmailTemplateDetails):
         """
         Method to get plaintext email template, substitute given values from 'template_params' using jinja2 and return
@@ -145,8 +194,12 @@ class TemplateHandler:
                 f"Template {template_details.template_name} metadata is missing {file_path_key} entry"
             ) from exp
 
-        template = self._get_template_file(template_fp)
         schema = metadata.get("schema", None)
+        cache_key = (template_details.template_name, file_path_key)
+        if not schema and cache_key in self._static_renders:
+            return self._static_renders[cache_key]
+
+        template = self._get_template_file(template_fp)
         if schema and not template_details.template_params:
             raise EmailTemplateError(
                 f"Template provided {template_details.template_name} "
@@ -158,9 +211,21 @@ class TemplateHandler:
             attrs = self._parse_template_attrs(template_details, schema)
 
         try:
-            return template.render(**attrs)
+            rendered = template.render(**attrs)
         except TemplateError as template_exp:
             raise EmailTemplateError(
                 "Error occurred when rendering the template, check the template file "
                 f"{os.path.join(self.EMAIL_TEMPLATE_METADATA_FP, template_fp)}"
             ) from template_exp
+        if not schema:
+            self._static_renders[cache_key] = rendered
+        return rendered
+
+
+@lru_cache(maxsize=None)
+def get_default_template_handler() -> TemplateHandler:
+    """
+    Returns a TemplateHandler shared by the whole process, created on first use,
+    so template metadata is only loaded and templates only compiled once
+    """
+    return TemplateHandler()
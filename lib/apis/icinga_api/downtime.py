@@ -1,8 +1,7 @@
-import json
-import requests
-from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
-from requests.auth import HTTPBasicAuth
+from typing import List
+
 from apis.icinga_api.enums.icinga_objects import IcingaObject
+from apis.icinga_api.icinga_client import get_icinga_client
 from apis.icinga_api.structs.downtime_details import DowntimeDetails
 from apis.icinga_api.structs.icinga_account import IcingaAccount
 
@@ -14,42 +13,19 @@ def schedule_downtime(icinga_account: IcingaAccount, details: DowntimeDetails) -
     :param details: Details for scheduling a downtime for a host or service
     :param is_fixed: If true, the downtime is fixed otherwise flexible
     """
-    basic = HTTPBasicAuth(icinga_account.username, icinga_account.password)
-
-    if not details.object_name:
-        raise MissingMandatoryParamError("Missing object name")
-
-    if not details.start_time:
-        raise MissingMandatoryParamError("Missing start time")
-
-    if not details.end_time:
-        raise MissingMandatoryParamError("Missing end time")
+    get_icinga_client(icinga_account).schedule_downtime(details)
 
-    if not details.comment:
-        raise MissingMandatoryParamError("Missing comment")
 
-    payload = {
-        "type": details.object_type.name.capitalize(),
-        "filter": f'{details.object_type.name.lower()}.name=="{details.object_name}"',
-        "author": "StackStorm",
-        "comment": details.comment,
-        "start_time": details.start_time,
-        "end_time": details.end_time,
-        "fixed": details.is_fixed,
-        "duration": details.duration if not details.is_fixed else None,
-        "all_services": details.object_type == IcingaObject.HOST,
-    }
-
-    res = requests.post(
-        url=f"{icinga_account.icinga_endpoint}/v1/actions/schedule-downtime",
-        auth=basic,
-        verify="/var/lib/icinga2/certs/ca.crt",
-        headers={"Accept": "application/json"},
-        data=json.dumps(payload),
-        timeout=300,
-    )
+def schedule_downtimes(
+    icinga_account: IcingaAccount, downtimes: List[DowntimeDetails]
+) -> None:
+    """
+    Schedules downtimes for many hosts or services, with one request for the objects
+    sharing the same downtime
 
-    res.raise_for_status()  # Raises HTTPError, if one occurred
+    :param downtimes: Details for scheduling each downtime
+    """
+    get_icinga_client(icinga_account).schedule_downtimes(downtimes)
 
 
 def remove_downtime(
@@ -61,24 +37,16 @@ def remove_downtime(
     :param object_type: Icinga Object type, either Host or Service
     :param object_name: Name of Icinga object
     """
-    basic = HTTPBasicAuth(icinga_account.username, icinga_account.password)
-
-    if not object_name:
-        raise MissingMandatoryParamError("Missing object name")
+    get_icinga_client(icinga_account).remove_downtime(object_type, object_name)
 
-    payload = {
-        "type": object_type.name.capitalize(),
-        "filter": f'{object_type.name.lower()}.name=="{object_name}"',
-        "author": "StackStorm",  # Only remove downtimes created by StackStorm
-    }
 
-    res = requests.post(
-        url=f"{icinga_account.icinga_endpoint}/v1/actions/remove-downtime",
-        auth=basic,
-        verify="/var/lib/icinga2/certs/ca.crt",
-        headers={"Accept": "application/json"},
-        data=json.dumps(payload),
-        timeout=300,
-    )
+def remove_downtimes(
+    icinga_account: IcingaAccount, object_type: IcingaObject, object_names: List[str]
+) -> None:
+    """
+    Removes all downtimes created by stackstorm for many hosts or services with one request
 
-    res.raise_for_status()  # Raises HTTPError, if one occurred
+    :param object_type: Icinga Object type, either Host or Service
+    :param object_names: Names of Icinga objects
+    """
+    get_icinga_client(icinga_account).remove_downtimes(object_type, object_names)
@@ -0,0 +1,288 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
+from apis.icinga_api.enums.icinga_objects import IcingaObject
+from apis.icinga_api.structs.downtime_details import DowntimeDetails
+from apis.icinga_api.structs.icinga_account import IcingaAccount
+from apis.icinga_api.structs.object_query import IcingaQuery
+from apis.utils.json_stream import iter_json_array
+
+logger = logging.getLogger(__name__)
+
+ICINGA_CA_CERT = "/var/lib/icinga2/certs/ca.crt"
+
+
+class IcingaClient:
+    """
+    Client for the Icinga API which reuses one session, and its connections, for every request.
+    Downtimes for many hosts or services are scheduled or removed with one request for each
+    group of objects sharing the same downtime, using a filter matching any of their names
+    """
+
+    def __init__(
+        self,
+        icinga_account: IcingaAccount,
+        max_concurrent_requests: int = 4,
+        max_objects_per_request: int = 100,
+        timeout: int = 300,
+    ):
+        """
+        :param icinga_account: Account for interacting with icinga
+        :param max_concurrent_requests: Maximum number of requests to make at the same time
+        :param max_objects_per_request: Maximum number of object names to put in one filter
+        :param timeout: Seconds to wait for each request
+        """
+        self.api_url = f"{icinga_account.icinga_endpoint}/v1"
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_objects_per_request = max_objects_per_request
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(
+            icinga_account.username, icinga_account.password
+        )
+        self.session.verify = ICINGA_CA_CERT
+        self.session.headers.update({"Accept": "application/json"})
+        adapter = HTTPAdapter(pool_maxsize=max_concurrent_requests)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the session and its connections
+        """
+        self.session.close()
+
+    def _post(self, path: str, payload: Dict, **kwargs) -> requests.Response:
+        """
+        Make a post request to the Icinga API
+        :param path: path of the endpoint under /v1
+        :param payload: data to send as JSON
+        :param kwargs: further arguments to pass to the request
+        :raises requests.HTTPError: when the request failed
+        """
+        res = self.session.post(
+            url=f"{self.api_url}/{path}",
+            data=json.dumps(payload),
+            timeout=self.timeout,
+            **kwargs,
+        )
+        res.raise_for_status()  # Raises HTTPError, if one occurred
+        return res
+
+    def _post_many(self, path: str, payloads: List[Dict]) -> None:
+        """
+        Make post requests to the Icinga API at the same time, raising the first error once
+        every request has finished
+        :param path: path of the endpoint under /v1
+        :param payloads: data to send with each request
+        :raises requests.HTTPError: when any request failed
+        """
+
+        def _call(payload):
+            try:
+                self._post(path, payload)
+            except requests.RequestException as exc:
+                logger.error("Failed to post to %s: %s", path, exc)
+                return exc
+            return None
+
+        if len(payloads) == 1:
+            self._post(path, payloads[0])
+            return
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_concurrent_requests, len(payloads))
+        ) as executor:
+            errors = [exc for exc in executor.map(_call, payloads) if exc]
+        if errors:
+            raise errors[0]
+
+    def _filters(
+        self, object_type: IcingaObject, object_names: List[str]
+    ) -> List[Dict]:
+        """
+        Make filters matching objects by name, each with at most max_objects_per_request names
+        :param object_type: Icinga Object type, either Host or Service
+        :param object_names: Names of the Icinga objects
+        :return: list of dictionaries with the filter and filter_vars to send
+        """
+        attr = f"{object_type.name.lower()}.name"
+        if len(object_names) == 1:
+            return [{"filter": f'{attr}=="{object_names[0]}"'}]
+        return [
+            {
+                "filter": f"{attr} in object_names",
+                "filter_vars": {
+                    "object_names": object_names[i : i + self.max_objects_per_request]
+                },
+            }
+            for i in range(0, len(object_names), self.max_objects_per_request)
+        ]
+
+    def schedule_downtime(self, details: DowntimeDetails) -> None:
+        """
+        Schedules a downtime for a host or service
+        :param details: Details for scheduling a downtime for a host or service
+        """
+        self.schedule_downtimes([details])
+
+    def schedule_downtimes(self, downtimes: List[DowntimeDetails]) -> None:
+        """
+        Schedules downtimes for many hosts or services. Objects sharing the same downtime
+        are scheduled with one request
+        :param downtimes: Details for scheduling each downtime
+        :raises MissingMandatoryParamError: when any downtime is missing a mandatory field
+        :raises requests.HTTPError: when any request failed, after every request has been made
+        """
+        # downtimes which only differ by object name are scheduled together
+        groups: Dict[str, Tuple[IcingaObject, Dict, Dict[str, None]]] = {}
+        for details in downtimes:
+            _validate_downtime(details)
+            payload = {
+                "type": details.object_type.name.capitalize(),
+                "author": "StackStorm",
+                "comment": details.comment,
+                "start_time": details.start_time,
+                "end_time": details.end_time,
+                "fixed": details.is_fixed,
+                "duration": details.duration if not details.is_fixed else None,
+                "all_services": details.object_type == IcingaObject.HOST,
+            }
+            _, _, object_names = groups.setdefault(
+                json.dumps(payload, sort_keys=True),
+                (details.object_type, payload, {}),
+            )
+            object_names[details.object_name] = None
+
+        payloads = [
+            {**payload, **object_filter}
+            for object_type, payload, object_names in groups.values()
+            for object_filter in self._filters(object_type, list(object_names))
+        ]
+        if payloads:
+            self._post_many("actions/schedule-downtime", payloads)
+
+    def remove_downtime(self, object_type: IcingaObject, object_name: str) -> None:
+        """
+        Removes all downtimes created by stackstorm for a host or service
+        :param object_type: Icinga Object type, either Host or Service
+        :param object_name: Name of Icinga object
+        """
+        self.remove_downtimes(object_type, [object_name])
+
+    def remove_downtimes(
+        self, object_type: IcingaObject, object_names: List[str]
+    ) -> None:
+        """
+        Removes all downtimes created by stackstorm for many hosts or services
+        :param object_type: Icinga Object type, either Host or Service
+        :param object_names: Names of Icinga objects
+        :raises MissingMandatoryParamError: when any object name is empty
+        :raises requests.HTTPError: when any request failed, after every request has been made
+        """
+        if not all(object_names):
+            raise MissingMandatoryParamError("Missing object name")
+        object_names = list(dict.fromkeys(object_names))
+        if not object_names:
+            return
+        self._post_many(
+            "actions/remove-downtime",
+            [
+                {
+                    "type": object_type.name.capitalize(),
+                    **object_filter,
+                    "author": "StackStorm",  # Only remove downtimes created by StackStorm
+                }
+                for object_filter in self._filters(object_type, object_names)
+            ],
+        )
+
+    def query_objects(self, icinga_query: IcingaQuery, **kwargs) -> requests.Response:
+        """
+        Query icinga objects
+        :param icinga_query: Dataclass containing details used to filter and return
+            properties for icinga objects
+        :param kwargs: further arguments to pass to the request, i.e. stream
+        :return: The response
+        """
+        payload = {
+            "type": icinga_query.object_type.capitalize(),
+            "filter": icinga_query.filter,
+            "filter_vars": icinga_query.filter_vars,
+            "attrs": icinga_query.properties_to_select,
+            "joins": icinga_query.joins,
+        }
+        return self._post(
+            f"objects/{icinga_query.object_type.lower()}s",
+            payload,
+            headers={"X-HTTP-Method-Override": "GET"},
+            **kwargs,
+        )
+
+    def iter_objects(
+        self, icinga_query: IcingaQuery, chunk_size: int = 65536
+    ) -> Iterator[Dict]:
+        """
+        Query icinga objects, yielding each result as it is read from the response so the
+        whole response is never held in memory
+        :param icinga_query: Dataclass containing details used to filter and return
+            properties for icinga objects
+        :param chunk_size: Number of bytes to read from the response at a time
+        :return: generator of objects from the "results" of the response
+        """
+        with self.query_objects(icinga_query, stream=True) as res:
+            yield from iter_json_array(res.iter_content(chunk_size), "results")
+
+
+def _validate_downtime(details: DowntimeDetails) -> None:
+    """
+    Check a downtime has every mandatory field
+    :param details: Details for scheduling a downtime for a host or service
+    :raises MissingMandatoryParamError: when a mandatory field is missing
+    """
+    if not details.object_name:
+        raise MissingMandatoryParamError("Missing object name")
+
+    if not details.start_time:
+        raise MissingMandatoryParamError("Missing start time")
+
+    if not details.end_time:
+        raise MissingMandatoryParamError("Missing end time")
+
+    if not details.comment:
+        raise MissingMandatoryParamError("Missing comment")
+
+
+_clients: Dict[Tuple[str, str, str], IcingaClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_icinga_client(icinga_account: IcingaAccount) -> IcingaClient:
+    """
+    Returns the client shared by every caller using this icinga account
+    :param icinga_account: Account for interacting with icinga
+    """
+    key = (
+        icinga_account.icinga_endpoint,
+        icinga_account.username,
+        icinga_account.password,
+    )
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = IcingaClient(icinga_account)
+            _clients[key] = client
+        return client
@@ -1,7 +1,6 @@
-import json
-import requests
-from requests.auth import HTTPBasicAuth
+from typing import Dict, Iterator
 
+from apis.icinga_api.icinga_client import get_icinga_client
 from apis.icinga_api.structs.icinga_account import IcingaAccount
 from apis.icinga_api.structs.object_query import IcingaQuery
 
@@ -13,25 +12,18 @@ def query_object(icinga_account: IcingaAccount, icinga_qurey: IcingaQuery) -> in
     :param icinga_query: Dataclass containing details used to filter and return properties for icinga objects
     :return: Status code
     """
-    basic = HTTPBasicAuth(icinga_account.username, icinga_account.password)
+    res = get_icinga_client(icinga_account).query_objects(icinga_qurey)
 
-    payload = {
-        "type": icinga_qurey.object_type.capitalize(),
-        "filter": icinga_qurey.filter,
-        "filter_vars": icinga_qurey.filter_vars,
-        "attrs": icinga_qurey.properties_to_select,
-        "joins": icinga_qurey.joins,
-    }
-
-    res = requests.post(
-        url=f"{icinga_account.icinga_endpoint}/v1/objects/{icinga_qurey.object_type.lower()}s",
-        auth=basic,
-        verify="/var/lib/icinga2/certs/ca.crt",
-        headers={"Accept": "application/json", "X-HTTP-Method-Override": "GET"},
-        data=json.dumps(payload),
-        timeout=300,
-    )
+    return res.status_code, res.content
 
-    res.raise_for_status()  # Raises HTTPError, if one occurred
 
-    return res.status_code, res.content
+def query_object_results(
+    icinga_account: IcingaAccount, icinga_query: IcingaQuery
+) -> Iterator[Dict]:
+    """
+    Query icinga objects, yielding each result without reading the whole response at once
+    :param icinga_account: Account for interacting with icinga
+    :param icinga_query: Dataclass containing details used to filter and return properties for icinga objects
+    :return: generator of objects from the "results" of the response
+    """
+    return get_icinga_client(icinga_account).iter_objects(icinga_query)
@@ -1,8 +1,158 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
 import openstack.connection
 from openstack import connect
 
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PooledConnection:
+    """
+    A connection held by the pool, with the bookkeeping needed to decide
+    whether it can be handed out again
+    """
+
+    cloud_name: str
+    connection: openstack.connection.Connection
+    last_used: float = field(default_factory=time.monotonic)
+    in_use: int = 0
+
+
+class OpenstackConnectionPool:
+    """
+    Process-wide pool of Openstack connections keyed by cloud name.
+    A connection is authenticated once and then reused by every caller for that cloud,
+    so long-running processes (i.e. sensors) don't repeat Keystone auth and catalog discovery.
+    """
+
+    def __init__(self, idle_ttl: int = 900, token_stale_duration: int = 300):
+        """
+        :param idle_ttl: Seconds a connection can sit unused before it is closed and evicted
+        :param token_stale_duration: Seconds before token expiry at which we re-authenticate
+        """
+        self.idle_ttl = idle_ttl
+        self.token_stale_duration = token_stale_duration
+        self._connections: Dict[str, _PooledConnection] = {}
+        # id of connection -> connections removed from the pool after an error, but still
+        # in use by someone
+        self._discarded: Dict[int, _PooledConnection] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, cloud_name: str) -> openstack.connection.Connection:
+        """
+        Get a healthy connection to the given cloud, creating one if required
+        :param cloud_name: The name of the cloud found in clouds.yaml
+        :return: An authenticated openstack connection
+        """
+        with self._lock:
+            self._evict_idle()
+            pooled = self._connections.get(cloud_name)
+            if pooled and not self._is_healthy(pooled.connection):
+                logger.info("Discarding unhealthy connection to %s", cloud_name)
+                self._close(cloud_name)
+                pooled = None
+            if not pooled:
+                logger.debug("Opening pooled connection to %s", cloud_name)
+                pooled = _PooledConnection(
+                    cloud_name=cloud_name, connection=connect(cloud=cloud_name)
+                )
+                self._connections[cloud_name] = pooled
+            pooled.in_use += 1
+            pooled.last_used = time.monotonic()
+            return pooled.connection
+
+    def release(
+        self,
+        cloud_name: str,
+        connection: openstack.connection.Connection,
+        discard: bool = False,
+    ) -> None:
+        """
+        Return a connection to the pool
+        :param cloud_name: The name of the cloud the connection was acquired for
+        :param connection: The connection being returned
+        :param discard: If True, the connection may be broken, i.e. the caller failed while
+            using it, so it is removed from the pool instead of being handed out again. It is
+            closed once nobody else is using it
+        """
+        with self._lock:
+            pooled = self._connections.get(cloud_name)
+            if pooled is None or pooled.connection is not connection:
+                pooled = self._discarded.get(id(connection))
+                if pooled is None:
+                    return
+            pooled.in_use = max(pooled.in_use - 1, 0)
+            pooled.last_used = time.monotonic()
+            if discard and self._connections.get(cloud_name) is pooled:
+                logger.info("Discarding connection to %s after an error", cloud_name)
+                self._discarded[id(connection)] = self._connections.pop(cloud_name)
+            if pooled.in_use == 0 and id(connection) in self._discarded:
+                del self._discarded[id(connection)]
+                self._close_connection(pooled)
+
+    def close_all(self) -> None:
+        """
+        Close every pooled connection, including those discarded but still in use
+        """
+        with self._lock:
+            for cloud_name in list(self._connections):
+                self._close(cloud_name)
+            for pooled in self._discarded.values():
+                self._close_connection(pooled)
+            self._discarded.clear()
+
+    def _is_healthy(self, conn: openstack.connection.Connection) -> bool:
+        """
+        Checks the connection still holds a usable token, re-authenticating
+        in place if the token is about to expire
+        :param conn: The connection to check
+        """
+        auth = getattr(conn.session, "auth", None)
+        auth_ref = getattr(auth, "auth_ref", None)
+        if auth_ref is not None and not auth_ref.will_expire_soon(
+            self.token_stale_duration
+        ):
+            return True
+        try:
+            # authorize() fetches a fresh token if the current one is missing or stale
+            conn.authorize()
+        except Exception as exc:  # pylint:disable=broad-exception-caught
+            logger.warning("Pooled connection failed health check: %s", exc)
+            return False
+        return True
+
+    def _evict_idle(self) -> None:
+        """
+        Close connections which have not been used within the idle TTL
+        """
+        now = time.monotonic()
+        for cloud_name, pooled in list(self._connections.items()):
+            if pooled.in_use == 0 and now - pooled.last_used > self.idle_ttl:
+                logger.debug("Evicting idle connection to %s", cloud_name)
+                self._close(cloud_name)
+
+    def _close(self, cloud_name: str) -> None:
+        self._close_connection(self._connections.pop(cloud_name))
+
+    @staticmethod
+    def _close_connection(pooled: _PooledConnection) -> None:
+        try:
+            pooled.connection.close()
+        except Exception as exc:  # pylint:disable=broad-exception-caught
+            logger.warning(
+                "Failed to close connection to %s: %s", pooled.cloud_name, exc
+            )
+
+
+CONNECTION_POOL = OpenstackConnectionPool()
+
 
 class OpenstackConnection:
     """
@@ -10,15 +160,21 @@ class OpenstackConnection:
     This class is used as follows:
         with(OpenstackConnection()) as <name>:
             name.<openstack_API>.method()
+
+    By default, a new connection is made and closed each time.
+    Long-running callers can pass pooled=True to share a connection from CONNECTION_POOL instead,
+    which is dropped from the pool if the block raises
     """
 
-    def __init__(self, cloud_name: str):
+    def __init__(self, cloud_name: str, pooled: bool = False):
         """
         Starts a connection with the Openstack API when used in a context manager
         :param cloud_name: The name of the cloud found in clouds.yaml
+        :param pooled: If True, reuse a connection from the process-wide pool
         """
         self._cloud_name = cloud_name.strip() if cloud_name else None
-        self._connection = None
+        self._pooled = pooled
+        self._connection: Optional[openstack.connection.Connection] = None
 
     def __enter__(self) -> openstack.connection.Connection:
         if not self._cloud_name:
@@ -27,9 +183,18 @@ class OpenstackConnection:
             raise MissingMandatoryParamError(
                 "A cloud name is required but was not provided."
             )
-        self._connection = connect(cloud=self._cloud_name)
+        if self._pooled:
+            self._connection = CONNECTION_POOL.acquire(self._cloud_name)
+        else:
+            self._connection = connect(cloud=self._cloud_name)
         return self._connection
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._connection.close()
+        if self._pooled:
+            # a connection which failed, i.e. with an auth or transport error, isn't reused
+            CONNECTION_POOL.release(
+                self._cloud_name, self._connection, discard=exc_type is not None
+            )
+        else:
+            self._connection.close()
         self._connection = None
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from apis.openstack_api.openstack_connection import OpenstackConnection
+from openstack.connection import Connection
+
+
+def _index_resources(
+    conn: Connection,
+    fetch: Callable[[Connection], Iterable],
+    key: Callable[[Any], str],
+) -> Dict[str, Any]:
+    """
+    List resources from a cloud and index them by name
+    :param conn: Openstack connection to the cloud
+    :param fetch: Function taking a connection and returning the resources to list
+    :param key: Function returning the name to index each resource by
+    :return: A dictionary mapping each resource's key to the resource
+    """
+    # openstacksdk listings are lazy generators, so this is where the API calls are made
+    return {key(resource): resource for resource in fetch(conn)}
+
+
+def fetch_from_clouds(
+    source_cloud: str,
+    target_cloud: str,
+    source_fetch: Callable[[Connection], Iterable],
+    target_fetch: Optional[Callable[[Connection], Iterable]] = None,
+    key: Callable[[Any], str] = attrgetter("name"),
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    List the same kind of resource from two clouds at the same time using pooled connections,
+    so it takes as long as the slower cloud rather than both combined
+    :param source_cloud: The name of the source cloud found in clouds.yaml
+    :param target_cloud: The name of the target cloud found in clouds.yaml
+    :param source_fetch: Function taking a connection and returning the resources to list,
+    i.e. lambda conn: conn.compute.aggregates()
+    :param target_fetch: Function used to list resources from the target cloud, defaults to source_fetch
+    :param key: Function returning the name to index each resource by, defaults to the resource name
+    :return: A tuple of (source resources, target resources), each a dictionary mapping key to resource
+    """
+    target_fetch = target_fetch or source_fetch
+    with OpenstackConnection(
+        source_cloud, pooled=True
+    ) as source_conn, OpenstackConnection(
+        target_cloud, pooled=True
+    ) as target_conn, ThreadPoolExecutor(
+        max_workers=2
+    ) as executor:
+        source_future = executor.submit(
+            _index_resources, source_conn, source_fetch, key
+        )
+        target_future = executor.submit(
+            _index_resources, target_conn, target_fetch, key
+        )
+        return source_future.result(), target_future.result()
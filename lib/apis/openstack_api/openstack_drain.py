@@ -0,0 +1,368 @@
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from openstack.compute.v2.server import Server
+from openstack.connection import Connection
+from openstack.placement.v1.resource_provider_inventory import (
+    ResourceProviderInventory,
+)
+
+from apis.openstack_api.openstack_hypervisor import HypervisorFlavorIndex
+from apis.openstack_api.openstack_server import snapshot_and_migrate_server
+from apis.openstack_api.structs.migration_result import MigrationResult
+
+logger = logging.getLogger(__name__)
+
+# pylint:disable=too-many-instance-attributes
+# pylint: disable=too-few-public-methods
+
+
+@dataclass
+class _HostCapacity:
+    """
+    Free resources on a destination hypervisor, reduced as migrations are scheduled to it
+    """
+
+    name: str
+    vcpus_free: float
+    memory_free_mb: float
+
+    def fits(self, server: Server) -> bool:
+        vcpus, memory_mb = _server_size(server)
+        return vcpus <= self.vcpus_free and memory_mb <= self.memory_free_mb
+
+    def reserve(self, server: Server) -> None:
+        vcpus, memory_mb = _server_size(server)
+        self.vcpus_free -= vcpus
+        self.memory_free_mb -= memory_mb
+
+    def release(self, server: Server) -> None:
+        vcpus, memory_mb = _server_size(server)
+        self.vcpus_free += vcpus
+        self.memory_free_mb += memory_mb
+
+
+def _server_size(server: Server):
+    """
+    Returns the (vcpus, memory in MB) of a server's flavor
+    """
+    return server.flavor.vcpus or 0, server.flavor.ram or 0
+
+
+def _free_capacity(
+    inventory: Optional[ResourceProviderInventory],
+    used: int,
+    allocation_ratio: Optional[float] = None,
+) -> float:
+    """
+    Returns the amount of a resource class which can still be allocated on a resource provider
+    :param inventory: the provider's inventory of the resource class, if it has one
+    :param used: the amount of the resource class already allocated
+    :param allocation_ratio: (Optional) ratio to use instead of the inventory's allocation ratio
+    """
+    if inventory is None:
+        return 0
+    ratio = allocation_ratio or inventory.allocation_ratio or 1.0
+    return (inventory.total - (inventory.reserved or 0)) * ratio - used
+
+
+class DrainEngine:
+    """
+    Migrates every server off one or more hypervisors.
+    Servers are migrated largest first, each to the destination hypervisor with the most free memory
+    which can fit and build its flavor. The number of migrations running at once is limited
+    per source hypervisor, per destination hypervisor and in total for the cloud.
+    Progress is logged, passed to an optional callback, and saved to an optional checkpoint file
+    so a drain can be resumed after a restart without repeating completed migrations.
+    """
+
+    def __init__(
+        self,
+        conn: Connection,
+        max_migrations: int = 3,
+        max_per_source: int = 1,
+        max_per_destination: int = 1,
+        cpu_allocation_ratio: Optional[float] = None,
+        live_migration: bool = True,
+        checkpoint_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[MigrationResult], None]] = None,
+    ):
+        """
+        :param conn: Openstack connection
+        :param max_migrations: Maximum number of migrations to run at once in the cloud
+        :param max_per_source: Maximum number of migrations to run at once from each hypervisor being drained
+        :param max_per_destination: Maximum number of migrations to run at once to each destination hypervisor
+        :param cpu_allocation_ratio: (Optional) Number of vcpus that can be allocated per physical cpu on a
+            destination, by default the allocation ratio of each hypervisor in Placement is used
+        :param live_migration: Live migrate ACTIVE servers, otherwise cold migrate them
+        :param checkpoint_path: Optional path to a file to save progress to, and resume from
+        :param progress_callback: Optional function called with the result of each migration as it finishes
+        """
+        if min(max_migrations, max_per_source, max_per_destination) < 1:
+            raise ValueError("Maximum concurrent migrations must be at least 1")
+        self.conn = conn
+        self.max_migrations = max_migrations
+        self.max_per_source = max_per_source
+        self.max_per_destination = max_per_destination
+        self.cpu_allocation_ratio = cpu_allocation_ratio
+        self.live_migration = live_migration
+        self.checkpoint_path = checkpoint_path
+        self.progress_callback = progress_callback
+        self._completed: Dict[str, MigrationResult] = {}
+        self._total = 0
+        self._capacities: Dict[str, _HostCapacity] = {}
+        self._flavor_index: Optional[HypervisorFlavorIndex] = None
+        self._flavors_by_host: Dict[str, Set[str]] = {}
+
+    def drain(self, source_hosts: List[str]) -> List[MigrationResult]:
+        """
+        Migrate all servers off the given hypervisors
+        :param source_hosts: Hostnames of the hypervisors to drain
+        :return: Result of each migration, including any completed before resuming from a checkpoint
+        """
+        self._completed = self._load_checkpoint()
+        queue = sorted(
+            self._list_servers(source_hosts),
+            key=lambda item: _server_size(item[1]),
+            reverse=True,
+        )
+        self._total = len(set(self._completed).union(server.id for _, server in queue))
+        self._capacities = self._list_destinations(source_hosts)
+        self._flavor_index = HypervisorFlavorIndex.from_connection(self.conn)
+        self._flavors_by_host = {}
+        running_per_source = defaultdict(int)
+        running_per_dest = defaultdict(int)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_migrations) as executor:
+            while queue or running:
+                for source, server in list(queue):
+                    if len(running) >= self.max_migrations:
+                        break
+                    if running_per_source[source] >= self.max_per_source:
+                        continue
+                    dests = self._candidates(source, server)
+                    if not dests and not running:
+                        # capacity is only freed by a failed migration, so give up once nothing is running
+                        queue.remove((source, server))
+                        self._finish(
+                            MigrationResult(
+                                server_id=server.id,
+                                server_name=server.name,
+                                source_host=source,
+                                error="No destination hypervisor has capacity for this server",
+                            )
+                        )
+                        continue
+                    dests = [
+                        dest
+                        for dest in dests
+                        if running_per_dest[dest.name] < self.max_per_destination
+                    ]
+                    if not dests:
+                        continue
+                    dests[0].reserve(server)
+                    queue.remove((source, server))
+                    running_per_source[source] += 1
+                    running_per_dest[dests[0].name] += 1
+                    logger.info(
+                        "Migrating server %s from %s to %s",
+                        server.id,
+                        source,
+                        dests[0].name,
+                    )
+                    future = executor.submit(
+                        self._migrate, source, server, dests[0].name
+                    )
+                    running[future] = (source, server, dests[0])
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source, server, dest = running.pop(future)
+                    running_per_source[source] -= 1
+                    running_per_dest[dest.name] -= 1
+                    result = future.result()
+                    if not result.success:
+                        dest.release(server)
+                    self._finish(result)
+
+        return list(self._completed.values())
+
+    def _can_build(self, flavor_name: str, host: str) -> bool:
+        """
+        Checks if a flavor can be built on a hypervisor, according to its aggregates
+        """
+        if host not in self._flavors_by_host:
+            self._flavors_by_host[host] = set(self._flavor_index.flavors_for(host))
+        return flavor_name in self._flavors_by_host[host]
+
+    def _candidates(self, source: str, server: Server) -> List[_HostCapacity]:
+        """
+        Returns the destinations a server fits on and can be built on, those with the most free memory first
+        """
+        # if the source's aggregates don't tell us where the flavor can go, any destination will do
+        restricted = self._can_build(server.flavor.name, source)
+        return sorted(
+            (
+                capacity
+                for capacity in self._capacities.values()
+                if capacity.fits(server)
+                and (
+                    not restricted or self._can_build(server.flavor.name, capacity.name)
+                )
+            ),
+            key=lambda capacity: capacity.memory_free_mb,
+            reverse=True,
+        )
+
+    def _list_servers(self, source_hosts: List[str]) -> List[Tuple[str, Server]]:
+        """
+        List servers on the hypervisors being drained, skipping any already migrated according to the checkpoint
+        :return: (source hypervisor, server) pairs
+        """
+        servers = []
+        for host in source_hosts:
+            for server in self.conn.compute.servers(
+                all_projects=True, compute_host=host
+            ):
+                previous = self._completed.get(server.id)
+                if previous and previous.success:
+                    logger.info("Server %s was already migrated, skipping", server.id)
+                    continue
+                servers.append((host, server))
+        return servers
+
+    def _list_destinations(self, source_hosts: List[str]) -> Dict[str, _HostCapacity]:
+        """
+        List free capacity on every enabled and up hypervisor which isn't being drained.
+        Capacity is read from each hypervisor's resource provider in Placement, as Nova no
+        longer returns vcpus or memory for hypervisors from microversion 2.88
+        """
+        providers = {
+            provider.name: provider
+            for provider in self.conn.placement.resource_providers()
+        }
+        capacities = {}
+        for hypervisor in self.conn.compute.hypervisors(details=True):
+            if (
+                hypervisor.name in source_hosts
+                or hypervisor.status != "enabled"
+                or hypervisor.state != "up"
+            ):
+                continue
+            provider = providers.get(hypervisor.name)
+            if provider is None:
+                logger.warning(
+                    "No resource provider found for hypervisor %s, skipping it",
+                    hypervisor.name,
+                )
+                continue
+            inventories = {
+                inventory.resource_class: inventory
+                for inventory in self.conn.placement.resource_provider_inventories(
+                    provider
+                )
+            }
+            usages = (
+                self.conn.placement.fetch_resource_provider_usages(provider).usages
+                or {}
+            )
+            capacities[hypervisor.name] = _HostCapacity(
+                name=hypervisor.name,
+                vcpus_free=_free_capacity(
+                    inventories.get("VCPU"),
+                    usages.get("VCPU", 0),
+                    self.cpu_allocation_ratio,
+                ),
+                memory_free_mb=_free_capacity(
+                    inventories.get("MEMORY_MB"), usages.get("MEMORY_MB", 0)
+                ),
+            )
+        return capacities
+
+    def _migrate(self, source: str, server: Server, dest_host: str) -> MigrationResult:
+        """
+        Migrate a server to the given destination, recording any error instead of raising it
+        """
+        result = MigrationResult(
+            server_id=server.id,
+            server_name=server.name,
+            source_host=source,
+            dest_host=dest_host,
+        )
+        start = time.monotonic()
+        try:
+            snapshot_and_migrate_server(
+                conn=self.conn,
+                server_id=server.id,
+                # amphorae are recreated by octavia, so aren't worth snapshotting
+                snapshot=not server.name.startswith("amphora-"),
+                live_migration=self.live_migration,
+                dest_host=dest_host,
+            )
+            result.success = True
+        except Exception as exc:  # pylint:disable=broad-exception-caught
+            result.error = str(exc)
+        result.seconds = time.monotonic() - start
+        return result
+
+    def _finish(self, result: MigrationResult) -> None:
+        """
+        Record the result of a migration, report it and save it to the checkpoint
+        """
+        self._completed[result.server_id] = result
+        done = len(self._completed)
+        if result.success:
+            logger.info(
+                "[%s/%s] Migrated server %s from %s to %s in %.0f seconds",
+                done,
+                self._total,
+                result.server_id,
+                result.source_host,
+                result.dest_host,
+                result.seconds,
+            )
+        else:
+            logger.error(
+                "[%s/%s] Failed to migrate server %s from %s: %s",
+                done,
+                self._total,
+                result.server_id,
+                result.source_host,
+                result.error,
+            )
+        if self.progress_callback:
+            self.progress_callback(result)
+        self._save_checkpoint()
+
+    def _load_checkpoint(self) -> Dict[str, MigrationResult]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, "r", encoding="utf-8") as checkpoint_file:
+            return {
+                server_id: MigrationResult(**result)
+                for server_id, result in json.load(checkpoint_file).items()
+            }
+
+    def _save_checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        # write to a temporary file first, so a restart never sees a partly written checkpoint
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+            json.dump(
+                {
+                    server_id: asdict(result)
+                    for server_id, result in self._completed.items()
+                },
+                checkpoint_file,
+            )
+        os.replace(tmp_path, self.checkpoint_path)
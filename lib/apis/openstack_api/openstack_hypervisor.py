@@ -1,4 +1,5 @@
-from typing import Dict, List
+from collections import defaultdict
+from typing import Dict, Iterable, List
 
 from apis.openstack_api.enums.hypervisor_states import HypervisorState
 from openstack.connection import Connection
@@ -54,9 +55,83 @@ def valid_state(state) -> bool:
     return True
 
 
+# Aggregate metadata keys which are matched against flavor extra specs
+AGGREGATE_FLAVOR_KEYS = ["hosttype", "local-storage-type"]
+
+
+class HypervisorFlavorIndex:
+    """
+    In-memory index of which flavors can be built on which hypervisors.
+    Built once from a single aggregates listing and a single flavors listing (with extra specs),
+    so looking up many hypervisors doesn't need any further API calls.
+    A flavor can be built on a hypervisor if, for one of the hypervisor's aggregates,
+    its "aggregate_instance_extra_specs:<key>" extra specs match the aggregate metadata for each key in
+    AGGREGATE_FLAVOR_KEYS. A key missing from both matches, but flavors without any extra specs
+    never match, as with filtering the flavors listing by extra specs
+    """
+
+    def __init__(self, aggregates: Iterable, flavors: Iterable):
+        """
+        :param aggregates: Openstack aggregate objects
+        :param flavors: Openstack flavor objects, including extra specs
+        """
+        # (hosttype, local-storage-type) -> names of flavors with matching extra specs
+        flavors_by_specs = defaultdict(list)
+        for flavor in flavors:
+            if flavor.extra_specs:
+                flavors_by_specs[self._flavor_key(flavor.extra_specs)].append(
+                    flavor.name
+                )
+
+        self._aggregates_by_host: Dict[str, List[Dict]] = defaultdict(list)
+        self._flavors_by_host: Dict[str, List[str]] = defaultdict(list)
+        for agg in aggregates:
+            metadata = agg.metadata or {}
+            compatible_flavors = flavors_by_specs.get(self._aggregate_key(metadata), [])
+            for host in agg.hosts or []:
+                self._aggregates_by_host[host].append(metadata)
+                self._flavors_by_host[host].extend(compatible_flavors)
+
+    @classmethod
+    def from_connection(cls, conn: Connection) -> "HypervisorFlavorIndex":
+        """
+        Build the index by listing every aggregate and flavor once
+        :param conn: openstack connection object
+        """
+        return cls(
+            conn.compute.aggregates(), conn.compute.flavors(get_extra_specs=True)
+        )
+
+    @staticmethod
+    def _aggregate_key(metadata: Dict):
+        return tuple(metadata.get(key) for key in AGGREGATE_FLAVOR_KEYS)
+
+    @staticmethod
+    def _flavor_key(extra_specs: Dict):
+        return tuple(
+            extra_specs.get(f"aggregate_instance_extra_specs:{key}")
+            for key in AGGREGATE_FLAVOR_KEYS
+        )
+
+    def aggregates_for(self, hypervisor_name: str) -> List[Dict]:
+        """
+        Returns metadata of each aggregate the hypervisor belongs to
+        :param hypervisor_name: Hostname of a hypervisor
+        """
+        return list(self._aggregates_by_host.get(hypervisor_name, []))
+
+    def flavors_for(self, hypervisor_name: str) -> List[str]:
+        """
+        Returns names of flavors which can be built on the hypervisor
+        :param hypervisor_name: Hostname of a hypervisor
+        """
+        return list(self._flavors_by_host.get(hypervisor_name, []))
+
+
 def get_available_flavors(conn: Connection, hypervisor_name: str) -> List[str]:
     """
-    Returns names of flavors which can be built on a given hypervisor
+    Returns names of flavors which can be built on a given hypervisor.
+    To look up several hypervisors, build a HypervisorFlavorIndex once and use that instead
     :param conn: openstack connection object
     :type conn: Connection
     :param hypervisor_name: Hostname of a hypervisor
@@ -64,18 +139,4 @@ def get_available_flavors(conn: Connection, hypervisor_name: str) -> List[str]:
     :return: List of flavor names
     :rtype: List[str]
     """
-    available_flavors = []
-    for agg in conn.compute.aggregates():
-        hosttype = agg.metadata.get("hosttype")
-        local_storage_type = agg.metadata.get("local-storage-type")
-
-        if hypervisor_name in agg.hosts:
-            for flavor in conn.compute.flavors(
-                extra_specs={
-                    "aggregate_instance_extra_specs:hosttype": hosttype,
-                    "aggregate_instance_extra_specs:local-storage-type": local_storage_type,
-                }
-            ):
-                available_flavors.append(flavor.name)
-
-    return available_flavors
+    return HypervisorFlavorIndex.from_connection(conn).flavors_for(hypervisor_name)
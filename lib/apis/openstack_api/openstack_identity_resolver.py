@@ -0,0 +1,192 @@
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+from openstack import exceptions
+from openstack.connection import Connection
+
+# How long (in seconds) a resolved identity object is reused for
+IDENTITY_CACHE_TTL = 300
+# How long (in seconds) we remember that an identity object doesn't exist
+IDENTITY_NEGATIVE_CACHE_TTL = 30
+
+# Marks a cached lookup which found nothing
+_MISSING = object()
+
+
+class IdentityResolver:
+    """
+    Resolves Keystone projects, domains, roles, users and groups by name or ID for one connection,
+    remembering each lookup so helpers working on the same objects don't repeat Keystone calls.
+    Lookups which find nothing are remembered for a shorter time.
+    Use get_identity_resolver() to share a resolver between helpers.
+    """
+
+    KINDS = ["project", "domain", "role", "user", "group"]
+
+    def __init__(
+        self,
+        conn: Connection,
+        ttl: int = IDENTITY_CACHE_TTL,
+        negative_ttl: int = IDENTITY_NEGATIVE_CACHE_TTL,
+    ):
+        """
+        :param conn: Openstack connection to resolve identity objects with
+        :param ttl: Seconds a found object is reused for
+        :param negative_ttl: Seconds a missing object is remembered for
+        """
+        # weak, so the connection isn't kept alive by the shared resolver of it
+        self._conn = weakref.ref(conn)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # (kind, identifier, filters) -> (expiry time, object or _MISSING)
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> Connection:
+        """
+        The Openstack connection
+        :raises ReferenceError: when the connection no longer exists
+        """
+        conn = self._conn()
+        if conn is None:
+            raise ReferenceError("The Openstack connection no longer exists")
+        return conn
+
+    def find(
+        self, kind: str, identifier: str, ignore_missing: bool = True, **filters
+    ) -> Optional[Any]:
+        """
+        Find an identity object by name or ID, using a remembered result if there is one
+        :param kind: The kind of object to find, one of KINDS
+        :param identifier: The name or ID of the object
+        :param ignore_missing: If False, raise ResourceNotFound when the object doesn't exist
+        :param filters: Further filters to pass to the lookup, i.e. domain_id
+        :return: The object, or None if it doesn't exist and ignore_missing is True
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Cannot resolve identity objects of kind {kind}")
+        key = (kind, identifier, tuple(sorted(filters.items())))
+        now = time.monotonic()
+        with self._lock:
+            expiry, found = self._cache.get(key, (0, None))
+        if expiry <= now:
+            finder = getattr(self.conn.identity, f"find_{kind}")
+            try:
+                found = finder(identifier, ignore_missing=ignore_missing, **filters)
+            except exceptions.ResourceNotFound:
+                with self._lock:
+                    self._cache[key] = (now + self.negative_ttl, _MISSING)
+                raise
+            with self._lock:
+                if found is None:
+                    self._cache[key] = (now + self.negative_ttl, _MISSING)
+                    found = _MISSING
+                else:
+                    self._cache[key] = (now + self.ttl, found)
+                    # the same object is often looked up by name first, then by ID
+                    self._cache[(kind, found["id"], key[2])] = (now + self.ttl, found)
+
+        if found is _MISSING:
+            if not ignore_missing:
+                raise exceptions.ResourceNotFound(f"No {kind} found for {identifier}")
+            return None
+        return found
+
+    def find_project(self, identifier: str, ignore_missing: bool = True, **filters):
+        """
+        Find a project by name or ID
+        :param identifier: The name or ID of the project
+        :param ignore_missing: If False, raise ResourceNotFound when the project doesn't exist
+        :param filters: Further filters to pass to the lookup, i.e. domain_id
+        """
+        return self.find("project", identifier, ignore_missing, **filters)
+
+    def find_domain(self, identifier: str, ignore_missing: bool = True, **filters):
+        """
+        Find a domain by name or ID
+        :param identifier: The name or ID of the domain
+        :param ignore_missing: If False, raise ResourceNotFound when the domain doesn't exist
+        :param filters: Further filters to pass to the lookup
+        """
+        return self.find("domain", identifier, ignore_missing, **filters)
+
+    def find_role(self, identifier: str, ignore_missing: bool = True, **filters):
+        """
+        Find a role by name or ID
+        :param identifier: The name or ID of the role
+        :param ignore_missing: If False, raise ResourceNotFound when the role doesn't exist
+        :param filters: Further filters to pass to the lookup, i.e. domain_id
+        """
+        return self.find("role", identifier, ignore_missing, **filters)
+
+    def find_user(self, identifier: str, ignore_missing: bool = True, **filters):
+        """
+        Find a user by name or ID
+        :param identifier: The name or ID of the user
+        :param ignore_missing: If False, raise ResourceNotFound when the user doesn't exist
+        :param filters: Further filters to pass to the lookup, i.e. domain_id
+        """
+        return self.find("user", identifier, ignore_missing, **filters)
+
+    def find_group(self, identifier: str, ignore_missing: bool = True, **filters):
+        """
+        Find a group by name or ID
+        :param identifier: The name or ID of the group
+        :param ignore_missing: If False, raise ResourceNotFound when the group doesn't exist
+        :param filters: Further filters to pass to the lookup, i.e. domain_id
+        """
+        return self.find("group", identifier, ignore_missing, **filters)
+
+    def remember(self, kind: str, found: Any) -> None:
+        """
+        Remember an object we already have, i.e. one that was just created, by its name and ID
+        :param kind: The kind of object, one of KINDS
+        :param found: The object to remember
+        """
+        self.invalidate(kind, found["id"], found["name"])
+        expiry = time.monotonic() + self.ttl
+        with self._lock:
+            self._cache[(kind, found["id"], ())] = (expiry, found)
+            self._cache[(kind, found["name"], ())] = (expiry, found)
+
+    def invalidate(self, kind: str, *identifiers: str) -> None:
+        """
+        Forget lookups of an object, i.e. after it is created, updated or deleted
+        :param kind: The kind of object, one of KINDS
+        :param identifiers: Names and IDs the object may have been looked up by
+        """
+        with self._lock:
+            for key, (_, found) in list(self._cache.items()):
+                if key[0] != kind:
+                    continue
+                if key[1] in identifiers or (
+                    found is not _MISSING and found["id"] in identifiers
+                ):
+                    del self._cache[key]
+
+    def clear(self) -> None:
+        """
+        Forget every lookup
+        """
+        with self._lock:
+            self._cache.clear()
+
+
+_resolvers = weakref.WeakKeyDictionary()
+_resolvers_lock = threading.Lock()
+
+
+def get_identity_resolver(conn: Connection) -> IdentityResolver:
+    """
+    Returns the identity resolver shared by every caller using this connection
+    :param conn: Openstack connection
+    """
+    with _resolvers_lock:
+        resolver = _resolvers.get(conn)
+        if resolver is None:
+            resolver = IdentityResolver(conn)
+            _resolvers[conn] = resolver
+        return resolver
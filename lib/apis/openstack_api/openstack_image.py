@@ -1,5 +1,7 @@
 from openstack.connection import Connection
 
+from apis.openstack_api.openstack_identity_resolver import get_identity_resolver
+
 
 def share_image_to_project(
     conn: Connection,
@@ -14,7 +16,7 @@ def share_image_to_project(
     :param project_identifier: Project name or ID to share image to
     """
     image = conn.image.find_image(image_identifier, ignore_missing=False)
-    destination_project = conn.identity.find_project(
+    destination_project = get_identity_resolver(conn).find_project(
         project_identifier, ignore_missing=False
     )
 
@@ -6,6 +6,7 @@ from openstack.network.v2.network import Network
 from openstack.network.v2.rbac_policy import RBACPolicy
 
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
+from apis.openstack_api.openstack_identity_resolver import get_identity_resolver
 from apis.openstack_api.enums.rbac_network_actions import RbacNetworkActions
 from apis.openstack_api.structs.network_details import NetworkDetails
 from apis.openstack_api.structs.network_rbac import NetworkRbac
@@ -33,7 +34,9 @@ def allocate_floating_ips(
     if not network_identifier:
         raise MissingMandatoryParamError("A network name or ID is required")
 
-    project = conn.identity.find_project(project_identifier, ignore_missing=False)
+    project = get_identity_resolver(conn).find_project(
+        project_identifier, ignore_missing=False
+    )
     network = conn.network.find_network(network_identifier, ignore_missing=False)
 
     return [
@@ -57,7 +60,7 @@ def create_network(conn: Connection, details: NetworkDetails) -> Optional[Networ
     if not details.project_identifier:
         raise MissingMandatoryParamError("A project name or ID is required")
 
-    project = conn.identity.find_project(
+    project = get_identity_resolver(conn).find_project(
         details.project_identifier, ignore_missing=False
     )
 
@@ -106,7 +109,7 @@ def create_network_rbac(conn: Connection, rbac_details: NetworkRbac) -> RBACPoli
     network = conn.network.find_network(
         rbac_details.network_identifier, ignore_missing=False
     )
-    project = conn.identity.find_project(
+    project = get_identity_resolver(conn).find_project(
         rbac_details.project_identifier, ignore_missing=False
     )
 
@@ -6,6 +6,7 @@ from openstack.exceptions import ConflictException
 from openstack.identity.v3.project import Project
 
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
+from apis.openstack_api.openstack_identity_resolver import get_identity_resolver
 from apis.openstack_api.structs.project_details import ProjectDetails
 
 
@@ -42,10 +43,13 @@ def create_project(
     create_project_kwargs["tags"] = tags
 
     try:
-        return conn.identity.create_project(**create_project_kwargs)
+        project = conn.identity.create_project(**create_project_kwargs)
     except ConflictException as err:
         # Strip out frames that are noise by rethrowing
         raise ConflictException(err.message) from err
+    # helpers setting up the new project can use it without looking it up again
+    get_identity_resolver(conn).remember("project", project)
+    return project
 
 
 def delete_project(conn: Connection, project_identifier: str) -> bool:
@@ -64,6 +68,9 @@ def delete_project(conn: Connection, project_identifier: str) -> bool:
         raise ValueError("Project is immutable and so can't be deleted")
 
     result = conn.identity.delete_project(project=project, ignore_missing=False)
+    get_identity_resolver(conn).invalidate(
+        "project", project_identifier, project["id"], project["name"]
+    )
     return result is None  # Where None == success
 
 
@@ -77,7 +84,9 @@ def add_flavor_to_project(
     :param flavor_identifier: The name or Openstack ID for the flavor
     :return:
     """
-    project = conn.identity.find_project(project_identifier, ignore_missing=False)
+    project = get_identity_resolver(conn).find_project(
+        project_identifier, ignore_missing=False
+    )
     flavor = conn.compute.find_flavor(flavor_identifier, ignore_missing=False)
     res = conn.compute.flavor_add_tenant_access(flavor, project.id)
     return res is None
@@ -2,6 +2,7 @@ from openstack.connection import Connection
 
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
 from apis.openstack_api.structs.quota_details import QuotaDetails
+from apis.openstack_api.openstack_identity_resolver import get_identity_resolver
 
 
 # pylint: disable=too-few-public-methods
@@ -15,9 +16,11 @@ def set_quota(conn: Connection, details: QuotaDetails):
     if not details.project_identifier:
         raise MissingMandatoryParamError("The project name is missing")
 
-    project_id = conn.identity.find_project(
-        details.project_identifier, ignore_missing=False
-    ).id
+    project_id = (
+        get_identity_resolver(conn)
+        .find_project(details.project_identifier, ignore_missing=False)
+        .id
+    )
 
     service_methods = {
         "compute": conn.set_compute_quotas,
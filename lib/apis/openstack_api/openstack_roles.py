@@ -1,4 +1,5 @@
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from openstack.connection import Connection
 
 from openstack.identity.v3.project import Project
@@ -6,7 +7,10 @@ from openstack.identity.v3.role import Role
 from openstack.identity.v3.user import User
 
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
+from apis.openstack_api.enums.user_domains import UserDomains
+from apis.openstack_api.structs.role_assignment_result import RoleAssignmentResult
 from apis.openstack_api.structs.role_details import RoleDetails
+from apis.openstack_api.openstack_identity_resolver import get_identity_resolver
 
 
 def assign_group_role_to_project(
@@ -22,9 +26,13 @@ def assign_group_role_to_project(
     # This is run rarely in comparison to most actions, as it
     # likely gets ran once or twice per new project
     # Assume the user has already checked the group exists and has stripped it
-    role = conn.identity.find_role(role_identifier, ignore_missing=False)
-    project = conn.identity.find_project(project_identifier, ignore_missing=False)
-    group = conn.identity.find_group(group_identifier, ignore_missing=False)
+    role = get_identity_resolver(conn).find_role(role_identifier, ignore_missing=False)
+    project = get_identity_resolver(conn).find_project(
+        project_identifier, ignore_missing=False
+    )
+    group = get_identity_resolver(conn).find_group(
+        group_identifier, ignore_missing=False
+    )
 
     conn.identity.assign_project_role_to_group(project=project, group=group, role=role)
 
@@ -39,6 +47,95 @@ def assign_role_to_user(conn: Connection, details: RoleDetails) -> None:
     conn.identity.assign_project_role_to_user(project=project, user=user, role=role)
 
 
+# pylint:disable=too-many-arguments
+def assign_role_to_users(
+    conn: Connection,
+    project_identifier: str,
+    role_identifier: str,
+    user_identifiers: List[str],
+    user_domain: UserDomains,
+    max_concurrent_assignments: int = 10,
+) -> List[RoleAssignmentResult]:
+    """
+    Assigns a role on a project to many users of the same domain. The project, role and domain
+    are looked up once, then each user is found in the domain by name and assigned the role
+    concurrently. A user who can't be found or assigned doesn't stop the others
+    :param conn: openstack connection object
+    :param project_identifier: The project Name or ID to assign the role on
+    :param role_identifier: The role Name or ID to assign
+    :param user_identifiers: Names or IDs of the users to assign the role to
+    :param user_domain: The domain the users belong to
+    :param max_concurrent_assignments: Maximum number of assignments to make at the same time
+    :return: A result for each user, in the order given
+    """
+    project_identifier = project_identifier.strip()
+    if not project_identifier:
+        raise MissingMandatoryParamError("The project name is missing")
+
+    role_identifier = role_identifier.strip()
+    if not role_identifier:
+        raise MissingMandatoryParamError("The role name is missing")
+
+    user_identifiers = list(
+        dict.fromkeys(user.strip() for user in user_identifiers if user.strip())
+    )
+    if not user_identifiers:
+        return []
+
+    resolver = get_identity_resolver(conn)
+    project = resolver.find_project(project_identifier, ignore_missing=False)
+    role = resolver.find_role(role_identifier, ignore_missing=False)
+    domain = resolver.find_domain(
+        user_domain.name.lower().strip(), ignore_missing=False
+    )
+
+    def _assign(user_identifier: str) -> RoleAssignmentResult:
+        user = None
+        try:
+            user = _find_domain_user(conn, domain.id, user_identifier)
+            if user is None:
+                return RoleAssignmentResult(
+                    user_identifier=user_identifier,
+                    error=f"User {user_identifier} not found in domain {user_domain.name}",
+                )
+            conn.identity.assign_project_role_to_user(
+                project=project, user=user, role=role
+            )
+        except Exception as exc:  # pylint:disable=broad-exception-caught
+            return RoleAssignmentResult(
+                user_identifier=user_identifier,
+                user_id=user.id if user is not None else None,
+                error=str(exc),
+            )
+        return RoleAssignmentResult(
+            user_identifier=user_identifier, assigned=True, user_id=user.id
+        )
+
+    with ThreadPoolExecutor(max_workers=max_concurrent_assignments) as executor:
+        return list(executor.map(_assign, user_identifiers))
+
+
+def _find_domain_user(
+    conn: Connection, domain_id: str, user_identifier: str
+) -> Optional[User]:
+    """
+    Finds a user in a domain with a listing of the domain filtered by name, so only the
+    matching user is returned. Identifiers which aren't a name are looked up as an ID
+    :param conn: openstack connection object
+    :param domain_id: ID of the domain the user belongs to
+    :param user_identifier: Name or ID of the user to find
+    :return: The user, or None if there is no such user in the domain
+    """
+    user = next(
+        iter(conn.identity.users(domain_id=domain_id, name=user_identifier)), None
+    )
+    if user is None:
+        user = get_identity_resolver(conn).find_user(
+            user_identifier, domain_id=domain_id
+        )
+    return user
+
+
 def add_user_to_group(
     conn: Connection,
     user_identifier: str,
@@ -52,11 +149,13 @@ def add_user_to_group(
     :param domain_identifier: Name or ID of the domain the user and group are associated with
     :param group_identifier: Name or ID of the group to assign the user to
     """
-    found_domain = conn.identity.find_domain(domain_identifier, ignore_missing=False)
-    user = conn.identity.find_user(
+    found_domain = get_identity_resolver(conn).find_domain(
+        domain_identifier, ignore_missing=False
+    )
+    user = get_identity_resolver(conn).find_user(
         user_identifier, domain_id=found_domain.id, ignore_missing=False
     )
-    group = conn.identity.find_group(
+    group = get_identity_resolver(conn).find_group(
         group_identifier, domain_id=found_domain.id, ignore_missing=False
     )
     conn.identity.add_user_to_group(user=user, group=group)
@@ -94,12 +193,14 @@ def _find_role_details(
 
     domain = details.user_domain.name.lower().strip()
 
-    project = conn.identity.find_project(
+    project = get_identity_resolver(conn).find_project(
         details.project_identifier, ignore_missing=False
     )
-    domain_id = conn.identity.find_domain(domain, ignore_missing=False)
-    user = conn.identity.find_user(
+    domain_id = get_identity_resolver(conn).find_domain(domain, ignore_missing=False)
+    user = get_identity_resolver(conn).find_user(
         details.user_identifier, domain_id=domain_id.id, ignore_missing=False
     )
-    role = conn.identity.find_role(details.role_identifier, ignore_missing=False)
+    role = get_identity_resolver(conn).find_role(
+        details.role_identifier, ignore_missing=False
+    )
     return user, project, role
@@ -1,6 +1,7 @@
 import logging
 from openstack.connection import Connection
 from openstack.network.v2.router import Router
+from apis.openstack_api.openstack_identity_resolver import get_identity_resolver
 from apis.openstack_api.structs.router_details import RouterDetails
 
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
@@ -34,7 +35,9 @@ def add_interface_to_router(
     if not subnet_identifier:
         raise MissingMandatoryParamError("A subnet name or ID is required")
 
-    project = conn.identity.find_project(project_identifier, ignore_missing=False)
+    project = get_identity_resolver(conn).find_project(
+        project_identifier, ignore_missing=False
+    )
     router = conn.network.find_router(
         router_identifier, project_id=project.id, ignore_missing=False
     )
@@ -66,7 +69,7 @@ def create_router(conn: Connection, details: RouterDetails) -> Router:
     if not details.router_name:
         raise MissingMandatoryParamError("New router name is required")
 
-    project = conn.identity.find_project(
+    project = get_identity_resolver(conn).find_project(
         details.project_identifier, ignore_missing=False
     )
     external_network = conn.network.find_network(
@@ -1,5 +1,8 @@
-from typing import List
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
+from openstack import exceptions
 from openstack.connection import Connection
 
 from openstack.network.v2.security_group import SecurityGroup
@@ -8,12 +11,15 @@ from openstack.network.v2.security_group_rule import SecurityGroupRule
 from apis.openstack_api.enums.ip_version import IPVersion
 from apis.openstack_api.enums.network_direction import NetworkDirection
 from apis.openstack_api.enums.protocol import Protocol
+from apis.openstack_api.openstack_identity_resolver import get_identity_resolver
 from apis.openstack_api.structs.security_group_rule_details import (
     SecurityGroupRuleDetails,
 )
 
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
 
+logger = logging.getLogger(__name__)
+
 
 def create_http_security_group(conn, project_identifier: str):
     """
@@ -24,17 +30,19 @@ def create_http_security_group(conn, project_identifier: str):
     _create_security_group(
         conn, "HTTP", "Rules allowing HTTP traffic ingress", project_identifier
     )
-    _create_security_group_rule(
+    create_security_group_rules(
         conn,
-        SecurityGroupRuleDetails(
-            project_identifier=project_identifier,
-            security_group_identifier="HTTP",
-            direction=NetworkDirection.INGRESS,
-            ip_version=IPVersion.IPV4,
-            protocol=Protocol.TCP,
-            remote_ip_cidr="0.0.0.0/0",
-            port_range=("80", "80"),
-        ),
+        [
+            SecurityGroupRuleDetails(
+                project_identifier=project_identifier,
+                security_group_identifier="HTTP",
+                direction=NetworkDirection.INGRESS,
+                ip_version=IPVersion.IPV4,
+                protocol=Protocol.TCP,
+                remote_ip_cidr="0.0.0.0/0",
+                port_range=("80", "80"),
+            )
+        ],
     )
 
 
@@ -47,29 +55,20 @@ def create_https_security_group(conn, project_identifier: str):
     _create_security_group(
         conn, "HTTPS", "Rules allowing HTTPS traffic ingress", project_identifier
     )
-    _create_security_group_rule(
-        conn,
-        SecurityGroupRuleDetails(
-            project_identifier=project_identifier,
-            security_group_identifier="HTTPS",
-            direction=NetworkDirection.INGRESS,
-            ip_version=IPVersion.IPV4,
-            protocol=Protocol.TCP,
-            remote_ip_cidr="0.0.0.0/0",
-            port_range=("443", "443"),
-        ),
-    )
-    _create_security_group_rule(
+    create_security_group_rules(
         conn,
-        SecurityGroupRuleDetails(
-            project_identifier=project_identifier,
-            security_group_identifier="HTTPS",
-            direction=NetworkDirection.INGRESS,
-            ip_version=IPVersion.IPV4,
-            protocol=Protocol.UDP,
-            remote_ip_cidr="0.0.0.0/0",
-            port_range=("443", "443"),
-        ),
+        [
+            SecurityGroupRuleDetails(
+                project_identifier=project_identifier,
+                security_group_identifier="HTTPS",
+                direction=NetworkDirection.INGRESS,
+                ip_version=IPVersion.IPV4,
+                protocol=protocol,
+                remote_ip_cidr="0.0.0.0/0",
+                port_range=("443", "443"),
+            )
+            for protocol in [Protocol.TCP, Protocol.UDP]
+        ],
     )
 
 
@@ -244,48 +243,28 @@ def create_external_security_group_rules(
         "208.0.0.0/4",
     ]
 
-    results = []
-    for rule in default_external_rules:
-        results.append(
-            _create_security_group_rule(
-                conn,
-                SecurityGroupRuleDetails(
-                    security_group_identifier=security_group_identifier,
-                    project_identifier=project_identifier,
-                    **rule,
-                ),
-            )
+    rules = [
+        SecurityGroupRuleDetails(
+            security_group_identifier=security_group_identifier,
+            project_identifier=project_identifier,
+            **rule,
         )
+        for rule in default_external_rules
+    ]
     for cidr in tcp_udp_egress_external_cidr:
-        results.append(
-            _create_security_group_rule(
-                conn,
-                SecurityGroupRuleDetails(
-                    security_group_identifier=security_group_identifier,
-                    project_identifier=project_identifier,
-                    direction=NetworkDirection.EGRESS,
-                    ip_version=IPVersion.IPV4,
-                    protocol=Protocol.TCP,
-                    remote_ip_cidr=cidr,
-                    port_range=("1", "65535"),
-                ),
-            )
-        )
-        results.append(
-            _create_security_group_rule(
-                conn,
+        for protocol in [Protocol.TCP, Protocol.UDP]:
+            rules.append(
                 SecurityGroupRuleDetails(
                     security_group_identifier=security_group_identifier,
                     project_identifier=project_identifier,
                     direction=NetworkDirection.EGRESS,
                     ip_version=IPVersion.IPV4,
-                    protocol=Protocol.UDP,
+                    protocol=protocol,
                     remote_ip_cidr=cidr,
                     port_range=("1", "65535"),
-                ),
+                )
             )
-        )
-    return results
+    return create_security_group_rules(conn, rules)
 
 
 def create_internal_security_group_rules(
@@ -298,46 +277,28 @@ def create_internal_security_group_rules(
     :param security_group_identifier: The name or the Openstack ID of the associated security group
     """
 
-    # allow all icmp by default
-    _create_security_group_rule(
-        conn,
-        SecurityGroupRuleDetails(
-            project_identifier=project_identifier,
-            security_group_identifier=security_group_identifier,
-            direction=NetworkDirection.INGRESS,
-            ip_version=IPVersion.IPV4,
-            protocol=Protocol.ICMP,
-            remote_ip_cidr="0.0.0.0/0",
-            port_range=("*", "*"),
-        ),
-    )
-
-    # allow ssh by default
-    _create_security_group_rule(
-        conn,
-        SecurityGroupRuleDetails(
-            project_identifier=project_identifier,
-            security_group_identifier=security_group_identifier,
-            direction=NetworkDirection.INGRESS,
-            ip_version=IPVersion.IPV4,
-            protocol=Protocol.TCP,
-            remote_ip_cidr="0.0.0.0/0",
-            port_range=("22", "22"),
-        ),
-    )
-
-    # allow aquilon notify by default
-    _create_security_group_rule(
+    default_rules = [
+        # allow all icmp by default
+        (Protocol.ICMP, ("*", "*")),
+        # allow ssh by default
+        (Protocol.TCP, ("22", "22")),
+        # allow aquilon notify by default
+        (Protocol.UDP, ("7777", "7777")),
+    ]
+    return create_security_group_rules(
         conn,
-        SecurityGroupRuleDetails(
-            project_identifier=project_identifier,
-            security_group_identifier=security_group_identifier,
-            direction=NetworkDirection.INGRESS,
-            ip_version=IPVersion.IPV4,
-            protocol=Protocol.UDP,
-            remote_ip_cidr="0.0.0.0/0",
-            port_range=("7777", "7777"),
-        ),
+        [
+            SecurityGroupRuleDetails(
+                project_identifier=project_identifier,
+                security_group_identifier=security_group_identifier,
+                direction=NetworkDirection.INGRESS,
+                ip_version=IPVersion.IPV4,
+                protocol=protocol,
+                remote_ip_cidr="0.0.0.0/0",
+                port_range=port_range,
+            )
+            for protocol, port_range in default_rules
+        ],
     )
 
 
@@ -351,47 +312,128 @@ def create_jasmin_security_group_rules(
     :param security_group_identifier: The name or the Openstack ID of the associated security group
     """
 
-    # allow all icmp by default
-    _create_security_group_rule(
+    default_rules = [
+        # allow all icmp by default
+        (Protocol.ICMP, ("*", "*")),
+        # allow ssh by default
+        (Protocol.TCP, ("22", "22")),
+        # allow aquilon notify by default
+        (Protocol.UDP, ("7777", "7777")),
+    ]
+    return create_security_group_rules(
         conn,
-        SecurityGroupRuleDetails(
-            project_identifier=project_identifier,
-            security_group_identifier=security_group_identifier,
-            direction=NetworkDirection.INGRESS,
-            ip_version=IPVersion.IPV4,
-            protocol=Protocol.ICMP,
-            remote_ip_cidr="0.0.0.0/0",
-            port_range=("*", "*"),
-        ),
+        [
+            SecurityGroupRuleDetails(
+                project_identifier=project_identifier,
+                security_group_identifier=security_group_identifier,
+                direction=NetworkDirection.INGRESS,
+                ip_version=IPVersion.IPV4,
+                protocol=protocol,
+                remote_ip_cidr="0.0.0.0/0",
+                port_range=port_range,
+            )
+            for protocol, port_range in default_rules
+        ],
     )
 
-    # allow ssh by default
-    _create_security_group_rule(
-        conn,
-        SecurityGroupRuleDetails(
-            project_identifier=project_identifier,
-            security_group_identifier=security_group_identifier,
-            direction=NetworkDirection.INGRESS,
-            ip_version=IPVersion.IPV4,
-            protocol=Protocol.TCP,
-            remote_ip_cidr="0.0.0.0/0",
-            port_range=("22", "22"),
-        ),
-    )
 
-    # allow aquilon notify by default
-    _create_security_group_rule(
-        conn,
-        SecurityGroupRuleDetails(
-            project_identifier=project_identifier,
-            security_group_identifier=security_group_identifier,
-            direction=NetworkDirection.INGRESS,
-            ip_version=IPVersion.IPV4,
-            protocol=Protocol.UDP,
-            remote_ip_cidr="0.0.0.0/0",
-            port_range=("7777", "7777"),
-        ),
-    )
+def create_security_group_rules(
+    conn: Connection,
+    rules: List[SecurityGroupRuleDetails],
+    max_concurrent_creates: int = 8,
+) -> List[SecurityGroupRule]:
+    """
+    Creates many security group rules at once. Each project and security group is looked up once,
+    rules which already exist in the security group are skipped, and the rest are created in one
+    bulk request - or on a thread pool if the cloud doesn't support bulk creation
+    :param conn: openstack connection object
+    :param rules: The details of the new security group rules
+    :param max_concurrent_creates: Maximum number of rules to create at the same time without bulk creation
+    :return: The created rules
+    :raises RuntimeError: when any rule created one at a time failed, after trying every rule,
+        naming the rules which were and weren't created. Running again only creates the missing rules
+    """
+    for details in rules:
+        details.security_group_identifier = details.security_group_identifier.strip()
+        if not details.security_group_identifier:
+            raise MissingMandatoryParamError("A security group name or ID is required")
+        details.project_identifier = details.project_identifier.strip()
+        if not details.project_identifier:
+            raise MissingMandatoryParamError("A project name or ID is required")
+
+    group_ids = _find_security_groups(conn, rules)
+    new_rules = [
+        _security_group_rule_body(
+            *group_ids[(details.project_identifier, details.security_group_identifier)],
+            details,
+        )
+        for details in rules
+    ]
+
+    existing = {
+        _security_group_rule_key(rule)
+        for security_group_id in {ids[1] for ids in group_ids.values()}
+        for rule in conn.network.security_group_rules(
+            security_group_id=security_group_id
+        )
+    }
+    to_create = []
+    for rule in new_rules:
+        key = _security_group_rule_key(rule)
+        if key not in existing:
+            existing.add(key)
+            to_create.append(rule)
+    if not to_create:
+        return []
+
+    try:
+        return list(conn.network.create_security_group_rules(to_create))
+    except (exceptions.MethodNotSupported, exceptions.BadRequestException) as exc:
+        logger.warning(
+            "Bulk security group rule creation failed, creating rules one at a time: %s",
+            exc,
+        )
+    return _create_rules_one_at_a_time(conn, to_create, max_concurrent_creates)
+
+
+def _create_rules_one_at_a_time(
+    conn: Connection, to_create: List[Dict], max_concurrent_creates: int
+) -> List[SecurityGroupRule]:
+    """
+    Creates security group rules one at a time on a thread pool, trying every rule even if some fail
+    :param conn: openstack connection object
+    :param to_create: The attributes of each new security group rule
+    :param max_concurrent_creates: Maximum number of rules to create at the same time
+    :return: The created rules
+    :raises RuntimeError: when any rule couldn't be created, naming the rules which were and weren't
+    """
+
+    def _create(rule: Dict):
+        try:
+            return conn.network.create_security_group_rule(**rule)
+        except Exception as exc:  # pylint:disable=broad-exception-caught
+            return exc
+
+    with ThreadPoolExecutor(max_workers=max_concurrent_creates) as executor:
+        results = list(executor.map(_create, to_create))
+
+    failed = [
+        f"{_describe_rule(rule)} ({result})"
+        for rule, result in zip(to_create, results)
+        if isinstance(result, Exception)
+    ]
+    if failed:
+        created = [
+            _describe_rule(rule)
+            for rule, result in zip(to_create, results)
+            if not isinstance(result, Exception)
+        ]
+        raise RuntimeError(
+            f"Failed to create {len(failed)} of {len(to_create)} security group rules: "
+            + "; ".join(failed)
+            + f". Created {len(created)} rules: {', '.join(created) or 'none'}"
+        )
+    return results
 
 
 def refresh_security_groups(
@@ -406,7 +448,9 @@ def refresh_security_groups(
     project_identifier = project_identifier.strip()
     if not project_identifier:
         raise MissingMandatoryParamError("A project name or ID is required")
-    project = conn.identity.find_project(project_identifier, ignore_missing=False)
+    project = get_identity_resolver(conn).find_project(
+        project_identifier, ignore_missing=False
+    )
 
     # We have to use tenant_id here to force Train to
     # actually refresh the default security group for a new project
@@ -430,7 +474,9 @@ def _create_security_group(
     project_identifier = project_identifier.strip()
     if not project_identifier:
         raise MissingMandatoryParamError("A project name or ID is required")
-    project = conn.identity.find_project(project_identifier, ignore_missing=False)
+    project = get_identity_resolver(conn).find_project(
+        project_identifier, ignore_missing=False
+    )
 
     return conn.network.create_security_group(
         name=group_name,
@@ -439,29 +485,44 @@ def _create_security_group(
     )
 
 
-def _create_security_group_rule(
-    conn: Connection, details: SecurityGroupRuleDetails
-) -> SecurityGroupRule:
+def _find_security_groups(
+    conn: Connection, rules: List[SecurityGroupRuleDetails]
+) -> Dict[Tuple[str, str], Tuple[str, str]]:
     """
+    Looks up each project and security group used by a set of rules once
     :param conn: openstack connection object
-    :param details: The details of the new security group rule
-    :return: The created rule
+    :param rules: The details of the security group rules
+    :return: A dictionary mapping (project identifier, security group identifier) to
+    (project ID, security group ID)
     """
-    details.security_group_identifier = details.security_group_identifier.strip()
-    if not details.security_group_identifier:
-        raise MissingMandatoryParamError("A security group name or ID is required")
-
-    details.project_identifier = details.project_identifier.strip()
-    if not details.project_identifier:
-        raise MissingMandatoryParamError("A project name or ID is required")
-    project = conn.identity.find_project(
-        details.project_identifier, ignore_missing=False
-    )
+    group_ids = {}
+    for project_identifier, security_group_identifier in dict.fromkeys(
+        (details.project_identifier, details.security_group_identifier)
+        for details in rules
+    ):
+        project = get_identity_resolver(conn).find_project(
+            project_identifier, ignore_missing=False
+        )
+        security_group = conn.network.find_security_group(
+            security_group_identifier, ignore_missing=False, project_id=project.id
+        )
+        group_ids[(project_identifier, security_group_identifier)] = (
+            project.id,
+            security_group.id,
+        )
+    return group_ids
 
-    security_group = conn.network.find_security_group(
-        details.security_group_identifier, ignore_missing=False, project_id=project.id
-    )
 
+def _security_group_rule_body(
+    project_id: str, security_group_id: str, details: SecurityGroupRuleDetails
+) -> Dict:
+    """
+    Builds the attributes of a new security group rule in the form the Openstack API expects
+    :param project_id: The ID of the project the rule belongs to
+    :param security_group_id: The ID of the security group the rule belongs to
+    :param details: The details of the new security group rule
+    :return: The rule attributes
+    """
     start_port = str(details.port_range[0]).strip()
     end_port = str(details.port_range[1]).strip()
     _validate_rule_ports(start_port, end_port)
@@ -473,15 +534,55 @@ def _create_security_group_rule(
     start_port = None if start_port == "*" else start_port
     end_port = None if end_port == "*" else end_port
 
-    return conn.network.create_security_group_rule(
-        project_id=project.id,
-        security_group_id=security_group.id,
-        direction=details.direction.value.lower(),
-        ether_type=details.ip_version.value.lower(),
-        protocol=protocol,
-        remote_ip_prefix=details.remote_ip_cidr,
-        port_range_min=start_port,
-        port_range_max=end_port,
+    return {
+        "project_id": project_id,
+        "security_group_id": security_group_id,
+        "direction": details.direction.value.lower(),
+        "ether_type": details.ip_version.value.lower(),
+        "protocol": protocol,
+        "remote_ip_prefix": details.remote_ip_cidr,
+        "port_range_min": start_port,
+        "port_range_max": end_port,
+    }
+
+
+def _security_group_rule_key(rule) -> Tuple:
+    """
+    Gets the fields which make a security group rule unique, so existing and new rules can be compared
+    :param rule: A security group rule, or the attributes of a new one
+    :return: A tuple of the rule's identifying fields
+    """
+
+    def port(value):
+        return None if value is None else int(value)
+
+    remote_ip_prefix = rule["remote_ip_prefix"]
+    return (
+        rule["security_group_id"],
+        rule["direction"].lower(),
+        rule["ether_type"].lower(),
+        rule["protocol"].lower() if rule["protocol"] else None,
+        # a rule open to any address may be returned without a prefix
+        None if remote_ip_prefix in ("0.0.0.0/0", "::/0") else remote_ip_prefix,
+        port(rule["port_range_min"]),
+        port(rule["port_range_max"]),
+    )
+
+
+def _describe_rule(rule: Dict) -> str:
+    """
+    Describes the attributes of a new security group rule for error messages
+    :param rule: The attributes of a new security group rule
+    :return: i.e. "ingress tcp 0.0.0.0/0 80-80"
+    """
+    ports = (
+        "any"
+        if rule["port_range_min"] is None
+        else f"{rule['port_range_min']}-{rule['port_range_max']}"
+    )
+    return (
+        f"{rule['direction']} {rule['protocol'] or 'any'} "
+        f"{rule['remote_ip_prefix']} {ports}"
     )
 
 
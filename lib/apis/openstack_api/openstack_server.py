@@ -1,12 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
 import time
-from typing import Optional, List
+from typing import Dict, Optional, List
 from openstack.connection import Connection
 from openstack.compute.v2.image import Image
 from openstack.compute.v2.server import Server
 from openstack.exceptions import ResourceFailure, ResourceTimeout
 
+from apis.openstack_api.openstack_status_watcher import get_status_watcher
+from apis.openstack_api.structs.server_shutoff_result import ServerShutoffResult
+
 logger = logging.getLogger(__name__)
 
 
@@ -123,7 +127,8 @@ def snapshot_server(conn: Connection, server_id: str) -> Image:
 
 def wait_for_image_status(conn: Connection, image, status, interval=5, timeout=3600):
     """
-    Waits for the status of the image to be the selected status
+    Waits for the status of the image to be the selected status.
+    Images are checked by a status watcher shared with every other caller using this connection
     :param conn: Openstack connection
     :param image: The Image object
     :param status: The status of the image that is required
@@ -132,45 +137,31 @@ def wait_for_image_status(conn: Connection, image, status, interval=5, timeout=3
     """
     if image.status == status:
         return image
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        logger.info("Status of image %s: %s", image.id, image.status)
-        image = conn.image.get_image(image.id)
-        if image.status == status:
-            return image
-        if image.status == "error":
-            raise ResourceFailure(f"Image {image.name} failed to upload.")
-        time.sleep(interval)
-    raise ResourceTimeout(f"Timeout waiting for image {image.name} to become {status}.")
+    try:
+        return get_status_watcher(conn).wait_for_image(
+            image.id, status, interval=interval, timeout=timeout
+        )
+    except ResourceTimeout as exc:
+        raise ResourceTimeout(
+            f"Timeout waiting for image {image.name} to become {status}."
+        ) from exc
 
 
 def wait_for_migration_status(
     conn: Connection, server_id, status, interval=5, timeout=3600
 ):
     """
-    Waits for the status of the migration to be the selected status
+    Waits for the status of the migration to be the selected status.
+    Migrations are checked by a status watcher shared with every other caller using this connection
     :param conn: Openstack connection
     :param server_id: The ID of the server where the migrations are from
     :param status: The status of the migration that is required
     :param interval:How long to wait between checks
     :param timeout: Timeout of the function
     """
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            migration = next(conn.compute.migrations(instance_uuid=server_id))
-        except StopIteration:
-            logger.info("No migration details available for %s yet", server_id)
-            time.sleep(interval)
-            continue
-
-        logger.info("Status of migration of server %s: %s", server_id, migration.status)
-        if migration.status == status:
-            return migration
-        if migration.status in ["error", "failed"]:
-            raise ResourceFailure(migration)
-        time.sleep(interval)
-    raise ResourceTimeout(f"Timeout waiting for migration to become {status}.")
+    return get_status_watcher(conn).wait_for_migration(
+        server_id, status, interval=interval, timeout=timeout
+    )
 
 
 def build_server(
@@ -300,3 +291,139 @@ def shutoff_server_list(conn: Connection, server_id_list: List[str]) -> None:
     """
     for server_id in server_id_list:
         shutoff_server(conn, server_id)
+
+
+def _list_server_statuses(conn: Connection, hypervisor_name: str) -> Dict[str, str]:
+    """
+    List the status of every server on a hypervisor with a single API call
+
+    :param conn: openstack connection object
+    :type conn: Connection
+    :param hypervisor_name: Hostname of the hypervisor
+    :type hypervisor_name: str
+    :return: Dictionary of server ID to upper-case server status
+    :rtype: Dict[str, str]
+    """
+    return {
+        server.id: server.status.upper()
+        for server in conn.compute.servers(
+            all_projects=True, compute_host=hypervisor_name
+        )
+    }
+
+
+def _stop_server(conn: Connection, result: ServerShutoffResult) -> None:
+    """
+    Issue a stop call for a server without waiting for it, recording any error on the result
+    """
+    logger.info("Shutting off server: %s", result.server_id)
+    try:
+        conn.compute.stop_server(result.server_id)
+    except Exception as ex:  # pylint:disable=broad-exception-caught
+        logger.error("Failed to shut off server %s: %s", result.server_id, ex)
+        result.error = f"Failed to stop server: {ex}"
+
+
+def _update_shutoff_result(
+    result: ServerShutoffResult, status: str, elapsed: float, timeout: int
+) -> bool:
+    """
+    Update the result for a stopped server with its latest status
+    :return: True if we should keep waiting for the server to shut off
+    """
+    result.status = status
+    result.seconds = elapsed
+    if status == "SHUTOFF":
+        logger.info("server is shut off: %s", result.server_id)
+        result.shut_off = True
+    elif status == "ERROR":
+        logger.error("server %s is in ERROR status", result.server_id)
+        result.error = "Server went into ERROR status"
+    elif not status:
+        result.error = "Server is no longer on the hypervisor"
+    elif elapsed >= timeout:
+        logger.error("Timed out waiting for server %s to shut off", result.server_id)
+        result.error = (
+            f"Timed out after {timeout} seconds waiting for server to shut off"
+        )
+    else:
+        return True
+    return False
+
+
+def shutoff_servers_on_hypervisor(
+    conn: Connection,
+    hypervisor_name: str,
+    server_id_list: List[str],
+    max_concurrent_stops: int = 10,
+    timeout: int = 600,
+    interval: int = 5,
+) -> List[ServerShutoffResult]:
+    """
+    Shutoff a list of servers on a hypervisor in one batch.
+    Stop calls are issued for every ACTIVE server first, then a single polling loop lists
+    the servers on the hypervisor until they are all shut off or have timed out
+
+    :param conn: openstack connection object
+    :type conn: Connection
+    :param hypervisor_name: Hostname of the hypervisor the servers are on
+    :type hypervisor_name: str
+    :param server_id_list: List of ID of servers to shutoff
+    :type server_id_list: List[str]
+    :param max_concurrent_stops: Maximum number of stop calls to issue at once
+    :type max_concurrent_stops: int
+    :param timeout: Seconds to wait for each server to shut off after it is stopped
+    :type timeout: int
+    :param interval: Seconds to wait between listing the servers
+    :type interval: int
+    :return: Result of shutting off each server, in the order given
+    :rtype: List[ServerShutoffResult]
+    """
+    if max_concurrent_stops < 1:
+        raise ValueError("Maximum concurrent stops must be at least 1")
+
+    statuses = _list_server_statuses(conn, hypervisor_name)
+    results = [
+        ServerShutoffResult(server_id=server_id, status=statuses.get(server_id, ""))
+        for server_id in server_id_list
+    ]
+    to_stop = []
+    for result in results:
+        if result.status == "ACTIVE":
+            to_stop.append(result)
+        elif result.status in ["SHUTOFF", "STOPPED"]:
+            logger.info(
+                "Server %s is in status %s, nothing to do",
+                result.server_id,
+                result.status,
+            )
+            result.shut_off = True
+        elif not result.status:
+            result.error = f"Server not found on hypervisor {hypervisor_name}"
+        else:
+            logger.info(
+                "Server %s is in status %s, cannot perform standard shutdown",
+                result.server_id,
+                result.status,
+            )
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_concurrent_stops) as executor:
+        for result in to_stop:
+            executor.submit(_stop_server, conn, result)
+
+    pending = [result for result in to_stop if not result.error]
+    while pending:
+        logger.info("Waiting for %s servers to shut off", len(pending))
+        statuses = _list_server_statuses(conn, hypervisor_name)
+        elapsed = time.monotonic() - start
+        pending = [
+            result
+            for result in pending
+            if _update_shutoff_result(
+                result, statuses.get(result.server_id, ""), elapsed, timeout
+            )
+        ]
+        if pending:
+            time.sleep(interval)
+    return results
@@ -0,0 +1,279 @@
+import logging
+import threading
+import weakref
+from collections import defaultdict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from openstack.connection import Connection
+from openstack.exceptions import ResourceFailure, ResourceTimeout
+
+logger = logging.getLogger(__name__)
+
+# pylint:disable=too-many-instance-attributes
+
+
+@dataclass
+class _Waiter:
+    """
+    A caller waiting for a migration or image to reach a status
+    """
+
+    resource_id: str
+    status: str
+    failure_statuses: List[str]
+    interval: float
+    future: Future = field(default_factory=Future)
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class StatusWatcher:
+    """
+    Watches the status of server migrations and images for many callers at once.
+    Each tick makes one call listing migrations and one call listing images, however many
+    callers are waiting, and resolves each caller's future once its resource reaches the wanted status.
+    The tick interval starts at the shortest interval any caller asked for, and backs off
+    while nothing changes. A background thread runs while there is someone waiting.
+    """
+
+    def __init__(
+        self, conn: Connection, max_interval: float = 60, backoff: float = 1.5
+    ):
+        """
+        :param conn: Openstack connection
+        :param max_interval: Longest time to wait between ticks when nothing is changing
+        :param backoff: Multiplier applied to the interval after each tick where nothing changed
+        """
+        # weak, so the connection isn't kept alive by the shared watcher of it
+        self._conn = weakref.ref(conn)
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self._condition = threading.Condition()
+        self._migration_waiters: Dict[str, List[_Waiter]] = defaultdict(list)
+        self._image_waiters: Dict[str, List[_Waiter]] = defaultdict(list)
+        self._last_statuses: Dict[str, str] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def conn(self) -> Connection:
+        """
+        The Openstack connection
+        :raises ReferenceError: when the connection no longer exists
+        """
+        conn = self._conn()
+        if conn is None:
+            raise ReferenceError("The Openstack connection no longer exists")
+        return conn
+
+    def wait_for_migration(
+        self, server_id: str, status: str, interval: float = 5, timeout: float = 3600
+    ):
+        """
+        Waits for the latest migration of a server to reach a status
+        :param server_id: The ID of the server being migrated
+        :param status: The status of the migration that is required
+        :param interval: Shortest time to wait between checks
+        :param timeout: Timeout in seconds
+        :return: The migration
+        """
+        waiter = _Waiter(server_id, status, ["error", "failed"], interval)
+        return self._wait(
+            self._migration_waiters,
+            waiter,
+            timeout,
+            f"Timeout waiting for migration to become {status}.",
+        )
+
+    def wait_for_image(
+        self, image_id: str, status: str, interval: float = 5, timeout: float = 3600
+    ):
+        """
+        Waits for an image to reach a status
+        :param image_id: The ID of the image
+        :param status: The status of the image that is required
+        :param interval: Shortest time to wait between checks
+        :param timeout: Timeout in seconds
+        :return: The image
+        """
+        waiter = _Waiter(image_id, status, ["error"], interval)
+        return self._wait(
+            self._image_waiters,
+            waiter,
+            timeout,
+            f"Timeout waiting for image {image_id} to become {status}.",
+        )
+
+    def _wait(
+        self,
+        waiters: Dict[str, List[_Waiter]],
+        waiter: _Waiter,
+        timeout: float,
+        timeout_message: str,
+    ):
+        with self._condition:
+            waiters[waiter.resource_id].append(waiter)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="openstack-status-watcher", daemon=True
+                )
+                self._thread.start()
+            # wake the watcher, so a new waiter is checked straight away
+            self._condition.notify_all()
+        try:
+            return waiter.future.result(timeout=timeout)
+        except FutureTimeoutError as exc:
+            raise ResourceTimeout(timeout_message) from exc
+        finally:
+            with self._condition:
+                self._remove(waiters, waiter)
+
+    @staticmethod
+    def _remove(waiters: Dict[str, List[_Waiter]], waiter: _Waiter) -> None:
+        if waiter in waiters.get(waiter.resource_id, []):
+            waiters[waiter.resource_id].remove(waiter)
+            if not waiters[waiter.resource_id]:
+                del waiters[waiter.resource_id]
+
+    def _run(self) -> None:
+        """
+        Poll for as long as anyone is waiting
+        """
+        interval = None
+        while True:
+            with self._condition:
+                waiters = [
+                    waiter
+                    for resource_waiters in (
+                        *self._migration_waiters.values(),
+                        *self._image_waiters.values(),
+                    )
+                    for waiter in resource_waiters
+                    if not waiter.future.done()
+                ]
+                if not waiters:
+                    self._thread = None
+                    return
+                min_interval = min(waiter.interval for waiter in waiters)
+
+            changed = self._poll_migrations() | self._poll_images()
+            interval = self._next_interval(interval, min_interval, changed)
+
+            with self._condition:
+                self._condition.wait(interval)
+
+    def _next_interval(
+        self, interval: Optional[float], min_interval: float, changed: bool
+    ) -> float:
+        """
+        Work out how long to wait before the next tick - the shortest interval
+        while statuses are changing, backing off up to max_interval while they aren't
+        :param interval: The interval before the last tick, None on the first tick
+        :param min_interval: The shortest interval asked for by anyone waiting
+        :param changed: True if any status changed on the last tick
+        """
+        if changed or interval is None:
+            return min_interval
+        return min(max(interval, min_interval) * self.backoff, self.max_interval)
+
+    def _poll_migrations(self) -> bool:
+        """
+        List recent migrations once and update everyone waiting on one
+        :return: True if any watched migration changed status
+        """
+        with self._condition:
+            server_ids = set(self._migration_waiters)
+            if not server_ids:
+                return False
+            since = min(
+                waiter.started_at
+                for resource_waiters in self._migration_waiters.values()
+                for waiter in resource_waiters
+            ) - timedelta(minutes=5)
+        try:
+            latest = {}
+            # migrations are listed newest first, so the first one seen for a server is its latest
+            for migration in self.conn.compute.migrations(
+                changes_since=since.isoformat()
+            ):
+                if migration.server_id in server_ids:
+                    latest.setdefault(migration.server_id, migration)
+        except Exception as exc:  # pylint:disable=broad-exception-caught
+            logger.warning("Failed to list migrations: %s", exc)
+            return False
+        for server_id in server_ids - set(latest):
+            logger.info("No migration details available for %s yet", server_id)
+        return self._update(
+            self._migration_waiters,
+            latest,
+            ResourceFailure,
+        )
+
+    def _poll_images(self) -> bool:
+        """
+        List watched images in one call and update everyone waiting on one
+        :return: True if any watched image changed status
+        """
+        with self._condition:
+            image_ids = sorted(self._image_waiters)
+        if not image_ids:
+            return False
+        try:
+            images = {
+                image.id: image
+                for image in self.conn.image.images(id=f"in:{','.join(image_ids)}")
+            }
+        except Exception as exc:  # pylint:disable=broad-exception-caught
+            logger.warning("Failed to list images: %s", exc)
+            return False
+        return self._update(
+            self._image_waiters,
+            images,
+            lambda image: ResourceFailure(f"Image {image.name} failed to upload."),
+        )
+
+    def _update(self, waiters: Dict[str, List[_Waiter]], resources: Dict, failure):
+        """
+        Resolve the futures of waiters whose resource reached the wanted status, or failed
+        :return: True if any resource changed status since the last tick
+        """
+        changed: Set[str] = set()
+        with self._condition:
+            for resource_id, resource in resources.items():
+                logger.info("Status of %s: %s", resource_id, resource.status)
+                if self._last_statuses.get(resource_id) != resource.status:
+                    changed.add(resource_id)
+                    self._last_statuses[resource_id] = resource.status
+                for waiter in waiters.get(resource_id, []):
+                    if waiter.future.done():
+                        continue
+                    if resource.status == waiter.status:
+                        waiter.future.set_result(resource)
+                    elif resource.status in waiter.failure_statuses:
+                        waiter.future.set_exception(failure(resource))
+            # forget statuses of resources nobody is waiting on anymore
+            for resource_id in list(self._last_statuses):
+                if (
+                    resource_id not in self._migration_waiters
+                    and resource_id not in self._image_waiters
+                ):
+                    del self._last_statuses[resource_id]
+        return bool(changed)
+
+
+_watchers = weakref.WeakKeyDictionary()
+_watchers_lock = threading.Lock()
+
+
+def get_status_watcher(conn: Connection) -> StatusWatcher:
+    """
+    Returns the status watcher shared by every caller using this connection
+    :param conn: Openstack connection
+    """
+    with _watchers_lock:
+        watcher = _watchers.get(conn)
+        if watcher is None:
+            watcher = StatusWatcher(conn)
+            _watchers[conn] = watcher
+        return watcher
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class MigrationResult:
+    """
+    Outcome of migrating a single server while draining a hypervisor
+    :param server_id: (String): ID of the server
+    :param server_name: (String): Name of the server
+    :param source_host: (String): Hypervisor the server was migrated from
+    :param dest_host: (String): Optional hypervisor the server was migrated to, None if one couldn't be found
+    :param success: bool: True if the server was migrated
+    :param seconds: (Float): Time taken to migrate the server
+    :param error: (String): An Optional description of why the server could not be migrated
+    """
+
+    server_id: str
+    server_name: str
+    source_host: str
+    dest_host: Optional[str] = None
+    success: bool = False
+    seconds: float = 0.0
+    error: Optional[str] = None
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class RoleAssignmentResult:
+    """
+    Outcome of assigning a role to a single user as part of a batch
+    :param user_identifier: (String): Name or ID of the user as given
+    :param assigned: bool: True if the role was assigned to the user
+    :param user_id: (String): An Optional ID of the user, if they were found
+    :param error: (String): An Optional description of why the role could not be assigned
+    """
+
+    user_identifier: str
+    assigned: bool = False
+    user_id: Optional[str] = None
+    error: Optional[str] = None
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ServerBuildResult:
+    """
+    Outcome of building and deleting a single test server
+    :param hypervisor_name: (String): Hostname of the hypervisor the server was built on
+    :param flavor_name: (String): Flavor the server was built with
+    :param success: bool: True if the server was built and deleted
+    :param build_seconds: (Float): Time taken to build the server, or until the build failed
+    :param delete_seconds: (Float): Optional time taken to delete the server, None if it wasn't deleted
+    :param error: (String): An Optional description of why the server could not be built or deleted
+    """
+
+    hypervisor_name: str
+    flavor_name: str
+    success: bool
+    build_seconds: float
+    delete_seconds: Optional[float] = None
+    error: Optional[str] = None
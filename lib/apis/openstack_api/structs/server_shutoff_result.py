@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ServerShutoffResult:
+    """
+    Outcome of shutting off a single server as part of a batch
+    :param server_id: (String): ID of the server
+    :param status: (String): Last status seen for the server
+    :param shut_off: bool: True if the server is shut off
+    :param seconds: (Float): Time taken from the stop call until the server was seen shut off, or gave up
+    :param error: (String): An Optional description of why the server could not be shut off
+    """
+
+    server_id: str
+    status: str
+    shut_off: bool = False
+    seconds: float = 0.0
+    error: Optional[str] = None
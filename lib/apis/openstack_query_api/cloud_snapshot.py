@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import defaultdict
+from functools import cached_property
+from typing import Dict, List
+
+from apis.openstack_api.openstack_connection import OpenstackConnection
+from apis.openstack_api.openstack_hypervisor import HypervisorFlavorIndex
+from openstackquery import HypervisorQuery, ServerQuery
+
+# How long (in seconds) a snapshot is reused before the cloud is queried again
+SNAPSHOT_MAX_AGE = 60
+
+_snapshots: Dict[str, "CloudSnapshot"] = {}
+_snapshots_lock = threading.Lock()
+
+
+class CloudSnapshot:
+    """
+    A short-lived, in-process copy of the hypervisors, servers, flavors and aggregates in a cloud.
+    Each resource type is listed at most once, the first time it is needed, and then served from memory.
+    Use get_cloud_snapshot() to share a snapshot between callers.
+    """
+
+    HYPERVISOR_PROPS = [
+        "hypervisor_id",
+        "hypervisor_name",
+        "hypervisor_state",
+        "hypervisor_status",
+    ]
+    SERVER_PROPS = [
+        "server_id",
+        "server_name",
+        "server_status",
+        "flavor_id",
+        "hypervisor_name",
+    ]
+
+    def __init__(self, cloud_account: str):
+        """
+        :param cloud_account: A string representing the cloud account to use - set in clouds.yaml
+        """
+        self.cloud_account = cloud_account
+        self.created_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        """
+        Seconds since the snapshot was created
+        """
+        return time.monotonic() - self.created_at
+
+    @cached_property
+    def _hypervisor_query(self) -> HypervisorQuery:
+        query = HypervisorQuery()
+        query.select(*self.HYPERVISOR_PROPS)
+        query.run(cloud_account=self.cloud_account, all_projects=True, as_admin=True)
+        return query
+
+    @cached_property
+    def _server_query(self) -> ServerQuery:
+        query = ServerQuery()
+        query.select(*self.SERVER_PROPS)
+        query.run(cloud_account=self.cloud_account, all_projects=True, as_admin=True)
+        return query
+
+    @cached_property
+    def hypervisor_objects(self) -> List:
+        """
+        Openstack hypervisor objects, to run further queries on using from_subset
+        """
+        return self._hypervisor_query.to_objects()
+
+    @cached_property
+    def hypervisors(self) -> List[Dict]:
+        """
+        Properties of every hypervisor in the cloud
+        """
+        return self._hypervisor_query.to_props()
+
+    @cached_property
+    def server_objects(self) -> List:
+        """
+        Openstack server objects, to run further queries on using from_subset
+        """
+        return self._server_query.to_objects()
+
+    @cached_property
+    def servers(self) -> List[Dict]:
+        """
+        Properties of every server in the cloud, across all projects
+        """
+        return self._server_query.to_props()
+
+    @cached_property
+    def servers_by_hypervisor(self) -> Dict[str, List[Dict]]:
+        """
+        Servers grouped by the name of the hypervisor they are running on
+        """
+        grouped = defaultdict(list)
+        for server in self.servers:
+            grouped[server["hypervisor_name"]].append(server)
+        return dict(grouped)
+
+    @cached_property
+    def hypervisors_by_state(self) -> Dict[str, List[Dict]]:
+        """
+        Hypervisors grouped by state - i.e. up or down
+        """
+        grouped = defaultdict(list)
+        for hypervisor in self.hypervisors:
+            grouped[hypervisor["hypervisor_state"]].append(hypervisor)
+        return dict(grouped)
+
+    @cached_property
+    def hypervisors_by_status(self) -> Dict[str, List[Dict]]:
+        """
+        Hypervisors grouped by status - i.e. enabled or disabled
+        """
+        grouped = defaultdict(list)
+        for hypervisor in self.hypervisors:
+            grouped[hypervisor["hypervisor_status"]].append(hypervisor)
+        return dict(grouped)
+
+    @cached_property
+    def flavors(self) -> List:
+        """
+        Every flavor in the cloud, including extra specs
+        """
+        with OpenstackConnection(self.cloud_account) as conn:
+            return list(conn.compute.flavors(get_extra_specs=True))
+
+    @cached_property
+    def aggregates(self) -> List:
+        """
+        Every host aggregate in the cloud
+        """
+        with OpenstackConnection(self.cloud_account) as conn:
+            return list(conn.compute.aggregates())
+
+    @cached_property
+    def flavor_index(self) -> HypervisorFlavorIndex:
+        """
+        Index of which flavors can be built on each hypervisor, built from the snapshot's aggregates and flavors
+        """
+        return HypervisorFlavorIndex(self.aggregates, self.flavors)
+
+    def server_count(self, hypervisor_name: str) -> int:
+        """
+        Returns the number of servers running on a hypervisor
+        :param hypervisor_name: Name of the hypervisor
+        """
+        return len(self.servers_by_hypervisor.get(hypervisor_name, []))
+
+
+def get_cloud_snapshot(
+    cloud_account: str, max_age: int = SNAPSHOT_MAX_AGE
+) -> CloudSnapshot:
+    """
+    Returns a snapshot of the cloud shared by every caller in this process,
+    taking a new one if the last is older than max_age
+    :param cloud_account: A string representing the cloud account to use - set in clouds.yaml
+    :param max_age: Maximum age in seconds of a snapshot that can be reused
+    """
+    with _snapshots_lock:
+        snapshot = _snapshots.get(cloud_account)
+        if snapshot is None or snapshot.age > max_age:
+            snapshot = CloudSnapshot(cloud_account)
+            _snapshots[cloud_account] = snapshot
+        return snapshot
+
+
+def clear_cloud_snapshots() -> None:
+    """
+    Forget all shared snapshots so the next lookup queries the cloud again
+    """
+    with _snapshots_lock:
+        _snapshots.clear()
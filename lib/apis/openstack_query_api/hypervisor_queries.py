@@ -1,11 +1,20 @@
-from openstackquery.api.query_objects import HypervisorQuery, ServerQuery
+from typing import Optional
 
+from apis.openstack_query_api.cloud_snapshot import CloudSnapshot, get_cloud_snapshot
+from openstackquery.api.query_objects import HypervisorQuery
 
-def query_hypervisor_state(cloud_account: str):
+
+def query_hypervisor_state(
+    cloud_account: str, snapshot: Optional[CloudSnapshot] = None
+):
     """
     Query the state of hypervisors
     :param cloud_account: A string representing the cloud account to use - set in clouds.yaml
+    :param snapshot: Optional cloud snapshot to read hypervisors and servers from, defaults to the shared snapshot
     """
+    if snapshot is None:
+        snapshot = get_cloud_snapshot(cloud_account)
+
     state_query = HypervisorQuery()
     state_query.where(
         "regex",
@@ -20,26 +29,24 @@ def query_hypervisor_state(cloud_account: str):
         "disabled_reason",
     )
 
-    state_query.run(cloud_account=cloud_account, all_projects=True, as_admin=True)
+    state_query.run(
+        cloud_account=cloud_account, from_subset=snapshot.hypervisor_objects
+    )
     hypervisor_info = state_query.to_props()
-    server_query = ServerQuery()
-    server_query.group_by("hypervisor_name")
-    server_query.run(cloud_account=cloud_account, all_projects=True, as_admin=True)
-
-    servers_on_hypervisor = server_query.to_props()
 
     for hv in hypervisor_info:
-        hv["hypervisor_server_count"] = len(
-            servers_on_hypervisor.get(hv["hypervisor_name"], [])
-        )
+        hv["hypervisor_server_count"] = snapshot.server_count(hv["hypervisor_name"])
 
     return hypervisor_info
 
 
-def find_down_hypervisors(cloud_account: str):
+def find_down_hypervisors(cloud_account: str, snapshot: Optional[CloudSnapshot] = None):
     """
     :param cloud_account: string represents cloud account to use
+    :param snapshot: Optional cloud snapshot to read hypervisors from, defaults to the shared snapshot
     """
+    if snapshot is None:
+        snapshot = get_cloud_snapshot(cloud_account)
 
     hypervisor_query_down = HypervisorQuery()
     hypervisor_query_down.where(
@@ -49,6 +56,7 @@ def find_down_hypervisors(cloud_account: str):
     )
     hypervisor_query_down.run(
         cloud_account,
+        from_subset=snapshot.hypervisor_objects,
     )
     hypervisor_query_down.select(
         "hypervisor_id",
@@ -60,10 +68,15 @@ def find_down_hypervisors(cloud_account: str):
     return hypervisor_query_down
 
 
-def find_disabled_hypervisors(cloud_account: str):
+def find_disabled_hypervisors(
+    cloud_account: str, snapshot: Optional[CloudSnapshot] = None
+):
     """
     :param cloud_account: string represents cloud account to use
+    :param snapshot: Optional cloud snapshot to read hypervisors from, defaults to the shared snapshot
     """
+    if snapshot is None:
+        snapshot = get_cloud_snapshot(cloud_account)
 
     hypervisor_query_disabled = HypervisorQuery()
     hypervisor_query_disabled.where(
@@ -73,6 +86,7 @@ def find_disabled_hypervisors(cloud_account: str):
     )
     hypervisor_query_disabled.run(
         cloud_account,
+        from_subset=snapshot.hypervisor_objects,
     )
     hypervisor_query_disabled.select(
         "hypervisor_id",
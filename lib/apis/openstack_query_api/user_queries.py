@@ -1,7 +1,14 @@
-from typing import Tuple
+import time
+from typing import Dict, Iterable, Optional, Tuple
 
 from openstackquery import UserQuery
 
+# How long (in seconds) a resolved user's name and email are reused for
+USER_INFO_CACHE_TTL = 3600
+
+# (cloud_account, user_id) -> (expiry time, user name, user email)
+_user_info_cache: Dict[Tuple[str, str], Tuple[float, str, Optional[str]]] = {}
+
 
 def find_user_info(
     user_id,
@@ -24,3 +31,67 @@ def find_user_info(
         return "", override_email_address
 
     return res["user_name"][0], res["user_email"][0]
+
+
+def find_user_info_bulk(
+    user_ids: Iterable[str],
+    cloud_account,
+    override_email_address,
+) -> Dict[str, Tuple[str, str]]:
+    """
+    Find the user name and email address for many user IDs using a single UserQuery.
+    Results are cached for USER_INFO_CACHE_TTL seconds so repeated lookups don't hit Keystone again.
+    :param user_ids: The OpenStack user IDs to be queried
+    :param cloud_account: String representing the cloud account to use
+    :param override_email_address: String email address to return for users with no email address
+    :return: A dictionary mapping each user ID to a (user name, email address) tuple -
+    unknown users or users without an email are given ("", override_email_address)
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    now = time.monotonic()
+
+    to_query = [
+        user_id
+        for user_id in user_ids
+        if _user_info_cache.get((cloud_account, user_id), (0,))[0] <= now
+    ]
+    if to_query:
+        user_query = UserQuery()
+        user_query.select("id", "name", "email_address")
+        user_query.where("any_in", "id", values=to_query)
+        user_query.run(cloud_account=cloud_account)
+        res = user_query.to_props(flatten=True)
+
+        found = {}
+        if res:
+            found = {
+                user_id: (user_name, user_email)
+                for user_id, user_name, user_email in zip(
+                    res["user_id"], res["user_name"], res["user_email"]
+                )
+            }
+        expiry = now + USER_INFO_CACHE_TTL
+        for user_id in to_query:
+            # users which weren't found are cached too, so we don't keep looking for them
+            user_name, user_email = found.get(user_id, ("", None))
+            _user_info_cache[(cloud_account, user_id)] = (
+                expiry,
+                user_name,
+                user_email,
+            )
+
+    user_info = {}
+    for user_id in user_ids:
+        _, user_name, user_email = _user_info_cache[(cloud_account, user_id)]
+        if not user_email:
+            user_info[user_id] = ("", override_email_address)
+        else:
+            user_info[user_id] = (user_name, user_email)
+    return user_info
+
+
+def clear_user_info_cache() -> None:
+    """
+    Forget all cached user lookups
+    """
+    _user_info_cache.clear()
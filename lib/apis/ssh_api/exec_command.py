@@ -1,66 +1,162 @@
+import codecs
+import select
+import threading
+import time
+from typing import Callable, Optional
+
 import paramiko
 from paramiko.ssh_exception import SSHException
 
+from apis.ssh_api.output_capture import OutputCapture
+from apis.ssh_api.structs.command_result import CommandResult
 from apis.ssh_api.structs.ssh_connection_details import SSHDetails
 
 
 class SSHConnection:
     """
-    Class to create a SSH connection and execute remote commands
+    Class to create a SSH connection and execute remote commands. The connection is kept
+    open between commands, each command is run over a new channel on the same transport
     """
 
-    def __init__(self, conn: SSHDetails):
+    def __init__(
+        self, conn: SSHDetails, buffer_size: int = 32768, poll_interval: float = 1.0
+    ):
         """
         Create SSH client and load private key
+        :param conn: details of the host to connect to
+        :param buffer_size: maximum number of bytes of output to read at a time
+        :param poll_interval: seconds to wait for output before checking if a command has
+            finished
         """
         self.host = conn.host
         self.username = conn.username
         self.private_key = paramiko.RSAKey.from_private_key_file(conn.private_key_path)
         self.client = paramiko.SSHClient()
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
 
-    def __enter__(self):
+    def connect(self) -> paramiko.SSHClient:
         """
-        Connect host via SSH
+        Connect host via SSH, reusing the connection if it is still open
         """
-        self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        with self._lock:
+            transport = self.client.get_transport()
+            if transport is None or not transport.is_active():
+                self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
-        self.client.connect(self.host, username=self.username, pkey=self.private_key)
+                self.client.connect(
+                    self.host, username=self.username, pkey=self.private_key
+                )
 
-        return self.client
+            return self.client
+
+    def __enter__(self):
+        """
+        Connect host via SSH
+        """
+        return self.connect()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """
         Close ssh client
         """
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close ssh client and its connection
+        """
         self.client.close()
 
-    def run_command_on_host(self, command: str):
+    # pylint:disable=too-many-locals
+    def run(
+        self,
+        command: str,
+        on_output: Optional[Callable[[str], None]] = None,
+        timeout: Optional[float] = None,
+        capture: Optional[OutputCapture] = None,
+    ) -> CommandResult:
         """
-        Run command on a host with live output
+        Run command on the host, blocking until there is output rather than polling the
+        channel in a loop
         :param command: Command to run over SSH
-        :return: None
+        :param on_output: (Optional) called with each chunk of output as it is received
+        :param timeout: (Optional) seconds to wait for the command to finish
+        :param capture: (Optional) where to capture the output, by default the head and tail
+            of the output are kept
+        :return: the exit status and captured output of the command, with stderr combined
+            into stdout
         """
-        with self as client:
-            stdin, stdout, stderr = client.exec_command(command=command)
+        if capture is None:
+            capture = OutputCapture()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        channel = self.connect().get_transport().open_session()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
 
-            stdin.close()
-            stdout.channel.set_combine_stderr(True)
-            stdout.channel.shutdown_write()
+        def _handle(text):
+            if text:
+                capture.write(text)
+                if on_output is not None:
+                    on_output(text)
 
-            channel = stdout.channel
-            while (not channel.closed) or channel.recv_ready():
-                # Print out any command output
-                if channel.recv_ready():
-                    output = channel.recv(1024).decode("utf-8")
-                    print(output, end="")
+        exit_code = None
+        timed_out = False
+        try:
+            channel.set_combine_stderr(True)
+            channel.exec_command(command)
+            channel.shutdown_write()
 
-                if channel.exit_status_ready() and not channel.recv_ready():
-                    channel.shutdown_read()
-                    stdout.close()
-                    stderr.close()
+            while True:
+                wait = self.poll_interval
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        timed_out = True
+                        break
+                # blocks until there is output, the command ends, or the wait passes
+                select.select([channel], [], [], wait)
+                if channel.recv_ready():
+                    _handle(decoder.decode(channel.recv(self.buffer_size)))
+                elif channel.eof_received or channel.closed:
                     break
+            _handle(decoder.decode(b"", final=True))
 
-            if stdout.channel.recv_exit_status() != 0:
-                raise SSHException()
+            if not timed_out:
+                exit_code = channel.recv_exit_status()
+        finally:
+            channel.close()
+            capture.close()
 
-            return
+        return CommandResult(
+            host=self.host,
+            command=command,
+            exit_code=exit_code,
+            output=capture.output,
+            error=f"Timed out after {timeout} seconds" if timed_out else None,
+            truncated=capture.truncated,
+            output_path=capture.spill_path,
+            timed_out=timed_out,
+        )
+
+    def run_command_on_host(
+        self,
+        command: str,
+        on_output: Optional[Callable[[str], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> CommandResult:
+        """
+        Run command on a host
+        :param command: Command to run over SSH
+        :param on_output: (Optional) called with each chunk of output as it is received
+        :param timeout: (Optional) seconds to wait for the command to finish
+        :return: the exit status and the head and tail of the output of the command
+        :raises SSHException: when the command failed or timed out
+        """
+        res = self.run(command, on_output=on_output, timeout=timeout)
+        if not res.succeeded:
+            raise SSHException(
+                f"{command} failed on {self.host}: "
+                f"{res.error or f'exit code {res.exit_code}'}\n{res.output[-2000:]}"
+            )
+        return res
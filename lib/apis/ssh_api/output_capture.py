@@ -0,0 +1,95 @@
+import tempfile
+from collections import deque
+from typing import Optional
+
+
+class OutputCapture:
+    """
+    Captures the output of a command in bounded memory. The start of the output is kept
+    whole, and the end is kept in a ring buffer, so only the head and tail of a long output
+    are held. All the output can also be spilled to a temporary file
+    """
+
+    def __init__(
+        self, head_size: int = 16384, tail_size: int = 49152, spill: bool = False
+    ):
+        """
+        :param head_size: number of characters to keep from the start of the output
+        :param tail_size: number of characters to keep from the end of the output
+        :param spill: write all the output to a temporary file, which is kept once closed
+        """
+        self.head_size = head_size
+        self._head = []
+        self._head_length = 0
+        self._tail = deque(maxlen=tail_size)
+        self.length = 0
+        self._file = None
+        if spill:
+            # pylint:disable=consider-using-with
+            self._file = tempfile.NamedTemporaryFile(
+                mode="w",
+                encoding="utf-8",
+                prefix="ssh-output-",
+                suffix=".log",
+                delete=False,
+            )
+
+    def write(self, text: str) -> None:
+        """
+        Add output to the capture
+        :param text: output received from the command
+        """
+        self.length += len(text)
+        if self._file is not None:
+            self._file.write(text)
+        if self._head_length < self.head_size:
+            head = text[: self.head_size - self._head_length]
+            self._head.append(head)
+            self._head_length += len(head)
+            text = text[len(head) :]
+        self._tail.extend(text)
+
+    def close(self) -> None:
+        """
+        Close the spill file, if there is one
+        """
+        if self._file is not None:
+            self._file.close()
+
+    @property
+    def spill_path(self) -> Optional[str]:
+        """
+        Path of the file holding all the output, if it is being spilled
+        """
+        return self._file.name if self._file is not None else None
+
+    @property
+    def head(self) -> str:
+        """
+        The start of the output, up to head_size characters
+        """
+        return "".join(self._head)
+
+    @property
+    def tail(self) -> str:
+        """
+        The end of the output after the head, up to tail_size characters
+        """
+        return "".join(self._tail)
+
+    @property
+    def truncated(self) -> bool:
+        """
+        Whether some of the output, between the head and tail, was dropped
+        """
+        return self.length > self._head_length + len(self._tail)
+
+    @property
+    def output(self) -> str:
+        """
+        The captured output, with a marker where any output was dropped
+        """
+        if not self.truncated:
+            return self.head + self.tail
+        omitted = self.length - self._head_length - len(self._tail)
+        return f"{self.head}\n... [{omitted} characters omitted] ...\n{self.tail}"
@@ -0,0 +1,104 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from paramiko.ssh_exception import SSHException
+
+from apis.ssh_api.exec_command import SSHConnection
+from apis.ssh_api.structs.command_result import CommandResult
+from apis.ssh_api.structs.ssh_connection_details import SSHDetails
+
+logger = logging.getLogger(__name__)
+
+
+class SSHExecutor:
+    """
+    Runs commands on many hosts over SSH. One connection is kept open to each host and
+    reused for every command run on it, and a command can be run on many hosts at the same time
+    """
+
+    def __init__(
+        self, username: str, private_key_path: str, max_concurrent_hosts: int = 10
+    ):
+        """
+        :param username: Username to authenticate with
+        :param private_key_path: Path to private key to authenticate with
+        :param max_concurrent_hosts: Maximum number of hosts to run commands on at the same time
+        """
+        self.username = username
+        self.private_key_path = private_key_path
+        self.max_concurrent_hosts = max_concurrent_hosts
+        self._connections: Dict[str, SSHConnection] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the connection to every host
+        """
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for connection in connections:
+            connection.close()
+
+    def connection(self, host: str) -> SSHConnection:
+        """
+        Get the connection to a host, creating it the first time the host is used
+        :param host: Host to connect to
+        """
+        with self._lock:
+            connection = self._connections.get(host)
+            if connection is None:
+                connection = SSHConnection(
+                    SSHDetails(
+                        host=host,
+                        username=self.username,
+                        private_key_path=self.private_key_path,
+                    )
+                )
+                self._connections[host] = connection
+            return connection
+
+    def run(
+        self,
+        host: str,
+        command: str,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> CommandResult:
+        """
+        Run command on a host
+        :param host: Host to run command on
+        :param command: Command to run over SSH
+        :param on_output: (Optional) called with each chunk of output as it is received
+        :return: the exit code and output of the command, or the error if it could not be run
+        """
+        try:
+            return self.connection(host).run(command, on_output=on_output)
+        except (SSHException, OSError) as exc:
+            logger.error("Failed to run %s on %s: %s", command, host, exc)
+            return CommandResult(
+                host=host, command=command, exit_code=None, error=repr(exc)
+            )
+
+    def run_on_hosts(self, hosts: List[str], command: str) -> Dict[str, CommandResult]:
+        """
+        Run command on many hosts at the same time, at most max_concurrent_hosts at once
+        :param hosts: Hosts to run command on
+        :param command: Command to run over SSH
+        :return: a dictionary mapping each host to the result of the command
+        """
+        hosts = list(dict.fromkeys(hosts))
+        if not hosts:
+            return {}
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_concurrent_hosts, len(hosts))
+        ) as executor:
+            results = executor.map(lambda host: self.run(host, command), hosts)
+            return dict(zip(hosts, results))
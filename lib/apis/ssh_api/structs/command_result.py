@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+# pylint: disable=too-many-instance-attributes
+@dataclass
+class CommandResult:
+    """
+    Dataclass to hold the outcome of running a command on a host over SSH
+    """
+
+    host: str
+    command: str
+    # None if the command could not be run, i.e. the host could not be connected to
+    exit_code: Optional[int]
+    # the head and tail of the output, with a marker where any output was dropped
+    output: str = ""
+    error: Optional[str] = None
+    truncated: bool = False
+    # file holding all the output, if it was spilled to a file
+    output_path: Optional[str] = None
+    timed_out: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        """
+        Whether the command ran and exited successfully
+        """
+        return self.exit_code == 0
@@ -1,7 +1,29 @@
 import fnmatch
+import hashlib
+import json
 import re
-from collections import Counter, deque
-from typing import Any, Deque, Dict, List, Set, Tuple, Union
+from collections import Counter, defaultdict, deque
+from functools import lru_cache
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    Union,
+)
+
+# A path is carried as a tuple of segments while traversing - a str segment is a dict key,
+# an int segment is a list index and None is an item in an unordered collection
+Path = Tuple[Union[str, int, None], ...]
+
+# Fields shared by more list items than this are too common to say which items are most
+# similar, so they're skipped when pairing up unmatched items in unordered lists
+MAX_SIMILARITY_POSTINGS = 64
 
 
 def _format_value(value: Any) -> str:
@@ -32,6 +54,59 @@ def _normalize_path(path: str) -> str:
     return "root/" + "/".join(cleaned_parts)
 
 
+def _format_path(path: Path) -> str:
+    """
+    Convert a path tuple to bracket notation (e.g., root['a'][0]) for the difference report.
+
+    :param path: The path as a tuple of segments.
+    :return: The path string in bracket notation.
+    """
+    parts = ["root"]
+    for segment in path:
+        if segment is None:
+            parts.append("[?]")
+        elif isinstance(segment, int):
+            parts.append(f"[{segment}]")
+        else:
+            parts.append(f"['{segment}']")
+    return "".join(parts)
+
+
+@lru_cache(maxsize=128)
+def _compile_exclude_paths(exclude_paths: FrozenSet[str]) -> Optional[Pattern]:
+    """
+    Compile glob-like exclude patterns into a single regex matching normalized paths.
+
+    :param exclude_paths: Exclude patterns in bracket notation.
+    :return: The compiled regex, or None if there are no patterns.
+    """
+    if not exclude_paths:
+        return None
+    return re.compile(
+        "|".join(
+            fnmatch.translate(_normalize_path(pattern))
+            for pattern in sorted(exclude_paths)
+        )
+    )
+
+
+def _similarity_features(canonical: Any) -> Set[str]:
+    """
+    Get the parts of a canonical item used to judge how similar two items are -
+    the key/value pairs of a dict, or the elements of a list.
+
+    :param canonical: The canonical form of an item, from DiffUtils._canonical.
+    :return: Set of serialized features.
+    """
+    if isinstance(canonical, dict):
+        return {
+            json.dumps([key, value], sort_keys=True) for key, value in canonical.items()
+        }
+    if isinstance(canonical, list):
+        return {json.dumps(item, sort_keys=True) for item in canonical}
+    return {json.dumps(canonical, sort_keys=True)}
+
+
 # pylint: disable=too-few-public-methods
 class DiffUtils:
     """
@@ -57,134 +132,200 @@ class DiffUtils:
         """
         self.exclude_paths: Set[str] = set(exclude_paths or [])
         self.ignore_order: bool = ignore_order
+        # Patterns are compiled once, and shared by every DiffUtils with the same exclude paths
+        self._exclude_regex = _compile_exclude_paths(frozenset(self.exclude_paths))
 
         # State tracking
         self.changes: List[List[str]] = []
-        self.queue: Deque[Tuple[Any, Any, str]] = deque()
+        self.queue: Deque[Tuple[Any, Any, Path]] = deque()
         # Track object ID pairs to prevent infinite recursion on circular references
         self.visited_pairs: Set[Tuple[int, int]] = set()
 
-    def _is_excluded(self, path: str) -> bool:
+    def _is_excluded(self, path: Path) -> bool:
         """
         Check if a path matches any excluded pattern using glob matching.
 
-        :param path: The current path string in bracket notation.
+        :param path: The current path tuple.
         :return: True if the path is excluded, False otherwise.
         """
-        norm_path = _normalize_path(path)
-        for pattern in self.exclude_paths:
-            if fnmatch.fnmatch(norm_path, _normalize_path(pattern)):
-                return True
-        return False
-
-    def _get_diff_dict(self, source: Dict, target: Dict, path: str) -> None:
+        if self._exclude_regex is None:
+            return False
+        norm_path = "root/" + "/".join(
+            "?" if segment is None else str(segment) for segment in path
+        )
+        return self._exclude_regex.match(norm_path) is not None
+
+    def _get_diff_dict(self, source: Dict, target: Dict, path: Path) -> None:
         """
         Compare two dictionaries and queue items for further processing.
 
         :param source: Dictionary from the source object.
         :param target: Dictionary from the target object.
-        :param path: The current path string.
+        :param path: The current path tuple.
         :return: None
         """
         all_keys = set(source.keys()) | set(target.keys())
         for key in all_keys:
-            key_path = f"{path}['{key}']"
+            key_path = path + (str(key),)
             if self._is_excluded(key_path):
                 continue
             if key not in source:
                 self.changes.append(
-                    [key_path, "Not Present", _format_value(target[key])]
+                    [_format_path(key_path), "Not Present", _format_value(target[key])]
                 )
             elif key not in target:
                 self.changes.append(
-                    [key_path, _format_value(source[key]), "Not Present"]
+                    [_format_path(key_path), _format_value(source[key]), "Not Present"]
                 )
             else:
                 # Add to queue for deeper comparison
                 self.queue.append((source[key], target[key], key_path))
 
     def _get_diff_list_hashable(
-        self, src: List[Any], tgt: List[Any], path: str
+        self, src: List[Any], tgt: List[Any], path: Path
     ) -> None:
         """
         Compare hashable items in unordered lists using Counter.
 
         :param src: List of hashable items from source.
         :param tgt: List of hashable items from target.
-        :param path: The current path string.
+        :param path: The current path tuple.
         :return: None
         """
         src_counts, tgt_counts = Counter(src), Counter(tgt)
+        item_path = _format_path(path + (None,))
 
         # Report items unique to source
         for item, count in (src_counts - tgt_counts).items():
             for _ in range(count):
-                self.changes.append([f"{path}[?]", _format_value(item), "Not Present"])
+                self.changes.append([item_path, _format_value(item), "Not Present"])
 
         # Report items unique to target
         for item, count in (tgt_counts - src_counts).items():
             for _ in range(count):
-                self.changes.append([f"{path}[?]", "Not Present", _format_value(item)])
+                self.changes.append([item_path, "Not Present", _format_value(item)])
+
+    @staticmethod
+    def _match_identical(
+        src_canonical: List[Any], tgt_canonical: List[Any], matched_in_tgt: List[bool]
+    ) -> List[int]:
+        """
+        Match source and target items with the same canonical form, which have no differences.
+
+        :param src_canonical: Canonical forms of the source items.
+        :param tgt_canonical: Canonical forms of the target items.
+        :param matched_in_tgt: Flags for which target items are matched, updated in place.
+        :return: Indexes of the source items left unmatched.
+        """
+        tgt_by_key: Dict[str, Deque[int]] = defaultdict(deque)
+        for j, canonical in enumerate(tgt_canonical):
+            tgt_by_key[json.dumps(canonical, sort_keys=True)].append(j)
+        unmatched_src = []
+        for i, canonical in enumerate(src_canonical):
+            candidates = tgt_by_key.get(json.dumps(canonical, sort_keys=True))
+            if candidates:
+                matched_in_tgt[candidates.popleft()] = True
+            else:
+                unmatched_src.append(i)
+        return unmatched_src
+
+    @staticmethod
+    def _match_similar(
+        src_canonical: List[Any],
+        tgt_canonical: List[Any],
+        unmatched_src: List[int],
+        matched_in_tgt: List[bool],
+    ) -> List[Tuple[int, Optional[int]]]:
+        """
+        Pair each unmatched source item with the unmatched target item sharing the most
+        features with it, or the first unmatched target item if none share any.
+
+        :param src_canonical: Canonical forms of the source items.
+        :param tgt_canonical: Canonical forms of the target items.
+        :param unmatched_src: Indexes of the source items to pair.
+        :param matched_in_tgt: Flags for which target items are matched, updated in place.
+        :return: (source index, target index) pairs - the target index is None if no target is left.
+        """
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for j, canonical in enumerate(tgt_canonical):
+            if not matched_in_tgt[j]:
+                for feature in _similarity_features(canonical):
+                    postings[feature].append(j)
+
+        pairs = []
+        next_unmatched = 0
+        for i in unmatched_src:
+            scores: Counter = Counter()
+            for feature in _similarity_features(src_canonical[i]):
+                candidates = postings.get(feature, [])
+                if len(candidates) <= MAX_SIMILARITY_POSTINGS:
+                    scores.update(j for j in candidates if not matched_in_tgt[j])
+            if scores:
+                best = max(scores.items(), key=lambda score: (score[1], -score[0]))[0]
+            else:
+                while (
+                    next_unmatched < len(matched_in_tgt)
+                    and matched_in_tgt[next_unmatched]
+                ):
+                    next_unmatched += 1
+                best = next_unmatched if next_unmatched < len(matched_in_tgt) else None
+            if best is not None:
+                matched_in_tgt[best] = True
+            pairs.append((i, best))
+        return pairs
 
     def _get_diff_list_unhashable(
-        self, src: List[Any], tgt: List[Any], path: str
+        self, src: List[Any], tgt: List[Any], path: Path
     ) -> None:
         """
-        Compare unhashable items (e.g., dicts, lists) in unordered lists using pairwise comparison.
+        Compare unhashable items (e.g., dicts, lists) in unordered lists.
 
-        Attempts to find a "match" first, then reports closest diffs if no perfect match.
+        Identical items are matched first by their canonical form, then each remaining
+        source item is paired with the most similar remaining target item and their diffs reported.
 
         :param src: List of unhashable items from source.
         :param tgt: List of unhashable items from target.
-        :param path: The current path string.
+        :param path: The current path tuple.
         :return: None
         """
         matched_in_tgt = [False] * len(tgt)
-
-        # Pass 1: look for perfect matches
-        for item in src:
-            found_match = False
-            for j, tgt_item in enumerate(tgt):
-                if not matched_in_tgt[j]:
-                    sub_changes = DiffUtils(self.exclude_paths, True).diff(
-                        item, tgt_item
-                    )
-                    if not sub_changes:
-                        matched_in_tgt[j] = True
-                        found_match = True
-                        break
-            if found_match:
-                continue
-
-            # Pass 2: look for best available match (nested diffs)
-            for j, tgt_item in enumerate(tgt):
-                if not matched_in_tgt[j]:
-                    sub_changes = DiffUtils(self.exclude_paths, False).diff(
-                        item, tgt_item
-                    )
-                    for sub_path, val1, val2 in sub_changes:
-                        nested_path = sub_path.replace("root", f"{path}[?]")
-                        self.changes.append([nested_path, val1, val2])
-                    matched_in_tgt[j] = True
-                    break
-            else:
+        item_path = path + (None,)
+        src_canonical = [self._canonical(item, item_path) for item in src]
+        tgt_canonical = [self._canonical(item, item_path) for item in tgt]
+
+        # Pass 1: match identical items by their canonical form
+        unmatched_src = self._match_identical(
+            src_canonical, tgt_canonical, matched_in_tgt
+        )
+
+        # Pass 2: pair remaining items with the most similar target (nested diffs)
+        for i, j in self._match_similar(
+            src_canonical, tgt_canonical, unmatched_src, matched_in_tgt
+        ):
+            if j is None:
                 # No match found: item missing in target
-                self.changes.append([f"{path}[?]", _format_value(item), "Not Present"])
+                self.changes.append(
+                    [_format_path(item_path), _format_value(src[i]), "Not Present"]
+                )
+            else:
+                self.changes.extend(
+                    DiffUtils(self.exclude_paths, False).diff(src[i], tgt[j], item_path)
+                )
 
         # Pass 3: items in target missing from source
         for j, tgt_item in enumerate(tgt):
             if not matched_in_tgt[j]:
                 self.changes.append(
-                    [f"{path}[?]", "Not Present", _format_value(tgt_item)]
+                    [_format_path(item_path), "Not Present", _format_value(tgt_item)]
                 )
 
-    def _get_diff_list_unordered(self, src: List, tgt: List, path: str) -> None:
+    def _get_diff_list_unordered(self, src: List, tgt: List, path: Path) -> None:
         """
         Compare two lists, ignoring order.
 
         :param src: Source list.
         :param tgt: Target list.
-        :param path: The current path string.
+        :param path: The current path tuple.
         :return: None
         """
 
@@ -204,45 +345,103 @@ class DiffUtils:
         # 2. Slower pair-wise comparison for unhashable items
         self._get_diff_list_unhashable(src_unhash, tgt_unhash, path)
 
-    def _get_diff_list_ordered(self, src: List, tgt: List, path: str) -> None:
+    def _get_diff_list_ordered(self, src: List, tgt: List, path: Path) -> None:
         """
         Compare two lists, considering the order of elements.
 
         :param src: Source list.
         :param tgt: Target list.
-        :param path: The current path string.
+        :param path: The current path tuple.
         :return: None
         """
         for i in range(max(len(src), len(tgt))):
-            item_path = f"{path}[{i}]"
+            item_path = path + (i,)
             if i >= len(src):
-                self.changes.append([item_path, "Not Present", _format_value(tgt[i])])
+                self.changes.append(
+                    [_format_path(item_path), "Not Present", _format_value(tgt[i])]
+                )
             elif i >= len(tgt):
-                self.changes.append([item_path, _format_value(src[i]), "Not Present"])
+                self.changes.append(
+                    [_format_path(item_path), _format_value(src[i]), "Not Present"]
+                )
             else:
                 # Add matching elements to queue for deeper comparison
                 self.queue.append((src[i], tgt[i], item_path))
 
-    def _get_diff_set(self, src: Set, tgt: Set, path: str) -> None:
+    def _get_diff_set(self, src: Set, tgt: Set, path: Path) -> None:
         """
         Compare two sets and report unique elements in each.
 
         :param src: Source set.
         :param tgt: Target set.
-        :param path: The current path string.
+        :param path: The current path tuple.
         :return: None
         """
+        set_path = _format_path(path)
         for item in src - tgt:
-            self.changes.append([path, _format_value(item), "Not Present in Set"])
+            self.changes.append([set_path, _format_value(item), "Not Present in Set"])
         for item in tgt - src:
-            self.changes.append([path, "Not Present in Set", _format_value(item)])
+            self.changes.append([set_path, "Not Present in Set", _format_value(item)])
+
+    def _canonical(
+        self, obj: Any, path: Path, ancestors: Optional[Set[int]] = None
+    ) -> Any:
+        """
+        Convert an object to a JSON-serialisable form with excluded paths removed,
+        where the order of unordered collections doesn't matter.
+
+        :param obj: The object to convert.
+        :param path: The current path tuple.
+        :param ancestors: IDs of the containers being converted, to stop on circular references.
+        :return: The canonical form of the object.
+        """
+        if isinstance(obj, (str, int, float, bool, type(None))):
+            return obj
+        if not isinstance(obj, (dict, list, set)):
+            return repr(obj)
+        ancestors = ancestors or set()
+        if id(obj) in ancestors:
+            return "<circular>"
+        ancestors.add(id(obj))
+        if isinstance(obj, dict):
+            canonical = {}
+            for key, value in obj.items():
+                key_path = path + (str(key),)
+                if not self._is_excluded(key_path):
+                    canonical[str(key)] = self._canonical(value, key_path, ancestors)
+        else:
+            unordered = self.ignore_order or isinstance(obj, set)
+            canonical = [
+                self._canonical(item, path + (None if unordered else i,), ancestors)
+                for i, item in enumerate(obj)
+            ]
+            if unordered:
+                canonical.sort(key=lambda item: json.dumps(item, sort_keys=True))
+        ancestors.discard(id(obj))
+        return canonical
+
+    def fingerprint(self, obj: Any) -> str:
+        """
+        Get a stable hash of an object, ignoring excluded paths (and list order if ignore_order is set).
+        Objects with no differences between them have the same fingerprint.
 
-    def diff(self, obj1: Any, obj2: Any) -> List[List[str]]:
+        :param obj: The object to fingerprint.
+        :return: Hex digest of the object's canonical form.
+        """
+        if self._is_excluded(()):
+            obj = None
+        canonical = json.dumps(
+            self._canonical(obj, ()), sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def diff(self, obj1: Any, obj2: Any, path: Path = ()) -> List[List[str]]:
         """
         Recursively compare two arbitrary objects (dict, list, set, or primitive).
 
         :param obj1: Source object.
         :param obj2: Target object.
+        :param path: Path tuple of the objects being compared, if they are nested in a larger object.
         :return: List of differences [Path, SourceValue, TargetValue].
         """
         self.changes.clear()
@@ -250,7 +449,7 @@ class DiffUtils:
         self.visited_pairs.clear()
 
         # Seed the queue with the root objects
-        self.queue.append((obj1, obj2, "root"))
+        self.queue.append((obj1, obj2, path))
 
         while self.queue:
             src, tgt, path = self.queue.popleft()
@@ -267,7 +466,9 @@ class DiffUtils:
 
             # Type mismatch
             if not isinstance(src, type(tgt)):
-                self.changes.append([path, _format_value(src), _format_value(tgt)])
+                self.changes.append(
+                    [_format_path(path), _format_value(src), _format_value(tgt)]
+                )
                 continue
 
             # Dispatch based on type
@@ -282,7 +483,9 @@ class DiffUtils:
                 self._get_diff_set(src, tgt, path)
             elif src != tgt:
                 # Base case: primitive inequality
-                self.changes.append([path, _format_value(src), _format_value(tgt)])
+                self.changes.append(
+                    [_format_path(path), _format_value(src), _format_value(tgt)]
+                )
 
         return self.changes
 
@@ -303,3 +506,19 @@ def get_diff(
     :return: List of differences [Path, SourceValue, TargetValue].
     """
     return DiffUtils(exclude_paths, ignore_order).diff(obj1, obj2)
+
+
+def get_fingerprint(
+    obj: Union[Dict, List, Set, Any],
+    exclude_paths: Union[List[str], Set[str]] = None,
+    ignore_order: bool = True,
+) -> str:
+    """
+    Convenience wrapper to fingerprint an object with DiffUtils without instantiating directly.
+
+    :param obj: The object to fingerprint.
+    :param exclude_paths: Optional set of paths to exclude.
+    :param ignore_order: If True, lists are treated as unordered collections.
+    :return: Hex digest which changes only if get_diff would find a difference.
+    """
+    return DiffUtils(exclude_paths, ignore_order).fingerprint(obj)
@@ -0,0 +1,114 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Union
+
+_WHITESPACE = " \t\n\r"
+# characters which can continue a number, i.e. after "1697000000" comes ".25" or "e9"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class _StreamReader:
+    """
+    Buffer over chunks of JSON text, read only as far as needed to decode the next value
+    """
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+
+    def fill(self) -> bool:
+        """
+        Read the next chunk into the buffer, dropping what has already been consumed
+        :return: False if there are no more chunks
+        """
+        for chunk in self._chunks:
+            text = chunk if isinstance(chunk, str) else self._decoder.decode(chunk)
+            if text:
+                self.buffer = self.buffer[self.pos :] + text
+                self.pos = 0
+                return True
+        return False
+
+    def peek(self) -> str:
+        """
+        Skip whitespace and return the next character without consuming it
+        :raises ValueError: when the text ends before the next character
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON")
+
+    def expect(self, char: str) -> None:
+        """
+        Consume the next character, which must be the one given
+        :raises ValueError: when the next character is different
+        """
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' at {self.pos}, found '{found}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """
+        Decode the next JSON value, reading more chunks until it is complete
+        :raises json.JSONDecodeError: when the value is invalid
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # a number only followed by characters which can continue it, i.e. "1697000000."
+            # at the end of the buffer, may continue into the next chunk
+            if (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and not self.buffer[end:].strip(_NUMBER_CHARS)
+                and self.fill()
+            ):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(chunks: Iterable[Union[bytes, str]], key: str) -> Iterator[Any]:
+    """
+    Yields each item of an array in a JSON object as soon as it has been read, i.e. the
+    "results" of an API response, so the whole response is never held in memory
+    :param chunks: the JSON text of the object, in chunks of bytes or strings,
+        i.e. response.iter_content()
+    :param key: key of the array in the top level of the object
+    :raises ValueError: when the text is not an object with an array under the key
+    """
+    reader = _StreamReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name != key:
+            # other values are small, i.e. an error message, so are read whole and skipped
+            reader.value()
+        else:
+            reader.expect("[")
+            if reader.peek() == "]":
+                return
+            while True:
+                yield reader.value()
+                if reader.peek() == "]":
+                    return
+                reader.expect(",")
+        if reader.peek() == "}":
+            return
+        reader.expect(",")
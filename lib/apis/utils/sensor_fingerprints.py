@@ -0,0 +1,96 @@
+import json
+from typing import Dict, Iterable, List, Optional
+
+from apis.utils.diff_utils import get_fingerprint
+
+
+class FingerprintStore:
+    """
+    Remembers the fingerprints of resources a sensor compares between two clouds, and the
+    mismatch last reported for each, so a poll only re-diffs resources which changed
+    on either side and only dispatches mismatches which are new or have changed.
+    Fingerprints are kept in memory and saved to the sensor datastore as a single value,
+    so they survive a sensor restart.
+    """
+
+    def __init__(self, sensor_service, name: str):
+        """
+        :param sensor_service: The sensor service of the sensor using the store
+        :param name: Name of the datastore value the fingerprints are saved under
+        """
+        self.sensor_service = sensor_service
+        self.name = name
+        self._log = sensor_service.get_logger(__name__)
+        # resource name -> {"source": fingerprint, "target": fingerprint, "mismatch": fingerprint}
+        self._fingerprints: Optional[Dict[str, Dict[str, Optional[str]]]] = None
+
+    def load(self) -> None:
+        """
+        Load fingerprints from the datastore, the first time they're needed
+        """
+        if self._fingerprints is not None:
+            return
+        value = self.sensor_service.get_value(name=self.name, local=True)
+        try:
+            self._fingerprints = json.loads(value) if value else {}
+        except (TypeError, ValueError):
+            self._log.warning("Ignoring unreadable fingerprints in %s", self.name)
+            self._fingerprints = {}
+
+    def save(self, resource_names: Iterable[str]) -> None:
+        """
+        Forget resources which weren't seen in the last poll, then save to the datastore
+        :param resource_names: Names of the resources seen in the last poll
+        """
+        self.load()
+        seen = set(resource_names)
+        self._fingerprints = {
+            name: state for name, state in self._fingerprints.items() if name in seen
+        }
+        self.sensor_service.set_value(
+            name=self.name, value=json.dumps(self._fingerprints), local=True
+        )
+
+    def is_unchanged(
+        self, resource_name: str, source_fingerprint: str, target_fingerprint: str
+    ) -> bool:
+        """
+        Checks whether a resource was compared before with the same fingerprints on both sides
+        :param resource_name: Name of the resource
+        :param source_fingerprint: Fingerprint of the resource in the source cloud
+        :param target_fingerprint: Fingerprint of the resource in the target cloud, None if it's missing
+        """
+        self.load()
+        state = self._fingerprints.get(resource_name)
+        return bool(
+            state
+            and state["source"] == source_fingerprint
+            and state["target"] == target_fingerprint
+        )
+
+    def record(
+        self,
+        resource_name: str,
+        source_fingerprint: str,
+        target_fingerprint: Optional[str],
+        mismatch: Optional[List],
+    ) -> bool:
+        """
+        Record the result of comparing a resource
+        :param resource_name: Name of the resource
+        :param source_fingerprint: Fingerprint of the resource in the source cloud
+        :param target_fingerprint: Fingerprint of the resource in the target cloud, None if it's missing
+        :param mismatch: The mismatch found, if any
+        :return: True if the mismatch is new or differs from the one last reported, and so should be dispatched
+        """
+        self.load()
+        previous = self._fingerprints.get(resource_name, {}).get("mismatch")
+        mismatch_fingerprint = (
+            get_fingerprint(mismatch, ignore_order=False) if mismatch else None
+        )
+        self._fingerprints[resource_name] = {
+            "source": source_fingerprint,
+            "target": target_fingerprint,
+            "mismatch": mismatch_fingerprint,
+        }
+        return bool(mismatch_fingerprint) and mismatch_fingerprint != previous
@@ -13,7 +13,7 @@ from apis.openstack_api.openstack_project import (
     create_project as create_openstack_project,
 )
 from apis.openstack_api.openstack_quota import set_quota
-from apis.openstack_api.openstack_roles import assign_role_to_user
+from apis.openstack_api.openstack_roles import assign_role_to_users
 from apis.openstack_api.openstack_router import add_interface_to_router, create_router
 from apis.openstack_api.openstack_security_groups import (
     create_external_security_group_rules,
@@ -28,7 +28,6 @@ from apis.openstack_api.structs.network_details import NetworkDetails
 from apis.openstack_api.structs.network_rbac import NetworkRbac
 from apis.openstack_api.structs.project_details import ProjectDetails
 from apis.openstack_api.structs.quota_details import QuotaDetails
-from apis.openstack_api.structs.role_details import RoleDetails
 from apis.openstack_api.structs.router_details import RouterDetails
 from openstack.connection import Connection
 from openstack.identity.v3.project import Project
@@ -125,29 +124,27 @@ def create_project(
     create_http_security_group(conn, project_identifier=project["id"])
     create_https_security_group(conn, project_identifier=project["id"])
 
-    for admin_user in admin_user_list:
-        assign_role_to_user(
+    failed = []
+    for users, role, domain in [
+        (admin_user_list, "admin", UserDomains.DEFAULT),
+        (user_list, "user", UserDomains.from_string(user_domain)),
+    ]:
+        for result in assign_role_to_users(
             conn,
-            RoleDetails(
-                user_identifier=admin_user,
-                user_domain=UserDomains.DEFAULT,
-                project_identifier=project["id"],
-                role_identifier="admin",
-            ),
-        )
-        logger.info("Added %s as project admin", admin_user)
-
-    for user in user_list:
-        assign_role_to_user(
-            conn,
-            RoleDetails(
-                user_identifier=user,
-                user_domain=UserDomains.from_string(user_domain),
-                project_identifier=project["id"],
-                role_identifier="user",
-            ),
+            project_identifier=project["id"],
+            role_identifier=role,
+            user_identifiers=users,
+            user_domain=domain,
+        ):
+            if result.assigned:
+                logger.info("Added %s as project %s", result.user_identifier, role)
+            else:
+                failed.append(f"{result.user_identifier} ({role}): {result.error}")
+    if failed:
+        raise RuntimeError(
+            f"Project {project_name} was created, but these users could not be added: "
+            + "; ".join(failed)
         )
-        logger.info("Added %s as project user", user)
     logger.info("Competed building project %s", project_name)
 
 
@@ -1,10 +1,9 @@
 import re
 from typing import List, Optional
 
-from apis.openstack_api.openstack_connection import OpenstackConnection
-from apis.openstack_api.openstack_hypervisor import get_available_flavors
-from openstack.connection import Connection
-from openstackquery import HypervisorQuery, ServerQuery
+from apis.openstack_api.openstack_hypervisor import HypervisorFlavorIndex
+from apis.openstack_query_api.cloud_snapshot import get_cloud_snapshot
+from openstackquery import HypervisorQuery
 
 # pylint:disable=too-many-arguments
 # pylint:disable=too-many-locals
@@ -27,7 +26,8 @@ def find_reinstall_candidate_hypervisors(
 ):
     """
     Finds candidate hypervisors for reinstallation based on resource usage,
-    hostname/IP filtering, and allowed or disallowed flavor types.
+    hostname/IP filtering, and allowed or disallowed flavor types. Hypervisors, VM counts
+    and flavors are all read from the shared cloud snapshot.
 
     :param cloud_account: A string representing the cloud account to use - set in clouds.yaml
     :param ip_regex: Regular expression pattern to filter hypervisor IPs (default: "172.16.x.x").
@@ -89,33 +89,32 @@ def find_reinstall_candidate_hypervisors(
     if sort_by and sort_by != "running_vms":
         query.sort_by((sort_by, sort_direction))
 
+    snapshot = get_cloud_snapshot(cloud_account)
+
     if include_flavours or exclude_flavours:
-        query.run(cloud_account, **kwargs)
+        query.run(cloud_account, from_subset=snapshot.hypervisor_objects, **kwargs)
         hvs = query.to_props(flatten=True)
 
-        with OpenstackConnection(cloud_account) as conn:
-            allowed_hv_names = filter_hypervisors_by_flavour(
-                conn, hvs["hypervisor_name"], include_flavours, exclude_flavours
-            )
+        allowed_hv_names = filter_hypervisors_by_flavour(
+            snapshot.flavor_index,
+            hvs["hypervisor_name"],
+            include_flavours,
+            exclude_flavours,
+        )
 
         query.where(
             preset="ANY_IN",
             prop="name",
             value=allowed_hv_names,
         )
-    query.run(cloud_account, **kwargs)
+    query.run(cloud_account, from_subset=snapshot.hypervisor_objects, **kwargs)
 
     # pylint: disable=protected-access
     hypervisor_results = query.results_container._results
 
-    server_query = ServerQuery()
-    server_query.group_by("hypervisor_name")
-    server_query.run(cloud_account, all_projects=True, as_admin=True)
-    servers_grouped = server_query.to_props()
-
     for hv_result in hypervisor_results:
         hv_name = hv_result.get_prop(hv_result._prop_enum_cls.HYPERVISOR_NAME)
-        running_vms_count = len(servers_grouped.get(hv_name, []))
+        running_vms_count = snapshot.server_count(hv_name)
         hv_result.update_forwarded_properties({"running_vms": running_vms_count})
 
     if max_vms is not None:
@@ -147,13 +146,13 @@ def find_reinstall_candidate_hypervisors(
 
 
 def filter_hypervisors_by_flavour(
-    conn: Connection,
+    flavor_index: HypervisorFlavorIndex,
     hv_names: List[str],
     include_flavours: Optional[List[str]],
     exclude_flavours: Optional[List[str]],
 ) -> List[str]:
-    def check_flavours_allowed(conn, hv_name):
-        flavours = set(get_available_flavors(conn, hv_name))
+    def check_flavours_allowed(hv_name):
+        flavours = set(flavor_index.flavors_for(hv_name))
 
         if include_flavours:
             if not set(include_flavours).intersection(flavours):
@@ -165,7 +164,7 @@ def filter_hypervisors_by_flavour(
 
         return True
 
-    allowed_hv_names = [name for name in hv_names if check_flavours_allowed(conn, name)]
+    allowed_hv_names = [name for name in hv_names if check_flavours_allowed(name)]
 
     return allowed_hv_names
 
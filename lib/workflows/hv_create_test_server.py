@@ -1,33 +1,31 @@
 import logging
 import random
 import re
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
 
 from openstack.connection import Connection
-from apis.openstack_api.openstack_hypervisor import get_available_flavors
+from apis.openstack_api.openstack_hypervisor import HypervisorFlavorIndex
 from apis.openstack_api.openstack_server import build_server, delete_server
+from apis.openstack_api.structs.server_build_result import ServerBuildResult
 
 logger = logging.getLogger(__name__)
 
+# pylint:disable=too-many-arguments
 
-def create_test_server_single_hypervisor(
-    conn: Connection,
-    hypervisor_name: str,
-    test_all_flavors: bool,
-    delete_on_failure: bool,
-) -> None:
+
+def _validate_hypervisor_name(hypervisor_name: str) -> str:
     """
-    Create a test server on a hypervisor, option to test all possible flavors avaliable to the hypervisor
+    Checks a hypervisor hostname is not empty and has no special characters
 
-    :param conn: openstack connection object
-    :type conn: Connection
     :param hypervisor_name: Hostname of the hypervisor
     :type hypervisor_name: str
-    :param test_all_flavors: Option to test all possible flavors avaliable to the hypervisor
-    :type test_all_flavors: bool
-    :return: None
-    :rtype: None
+    :return: The hostname with leading/trailing whitespace removed
+    :rtype: str
     """
-    # 1st we ensure the hypervisor name is correct
     # remove potential leading/trailing whitespaces
     hypervisor_name = hypervisor_name.strip()
     if not hypervisor_name:
@@ -42,13 +40,59 @@ def create_test_server_single_hypervisor(
     # - dash (-)
     if not pattern.fullmatch(hypervisor_name):
         raise ValueError("Hypervisor hostname cannot include special characters")
-    # if everything is OK with the hostname we can proceed
-    flavors = get_available_flavors(conn, hypervisor_name)
+    return hypervisor_name
+
+
+def _select_flavors(
+    flavor_index: HypervisorFlavorIndex, hypervisor_name: str, test_all_flavors: bool
+) -> List[str]:
+    """
+    Get the flavors to test on a hypervisor - either all of them or one at random
+
+    :param flavor_index: Index of flavors available to each hypervisor
+    :type flavor_index: HypervisorFlavorIndex
+    :param hypervisor_name: Hostname of the hypervisor
+    :type hypervisor_name: str
+    :param test_all_flavors: Option to test all possible flavors avaliable to the hypervisor
+    :type test_all_flavors: bool
+    :return: List of flavor names
+    :rtype: List[str]
+    """
+    flavors = list(dict.fromkeys(flavor_index.flavors_for(hypervisor_name)))
     logger.info("Flavors avaliable to %s: %s", hypervisor_name, flavors)
+    if not flavors:
+        raise ValueError(f"No flavors are avaliable to hypervisor {hypervisor_name}")
     if not test_all_flavors:
         flavors = [random.choice(flavors)]
-    for flavor in flavors:
-        logger.info("Building flavor: %s", flavor)
+    return flavors
+
+
+def _build_and_delete_test_server(
+    conn: Connection, hypervisor_name: str, flavor: str, delete_on_failure: bool
+) -> ServerBuildResult:
+    """
+    Build a test server with the given flavor on a hypervisor and then delete it, timing each step
+
+    :param conn: openstack connection object
+    :type conn: Connection
+    :param hypervisor_name: Hostname of the hypervisor
+    :type hypervisor_name: str
+    :param flavor: Name of the flavor to build
+    :type flavor: str
+    :param delete_on_failure: Delete the server if it errors during creation
+    :type delete_on_failure: bool
+    :return: Result of the build, recording any error instead of raising it
+    :rtype: ServerBuildResult
+    """
+    result = ServerBuildResult(
+        hypervisor_name=hypervisor_name,
+        flavor_name=flavor,
+        success=False,
+        build_seconds=0.0,
+    )
+    logger.info("Building flavor: %s on %s", flavor, hypervisor_name)
+    start = time.monotonic()
+    try:
         server = build_server(
             conn,
             "stackstorm-test-server",
@@ -58,9 +102,167 @@ def create_test_server_single_hypervisor(
             hypervisor_name,
             delete_on_failure,
         )
-        logger.info("✔ Successfully built flavor: %s", flavor)
+    except Exception as exc:  # pylint:disable=broad-exception-caught
+        result.build_seconds = time.monotonic() - start
+        result.error = f"Failed to build server: {exc}"
+        logger.error(
+            "Failed to build flavor %s on %s: %s", flavor, hypervisor_name, exc
+        )
+        return result
+    result.build_seconds = time.monotonic() - start
+    logger.info("✔ Successfully built flavor: %s on %s", flavor, hypervisor_name)
+
+    start = time.monotonic()
+    try:
         delete_server(conn, server.id)
-        logger.info("Successfully deleted flavor: %s", flavor)
+    except Exception as exc:  # pylint:disable=broad-exception-caught
+        result.error = f"Failed to delete server {server.id}: {exc}"
+        logger.error("Failed to delete server %s: %s", server.id, exc)
+        return result
+    result.delete_seconds = time.monotonic() - start
+    result.success = True
+    logger.info("Successfully deleted flavor: %s on %s", flavor, hypervisor_name)
+    return result
+
+
+def _run_test_server_builds(
+    conn: Connection,
+    builds: List[Tuple[str, str]],
+    delete_on_failure: bool,
+    max_concurrent_builds: int,
+    max_builds_per_hypervisor: int,
+) -> List[ServerBuildResult]:
+    """
+    Build and delete test servers concurrently, with a limit on how many builds run at once
+    overall and on each hypervisor. Builds are started round-robin across hypervisors as
+    earlier builds finish, so the total time is close to that of the slowest builds rather than the sum
+
+    :param conn: openstack connection object
+    :type conn: Connection
+    :param builds: (hypervisor name, flavor name) pairs to build
+    :type builds: List[Tuple[str, str]]
+    :param delete_on_failure: Delete servers that error during creation
+    :type delete_on_failure: bool
+    :param max_concurrent_builds: Maximum number of servers to build at once
+    :type max_concurrent_builds: int
+    :param max_builds_per_hypervisor: Maximum number of servers to build at once on each hypervisor
+    :type max_builds_per_hypervisor: int
+    :return: Result of each build, in the order they finished
+    :rtype: List[ServerBuildResult]
+    """
+    if max_concurrent_builds < 1 or max_builds_per_hypervisor < 1:
+        raise ValueError("Maximum concurrent builds must be at least 1")
+
+    pending = defaultdict(deque)
+    for hypervisor_name, flavor in builds:
+        pending[hypervisor_name].append(flavor)
+
+    running = {}
+    running_per_hypervisor = defaultdict(int)
+    results = []
+    with ThreadPoolExecutor(max_workers=max_concurrent_builds) as executor:
+        while pending or running:
+            submitted = True
+            while submitted and len(running) < max_concurrent_builds:
+                submitted = False
+                for hypervisor_name in list(pending):
+                    if len(running) >= max_concurrent_builds:
+                        break
+                    if (
+                        running_per_hypervisor[hypervisor_name]
+                        >= max_builds_per_hypervisor
+                    ):
+                        continue
+                    future = executor.submit(
+                        _build_and_delete_test_server,
+                        conn,
+                        hypervisor_name,
+                        pending[hypervisor_name].popleft(),
+                        delete_on_failure,
+                    )
+                    running[future] = hypervisor_name
+                    running_per_hypervisor[hypervisor_name] += 1
+                    submitted = True
+                    if not pending[hypervisor_name]:
+                        del pending[hypervisor_name]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                running_per_hypervisor[running.pop(future)] -= 1
+                results.append(future.result())
+    return results
+
+
+def _to_result_matrix(
+    results: List[ServerBuildResult], raise_on_failure: bool
+) -> Dict[str, Dict[str, Dict]]:
+    """
+    Arrange build results into a hypervisor x flavor matrix
+
+    :param results: Result of each build
+    :type results: List[ServerBuildResult]
+    :param raise_on_failure: Raise an error if any build failed
+    :type raise_on_failure: bool
+    :return: Dictionary of hypervisor name to flavor name to build result
+    :rtype: Dict[str, Dict[str, Dict]]
+    """
+    matrix = defaultdict(dict)
+    for result in results:
+        matrix[result.hypervisor_name][result.flavor_name] = asdict(result)
+
+    failures = [result for result in results if not result.success]
+    if failures and raise_on_failure:
+        raise RuntimeError(
+            f"{len(failures)} of {len(results)} test servers failed: "
+            + ", ".join(
+                f"{result.hypervisor_name} ({result.flavor_name}): {result.error}"
+                for result in failures
+            )
+        )
+    return dict(matrix)
+
+
+def create_test_server_single_hypervisor(
+    conn: Connection,
+    hypervisor_name: str,
+    test_all_flavors: bool,
+    delete_on_failure: bool,
+    flavor_index: Optional[HypervisorFlavorIndex] = None,
+    max_concurrent_builds: int = 1,
+    raise_on_failure: bool = True,
+) -> Dict[str, Dict]:
+    """
+    Create a test server on a hypervisor, option to test all possible flavors avaliable to the hypervisor
+
+    :param conn: openstack connection object
+    :type conn: Connection
+    :param hypervisor_name: Hostname of the hypervisor
+    :type hypervisor_name: str
+    :param test_all_flavors: Option to test all possible flavors avaliable to the hypervisor
+    :type test_all_flavors: bool
+    :param flavor_index: Index of flavors available to each hypervisor, built from conn if not given
+    :type flavor_index: HypervisorFlavorIndex
+    :param max_concurrent_builds: Maximum number of flavors to build at once
+    :type max_concurrent_builds: int
+    :param raise_on_failure: Raise an error once all builds finish if any of them failed
+    :type raise_on_failure: bool
+    :return: Dictionary of flavor name to build result
+    :rtype: Dict[str, Dict]
+    """
+    # 1st we ensure the hypervisor name is correct
+    hypervisor_name = _validate_hypervisor_name(hypervisor_name)
+    # if everything is OK with the hostname we can proceed
+    if flavor_index is None:
+        flavor_index = HypervisorFlavorIndex.from_connection(conn)
+    flavors = _select_flavors(flavor_index, hypervisor_name, test_all_flavors)
+    results = _run_test_server_builds(
+        conn,
+        [(hypervisor_name, flavor) for flavor in flavors],
+        delete_on_failure,
+        max_concurrent_builds,
+        max_concurrent_builds,
+    )
+    return _to_result_matrix(results, raise_on_failure).get(hypervisor_name, {})
 
 
 def _str_to_list(hypervisor_names):
@@ -99,9 +301,14 @@ def create_test_server(
     hypervisor_names: str,
     test_all_flavors: bool,
     delete_on_failure: bool,
-) -> None:
+    max_concurrent_builds: int = 10,
+    max_builds_per_hypervisor: int = 2,
+    raise_on_failure: bool = True,
+) -> Dict[str, Dict[str, Dict]]:
     """
-    Create a test server on one or more hypervisors
+    Create a test server on one or more hypervisors.
+    Servers are built concurrently, up to max_concurrent_builds at once overall and
+    max_builds_per_hypervisor at once on each hypervisor
 
     :param conn: openstack connection object
     :type conn: Connection
@@ -109,14 +316,34 @@ def create_test_server(
     :type hypervisor_name: str
     :param test_all_flavors: Option to test all possible flavors avaliable to the hypervisor
     :type test_all_flavors: bool
-    :return: None
-    :rtype: None
+    :param max_concurrent_builds: Maximum number of servers to build at once
+    :type max_concurrent_builds: int
+    :param max_builds_per_hypervisor: Maximum number of servers to build at once on each hypervisor
+    :type max_builds_per_hypervisor: int
+    :param raise_on_failure: Raise an error once all builds finish if any of them failed
+    :type raise_on_failure: bool
+    :return: Dictionary of hypervisor name to flavor name to build result,
+    with whether it passed, the build and delete timings and any error
+    :rtype: Dict[str, Dict[str, Dict]]
     """
     # 1st we convert the hypervisor_names string into a list
-    hv_name_l = _str_to_list(hypervisor_names)
-    # now we loop over all individual hypervisor names
-    # and call the function that checks the VM creation
-    for hv_name in hv_name_l:
-        create_test_server_single_hypervisor(
-            conn, hv_name, test_all_flavors, delete_on_failure
-        )
+    hv_name_l = [
+        _validate_hypervisor_name(name) for name in _str_to_list(hypervisor_names)
+    ]
+    # aggregates and flavors are listed once and shared by every hypervisor
+    flavor_index = HypervisorFlavorIndex.from_connection(conn)
+    # now we work out every hypervisor/flavor combination to test
+    # and build them all concurrently
+    builds = [
+        (hv_name, flavor)
+        for hv_name in hv_name_l
+        for flavor in _select_flavors(flavor_index, hv_name, test_all_flavors)
+    ]
+    results = _run_test_server_builds(
+        conn,
+        builds,
+        delete_on_failure,
+        max_concurrent_builds,
+        max_builds_per_hypervisor,
+    )
+    return _to_result_matrix(results, raise_on_failure)
@@ -0,0 +1,88 @@
+import logging
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+from openstack.connection import Connection
+from apis.openstack_api.openstack_drain import DrainEngine
+from apis.openstack_api.openstack_service import disable_service
+
+logger = logging.getLogger(__name__)
+
+# pylint:disable=too-many-arguments
+
+
+def drain_hypervisors(
+    conn: Connection,
+    hypervisor_names: List[str],
+    disabled_reason: str,
+    live_migration: bool = True,
+    max_migrations: int = 3,
+    max_migrations_per_source: int = 1,
+    max_migrations_per_destination: int = 1,
+    cpu_allocation_ratio: Optional[float] = None,
+    checkpoint_path: Optional[str] = None,
+    raise_on_failure: bool = True,
+) -> List[Dict]:
+    """
+    Disable one or more hypervisors and migrate all of their servers elsewhere
+
+    :param conn: openstack connection object
+    :type conn: Connection
+    :param hypervisor_names: Hostnames of the hypervisors to drain
+    :type hypervisor_names: List[str]
+    :param disabled_reason: Reason for draining the hypervisors
+    :type disabled_reason: str
+    :param live_migration: Live migrate ACTIVE servers, otherwise cold migrate them
+    :type live_migration: bool
+    :param max_migrations: Maximum number of migrations to run at once in the cloud
+    :type max_migrations: int
+    :param max_migrations_per_source: Maximum number of migrations to run at once from each hypervisor
+    :type max_migrations_per_source: int
+    :param max_migrations_per_destination: Maximum number of migrations to run at once to each destination
+    :type max_migrations_per_destination: int
+    :param cpu_allocation_ratio: Number of vcpus that can be allocated per physical cpu on a destination,
+        by default the allocation ratio of each hypervisor in Placement is used
+    :type cpu_allocation_ratio: float
+    :param checkpoint_path: Optional path to save progress to, an interrupted drain resumes from here
+    :type checkpoint_path: str
+    :param raise_on_failure: Raise an error once the drain finishes if any server could not be migrated
+    :type raise_on_failure: bool
+    :return: Result of migrating each server
+    :rtype: List[Dict]
+    """
+    hypervisor_names = [name.strip() for name in hypervisor_names if name.strip()]
+    if not hypervisor_names:
+        raise ValueError("No hypervisors given to drain")
+
+    # stop anything new being scheduled to the hypervisors while we empty them
+    for hypervisor_name in hypervisor_names:
+        disable_service(
+            conn=conn,
+            hypervisor_name=hypervisor_name,
+            service_binary="nova-compute",
+            disabled_reason=disabled_reason,
+        )
+
+    engine = DrainEngine(
+        conn,
+        max_migrations=max_migrations,
+        max_per_source=max_migrations_per_source,
+        max_per_destination=max_migrations_per_destination,
+        cpu_allocation_ratio=cpu_allocation_ratio,
+        live_migration=live_migration,
+        checkpoint_path=checkpoint_path,
+    )
+    results = engine.drain(hypervisor_names)
+
+    failures = [result for result in results if not result.success]
+    if failures and raise_on_failure:
+        raise RuntimeError(
+            f"Failed to migrate {len(failures)} of {len(results)} servers: "
+            + ", ".join(f"{result.server_id}: {result.error}" for result in failures)
+        )
+    logger.info(
+        "Drained hypervisors %s, migrated %s servers",
+        ", ".join(hypervisor_names),
+        len(results) - len(failures),
+    )
+    return [asdict(result) for result in results]
@@ -1,4 +1,6 @@
 import datetime
+from dataclasses import asdict
+from typing import Dict
 
 from paramiko import SSHException
 
@@ -7,10 +9,9 @@ from apis.icinga_api.downtime import schedule_downtime, remove_downtime
 from apis.icinga_api.structs.downtime_details import DowntimeDetails
 from apis.icinga_api.structs.icinga_account import IcingaAccount
 
-from apis.alertmanager_api.silence import remove_silence, schedule_silence
-from apis.alertmanager_api.structs.alert_matcher_details import AlertMatcherDetails
+from apis.alertmanager_api.alertmanager_client import get_alertmanager_client
+from apis.alertmanager_api.silence import hv_silence_details
 from apis.alertmanager_api.structs.alertmanager_account import AlertManagerAccount
-from apis.alertmanager_api.structs.silence_details import SilenceDetails
 
 from apis.ssh_api.structs.ssh_connection_details import SSHDetails
 from apis.ssh_api.exec_command import SSHConnection
@@ -22,7 +23,7 @@ def patch_and_reboot(
     icinga_account: IcingaAccount,
     hypervisor_name: str,
     private_key_path: str,
-) -> None:
+) -> Dict[str, Dict]:
     """
     Takes the selected hypervisor, schedules a downtime on it starting immediately then runs
     the patch and reboot scripts on the machine, before ending the downtime.
@@ -30,7 +31,7 @@ def patch_and_reboot(
     :param icinga_account: IcingaAccount: The icinga account object to use to schedule and remove the downtimes
     :param hypervisor_name: the name of the hypervisor - should also be the host name on icinga
     :param private_key_path: Path to the stackstorm key
-    return: None
+    return: the exit code and the head and tail of the output of the patch and reboot scripts
     """
     connection_details = SSHDetails(
         host=hypervisor_name, username="stackstorm", private_key_path=private_key_path
@@ -50,37 +51,27 @@ def patch_and_reboot(
         duration=end_timestamp - start_timestamp,
     )
     schedule_downtime(icinga_account=icinga_account, details=downtime_details)
-    matcher_instance = AlertMatcherDetails(name="instance", value=hypervisor_name)
-    silence_details_instance = SilenceDetails(
-        matchers=[matcher_instance],
-        author="stackstorm",
-        comment="Stackstorm: HV Patching",
-        start_time_dt=datetime.datetime.utcnow(),
-        duration_hours=6,
-    )
-    scheduled_silence_id_instance = schedule_silence(
-        alertmanager_account, silence_details_instance
-    )
-    matcher_hostname = AlertMatcherDetails(name="hostname", value=hypervisor_name)
-    silence_details_hostname = SilenceDetails(
-        matchers=[matcher_hostname],
-        author="stackstorm",
-        comment="Stackstorm: HV Patching",
-        start_time_dt=datetime.datetime.utcnow(),
-        duration_hours=6,
-    )
-    scheduled_silence_id_hostname = schedule_silence(
-        alertmanager_account, silence_details_hostname
+    alertmanager_client = get_alertmanager_client(alertmanager_account)
+    scheduled_silence_ids = alertmanager_client.schedule_silences(
+        hv_silence_details(
+            [hypervisor_name],
+            comment="Stackstorm: HV Patching",
+            start_time_dt=datetime.datetime.utcnow(),
+            duration_hours=6,
+        )
     )
     try:
-        ssh_client.run_command_on_host("patch")
-        ssh_client.run_command_on_host("reboot")
+        # both commands are run over the same connection
+        patch_result = ssh_client.run_command_on_host("patch")
+        reboot_result = ssh_client.run_command_on_host("reboot")
     except SSHException as exc:
         remove_downtime(
             icinga_account=icinga_account,
             object_type=IcingaObject.HOST,
             object_name=hypervisor_name,
         )
-        remove_silence(alertmanager_account, scheduled_silence_id_instance)
-        remove_silence(alertmanager_account, scheduled_silence_id_hostname)
+        alertmanager_client.remove_silences(scheduled_silence_ids)
         raise exc
+    finally:
+        ssh_client.close()
+    return {"patch": asdict(patch_result), "reboot": asdict(reboot_result)}
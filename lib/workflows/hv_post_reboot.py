@@ -1,7 +1,7 @@
 from openstack.connection import Connection
 
 from apis.openstack_api.openstack_service import enable_service
-from apis.alertmanager_api.silence import get_hv_silences, remove_silence
+from apis.alertmanager_api.alertmanager_client import get_alertmanager_client
 from apis.alertmanager_api.structs.alertmanager_account import AlertManagerAccount
 from apis.icinga_api.enums.icinga_objects import IcingaObject
 from apis.icinga_api.structs.icinga_account import IcingaAccount
@@ -36,6 +36,6 @@ def post_reboot(
         test_all_flavors=False,
         delete_on_failure=True,
     )
-    silences = get_hv_silences(alertmanager_account, hypervisor_hostname)
-    for silence_id in silences:
-        remove_silence(alertmanager_account, silence_id)
+    get_alertmanager_client(alertmanager_account).remove_hv_silences(
+        [hypervisor_hostname]
+    )
@@ -0,0 +1,379 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from paramiko.ssh_exception import SSHException
+
+from apis.icinga_api.enums.icinga_objects import IcingaObject
+from apis.icinga_api.icinga_client import get_icinga_client
+from apis.icinga_api.structs.downtime_details import DowntimeDetails
+from apis.icinga_api.structs.icinga_account import IcingaAccount
+from apis.icinga_api.structs.object_query import IcingaQuery
+
+from apis.alertmanager_api.alertmanager_client import get_alertmanager_client
+from apis.alertmanager_api.silence import hv_silence_details
+from apis.alertmanager_api.structs.alertmanager_account import AlertManagerAccount
+
+from apis.ssh_api.structs.ssh_connection_details import SSHDetails
+from apis.ssh_api.exec_command import SSHConnection
+
+DOWNTIME_HOURS = 6
+# changes every time a host boots, so tells whether a hypervisor has rebooted
+BOOT_ID_COMMAND = "cat /proc/sys/kernel/random/boot_id"
+
+
+@dataclass
+class HostPatchResult:
+    """
+    Outcome of patching and rebooting one hypervisor
+    """
+
+    hypervisor_name: str
+    succeeded: bool
+    duration_seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class PatchWaveResult:
+    """
+    Outcome and timings of one wave of hypervisors patched and rebooted together
+    """
+
+    wave: int
+    hypervisor_names: List[str]
+    started_at: str
+    duration_seconds: float = 0.0
+    hosts: List[HostPatchResult] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[str]:
+        """
+        Names of the hypervisors in this wave which failed
+        """
+        return [host.hypervisor_name for host in self.hosts if not host.succeeded]
+
+
+class _HostOutput:
+    """
+    Prints output from a hypervisor a line at a time, prefixed with its name, so the output
+    of hypervisors patched at the same time isn't interleaved mid-line
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, hypervisor_name: str):
+        self.prefix = f"[{hypervisor_name}] "
+        self.partial_line = ""
+
+    def __call__(self, output: str) -> None:
+        *lines, self.partial_line = (self.partial_line + output).split("\n")
+        if lines:
+            with self._lock:
+                for line in lines:
+                    print(self.prefix + line)
+
+    def flush(self) -> None:
+        """
+        Print any output received after the last newline
+        """
+        if self.partial_line:
+            with self._lock:
+                print(self.prefix + self.partial_line)
+            self.partial_line = ""
+
+
+def get_hostgroup_members(icinga_account: IcingaAccount, hostgroup: str) -> List[str]:
+    """
+    Get the names of the hosts in an Icinga host group
+    :param icinga_account: Account used to interact with icinga
+    :param hostgroup: Name of the host group
+    :return: names of the hosts in the group
+    """
+    query = IcingaQuery(
+        object_type="Host",
+        filter="hostgroup in host.groups",
+        filter_vars={"hostgroup": hostgroup},
+        properties_to_select=["name"],
+    )
+    return [
+        host["attrs"]["name"]
+        for host in get_icinga_client(icinga_account).iter_objects(query)
+    ]
+
+
+def _connect(hypervisor_name: str, private_key_path: str) -> SSHConnection:
+    """
+    Create a SSH connection to a hypervisor as stackstorm
+    :param hypervisor_name: the name of the hypervisor
+    :param private_key_path: Path to the stackstorm key
+    """
+    return SSHConnection(
+        SSHDetails(
+            host=hypervisor_name,
+            username="stackstorm",
+            private_key_path=private_key_path,
+        )
+    )
+
+
+def _patch_and_reboot_host(hypervisor_name: str, private_key_path: str) -> str:
+    """
+    Runs the patch and reboot scripts on a hypervisor, streaming its output
+    :param hypervisor_name: the name of the hypervisor
+    :param private_key_path: Path to the stackstorm key
+    :return: the boot ID of the hypervisor before it was rebooted
+    """
+    ssh_client = _connect(hypervisor_name, private_key_path)
+    output = _HostOutput(hypervisor_name)
+    try:
+        boot_id = ssh_client.run_command_on_host(BOOT_ID_COMMAND).output.strip()
+        ssh_client.run_command_on_host("patch", on_output=output)
+        ssh_client.run_command_on_host("reboot", on_output=output)
+    finally:
+        output.flush()
+        ssh_client.close()
+    return boot_id
+
+
+def _wait_until_ready(
+    hypervisor_name: str,
+    private_key_path: str,
+    boot_id: str,
+    timeout: float,
+    poll_interval: float,
+) -> bool:
+    """
+    Waits for a hypervisor to come back after being rebooted, which is when it can be
+    connected to over SSH again and has a new boot ID
+    :param hypervisor_name: the name of the hypervisor
+    :param private_key_path: Path to the stackstorm key
+    :param boot_id: the boot ID of the hypervisor before it was rebooted
+    :param timeout: seconds to wait for the hypervisor to come back
+    :param poll_interval: seconds to wait between attempts to connect
+    :return: True if the hypervisor came back before the timeout
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        ssh_client = None
+        try:
+            ssh_client = _connect(hypervisor_name, private_key_path)
+            res = ssh_client.run(BOOT_ID_COMMAND, timeout=60)
+        except (SSHException, OSError):
+            # still rebooting
+            continue
+        finally:
+            if ssh_client is not None:
+                ssh_client.close()
+        if res.succeeded and res.output.strip() != boot_id:
+            return True
+    return False
+
+
+# pylint:disable=too-many-locals,too-many-arguments
+def _run_wave(
+    alertmanager_account: AlertManagerAccount,
+    icinga_account: IcingaAccount,
+    hypervisor_names: List[str],
+    private_key_path: str,
+    wave: int,
+    ready_timeout: float,
+    ready_poll_interval: float,
+) -> PatchWaveResult:
+    """
+    Schedules downtimes and silences for a wave of hypervisors with one request each, then
+    patches and reboots every hypervisor in the wave at the same time, and waits for them
+    to come back. The downtime and silences of any hypervisor which fails, or doesn't come
+    back in time, are removed. If the silences can't be scheduled, the downtimes are
+    removed and every hypervisor in the wave fails without being patched
+    :param alertmanager_account: Alertmanager Account to use
+    :param icinga_account: The icinga account object to use to schedule and remove the downtimes
+    :param hypervisor_names: the names of the hypervisors in this wave
+    :param private_key_path: Path to the stackstorm key
+    :param wave: number of this wave, starting from 1
+    :param ready_timeout: seconds to wait for each hypervisor to come back after rebooting
+    :param ready_poll_interval: seconds to wait between checks that a hypervisor is back
+    """
+    result = PatchWaveResult(
+        wave=wave,
+        hypervisor_names=hypervisor_names,
+        started_at=datetime.datetime.utcnow().isoformat(),
+    )
+    wave_start = time.monotonic()
+
+    icinga_client = get_icinga_client(icinga_account)
+    alertmanager_client = get_alertmanager_client(alertmanager_account)
+
+    start_time = datetime.datetime.utcnow()
+    start_timestamp = int(start_time.timestamp())
+    end_timestamp = int(
+        (start_time + datetime.timedelta(hours=DOWNTIME_HOURS)).timestamp()
+    )
+    icinga_client.schedule_downtimes(
+        [
+            DowntimeDetails(
+                object_type=IcingaObject.HOST,
+                object_name=hypervisor_name,
+                start_time=start_timestamp,
+                end_time=end_timestamp,
+                comment=f"starting downtime to patch and reboot host: {hypervisor_name}",
+                is_fixed=True,
+                duration=end_timestamp - start_timestamp,
+            )
+            for hypervisor_name in hypervisor_names
+        ]
+    )
+    silences = hv_silence_details(
+        hypervisor_names,
+        comment="Stackstorm: HV Patching",
+        start_time_dt=datetime.datetime.utcnow(),
+        duration_hours=DOWNTIME_HOURS,
+    )
+    try:
+        scheduled = alertmanager_client.schedule_silences(silences)
+    except Exception as exc:  # pylint:disable=broad-exception-caught
+        # none of the wave is patched, so its downtimes would only hide real problems
+        icinga_client.remove_downtimes(IcingaObject.HOST, hypervisor_names)
+        result.hosts = [
+            HostPatchResult(
+                hypervisor_name=hypervisor_name,
+                succeeded=False,
+                duration_seconds=0.0,
+                error=f"Failed to schedule silences: {exc!r}",
+            )
+            for hypervisor_name in hypervisor_names
+        ]
+        result.duration_seconds = time.monotonic() - wave_start
+        return result
+    silence_ids: Dict[str, List[str]] = {}
+    for silence, silence_id in zip(silences, scheduled):
+        silence_ids.setdefault(silence.matchers[0].value, []).append(silence_id)
+
+    def _run(hypervisor_name):
+        host_start = time.monotonic()
+        try:
+            boot_id = _patch_and_reboot_host(hypervisor_name, private_key_path)
+        except Exception as exc:  # pylint:disable=broad-exception-caught
+            return HostPatchResult(
+                hypervisor_name=hypervisor_name,
+                succeeded=False,
+                duration_seconds=time.monotonic() - host_start,
+                error=repr(exc),
+            )
+        if not _wait_until_ready(
+            hypervisor_name,
+            private_key_path,
+            boot_id,
+            timeout=ready_timeout,
+            poll_interval=ready_poll_interval,
+        ):
+            return HostPatchResult(
+                hypervisor_name=hypervisor_name,
+                succeeded=False,
+                duration_seconds=time.monotonic() - host_start,
+                error=f"Did not come back within {ready_timeout} seconds of rebooting",
+            )
+        return HostPatchResult(
+            hypervisor_name=hypervisor_name,
+            succeeded=True,
+            duration_seconds=time.monotonic() - host_start,
+        )
+
+    with ThreadPoolExecutor(max_workers=len(hypervisor_names)) as executor:
+        result.hosts = list(executor.map(_run, hypervisor_names))
+
+    if result.failed:
+        icinga_client.remove_downtimes(IcingaObject.HOST, result.failed)
+        alertmanager_client.remove_silences(
+            [
+                silence_id
+                for hypervisor_name in result.failed
+                for silence_id in silence_ids.get(hypervisor_name, [])
+            ]
+        )
+
+    result.duration_seconds = time.monotonic() - wave_start
+    return result
+
+
+def rolling_patch_and_reboot(
+    alertmanager_account: AlertManagerAccount,
+    icinga_account: IcingaAccount,
+    private_key_path: str,
+    hypervisor_names: Optional[List[str]] = None,
+    icinga_hostgroup: Optional[str] = None,
+    parallelism: int = 5,
+    max_failures: int = 0,
+    ready_timeout: int = 1800,
+    ready_poll_interval: int = 30,
+) -> Tuple[bool, Dict]:
+    """
+    Patches and reboots many hypervisors in rolling waves. Each wave of up to parallelism
+    hypervisors is put into downtime and silenced together, then patched and rebooted at
+    the same time. The next wave only starts once every hypervisor in the wave is back from
+    rebooting, or has failed. Hypervisors which don't come back within ready_timeout count
+    as failed, and waves keep starting until more than max_failures hypervisors have failed
+    :param alertmanager_account: Alertmanager Account to use
+    :param icinga_account: The icinga account object to use to schedule and remove the downtimes
+    :param private_key_path: Path to the stackstorm key
+    :param hypervisor_names: (Optional) names of the hypervisors - should also be the host
+        names on icinga
+    :param icinga_hostgroup: (Optional) Icinga host group of the hypervisors, used instead of
+        hypervisor_names
+    :param parallelism: Number of hypervisors to patch and reboot at the same time
+    :param max_failures: Number of hypervisors which can fail before no more waves are started
+    :param ready_timeout: Seconds to wait for each hypervisor to come back after rebooting
+    :param ready_poll_interval: Seconds to wait between checks that a hypervisor is back
+    :return: whether every hypervisor was patched and rebooted, so the action fails if any
+        weren't, and the timings and outcome of each wave with the hypervisors skipped after
+        exceeding the failure budget
+    """
+    if bool(hypervisor_names) == bool(icinga_hostgroup):
+        raise ValueError("Give either hypervisor_names or icinga_hostgroup")
+    if parallelism < 1:
+        raise ValueError("parallelism must be at least 1")
+    if icinga_hostgroup:
+        hypervisor_names = get_hostgroup_members(icinga_account, icinga_hostgroup)
+    hypervisor_names = list(dict.fromkeys(hypervisor_names))
+
+    waves: List[PatchWaveResult] = []
+    failed: List[str] = []
+    for i in range(0, len(hypervisor_names), parallelism):
+        if len(failed) > max_failures:
+            break
+        wave = _run_wave(
+            alertmanager_account,
+            icinga_account,
+            hypervisor_names[i : i + parallelism],
+            private_key_path,
+            wave=len(waves) + 1,
+            ready_timeout=ready_timeout,
+            ready_poll_interval=ready_poll_interval,
+        )
+        waves.append(wave)
+        failed += wave.failed
+        print(
+            f"Wave {wave.wave}: patched {len(wave.hosts) - len(wave.failed)} "
+            f"of {len(wave.hosts)} hypervisors in {wave.duration_seconds:.0f}s"
+        )
+
+    attempted = {host.hypervisor_name for wave in waves for host in wave.hosts}
+    skipped = [name for name in hypervisor_names if name not in attempted]
+    if failed:
+        print(
+            f"Failed to patch and reboot {len(failed)} hypervisors: {', '.join(failed)}"
+            + (
+                f". Skipped {len(skipped)} hypervisors after exceeding the failure "
+                f"budget: {', '.join(skipped)}"
+                if skipped
+                else ""
+            )
+        )
+    return not failed, {
+        "waves": [asdict(wave) for wave in waves],
+        "skipped": skipped,
+    }
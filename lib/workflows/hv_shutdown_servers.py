@@ -1,9 +1,14 @@
 import logging
 import re
+from dataclasses import asdict
+from typing import Dict, List, Optional
 
 from openstack.connection import Connection
 from apis.openstack_query_api.server_queries import find_servers_on_hv
-from apis.openstack_api.openstack_server import shutoff_server_list
+from apis.openstack_api.openstack_server import (
+    shutoff_server_list,
+    shutoff_servers_on_hypervisor,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +16,11 @@ logger = logging.getLogger(__name__)
 def shutdown_all_servers_in_hypervisor(
     conn: Connection,
     hypervisor_name: str,
-) -> None:
+    batch: bool = True,
+    max_concurrent_stops: int = 10,
+    shutoff_timeout: int = 600,
+    raise_on_failure: bool = True,
+) -> Optional[List[Dict]]:
     """
     Shutdown all servers in a hypervisor
 
@@ -19,8 +28,16 @@ def shutdown_all_servers_in_hypervisor(
     :type conn: Connection
     :param hypervisor_name: Hostname of the hypervisor
     :type hypervisor_name: str
-    :return: None
-    :rtype: None
+    :param batch: Stop all servers at once and wait for them together, otherwise shut them off one at a time
+    :type batch: bool
+    :param max_concurrent_stops: Maximum number of stop calls to issue at once in batch mode
+    :type max_concurrent_stops: int
+    :param shutoff_timeout: Seconds to wait for each server to shut off in batch mode
+    :type shutoff_timeout: int
+    :param raise_on_failure: Raise an error in batch mode if any server could not be shut off
+    :type raise_on_failure: bool
+    :return: In batch mode, the result of shutting off each server
+    :rtype: Optional[List[Dict]]
     """
     logger.info("Attempting to shut down all servers is hypervisor %s", hypervisor_name)
     # 1st we ensure the hypervisor name is correct
@@ -54,8 +71,10 @@ def shutdown_all_servers_in_hypervisor(
     server_id_list = [server.id for server in servers_query.to_objects()]
     if not server_id_list:
         logger.info("No server found in hypervisor %s", hypervisor_name)
-    else:
-        logger.info("Found all servers for hypervisor %s", hypervisor_name)
+        return [] if batch else None
+
+    logger.info("Found all servers for hypervisor %s", hypervisor_name)
+    if not batch:
         # we shut them down
         try:
             shutoff_server_list(conn, server_id_list)
@@ -63,3 +82,31 @@ def shutdown_all_servers_in_hypervisor(
         except Exception as ex:
             logger.error("Exception captured when trying to shut down servers: %s", ex)
             raise ex
+        return None
+
+    # we stop them all at once, then wait for them together
+    results = shutoff_servers_on_hypervisor(
+        conn,
+        hypervisor_name,
+        server_id_list,
+        max_concurrent_stops=max_concurrent_stops,
+        timeout=shutoff_timeout,
+    )
+    failures = [result for result in results if result.error]
+    if failures:
+        logger.error(
+            "%s of %s servers on hypervisor %s failed to shut down",
+            len(failures),
+            len(results),
+            hypervisor_name,
+        )
+        if raise_on_failure:
+            raise RuntimeError(
+                f"Failed to shut down servers on hypervisor {hypervisor_name}: "
+                + ", ".join(
+                    f"{result.server_id}: {result.error}" for result in failures
+                )
+            )
+    else:
+        logger.info("All servers for hypervisor %s shut down", hypervisor_name)
+    return [asdict(result) for result in results]
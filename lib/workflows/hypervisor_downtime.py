@@ -7,10 +7,9 @@ from apis.icinga_api.enums.icinga_objects import IcingaObject
 from apis.icinga_api.structs.downtime_details import DowntimeDetails
 from apis.icinga_api.structs.icinga_account import IcingaAccount
 
-from apis.alertmanager_api.silence import schedule_silence
-from apis.alertmanager_api.structs.alert_matcher_details import AlertMatcherDetails
+from apis.alertmanager_api.alertmanager_client import get_alertmanager_client
+from apis.alertmanager_api.silence import hv_silence_details
 from apis.alertmanager_api.structs.alertmanager_account import AlertManagerAccount
-from apis.alertmanager_api.structs.silence_details import SilenceDetails
 
 
 def get_number_of_hours(start_dt, end_time_str, duration):
@@ -158,26 +157,14 @@ def schedule_hypervisor_downtime(
         comment=comment,
         is_fixed=True,
     )
-    matcher_instance = AlertMatcherDetails(name="instance", value=hypervisor_name)
-    matcher_hostname = AlertMatcherDetails(name="hostname", value=hypervisor_name)
-
-    silence_details_instance = SilenceDetails(
-        matchers=[matcher_instance],
-        author="stackstorm",
-        comment=comment,
-        start_time_dt=start_datetime,
-        duration_hours=duration_hours,
-    )
-    silence_details_hostname = SilenceDetails(
-        matchers=[matcher_hostname],
-        author="stackstorm",
-        comment=comment,
-        start_time_dt=start_datetime,
-        duration_hours=duration_hours,
-    )
-
     if set_silence:
-        schedule_silence(alertmanager_account, silence_details_instance)
-        schedule_silence(alertmanager_account, silence_details_hostname)
+        get_alertmanager_client(alertmanager_account).schedule_silences(
+            hv_silence_details(
+                [hypervisor_name],
+                comment=comment,
+                start_time_dt=start_datetime,
+                duration_hours=duration_hours,
+            )
+        )
     if set_downtime:
         schedule_downtime(icinga_account=icinga_account, details=downtime_details)
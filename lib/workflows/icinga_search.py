@@ -1,9 +1,16 @@
+import csv
 import json
+import sys
 from functools import partial
-from typing import Callable, Dict, List, Optional
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 
 from apis.icinga_api.enums.icinga_states import HostState, ServiceState
-from apis.icinga_api.query_objects import IcingaQuery, query_object
+from apis.icinga_api.query_objects import (
+    IcingaQuery,
+    query_object,
+    query_object_results,
+)
 from apis.icinga_api.structs.icinga_account import IcingaAccount
 from tabulate import tabulate
 
@@ -75,18 +82,39 @@ def create_property_filter_functions(
     return filter_functions
 
 
-def generate_table(
-    data: Dict, object_type: str, properties_to_select: List[str], user_joins: List[str]
-) -> str:
+def table_headers(
+    object_type: str, properties_to_select: List[str], user_joins: Optional[List[str]]
+) -> List[str]:
     """
-    Generate a table of properties from the query results
-    :param data: results of the query in a dict
+    Generate the headers for a table of properties from the query results
     :param object_type: Type of iginga object
     :param properties_to_select: User defined properties returned by the query
     :param user_joins: User defined query joins
-    :return: tabulate table string
+    :return: a header for each property followed by one for each join
+    """
+    headers = []
+    for prop in properties_to_select:
+        headers.append((f"{object_type} {prop}").title())
+    for join in user_joins if user_joins is not None else []:
+        join = join.replace(".", " ")
+        headers.append(join.title())
+    return headers
+
+
+def iter_rows(
+    results: Iterable[Dict],
+    object_type: str,
+    properties_to_select: List[str],
+    user_joins: Optional[List[str]],
+) -> Iterator[List[str]]:
+    """
+    Generate a row of properties for each object in the query results, one at a time
+    :param results: objects returned by the query
+    :param object_type: Type of iginga object
+    :param properties_to_select: User defined properties returned by the query
+    :param user_joins: User defined query joins
+    :return: generator of rows, with the values of each property followed by each join
     """
-    results = []
     prop_filter_functions = create_property_filter_functions(
         object_type, properties_to_select
     )
@@ -94,23 +122,144 @@ def generate_table(
         create_join_filter_functions(user_joins) if user_joins is not None else []
     )
 
-    for host in data["results"]:
+    for host in results:
         props = [fn(host) for fn in prop_filter_functions]
         joins = [fn(host) for fn in join_filter_functions]
 
         props += joins
-        results.append(props)
+        yield props
 
-    headers = []
-    for prop in properties_to_select:
-        headers.append((f"{object_type} {prop}").title())
-    for join in user_joins if user_joins is not None else []:
-        join = join.replace(".", " ")
-        headers.append(join.title())
+
+def generate_table(
+    data: Dict, object_type: str, properties_to_select: List[str], user_joins: List[str]
+) -> str:
+    """
+    Generate a table of properties from the query results
+    :param data: results of the query in a dict
+    :param object_type: Type of iginga object
+    :param properties_to_select: User defined properties returned by the query
+    :param user_joins: User defined query joins
+    :return: tabulate table string
+    """
+    results = list(
+        iter_rows(data["results"], object_type, properties_to_select, user_joins)
+    )
+    headers = table_headers(object_type, properties_to_select, user_joins)
 
     return tabulate(tabular_data=results, headers=headers, tablefmt="grid")
 
 
+def print_csv(rows: Iterable[List[str]], headers: List[str]) -> int:
+    """
+    Print CSV of properties from the query results a line at a time, so the output is never
+    held in memory as a whole
+    :param rows: rows of properties, as generated by iter_rows
+    :param headers: header for each column
+    :return: number of rows printed, not counting the header line
+    """
+    writer = csv.writer(sys.stdout)
+    writer.writerow(headers)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def print_ndjson(rows: Iterable[List[str]], headers: List[str]) -> int:
+    """
+    Print newline delimited JSON of properties from the query results a line at a time, so
+    the output is never held in memory as a whole
+    :param rows: rows of properties, as generated by iter_rows
+    :param headers: header for each column, used as the keys of each object
+    :return: number of rows printed
+    """
+    count = 0
+    for row in rows:
+        print(json.dumps(dict(zip(headers, row))))
+        count += 1
+    return count
+
+
+def print_paged_table(
+    rows: Iterable[List[str]], headers: List[str], page_size: int
+) -> int:
+    """
+    Print tables of properties from the query results, with one table for each page of rows
+    so only one page is held in memory at a time
+    :param rows: rows of properties, as generated by iter_rows
+    :param headers: header for each column
+    :param page_size: number of rows in each table
+    :return: number of rows printed
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    rows = iter(rows)
+    count = 0
+    page = list(islice(rows, page_size))
+    while page:
+        if count:
+            print()
+        print(tabulate(tabular_data=page, headers=headers, tablefmt="grid"))
+        count += len(page)
+        page = list(islice(rows, page_size))
+    return count
+
+
+# output types which are printed one row at a time from a streamed response
+STREAMED_OUTPUT_TYPES = ["csv", "ndjson"]
+
+
+# pylint:disable=too-many-arguments
+def _search(
+    icinga_account: IcingaAccount,
+    query: IcingaQuery,
+    output_type: str,
+    properties_to_select: List[str],
+    joins: Optional[List[str]],
+    page_size: Optional[int],
+):
+    """
+    Run a query and output its results. Tables without a page size and dicts are made
+    from the whole response and returned. Other outputs are printed as the response is
+    read, so neither the response nor the output is held in memory as a whole, and only
+    the number of rows printed is returned
+    :param icinga_account: Account used to interact with icinga
+    :param query: query to run
+    :param output_type: how to output the query, dict, table, csv or ndjson
+    :param properties_to_select: User defined properties returned by the query
+    :param joins: User defined query joins
+    :param page_size: (Optional) number of rows in each table
+    """
+    if output_type == "dict" or (output_type == "table" and not page_size):
+        _, data = query_object(icinga_account, query)
+
+        data = json.loads(data)
+
+        return {
+            "dict": data,
+            "table": generate_table(
+                data, query.object_type, properties_to_select, joins
+            ),
+        }[output_type]
+
+    if output_type not in STREAMED_OUTPUT_TYPES + ["table"]:
+        raise ValueError(f"Unknown output type {output_type}")
+
+    headers = table_headers(query.object_type, properties_to_select, joins)
+    rows = iter_rows(
+        query_object_results(icinga_account, query),
+        query.object_type,
+        properties_to_select,
+        joins,
+    )
+    if output_type == "csv":
+        return print_csv(rows, headers)
+    if output_type == "ndjson":
+        return print_ndjson(rows, headers)
+    return print_paged_table(rows, headers, page_size)
+
+
 def search_by_state(
     icinga_account: IcingaAccount,
     object_type: str,
@@ -118,6 +267,7 @@ def search_by_state(
     output_type: str,
     properties_to_select: List[str],
     joins: Optional[List[str]] = None,
+    page_size: Optional[int] = None,
 ):
     """
     Query iginga for objects in a given state
@@ -127,6 +277,8 @@ def search_by_state(
     :param output_type: how to output the query
     :param properties_to_select: User defined properties returned by the query
     :param user_joins: User defined query joins
+    :param page_size: (Optional) number of rows in each table, if given tables are
+        printed as the response is read
     """
 
     state = (
@@ -143,14 +295,9 @@ def search_by_state(
         joins=joins,
     )
 
-    _, data = query_object(icinga_account, query)
-
-    data = json.loads(data)
-
-    return {
-        "dict": data,
-        "table": generate_table(data, object_type, properties_to_select, joins),
-    }[output_type]
+    return _search(
+        icinga_account, query, output_type, properties_to_select, joins, page_size
+    )
 
 
 def search_by_name(
@@ -160,6 +307,7 @@ def search_by_name(
     output_type: str,
     properties_to_select: List[str],
     joins: Optional[List[str]] = None,
+    page_size: Optional[int] = None,
 ):
     """
     Query iginga for objects in a given state
@@ -169,6 +317,8 @@ def search_by_name(
     :param output_type: how to output the query
     :param properties_to_select: User defined properties returned by the query
     :param user_joins: User defined query joins
+    :param page_size: (Optional) number of rows in each table, if given tables are
+        printed as the response is read
     """
     query = IcingaQuery(
         object_type=object_type,
@@ -178,11 +328,6 @@ def search_by_name(
         joins=joins,
     )
 
-    _, data = query_object(icinga_account, query)
-
-    data = json.loads(data)
-
-    return {
-        "dict": data,
-        "table": generate_table(data, object_type, properties_to_select, joins),
-    }[output_type]
+    return _search(
+        icinga_account, query, output_type, properties_to_select, joins, page_size
+    )
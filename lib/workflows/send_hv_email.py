@@ -11,7 +11,7 @@ from apis.openstack_query_api.server_queries import (
     find_servers_on_hv,
     group_servers_by_user_id,
 )
-from apis.openstack_query_api.user_queries import find_user_info
+from apis.openstack_query_api.user_queries import find_user_info_bulk
 
 
 def print_email_params(email_addr: str, user_name: str, as_html: bool, vm_table: str):
@@ -107,10 +107,12 @@ def send_hv_email(
 
     grouped_query = group_servers_by_user_id(server_query)
 
-    for user_id in grouped_query.to_props().keys():
-        user_name, email_addr = find_user_info(
-            user_id, cloud_account, override_email_address
-        )
+    user_ids = list(grouped_query.to_props().keys())
+    user_info = find_user_info_bulk(user_ids, cloud_account, override_email_address)
+
+    emails = []
+    for user_id in user_ids:
+        user_name, email_addr = user_info[user_id]
         send_to = [email_addr]
         if use_override:
             send_to = [override_email_address]
@@ -137,4 +139,7 @@ def send_hv_email(
             email_template=email_template,
             **email_params_kwargs,
         )
-        Emailer(smtp_account).send_emails([email_params])
+        emails.append(email_params)
+
+    if emails:
+        Emailer(smtp_account).send_emails(emails)
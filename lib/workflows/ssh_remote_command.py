@@ -1,18 +1,53 @@
+from dataclasses import asdict
+from typing import Dict, List, Tuple
+
 from apis.ssh_api.exec_command import SSHConnection
+from apis.ssh_api.ssh_executor import SSHExecutor
 from apis.ssh_api.structs.ssh_connection_details import SSHDetails
 
 
-def ssh_remote_command(host: str, username: str, private_key_path: str, command: str):
+def ssh_remote_command(
+    host: str, username: str, private_key_path: str, command: str
+) -> Dict:
     """
     Run command on host over SSH
     :param host: Host to run command on
     :param username: Username to authenticate with
     :param private_key_path: Path to private key to authenticate with
     :param command: Command to run on host
-    :return: Command output
+    :return: the exit code and the head and tail of the command output
+    :raises SSHException: when the command failed, with the end of its output
     """
     connection_details = SSHDetails(
         host=host, username=username, private_key_path=private_key_path
     )
     ssh_client = SSHConnection(connection_details)
-    ssh_client.run_command_on_host(command)
+    try:
+        return asdict(ssh_client.run_command_on_host(command))
+    finally:
+        ssh_client.close()
+
+
+def ssh_remote_command_on_hosts(
+    hosts: List[str],
+    username: str,
+    private_key_path: str,
+    command: str,
+    max_concurrent_hosts: int = 10,
+) -> Tuple[bool, Dict[str, Dict]]:
+    """
+    Run command on many hosts over SSH at the same time
+    :param hosts: Hosts to run command on
+    :param username: Username to authenticate with
+    :param private_key_path: Path to private key to authenticate with
+    :param command: Command to run on each host
+    :param max_concurrent_hosts: Maximum number of hosts to run command on at the same time
+    :return: whether the command succeeded on every host, so the action fails if it didn't,
+        and a dictionary mapping each host to its exit code, output and any error
+    """
+    with SSHExecutor(username, private_key_path, max_concurrent_hosts) as executor:
+        results = executor.run_on_hosts(hosts, command)
+
+    return all(result.succeeded for result in results.values()), {
+        host: asdict(result) for host, result in results.items()
+    }
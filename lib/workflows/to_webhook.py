@@ -1,24 +1,168 @@
 import json
+import logging
 import os
-from typing import Dict, List
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Set, Union
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying, the webhook may be restarting or overloaded
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+# Number of errors to include when raising, the rest are in the logs
+MAX_REPORTED_ERRORS = 5
+
+
+@dataclass
+class WebhookDeliverySummary:
+    """
+    Outcome of sending rows to a stackstorm webhook
+    :param delivered: int: Number of rows the webhook accepted
+    :param failed: int: Number of rows the webhook did not accept
+    :param errors: (List[String]): A description of each request which failed
+    """
+
+    delivered: int = 0
+    failed: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+def _make_session(max_concurrent_posts: int, max_retries: int, backoff_factor: float):
+    """
+    Make a session which keeps a connection to the webhook open for each worker,
+    retrying requests that fail with a connection error or a retryable status. Read errors
+    aren't retried, as the webhook may have accepted the rows before the response was
+    lost, and sending them again would fire the trigger twice
+    :param max_concurrent_posts: Number of connections to keep open
+    :param max_retries: Number of times to retry each request
+    :param backoff_factor: Seconds to back off for, doubled after each retry
+    """
+    session = requests.Session()
+    session.headers.update({"X-Auth-Token": os.environ["ST2_ACTION_AUTH_TOKEN"]})
+    session.verify = False
+    retry = Retry(
+        total=max_retries,
+        read=0,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["POST"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=max_concurrent_posts, max_retries=retry
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
 
+def _batches(payload: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    """
+    Split rows into batches without reading ahead of the batch being built
+    :param payload: Rows to split, may be a generator
+    :param batch_size: Maximum number of rows in each batch
+    """
+    rows = iter(payload)
+    batch = list(islice(rows, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, batch_size))
 
-def to_webhook(webhook: str, payload: List[Dict]) -> None:
+
+def _post(
+    session: requests.Session, webhook_url: str, data: Union[Dict, List[Dict]]
+) -> None:
+    """
+    Post data to the webhook
+    :param session: Session to post with
+    :param webhook_url: Full url of the webhook
+    :param data: A row, or a batch of rows, to send
     """
-    Send post request to a stackstorm webhook
+    res = session.post(url=webhook_url, timeout=300, data=json.dumps(data))
+    if not res.status_code == 202:
+        raise requests.exceptions.HTTPError(
+            f"Webhook returned {res.status_code}", response=res
+        )
+
+
+def _collect(
+    pending: Dict[Future, int], done: Set[Future], summary: WebhookDeliverySummary
+) -> None:
+    """
+    Add finished requests to the summary
+    :param pending: Requests in flight, mapped to the number of rows each is sending
+    :param done: Requests which have finished, removed from pending
+    :param summary: Summary to add the rows delivered and failed to
+    """
+    for future in done:
+        rows = pending.pop(future)
+        try:
+            future.result()
+        except requests.exceptions.RequestException as exc:
+            logger.warning("Failed to send %s rows to webhook: %s", rows, exc)
+            summary.failed += rows
+            summary.errors.append(str(exc))
+            continue
+        summary.delivered += rows
+
+
+# pylint:disable=too-many-arguments
+def to_webhook(
+    webhook: str,
+    payload: Iterable[Dict],
+    batch_size: int = 1,
+    max_concurrent_posts: int = 4,
+    max_retries: int = 3,
+    backoff_factor: float = 0.5,
+    raise_on_failure: bool = True,
+) -> WebhookDeliverySummary:
+    """
+    Send post requests to a stackstorm webhook over a shared session. Rows are read from the
+    payload as workers become free, so a generator can still be producing rows while earlier
+    ones are being sent
     :param webhook: Webhook url path
-    :param payload: Data to send to webhook
+    :param payload: Data to send to webhook, one row per dictionary
+    :param batch_size: Number of rows to send in each request, if more than 1 each request
+    sends a list of rows
+    :param max_concurrent_posts: Maximum number of requests to send at the same time
+    :param max_retries: Number of times to retry a request that fails with a connection error
+    or a retryable status
+    :param backoff_factor: Seconds to back off for before retrying, doubled after each retry
+    :param raise_on_failure: If True, raise HTTPError once every row has been tried if any
+    were not delivered
+    :return: A summary of the rows delivered and failed
     """
     webhook_url = f'{os.environ["ST2_ACTION_API_URL"]}/webhooks/{webhook}'
+    summary = WebhookDeliverySummary()
+    pending: Dict[Future, int] = {}
+
+    with _make_session(
+        max_concurrent_posts, max_retries, backoff_factor
+    ) as session, ThreadPoolExecutor(max_workers=max_concurrent_posts) as executor:
+        for batch in _batches(payload, batch_size):
+            # bound the requests in flight so a large generator isn't read into memory at once
+            if len(pending) >= max_concurrent_posts * 2:
+                _collect(
+                    pending, wait(pending, return_when=FIRST_COMPLETED).done, summary
+                )
+            data = batch if batch_size > 1 else batch[0]
+            pending[executor.submit(_post, session, webhook_url, data)] = len(batch)
+        _collect(pending, wait(pending).done, summary)
 
-    for data in payload:
-        res = requests.post(
-            url=webhook_url,
-            headers={"X-Auth-Token": os.environ["ST2_ACTION_AUTH_TOKEN"]},
-            timeout=300,
-            data=json.dumps(data),
-            verify=False,
+    logger.info(
+        "Sent %s rows to webhook %s, %s failed",
+        summary.delivered,
+        webhook,
+        summary.failed,
+    )
+    if raise_on_failure and summary.failed:
+        raise requests.exceptions.HTTPError(
+            f"{summary.failed} rows could not be sent to webhook {webhook}: "
+            + "; ".join(summary.errors[:MAX_REPORTED_ERRORS])
         )
-        if not res.status_code == 202:
-            raise requests.exceptions.HTTPError(res)
+    return summary
@@ -1,6 +1,8 @@
 import tabulate
-from apis.openstack_api.openstack_connection import OpenstackConnection
-from apis.utils.diff_utils import get_diff
+from apis.openstack_api.openstack_connection import CONNECTION_POOL
+from apis.openstack_api.openstack_cross_cloud import fetch_from_clouds
+from apis.utils.diff_utils import get_diff, get_fingerprint
+from apis.utils.sensor_fingerprints import FingerprintStore
 from st2reactor.sensor.base import PollingSensor
 
 
@@ -17,6 +19,8 @@ class FlavorPropertiesSensor(PollingSensor):
         - indicates the interval between two successive poll() calls.
     """
 
+    EXCLUDE_PATHS = ["root['id']", "root['location']"]
+
     def __init__(self, sensor_service, config=None, poll_interval=10):
         super().__init__(
             sensor_service=sensor_service, config=config, poll_interval=poll_interval
@@ -24,6 +28,9 @@ class FlavorPropertiesSensor(PollingSensor):
         self._log = self._sensor_service.get_logger(__name__)
         self.source_cloud = self.config["flavor_sensor"]["source_cloud_account"]
         self.target_cloud = self.config["flavor_sensor"]["target_cloud_account"]
+        self._fingerprints = FingerprintStore(
+            self._sensor_service, "flavor_fingerprints"
+        )
 
     def setup(self):
         """
@@ -35,88 +42,107 @@ class FlavorPropertiesSensor(PollingSensor):
         Polls the source cloud flavors and checks each flavor against those in the
         target cloud. Compares the flavor properties and, where there is a difference or
         the flavor does not exist, dispatches a payload containing the flavor name, IDs, and the mismatch.
+        Flavors which haven't changed in either cloud since the last poll are skipped, and
+        mismatches which were already dispatched aren't dispatched again.
         """
-        with OpenstackConnection(self.source_cloud) as source_conn, OpenstackConnection(
-            self.target_cloud
-        ) as target_conn:
-
-            self._log.info("Polling for flavors.")
-
-            source_flavors = {
-                flavor.name: flavor for flavor in source_conn.list_flavors()
-            }
-            target_flavors = {
-                flavor.name: flavor for flavor in target_conn.list_flavors()
-            }
-
-            for flavor_name, source_flavor in source_flavors.items():
-                target_flavor = target_flavors.get(flavor_name)
-
-                headers = ["Path", self.source_cloud, self.target_cloud]
-
-                if not target_flavor:
-                    self._log.info(
-                        "Flavor %s does not exist in target cloud", flavor_name
-                    )
-
-                    payload = {
-                        "flavor_name": source_flavor.name,
-                        "source_cloud": self.source_cloud,
-                        "target_cloud": self.target_cloud,
-                        "source_flavor_id": source_flavor.id,
-                        "target_flavor_id": None,
-                        "diff": tabulate.tabulate(
-                            [
-                                [
-                                    f"Flavor missing in {self.target_cloud}",
-                                    source_flavor.id,
-                                    "N/A",
-                                ]
-                            ],
-                            headers=headers,
-                            tablefmt="jira",
-                        ),
-                    }
-
-                    self.sensor_service.dispatch(
-                        trigger="stackstorm_openstack.flavor.flavor_mismatch",
-                        payload=payload,
-                    )
+        self._log.info("Polling for flavors.")
+
+        source_flavors, target_flavors = fetch_from_clouds(
+            self.source_cloud,
+            self.target_cloud,
+            lambda conn: conn.list_flavors(),
+        )
+
+        for flavor_name, source_flavor in source_flavors.items():
+            target_flavor = target_flavors.get(flavor_name)
+            source_fingerprint = get_fingerprint(
+                source_flavor.to_dict(), self.EXCLUDE_PATHS
+            )
+            target_fingerprint = (
+                get_fingerprint(target_flavor.to_dict(), self.EXCLUDE_PATHS)
+                if target_flavor
+                else None
+            )
+            if self._fingerprints.is_unchanged(
+                flavor_name, source_fingerprint, target_fingerprint
+            ):
+                continue
+
+            headers = ["Path", self.source_cloud, self.target_cloud]
+
+            if not target_flavor:
+                self._log.info("Flavor %s does not exist in target cloud", flavor_name)
+                missing = [
+                    [
+                        f"Flavor missing in {self.target_cloud}",
+                        source_flavor.id,
+                        "N/A",
+                    ]
+                ]
+                if not self._fingerprints.record(
+                    flavor_name, source_fingerprint, None, missing
+                ):
                     continue
 
-                diff = get_diff(
-                    obj1=source_flavor.to_dict(),
-                    obj2=target_flavor.to_dict(),
-                    exclude_paths=["root['id']", "root['location']"],
+                payload = {
+                    "flavor_name": source_flavor.name,
+                    "source_cloud": self.source_cloud,
+                    "target_cloud": self.target_cloud,
+                    "source_flavor_id": source_flavor.id,
+                    "target_flavor_id": None,
+                    "diff": tabulate.tabulate(
+                        missing,
+                        headers=headers,
+                        tablefmt="jira",
+                    ),
+                }
+
+                self.sensor_service.dispatch(
+                    trigger="stackstorm_openstack.flavor.flavor_mismatch",
+                    payload=payload,
+                )
+                continue
+
+            diff = get_diff(
+                obj1=source_flavor.to_dict(),
+                obj2=target_flavor.to_dict(),
+                exclude_paths=self.EXCLUDE_PATHS,
+            )
+
+            if self._fingerprints.record(
+                flavor_name, source_fingerprint, target_fingerprint, diff
+            ):
+                self._log.info(
+                    "Mismatch in properties found for flavor: %s", flavor_name
                 )
 
-                if diff:
-                    self._log.info(
-                        "Mismatch in properties found for flavor: %s", flavor_name
-                    )
-
-                    payload = {
-                        "flavor_name": source_flavor.name,
-                        "source_cloud": self.source_cloud,
-                        "target_cloud": self.target_cloud,
-                        "source_flavor_id": source_flavor.id,
-                        "target_flavor_id": target_flavor.id,
-                        "diff": tabulate.tabulate(
-                            diff, headers=headers, tablefmt="jira"
-                        ),
-                    }
-
-                    self.sensor_service.dispatch(
-                        trigger="stackstorm_openstack.flavor.flavor_mismatch",
-                        payload=payload,
-                    )
-                else:
-                    self._log.info("No mismatch found for flavor: %s", flavor_name)
+                payload = {
+                    "flavor_name": source_flavor.name,
+                    "source_cloud": self.source_cloud,
+                    "target_cloud": self.target_cloud,
+                    "source_flavor_id": source_flavor.id,
+                    "target_flavor_id": target_flavor.id,
+                    "diff": tabulate.tabulate(diff, headers=headers, tablefmt="jira"),
+                }
+
+                self.sensor_service.dispatch(
+                    trigger="stackstorm_openstack.flavor.flavor_mismatch",
+                    payload=payload,
+                )
+            elif diff:
+                self._log.info(
+                    "Mismatch for flavor %s was already reported", flavor_name
+                )
+            else:
+                self._log.info("No mismatch found for flavor: %s", flavor_name)
+
+        self._fingerprints.save(source_flavors)
 
     def cleanup(self):
         """
-        Stub
+        Closes any pooled Openstack connections held by the sensor process
         """
+        CONNECTION_POOL.close_all()
 
     def add_trigger(self, trigger):
         """
@@ -1,6 +1,8 @@
 import tabulate
-from apis.openstack_api.openstack_connection import OpenstackConnection
-from apis.utils.diff_utils import get_diff
+from apis.openstack_api.openstack_connection import CONNECTION_POOL
+from apis.openstack_api.openstack_cross_cloud import fetch_from_clouds
+from apis.utils.diff_utils import get_diff, get_fingerprint
+from apis.utils.sensor_fingerprints import FingerprintStore
 from st2reactor.sensor.base import PollingSensor
 
 
@@ -17,6 +19,15 @@ class HostAggregateSensor(PollingSensor):
         - indicates the interval between two successive poll() calls.
     """
 
+    EXCLUDE_PATHS = [
+        "root['hosts']",
+        "root['created_at']",
+        "root['updated_at']",
+        "root['uuid']",
+        "root['id']",
+        "root['location']",
+    ]
+
     def __init__(self, sensor_service, config=None, poll_interval=None):
         super().__init__(
             sensor_service=sensor_service, config=config, poll_interval=poll_interval
@@ -24,6 +35,9 @@ class HostAggregateSensor(PollingSensor):
         self._log = self._sensor_service.get_logger(__name__)
         self.source_cloud = self.config["sensor_source_cloud"]
         self.target_cloud = self.config["sensor_dest_cloud"]
+        self._fingerprints = FingerprintStore(
+            self._sensor_service, "aggregate_fingerprints"
+        )
 
     def setup(self):
         """
@@ -34,78 +48,78 @@ class HostAggregateSensor(PollingSensor):
         """
         Polls the dev cloud host aggregates and dispatches a payload containing
         a list of aggregates.
+        Aggregates which haven't changed in either cloud since the last poll are skipped, and
+        mismatches which were already dispatched aren't dispatched again.
         """
-        with OpenstackConnection(self.source_cloud) as source_conn, OpenstackConnection(
-            self.target_cloud
-        ) as target_conn:
-
-            source_aggregates = {
-                agg.name: agg for agg in source_conn.compute.aggregates()
-            }
-            target_aggregates = {
-                agg.name: agg for agg in target_conn.compute.aggregates()
-            }
-
-            self._log.info(
-                "Compare source (%s) and target (%s) host aggregate metadata"
+        source_aggregates, target_aggregates = fetch_from_clouds(
+            self.source_cloud,
+            self.target_cloud,
+            lambda conn: conn.compute.aggregates(),
+        )
+
+        self._log.info("Compare source (%s) and target (%s) host aggregate metadata")
+        for aggregate_name, source_agg in source_aggregates.items():
+            target_agg = target_aggregates.get(aggregate_name)
+
+            if not target_agg:
+                self._log.info(
+                    "aggregate %s doesn't exist in %s cloud",
+                    aggregate_name,
+                    self.target_cloud,
+                )
+                continue
+
+            source_fingerprint = get_fingerprint(source_agg, self.EXCLUDE_PATHS)
+            target_fingerprint = get_fingerprint(target_agg, self.EXCLUDE_PATHS)
+            if self._fingerprints.is_unchanged(
+                aggregate_name, source_fingerprint, target_fingerprint
+            ):
+                continue
+
+            diff = get_diff(
+                obj1=source_agg,
+                obj2=target_agg,
+                exclude_paths=self.EXCLUDE_PATHS,
             )
-            for aggregate_name, source_agg in source_aggregates.items():
-                target_agg = target_aggregates.get(aggregate_name)
-
-                if not target_agg:
-                    self._log.info(
-                        "aggregate %s doesn't exist in %s cloud",
-                        aggregate_name,
-                        self.target_cloud,
-                    )
-                    continue
-
-                diff = get_diff(
-                    obj1=source_agg,
-                    obj2=target_agg,
-                    exclude_paths=[
-                        "root['hosts']",
-                        "root['created_at']",
-                        "root['updated_at']",
-                        "root['uuid']",
-                        "root['id']",
-                        "root['location']",
-                    ],
+
+            if self._fingerprints.record(
+                aggregate_name, source_fingerprint, target_fingerprint, diff
+            ):
+
+                self._log.info(
+                    "aggregate metadata mismatch between source (%s) and target (%s): %s",
+                    self.source_cloud,
+                    self.target_cloud,
+                    aggregate_name,
                 )
 
-                if diff:
-
-                    self._log.info(
-                        "aggregate metadata mismatch between source (%s) and target (%s): %s",
-                        self.source_cloud,
-                        self.target_cloud,
-                        aggregate_name,
-                    )
-
-                    headers = [
-                        "Path",
-                        self.source_cloud,
-                        self.target_cloud,
-                    ]
-
-                    payload = {
-                        "aggregate_name": source_agg.name,
-                        "diff": tabulate.tabulate(
-                            diff,
-                            headers=headers,
-                            tablefmt="jira",
-                        ),
-                    }
-
-                    self.sensor_service.dispatch(
-                        trigger="stackstorm_openstack.aggregate.metadata_mismatch",
-                        payload=payload,
-                    )
+                headers = [
+                    "Path",
+                    self.source_cloud,
+                    self.target_cloud,
+                ]
+
+                payload = {
+                    "aggregate_name": source_agg.name,
+                    "diff": tabulate.tabulate(
+                        diff,
+                        headers=headers,
+                        tablefmt="jira",
+                    ),
+                }
+
+                self.sensor_service.dispatch(
+                    trigger="stackstorm_openstack.aggregate.metadata_mismatch",
+                    payload=payload,
+                )
+
+        self._fingerprints.save(source_aggregates)
 
     def cleanup(self):
         """
-        Stub
+        Closes any pooled Openstack connections held by the sensor process
         """
+        CONNECTION_POOL.close_all()
 
     def add_trigger(self, trigger):
         """
@@ -1,6 +1,8 @@
 import tabulate
-from apis.openstack_api.openstack_connection import OpenstackConnection
-from apis.utils.diff_utils import get_diff
+from apis.openstack_api.openstack_connection import CONNECTION_POOL
+from apis.openstack_api.openstack_cross_cloud import fetch_from_clouds
+from apis.utils.diff_utils import get_diff, get_fingerprint
+from apis.utils.sensor_fingerprints import FingerprintStore
 from st2reactor.sensor.base import PollingSensor
 
 
@@ -17,6 +19,20 @@ class ImageMetadataSensor(PollingSensor):
         - indicates the interval between two successive poll() calls.
     """
 
+    EXCLUDE_PATHS = [
+        "root['instance_uuid']",
+        "root['location']['project']['id']",
+        "root['location']['cloud']",
+        "root['owner_id']",
+        "root['owner']",
+        "root['file']",
+        "root['direct_url']",
+        "root['locations']",
+        "root['id']",
+        "root['created_at']",
+        "root['updated_at']",
+    ]
+
     def __init__(self, sensor_service, config=None, poll_interval=None):
         super().__init__(
             sensor_service=sensor_service, config=config, poll_interval=poll_interval
@@ -24,6 +40,9 @@ class ImageMetadataSensor(PollingSensor):
         self._log = self._sensor_service.get_logger(__name__)
         self.source_cloud = self.config["image_sensor"]["source_cloud_account"]
         self.target_cloud = self.config["image_sensor"]["target_cloud_account"]
+        self._fingerprints = FingerprintStore(
+            self._sensor_service, "image_fingerprints"
+        )
 
     def setup(self):
         """
@@ -35,70 +54,74 @@ class ImageMetadataSensor(PollingSensor):
         Polls the source cloud images and lookup the relevant image in target for each image
         Compare the image metadata between source and target cloud and dispatch a payload
         containing the image's metadata and the difference.
+        Images which haven't changed in either cloud since the last poll are skipped, and
+        mismatches which were already dispatched aren't dispatched again.
         """
-        with OpenstackConnection(self.source_cloud) as source_conn, OpenstackConnection(
-            self.target_cloud
-        ) as target_conn:
-
-            source_images = {
-                img.name: img for img in source_conn.image.images(status="active")
-            }
-            target_images = {img.name: img for img in target_conn.image.images()}
-
-            self._log.info("Compare source and target metadata")
-
-            for image_name, source_img in source_images.items():
-                target_img = target_images.get(image_name)
-
-                if not target_img:
-                    self._log.info("Image %s doesn't exist in target cloud", image_name)
-                    continue
-
-                diff = get_diff(
-                    obj1=source_img.properties,
-                    obj2=target_img.properties,
-                    exclude_paths=[
-                        "root['instance_uuid']",
-                        "root['location']['project']['id']",
-                        "root['location']['cloud']",
-                        "root['owner_id']",
-                        "root['owner']",
-                        "root['file']",
-                        "root['direct_url']",
-                        "root['locations']",
-                        "root['id']",
-                        "root['created_at']",
-                        "root['updated_at']",
-                    ],
+        source_images, target_images = fetch_from_clouds(
+            self.source_cloud,
+            self.target_cloud,
+            lambda conn: conn.image.images(status="active"),
+            lambda conn: conn.image.images(),
+        )
+
+        self._log.info("Compare source and target metadata")
+
+        for image_name, source_img in source_images.items():
+            target_img = target_images.get(image_name)
+
+            if not target_img:
+                self._log.info("Image %s doesn't exist in target cloud", image_name)
+                continue
+
+            source_fingerprint = get_fingerprint(
+                source_img.properties, self.EXCLUDE_PATHS
+            )
+            target_fingerprint = get_fingerprint(
+                target_img.properties, self.EXCLUDE_PATHS
+            )
+            if self._fingerprints.is_unchanged(
+                image_name, source_fingerprint, target_fingerprint
+            ):
+                continue
+
+            diff = get_diff(
+                obj1=source_img.properties,
+                obj2=target_img.properties,
+                exclude_paths=self.EXCLUDE_PATHS,
+            )
+
+            if self._fingerprints.record(
+                image_name, source_fingerprint, target_fingerprint, diff
+            ):
+                self._log.info(
+                    "Image metadata mismatch between source and target: %s",
+                    image_name,
                 )
 
-                if diff:
-                    self._log.info(
-                        "Image metadata mismatch between source and target: %s",
-                        image_name,
-                    )
-
-                    headers = ["Path", self.source_cloud, self.target_cloud]
-
-                    payload = {
-                        "image_name": source_img.name,
-                        "target_cloud": {"name": self.target_cloud},
-                        "diff": tabulate.tabulate(
-                            diff,
-                            headers=headers,
-                            tablefmt="jira",
-                        ),
-                    }
-
-                    self.sensor_service.dispatch(
-                        trigger="stackstorm_openstack.image.metadata_mismatch",
-                        payload=payload,
-                    )
+                headers = ["Path", self.source_cloud, self.target_cloud]
+
+                payload = {
+                    "image_name": source_img.name,
+                    "target_cloud": {"name": self.target_cloud},
+                    "diff": tabulate.tabulate(
+                        diff,
+                        headers=headers,
+                        tablefmt="jira",
+                    ),
+                }
+
+                self.sensor_service.dispatch(
+                    trigger="stackstorm_openstack.image.metadata_mismatch",
+                    payload=payload,
+                )
+
+        self._fingerprints.save(source_images)
 
     def cleanup(self):
         """
-        Stub
+        Closes any pooled Openstack connections held by the sensor process
         """
+        CONNECTION_POOL.close_all()
 
     def add_trigger(self, trigger):
         """
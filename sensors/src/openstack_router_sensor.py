@@ -1,4 +1,7 @@
-from apis.openstack_api.openstack_connection import OpenstackConnection
+from apis.openstack_api.openstack_connection import (
+    CONNECTION_POOL,
+    OpenstackConnection,
+)
 from apis.openstack_api.openstack_router import check_for_internal_routers
 from st2reactor.sensor.base import PollingSensor
 
@@ -33,7 +36,7 @@ class OpenstackRouterSensor(PollingSensor):
         """
         Polls the state of hypervisors
         """
-        with OpenstackConnection(self.cloud_account) as conn:
+        with OpenstackConnection(self.cloud_account, pooled=True) as conn:
             data = check_for_internal_routers(conn)
             for router in data:
                 self._log.info("Dispatching Trigger for router: %s", router.id)
@@ -54,9 +57,9 @@ class OpenstackRouterSensor(PollingSensor):
 
     def cleanup(self):
         """
-        This is called when the st2 system goes down. You can perform cleanup operations like
-        closing the connections to external system here.
+        Closes any pooled Openstack connections held by the sensor process
         """
+        CONNECTION_POOL.close_all()
 
     def add_trigger(self, trigger):
         """This method is called when trigger is created"""
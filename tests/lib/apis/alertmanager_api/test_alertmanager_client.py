@@ -0,0 +1,325 @@
+import threading
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from apis.alertmanager_api.alertmanager_client import (
+    AlertmanagerClient,
+    get_alertmanager_client,
+)
+from apis.alertmanager_api.structs.alert_matcher_details import AlertMatcherDetails
+from apis.alertmanager_api.structs.alertmanager_account import AlertManagerAccount
+from apis.alertmanager_api.structs.silence_details import SilenceDetails
+
+
+def _raw_silence(silence_id, state, matchers):
+    """
+    Make a silence as returned by the AlertManager API
+    """
+    return {
+        "id": silence_id,
+        "status": {"state": state},
+        "comment": "comment",
+        "createdBy": "admin",
+        "startsAt": "2025-01-16T10:50:00.781Z",
+        "endsAt": "2025-01-16T12:50:00.000Z",
+        "matchers": [
+            {"isEqual": True, "isRegex": False, "name": name, "value": value}
+            for name, value in matchers
+        ],
+    }
+
+
+@pytest.fixture(name="mock_account")
+def mock_account_fixture():
+    """
+    Returns an alertmanager account
+    """
+    return AlertManagerAccount(
+        username="user", password="pass", alertmanager_endpoint="http://alerts"
+    )
+
+
+@pytest.fixture(name="client")
+def client_fixture(mock_account):
+    """
+    Returns a client with a mocked session
+    """
+    client = AlertmanagerClient(mock_account)
+    client.session = MagicMock()
+    return client
+
+
+@pytest.fixture(name="mock_silence_details")
+def mock_silence_details_fixture():
+    """
+    Returns a silence to schedule
+    """
+    return SilenceDetails(
+        matchers=[AlertMatcherDetails(name="instance", value="hv1")],
+        author="author",
+        comment="comment",
+        start_time_dt=datetime(2025, 1, 1, 10, 0, 0),
+        end_time_dt=datetime(2025, 1, 2, 10, 0, 0),
+    )
+
+
+@pytest.fixture(name="mock_listing")
+def mock_listing_fixture(client):
+    """
+    Makes the mocked session return a listing of silences for two hypervisors
+    """
+    client.session.request.return_value.json.return_value = [
+        _raw_silence("id1", "active", [("instance", "hv1"), ("env", "prod")]),
+        _raw_silence("id2", "pending", [("hostname", "hv1")]),
+        _raw_silence("id3", "expired", [("instance", "hv1")]),
+        _raw_silence("id4", "active", [("instance", "hv2")]),
+        _raw_silence("id5", "active", [("instance", "hv3")]),
+    ]
+
+
+def test_session(mock_account):
+    """
+    Test the session authenticates with the account
+    """
+    client = AlertmanagerClient(mock_account)
+    assert client.session.auth == mock_account.auth
+    assert client.session.headers["Accept"] == "application/json"
+
+
+def test_schedule_silence(client, mock_silence_details):
+    """
+    Test a silence is posted and its ID returned
+    """
+    client.session.request.return_value.json.return_value = {"silenceID": "new"}
+
+    assert client.schedule_silence(mock_silence_details) == "new"
+
+    client.session.request.assert_called_once_with(
+        "POST",
+        "http://alerts/api/v2/silences",
+        timeout=10,
+        json={
+            "matchers": mock_silence_details.matchers_raw,
+            "startsAt": "2025-01-01T10:00:00Z",
+            "endsAt": "2025-01-02T10:00:00Z",
+            "createdBy": "author",
+            "comment": "comment",
+        },
+    )
+
+
+def test_schedule_silence_error(client, mock_silence_details):
+    """
+    Test an error scheduling a silence is raised
+    """
+    mock_response = MagicMock()
+    mock_response.raise_for_status.side_effect = requests.HTTPError(
+        response=mock_response
+    )
+    client.session.request.return_value = mock_response
+
+    with pytest.raises(requests.HTTPError):
+        client.schedule_silence(mock_silence_details)
+
+
+def test_schedule_silences_concurrent(client, mock_silence_details):
+    """
+    Test silences are scheduled at the same time, returning IDs in the order given
+    """
+    # each request waits for the others to start, so would time out if run one after the other
+    barrier = threading.Barrier(3, timeout=5)
+
+    def request(method, url, timeout, json):  # pylint:disable=unused-argument
+        barrier.wait()
+        response = MagicMock()
+        response.json.return_value = {"silenceID": json["comment"]}
+        return response
+
+    client.session.request.side_effect = request
+    silences = []
+    for comment in ["a", "b", "c"]:
+        silence = SilenceDetails(**vars(mock_silence_details))
+        silence.comment = comment
+        silences.append(silence)
+
+    assert client.schedule_silences(silences) == ["a", "b", "c"]
+
+
+def test_schedule_silences_failure_removes_created(client, mock_silence_details):
+    """
+    Test the silences which were scheduled are removed if any fail
+    """
+
+    def request(method, url, timeout, **kwargs):  # pylint:disable=unused-argument
+        response = MagicMock()
+        if method == "POST" and kwargs["json"]["comment"] == "bad":
+            response.raise_for_status.side_effect = requests.HTTPError("bad silence")
+        response.json.return_value = {"silenceID": "created"}
+        return response
+
+    client.session.request.side_effect = request
+    bad_silence = SilenceDetails(**vars(mock_silence_details))
+    bad_silence.comment = "bad"
+
+    with pytest.raises(RuntimeError, match="Failed to schedule 1 of 2 silences"):
+        client.schedule_silences([mock_silence_details, bad_silence])
+
+    client.session.request.assert_any_call(
+        "DELETE", "http://alerts/api/v2/silence/created", timeout=10
+    )
+
+
+def test_remove_silences(client):
+    """
+    Test every silence is removed, even if some fail
+    """
+
+    def request(method, url, timeout):  # pylint:disable=unused-argument
+        response = MagicMock()
+        if url.endswith("id2"):
+            response.raise_for_status.side_effect = requests.HTTPError("not found")
+        return response
+
+    client.session.request.side_effect = request
+
+    with pytest.raises(RuntimeError, match="id2: not found"):
+        client.remove_silences(["id1", "id2", "id3"])
+
+    assert client.session.request.call_count == 3
+
+
+def test_remove_silences_empty(client):
+    """
+    Test nothing is removed when there are no silences
+    """
+    client.remove_silences([])
+    client.session.request.assert_not_called()
+
+
+@pytest.mark.usefixtures("mock_listing")
+def test_get_silences_cached(client):
+    """
+    Test the listing of silences is downloaded once and reused until refreshed
+    """
+    silences = client.get_silences()
+    assert list(silences) == ["id1", "id2", "id3", "id4", "id5"]
+    assert silences["id1"]["state"] == "active"
+    assert client.get_silences()["id1"] is silences["id1"]
+    client.session.request.assert_called_once_with(
+        "GET", "http://alerts/api/v2/silences", timeout=10
+    )
+
+    client.get_silences(refresh=True)
+    assert client.session.request.call_count == 2
+
+
+@pytest.mark.usefixtures("mock_listing")
+def test_get_silences_expires(client):
+    """
+    Test the listing of silences is downloaded again after the TTL
+    """
+    with patch(
+        "apis.alertmanager_api.alertmanager_client.time.monotonic"
+    ) as mock_monotonic:
+        mock_monotonic.return_value = 100
+        client.get_silences()
+        mock_monotonic.return_value = 129
+        client.get_silences()
+        mock_monotonic.return_value = 131
+        client.get_silences()
+
+    assert client.session.request.call_count == 2
+
+
+@pytest.mark.usefixtures("mock_listing")
+def test_get_hv_silences(client):
+    """
+    Test silences for many hypervisors are found with one listing
+    """
+    assert set(client.get_hv_silences("hv1")) == {"id1", "id2", "id3"}
+    assert set(client.get_hv_silences("hv2")) == {"id4"}
+    assert not client.get_hv_silences("hv9")
+    assert set(client.get_silences_matching("env", "prod")) == {"id1"}
+    client.session.request.assert_called_once()
+
+
+@pytest.mark.usefixtures("mock_listing")
+def test_get_hvs_silences(client):
+    """
+    Test silences for many hypervisors are found at once, filtered by state
+    """
+    res = client.get_hvs_silences(["hv1", "hv2"], states=["active"])
+    assert {hostname: list(silences) for hostname, silences in res.items()} == {
+        "hv1": ["id1"],
+        "hv2": ["id4"],
+    }
+    assert client.get_silence_index(["active"]) is client.get_silence_index(["active"])
+    client.session.request.assert_called_once()
+
+
+@pytest.mark.usefixtures("mock_listing")
+def test_remove_hv_silences(client):
+    """
+    Test the silences of many hypervisors are removed, skipping expired ones
+    """
+    removed = client.remove_hv_silences(["hv1", "hv2"])
+
+    assert sorted(removed) == ["id1", "id2", "id4"]
+    deleted = {
+        request_call.args[1]
+        for request_call in client.session.request.call_args_list
+        if request_call.args[0] == "DELETE"
+    }
+    assert deleted == {
+        "http://alerts/api/v2/silence/id1",
+        "http://alerts/api/v2/silence/id2",
+        "http://alerts/api/v2/silence/id4",
+    }
+
+
+@pytest.mark.usefixtures("mock_listing")
+def test_changes_invalidate_listing(client):
+    """
+    Test removing a silence means the listing is downloaded again
+    """
+    client.get_silences()
+    client.remove_silence("id1")
+    client.get_silences()
+    assert client.session.request.call_count == 3
+
+
+@pytest.mark.usefixtures("mock_listing")
+def test_listing_invalidated_while_downloading(client):
+    """
+    Test a listing downloaded while a silence changes isn't cached, so the change is seen
+    by the next lookup
+    """
+    listing = client.session.request.return_value.json.return_value
+
+    def download():
+        client.invalidate()
+        return listing
+
+    client.session.request.return_value.json.side_effect = download
+    assert len(client.get_silences()) == 5
+
+    client.session.request.return_value.json.side_effect = None
+    client.get_silences()
+    assert client.session.request.call_count == 2
+    client.get_silences()
+    assert client.session.request.call_count == 2
+
+
+def test_get_alertmanager_client(mock_account):
+    """
+    Test each account shares one client
+    """
+    other_account = AlertManagerAccount(
+        username="other", password="pass", alertmanager_endpoint="http://alerts"
+    )
+    client = get_alertmanager_client(mock_account)
+    assert get_alertmanager_client(mock_account) is client
+    assert get_alertmanager_client(other_account) is not client
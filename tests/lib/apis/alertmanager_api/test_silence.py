@@ -13,6 +13,8 @@ from apis.alertmanager_api.silence import (
     get_active_silences,
     get_valid_silences,
     get_hv_silences,
+    get_hvs_silences,
+    hv_silence_details,
 )
 
 
@@ -439,3 +441,47 @@ def test_get_hv_silences(mock_get, mock_get_silence_out):
     # should get 5 alerts which include hostname and instance
     mock_get.assert_called_once()
     assert len(res) == 5
+
+
+def test_hv_silence_details():
+    """
+    use case: hv_silence_details() builds an instance and hostname silence for each hypervisor
+    """
+    start_time = datetime(2025, 1, 1, 10, 0, 0)
+    res = hv_silence_details(["hv1", "hv2"], "patching", start_time, 6)
+
+    assert [silence.matchers for silence in res] == [
+        [AlertMatcherDetails(name="instance", value="hv1")],
+        [AlertMatcherDetails(name="hostname", value="hv1")],
+        [AlertMatcherDetails(name="instance", value="hv2")],
+        [AlertMatcherDetails(name="hostname", value="hv2")],
+    ]
+    assert all(silence.author == "stackstorm" for silence in res)
+    assert all(silence.comment == "patching" for silence in res)
+    assert all(silence.end_time_dt == datetime(2025, 1, 1, 16, 0, 0) for silence in res)
+
+
+@patch("apis.alertmanager_api.silence.requests.get")
+def test_get_hvs_silences(mock_get, mock_get_silence_out):
+    """
+    use case: get_hvs_silences() finds the silences of many hypervisors from one listing
+    """
+    mock_alertmanager_account = MagicMock()
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = mock_get_silence_out
+    mock_get.return_value = mock_response
+
+    res = get_hvs_silences(
+        mock_alertmanager_account,
+        ["hv123.matrix.net", "hv234.matrix.net", "hv999.matrix.net"],
+        states=["active", "pending"],
+    )
+
+    mock_get.assert_called_once()
+    # the expired hv123 silence is left out
+    assert {hostname: len(silences) for hostname, silences in res.items()} == {
+        "hv123.matrix.net": 3,
+        "hv234.matrix.net": 1,
+        "hv999.matrix.net": 0,
+    }
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+from apis.alertmanager_api.silence_index import SilenceIndex
+from apis.alertmanager_api.structs.alert_matcher_details import AlertMatcherDetails
+
+
+def _raw_silence(silence_id, state, matchers):
+    """
+    Make a silence as returned by the AlertManager API
+    """
+    return {
+        "id": silence_id,
+        "status": {"state": state},
+        "comment": "comment",
+        "createdBy": "admin",
+        "startsAt": "2025-01-16T10:50:00.000Z",
+        "endsAt": "2025-01-16T12:50:00.000Z",
+        "matchers": [
+            {"isEqual": True, "isRegex": False, "name": name, "value": value}
+            for name, value in matchers
+        ],
+    }
+
+
+@pytest.fixture(name="raw_silences")
+def raw_silences_fixture():
+    """
+    Returns a listing of silences for several hypervisors
+    """
+    return [
+        _raw_silence("id1", "active", [("instance", "hv1"), ("env", "prod")]),
+        _raw_silence("id2", "pending", [("hostname", "hv1")]),
+        _raw_silence("id3", "expired", [("instance", "hv1")]),
+        _raw_silence("id4", "active", [("instance", "hv2")]),
+        _raw_silence("id5", "active", [("instance", "hv2"), ("hostname", "hv2")]),
+        _raw_silence("id6", "active", [("other", "hv3")]),
+    ]
+
+
+def test_silences(raw_silences):
+    """
+    Test every silence is parsed, in the order listed
+    """
+    res = SilenceIndex(raw_silences).silences()
+
+    assert list(res) == ["id1", "id2", "id3", "id4", "id5", "id6"]
+    assert res["id1"]["state"] == "active"
+    details = res["id1"]["details"]
+    assert details.start_time_dt == datetime(2025, 1, 16, 10, 50, tzinfo=timezone.utc)
+    assert details.end_time_dt == datetime(2025, 1, 16, 12, 50, tzinfo=timezone.utc)
+    assert details.author == "admin"
+    assert details.matchers == [
+        AlertMatcherDetails(name="instance", value="hv1"),
+        AlertMatcherDetails(name="env", value="prod"),
+    ]
+
+
+def test_states_filtered(raw_silences):
+    """
+    Test only silences in the given states are indexed
+    """
+    index = SilenceIndex(raw_silences, ["active", "pending"])
+
+    assert len(index) == 5
+    assert "id3" not in index
+    assert index.ids_matching("instance", "hv1") == {"id1"}
+
+
+def test_matching(raw_silences):
+    """
+    Test silences are found by matcher name and value
+    """
+    index = SilenceIndex(raw_silences)
+
+    assert list(index.matching("instance", "hv1")) == ["id1", "id3"]
+    assert list(index.matching("env", "prod")) == ["id1"]
+    assert not index.matching("env", "dev")
+
+
+def test_hv_silences(raw_silences):
+    """
+    Test silences for many hypervisors are found at once, by instance or hostname
+    """
+    res = SilenceIndex(raw_silences).hv_silences(["hv1", "hv2", "hv3", "hv4"])
+
+    assert {hostname: list(silences) for hostname, silences in res.items()} == {
+        "hv1": ["id1", "id2", "id3"],
+        "hv2": ["id4", "id5"],
+        "hv3": [],
+        "hv4": [],
+    }
+
+
+def test_only_looked_up_silences_parsed(raw_silences):
+    """
+    Test silences are only parsed when they are looked up, and only once
+    """
+    index = SilenceIndex(raw_silences)
+    with patch(
+        "apis.alertmanager_api.silence_index.AlertMatcherDetails.from_dict"
+    ) as mock_from_dict:
+        index.hv_silences(["hv2"])
+        index.hv_silences(["hv2"])
+
+    # id4 has one matcher and id5 has two
+    assert mock_from_dict.call_count == 3
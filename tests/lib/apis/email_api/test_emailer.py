@@ -1,5 +1,6 @@
 from email.mime.multipart import MIMEMultipart
 from pathlib import Path
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
 from unittest.mock import MagicMock, NonCallableMock, call, mock_open, patch
 
 import pytest
@@ -23,6 +24,7 @@ def instance_fixture(template_handler):
     template injected
     """
     mock_smtp_account = MagicMock()
+    mock_smtp_account.max_connections = 1
     return Emailer(mock_smtp_account, template_handler)
 
 
@@ -89,29 +91,185 @@ def test_send_email(
     )
 
 
-@patch("apis.email_api.emailer.Emailer.send_email")
-def test_send_emails(mock_send_email, instance):
+def _mock_email_params(email_to):
     """
-    Tests that send_emails method works expectedly
-    Should iterate through list of email params and call send_email for each one
+    Helper to build a mock EmailParams addressed to a single recipient
     """
-    mock_email_param_1 = MagicMock()
-    mock_email_param_2 = MagicMock()
-    mock_email_param_3 = MagicMock()
+    mock_email_param = MagicMock()
+    mock_email_param.email_to = (email_to,)
+    mock_email_param.email_cc = None
+    return mock_email_param
+
+
+@patch("apis.email_api.emailer.Emailer.build_email")
+@patch("apis.email_api.emailer.SMTP")
+@patch("apis.email_api.emailer.ssl")
+def test_send_emails_reuses_connection(_, mock_smtp, mock_build_email, instance):
+    """
+    Tests that send_emails sends every email over a single SMTP connection
+    """
+    mock_emails = [_mock_email_params(f"test{i}@example.com") for i in range(3)]
+
+    res = instance.send_emails(mock_emails)
+
+    mock_smtp.assert_called_once_with(
+        instance.smtp_account.server, instance.smtp_account.port, timeout=60
+    )
+    mock_server = mock_smtp.return_value
+    mock_server.ehlo.assert_called_once()
+    mock_server.starttls.assert_called_once()
+    assert mock_server.sendmail.call_count == 3
+    assert mock_build_email.call_args_list == [call(email) for email in mock_emails]
+    mock_server.quit.assert_called_once()
+    assert [r.email_to for r in res] == [e.email_to for e in mock_emails]
+    assert all(r.success for r in res)
+
+
+@patch("apis.email_api.emailer.Emailer.build_email")
+@patch("apis.email_api.emailer.SMTP")
+@patch("apis.email_api.emailer.ssl")
+def test_send_emails_parallel_connections(_, mock_smtp, __, instance):
+    """
+    Tests that send_emails opens up to max_connections connections and
+    returns results in the same order as the emails given
+    """
+    mock_emails = [_mock_email_params(f"test{i}@example.com") for i in range(5)]
+
+    res = instance.send_emails(mock_emails, max_connections=2)
 
-    mock_emails = [mock_email_param_1, mock_email_param_2, mock_email_param_3]
+    assert mock_smtp.call_count == 2
+    assert mock_smtp.return_value.sendmail.call_count == 5
+    assert [r.email_to for r in res] == [e.email_to for e in mock_emails]
 
-    instance.send_emails(mock_emails)
 
-    assert mock_send_email.call_count == 3
-    mock_send_email.assert_has_calls(
+@patch("apis.email_api.emailer.Emailer.build_email")
+@patch("apis.email_api.emailer.SMTP")
+@patch("apis.email_api.emailer.ssl")
+def test_send_emails_uses_account_max_connections(_, mock_smtp, __, instance):
+    """
+    Tests that send_emails defaults to the SMTP account's max_connections,
+    never opening more connections than there are emails
+    """
+    instance.smtp_account.max_connections = 4
+    instance.send_emails([_mock_email_params("test1@example.com")] * 2)
+    assert mock_smtp.call_count == 2
+
+
+@patch("apis.email_api.emailer.Emailer.build_email")
+@patch("apis.email_api.emailer.SMTP")
+@patch("apis.email_api.emailer.ssl")
+def test_send_emails_reconnects(_, mock_smtp, __, instance):
+    """
+    Tests that send_emails reconnects and resends if the connection drops
+    """
+    mock_server = mock_smtp.return_value
+    mock_server.sendmail.side_effect = [SMTPServerDisconnected, None, None]
+
+    res = instance.send_emails(
         [
-            call(mock_email_param_1),
-            call(mock_email_param_2),
-            call(mock_email_param_3),
+            _mock_email_params("test1@example.com"),
+            _mock_email_params("test2@example.com"),
         ]
     )
 
+    assert mock_smtp.call_count == 2
+    assert mock_server.sendmail.call_count == 3
+    assert all(r.success for r in res)
+
+
+@patch("apis.email_api.emailer.Emailer.build_email")
+@patch("apis.email_api.emailer.SMTP")
+@patch("apis.email_api.emailer.ssl")
+def test_send_emails_gives_up_after_retries(_, mock_smtp, __, instance):
+    """
+    Tests that send_emails reports a failure once retries are exhausted,
+    and carries on sending the remaining emails
+    """
+    mock_server = mock_smtp.return_value
+    mock_server.sendmail.side_effect = [
+        SMTPServerDisconnected("dropped"),
+        SMTPServerDisconnected("dropped"),
+        None,
+    ]
+
+    res = instance.send_emails(
+        [
+            _mock_email_params("test1@example.com"),
+            _mock_email_params("test2@example.com"),
+        ],
+        raise_on_failure=False,
+    )
+
+    assert not res[0].success
+    assert res[0].error == "dropped"
+    assert res[1].success
+
+
+@patch("apis.email_api.emailer.Emailer.build_email")
+@patch("apis.email_api.emailer.SMTP")
+@patch("apis.email_api.emailer.ssl")
+def test_send_emails_rejected_recipient(_, mock_smtp, __, instance):
+    """
+    Tests that a rejected email is reported without reconnecting
+    """
+    mock_server = mock_smtp.return_value
+    mock_server.sendmail.side_effect = [
+        SMTPRecipientsRefused({"test1@example.com": (550, b"no such user")}),
+        None,
+    ]
+
+    res = instance.send_emails(
+        [
+            _mock_email_params("test1@example.com"),
+            _mock_email_params("test2@example.com"),
+        ],
+        raise_on_failure=False,
+    )
+
+    mock_smtp.assert_called_once()
+    assert not res[0].success
+    assert res[1].success
+
+
+@patch("apis.email_api.emailer.Emailer.build_email")
+@patch("apis.email_api.emailer.SMTP")
+@patch("apis.email_api.emailer.ssl")
+def test_send_emails_raises_on_failure(_, mock_smtp, __, instance):
+    """
+    Tests that send_emails raises once all emails are attempted if any failed
+    """
+    mock_server = mock_smtp.return_value
+    mock_server.sendmail.side_effect = [
+        SMTPRecipientsRefused({"test1@example.com": (550, b"no such user")}),
+        None,
+    ]
+
+    with pytest.raises(RuntimeError, match="Failed to send 1 of 2 email"):
+        instance.send_emails(
+            [
+                _mock_email_params("test1@example.com"),
+                _mock_email_params("test2@example.com"),
+            ]
+        )
+    assert mock_server.sendmail.call_count == 2
+
+
+@patch("apis.email_api.emailer.Emailer.build_email")
+@patch("apis.email_api.emailer.SMTP")
+def test_send_emails_build_failure(mock_smtp, mock_build_email, instance):
+    """
+    Tests that an email which can't be built is reported without sending it
+    """
+    mock_build_email.side_effect = RuntimeError("missing attachment")
+
+    res = instance.send_emails(
+        [_mock_email_params("test1@example.com")], raise_on_failure=False
+    )
+
+    mock_smtp.assert_not_called()
+    assert not res[0].success
+    assert res[0].error == "missing attachment"
+
 
 @patch("builtins.open", new_callable=mock_open, read_data="data")
 @patch("apis.email_api.emailer.MIMEApplication")
@@ -238,18 +396,14 @@ def test_build_email_body_plaintext(mock_mime_text, instance, template_handler):
 
 
 @patch("apis.email_api.emailer.MIMEText")
-@patch("apis.email_api.emailer.CSSInliner")
-@patch("apis.email_api.emailer.EmailTemplateDetails")
 def test_build_email_body_html(
-    mock_email_template_details,
-    mock_css_inliner,
     mock_mime_text,
     instance,
     template_handler,
 ):
     """
     Tests that build email body renders the expected templates and places them into expected MIMEText object
-    uses html templates when as_html=False. Also should render the wrapper template
+    uses html templates when as_html=True. Also should wrap the rendered templates with inlined styling
     """
     template_1 = NonCallableMock()
     template_2 = NonCallableMock()
@@ -257,25 +411,29 @@ def test_build_email_body_html(
     template_handler.render_html_template.side_effect = [
         "template-render-html-1\n",
         "template-render-html-2\n",
-        "template-render-wrapper",
     ]
     res = instance.build_email_body(template_list, as_html=True)
 
-    mock_email_template_details.assert_called_once_with(
-        template_name="wrapper",
-        template_params={"body": "template-render-html-1\ntemplate-render-html-2\n"},
-    )
-    assert template_handler.render_html_template.call_count == 3
     assert template_handler.render_plaintext_template.call_count == 0
     assert template_handler.render_html_template.call_args_list == [
         call(template_1),
         call(template_2),
-        call(mock_email_template_details.return_value),
     ]
-    mock_css_inliner.assert_called_once_with(keep_style_tags=True)
-    mock_css_inline_obj = mock_css_inliner.return_value
-    mock_css_inline_obj.inline.assert_called_once_with("template-render-wrapper")
+    template_handler.render_html_email.assert_called_once_with(
+        "template-render-html-1\ntemplate-render-html-2\n"
+    )
     mock_mime_text.assert_called_once_with(
-        mock_css_inline_obj.inline.return_value, "html"
+        template_handler.render_html_email.return_value, "html"
     )
     assert res == mock_mime_text.return_value
+
+
+@patch("apis.email_api.emailer.get_default_template_handler")
+def test_emailer_uses_default_template_handler(mock_get_default_template_handler):
+    """
+    Tests that Emailer uses the shared TemplateHandler if one isn't given
+    """
+    res = Emailer(MagicMock())
+    mock_get_default_template_handler.assert_called_once()
+    # pylint:disable=protected-access
+    assert res._template_handler == mock_get_default_template_handler.return_value
@@ -87,3 +87,20 @@ def test_from_pack_config_invalid_pack():
     """
     with pytest.raises(ValueError):
         SMTPAccount.from_pack_config({}, "config1")
+
+
+def test_from_dict_default_max_connections():
+    """
+    Tests that max_connections defaults to a single connection if not configured
+    """
+    res = SMTPAccount.from_dict(
+        {
+            "username": "user1",
+            "password": "some-pass",
+            "server": "sever",
+            "port": "port",
+            "secure": True,
+            "smtp_auth": True,
+        }
+    )
+    assert res.max_connections == 1
@@ -3,8 +3,15 @@ from unittest.mock import MagicMock, NonCallableMock, mock_open, patch
 import pytest
 from apis.email_api.exceptions.email_template_error import EmailTemplateError
 from apis.email_api.structs.email_template_details import EmailTemplateDetails
-from apis.email_api.template_handler import TemplateHandler
+from apis.email_api.template_handler import (
+    TemplateHandler,
+    get_default_template_handler,
+)
 from jinja2.exceptions import TemplateError, TemplateNotFound
+
+# weird issue where pylint can't find the module - works fine though
+# pylint:disable=no-name-in-module
+from css_inline import CSSInliner
 from yaml import YAMLError
 
 # pylint:disable=protected-access
@@ -345,3 +352,94 @@ def test_render_template_schema_but_no_params(instance):
             ),
             file_path_key="html_filepath",
         )
+
+
+@patch("apis.email_api.template_handler.TemplateHandler._get_template_file")
+def test_render_template_caches_static_templates(mock_get_template_file, instance):
+    """
+    Tests that templates without a schema are only rendered once
+    """
+    template_details = EmailTemplateDetails(
+        template_name="mock-template-no-schema", template_params={}
+    )
+    res_1 = instance._render_template(template_details, "html_filepath")
+    res_2 = instance._render_template(template_details, "html_filepath")
+
+    mock_get_template_file.assert_called_once_with("/path/to/file2.html")
+    mock_get_template_file.return_value.render.assert_called_once()
+    assert res_1 == res_2 == mock_get_template_file.return_value.render.return_value
+
+
+@patch("apis.email_api.template_handler.TemplateHandler._get_template_file")
+def test_render_template_does_not_cache_templates_with_params(
+    mock_get_template_file, instance
+):
+    """
+    Tests that templates with a schema are rendered every time
+    """
+    template_details = EmailTemplateDetails(
+        template_name="mock-template",
+        template_params={"attr1": "123", "attr2": "abc", "attr3": "def"},
+    )
+    instance._render_template(template_details, "html_filepath")
+    instance._render_template(template_details, "html_filepath")
+    assert mock_get_template_file.return_value.render.call_count == 2
+
+
+@patch("apis.email_api.template_handler.CSSInliner")
+@patch("apis.email_api.template_handler.TemplateHandler.render_html_template")
+def test_render_html_email(mock_render_html_template, mock_css_inliner, instance):
+    """
+    Tests that render_html_email renders and inlines the wrapper once, then
+    only inlines the body for each email using the wrapper's styles
+    """
+    mock_render_html_template.return_value = (
+        "<html><head><style>td {color: red;}</style></head>"
+        "<body>@@EMAIL_BODY@@</body></html>"
+    )
+    mock_css_inliner.return_value.inline.side_effect = lambda html: html
+
+    res_1 = instance.render_html_email("Hello <table><tr><td>1</td></tr></table>")
+    res_2 = instance.render_html_email("Bye <table><tr><td>2</td></tr></table>")
+
+    mock_render_html_template.assert_called_once_with(
+        EmailTemplateDetails(
+            template_name="wrapper", template_params={"body": "@@EMAIL_BODY@@"}
+        )
+    )
+    mock_css_inliner.assert_called_once_with(keep_style_tags=True)
+    assert res_1 == (
+        "<html><head><style>td {color: red;}</style></head><body>"
+        'Hello <table><tbody><tr><td style="color: red;">1</td></tr></tbody></table>'
+        "</body></html>"
+    )
+    assert res_2.startswith("<html><head><style>td {color: red;}</style></head>")
+    assert 'Bye <table><tbody><tr><td style="color: red;">2</td>' in res_2
+
+
+def test_render_html_email_matches_full_inlining():
+    """
+    Tests that pre-inlining the wrapper gives the same email as rendering and inlining
+    the whole wrapper template with the body in place
+    """
+    handler = TemplateHandler()
+    body = handler.render_html_template(
+        EmailTemplateDetails(
+            template_name="test", template_params={"username": "user1"}
+        )
+    ) + handler.render_html_template(
+        EmailTemplateDetails(template_name="footer", template_params={})
+    )
+    wrapped = handler.render_html_template(
+        EmailTemplateDetails(template_name="wrapper", template_params={"body": body})
+    )
+    assert handler.render_html_email(body) == CSSInliner(keep_style_tags=True).inline(
+        wrapped
+    )
+
+
+def test_get_default_template_handler():
+    """
+    Tests that the same TemplateHandler is returned every time
+    """
+    assert get_default_template_handler() is get_default_template_handler()
@@ -6,11 +6,16 @@ from requests import HTTPError
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
 
 from apis.icinga_api.enums.icinga_objects import IcingaObject
-from apis.icinga_api.downtime import remove_downtime, schedule_downtime
+from apis.icinga_api.downtime import (
+    remove_downtime,
+    remove_downtimes,
+    schedule_downtime,
+    schedule_downtimes,
+)
 from apis.icinga_api.structs.downtime_details import DowntimeDetails
 
 
-@patch("apis.icinga_api.downtime.requests.post")
+@patch("apis.icinga_api.icinga_client.requests.Session.post")
 def test_schedule_host_fixed_downtime_success(mock_post):
     icinga_account = MagicMock()
     details = DowntimeDetails(
@@ -49,7 +54,7 @@ def test_schedule_host_fixed_downtime_success(mock_post):
     assert payload == expected_payload
 
 
-@patch("apis.icinga_api.downtime.requests.post")
+@patch("apis.icinga_api.icinga_client.requests.Session.post")
 def test_schedule_service_fixed_downtime_success(mock_post):
     icinga_account = MagicMock()
     details = DowntimeDetails(
@@ -88,7 +93,7 @@ def test_schedule_service_fixed_downtime_success(mock_post):
     assert payload == expected_payload
 
 
-@patch("apis.icinga_api.downtime.requests.post")
+@patch("apis.icinga_api.icinga_client.requests.Session.post")
 def test_schedule_downtime_request_fail(mock_post):
     icinga_account = MagicMock()
     details = DowntimeDetails(
@@ -112,7 +117,7 @@ def test_schedule_downtime_request_fail(mock_post):
     mock_response.raise_for_status.assert_called_once()
 
 
-@patch("apis.icinga_api.downtime.requests.post")
+@patch("apis.icinga_api.icinga_client.requests.Session.post")
 def test_schedule_flexible_downtime_success(mock_post):
     icinga_account = MagicMock()
     details = DowntimeDetails(
@@ -215,7 +220,7 @@ def test_missing_schedule_downtime_comment():
         schedule_downtime(icinga_account, details)
 
 
-@patch("apis.icinga_api.downtime.requests.post")
+@patch("apis.icinga_api.icinga_client.requests.Session.post")
 def test_remove_downtime_success(mock_post):
     icinga_account = MagicMock()
 
@@ -244,7 +249,7 @@ def test_remove_downtime_success(mock_post):
     assert payload == expected_payload
 
 
-@patch("apis.icinga_api.downtime.requests.post")
+@patch("apis.icinga_api.icinga_client.requests.Session.post")
 def test_remove_downtime_request_fail(mock_post):
     icinga_account = MagicMock()
 
@@ -272,3 +277,28 @@ def test_missing_remove_downtime_object_name():
             object_type=IcingaObject.HOST,
             object_name="",
         )
+
+
+@patch("apis.icinga_api.downtime.get_icinga_client")
+def test_schedule_downtimes(mock_get_icinga_client):
+    icinga_account = MagicMock()
+    downtimes = [MagicMock(), MagicMock()]
+
+    schedule_downtimes(icinga_account, downtimes)
+
+    mock_get_icinga_client.assert_called_once_with(icinga_account)
+    mock_get_icinga_client.return_value.schedule_downtimes.assert_called_once_with(
+        downtimes
+    )
+
+
+@patch("apis.icinga_api.downtime.get_icinga_client")
+def test_remove_downtimes(mock_get_icinga_client):
+    icinga_account = MagicMock()
+
+    remove_downtimes(icinga_account, IcingaObject.HOST, ["hv1", "hv2"])
+
+    mock_get_icinga_client.assert_called_once_with(icinga_account)
+    mock_get_icinga_client.return_value.remove_downtimes.assert_called_once_with(
+        IcingaObject.HOST, ["hv1", "hv2"]
+    )
@@ -0,0 +1,251 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from requests import HTTPError
+from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
+
+from apis.icinga_api.enums.icinga_objects import IcingaObject
+from apis.icinga_api.icinga_client import IcingaClient, get_icinga_client
+from apis.icinga_api.structs.downtime_details import DowntimeDetails
+from apis.icinga_api.structs.icinga_account import IcingaAccount
+from apis.icinga_api.structs.object_query import IcingaQuery
+
+
+@pytest.fixture(name="icinga_account")
+def icinga_account_fixture():
+    """
+    Returns an icinga account
+    """
+    return IcingaAccount(
+        username="user", password="pass", icinga_endpoint="https://icinga:5665"
+    )
+
+
+@pytest.fixture(name="client")
+def client_fixture(icinga_account):
+    """
+    Returns a client with a mocked session
+    """
+    client = IcingaClient(icinga_account, max_objects_per_request=2)
+    client.session = MagicMock()
+    return client
+
+
+def _downtime(object_name, comment="Scheduled maintenance"):
+    """
+    Make details for a fixed host downtime
+    """
+    return DowntimeDetails(
+        object_type=IcingaObject.HOST,
+        object_name=object_name,
+        start_time=1725955200,
+        end_time=1725958800,
+        comment=comment,
+        is_fixed=True,
+        duration=3600,
+    )
+
+
+def _payloads(client):
+    """
+    Get the payload sent with each post
+    """
+    return [
+        json.loads(post_call.kwargs["data"])
+        for post_call in client.session.post.call_args_list
+    ]
+
+
+def test_session(icinga_account):
+    """
+    Test the session authenticates with the account and verifies the Icinga CA
+    """
+    client = IcingaClient(icinga_account)
+    assert client.session.auth.username == "user"
+    assert client.session.auth.password == "pass"
+    assert client.session.verify == "/var/lib/icinga2/certs/ca.crt"
+    assert client.session.headers["Accept"] == "application/json"
+
+
+def test_schedule_downtimes_grouped(client):
+    """
+    Test hosts sharing a downtime are scheduled with one request matching any of their names
+    """
+    client.schedule_downtimes(
+        [
+            _downtime("hv1"),
+            _downtime("hv2"),
+            _downtime("hv1"),
+            _downtime("hv3", "other"),
+        ]
+    )
+
+    client.session.post.assert_called_with(
+        url="https://icinga:5665/v1/actions/schedule-downtime",
+        data=client.session.post.call_args.kwargs["data"],
+        timeout=300,
+    )
+    payloads = sorted(
+        _payloads(client), key=lambda payload: payload["comment"], reverse=True
+    )
+    assert payloads == [
+        {
+            "type": "Host",
+            "filter": 'host.name=="hv3"',
+            "author": "StackStorm",
+            "comment": "other",
+            "start_time": 1725955200,
+            "end_time": 1725958800,
+            "fixed": True,
+            "duration": None,
+            "all_services": True,
+        },
+        {
+            "type": "Host",
+            "filter": "host.name in object_names",
+            "filter_vars": {"object_names": ["hv1", "hv2"]},
+            "author": "StackStorm",
+            "comment": "Scheduled maintenance",
+            "start_time": 1725955200,
+            "end_time": 1725958800,
+            "fixed": True,
+            "duration": None,
+            "all_services": True,
+        },
+    ]
+
+
+def test_schedule_downtimes_chunked(client):
+    """
+    Test large groups of hosts are split over several requests
+    """
+    client.schedule_downtimes([_downtime(f"hv{i}") for i in range(5)])
+
+    names = sorted(
+        payload["filter_vars"]["object_names"] for payload in _payloads(client)
+    )
+    assert names == [["hv0", "hv1"], ["hv2", "hv3"], ["hv4"]]
+
+
+def test_schedule_downtimes_missing_param(client):
+    """
+    Test nothing is scheduled if any downtime is missing a mandatory field
+    """
+    with pytest.raises(MissingMandatoryParamError):
+        client.schedule_downtimes([_downtime("hv1"), _downtime("hv2", comment="")])
+    client.session.post.assert_not_called()
+
+
+def test_schedule_downtimes_error_after_all_requests(client):
+    """
+    Test an error is raised once every request has been made
+    """
+    failed_response = MagicMock()
+    failed_response.raise_for_status.side_effect = HTTPError("Not Found")
+    client.session.post.side_effect = [failed_response, MagicMock(), MagicMock()]
+
+    with pytest.raises(HTTPError):
+        client.schedule_downtimes([_downtime(f"hv{i}") for i in range(5)])
+    assert client.session.post.call_count == 3
+
+
+def test_remove_downtimes(client):
+    """
+    Test downtimes for many hosts are removed matching any of their names
+    """
+    client.remove_downtimes(IcingaObject.SERVICE, ["svc1", "svc2", "svc1"])
+
+    client.session.post.assert_called_once()
+    assert (
+        client.session.post.call_args.kwargs["url"]
+        == "https://icinga:5665/v1/actions/remove-downtime"
+    )
+    assert _payloads(client) == [
+        {
+            "type": "Service",
+            "filter": "service.name in object_names",
+            "filter_vars": {"object_names": ["svc1", "svc2"]},
+            "author": "StackStorm",
+        }
+    ]
+
+
+def test_remove_downtimes_missing_name(client):
+    """
+    Test an empty object name is rejected
+    """
+    with pytest.raises(MissingMandatoryParamError):
+        client.remove_downtimes(IcingaObject.HOST, ["hv1", ""])
+    client.session.post.assert_not_called()
+
+
+def test_query_objects(client):
+    """
+    Test objects are queried with a GET override
+    """
+    res = client.query_objects(
+        IcingaQuery(
+            object_type="Host",
+            filter="host.team==team",
+            filter_vars={"team": "cloud"},
+            properties_to_select=["name"],
+        ),
+        stream=True,
+    )
+
+    assert res == client.session.post.return_value
+    client.session.post.assert_called_once_with(
+        url="https://icinga:5665/v1/objects/hosts",
+        data=json.dumps(
+            {
+                "type": "Host",
+                "filter": "host.team==team",
+                "filter_vars": {"team": "cloud"},
+                "attrs": ["name"],
+                "joins": None,
+            }
+        ),
+        timeout=300,
+        headers={"X-HTTP-Method-Override": "GET"},
+        stream=True,
+    )
+
+
+def test_get_icinga_client(icinga_account):
+    """
+    Test each account shares one client
+    """
+    other_account = IcingaAccount(
+        username="other", password="pass", icinga_endpoint="https://icinga:5665"
+    )
+    client = get_icinga_client(icinga_account)
+    assert get_icinga_client(icinga_account) is client
+    assert get_icinga_client(other_account) is not client
+
+
+def test_iter_objects(client):
+    """
+    Test the results of a query are read from the response as it is streamed
+    """
+    res = client.session.post.return_value
+    res.__enter__.return_value = res
+    res.iter_content.return_value = [
+        b'{"results": [{"name": "hv1"},',
+        b' {"name": "hv2"}]}',
+    ]
+
+    objects = client.iter_objects(
+        IcingaQuery(
+            object_type="Host",
+            filter="host.team==team",
+            filter_vars={"team": "cloud"},
+            properties_to_select=["name"],
+        ),
+        chunk_size=1024,
+    )
+
+    assert list(objects) == [{"name": "hv1"}, {"name": "hv2"}]
+    assert client.session.post.call_args.kwargs["stream"] is True
+    res.iter_content.assert_called_once_with(1024)
+    res.__exit__.assert_called_once()
@@ -7,7 +7,7 @@ from apis.icinga_api.query_objects import query_object
 from apis.icinga_api.query_objects import IcingaQuery
 
 
-@patch("apis.icinga_api.query_objects.requests.post")
+@patch("apis.icinga_api.icinga_client.requests.Session.post")
 @pytest.mark.parametrize("joins", [None, ["host.name", "host.state"]])
 def test_query_object_success(mock_post, joins):
     """
@@ -2,7 +2,10 @@ from unittest import mock
 import pytest
 
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
-from apis.openstack_api.openstack_connection import OpenstackConnection
+from apis.openstack_api.openstack_connection import (
+    OpenstackConnection,
+    OpenstackConnectionPool,
+)
 
 
 def test_openstack_connection_connects_first_time():
@@ -86,3 +89,183 @@ def test_openstack_connection_connects_second_time():
             pass
         with OpenstackConnection("a"):
             assert patched_connect.call_count == 2
+
+
+@pytest.fixture(name="pool")
+def pool_fixture():
+    """
+    Returns a fresh connection pool for each test
+    """
+    return OpenstackConnectionPool(idle_ttl=60, token_stale_duration=30)
+
+
+def test_pool_reuses_connection(pool):
+    """
+    Tests that acquiring the same cloud twice only calls connect once
+    """
+    with mock.patch(
+        "apis.openstack_api.openstack_connection.connect"
+    ) as patched_connect:
+        patched_connect.return_value.session.auth.auth_ref.will_expire_soon.return_value = (
+            False
+        )
+        first = pool.acquire("a")
+        pool.release("a", first)
+        second = pool.acquire("a")
+
+    patched_connect.assert_called_once_with(cloud="a")
+    assert first == second
+    first.close.assert_not_called()
+
+
+def test_pool_keys_by_cloud_name(pool):
+    """
+    Tests that different clouds get different connections
+    """
+    with mock.patch(
+        "apis.openstack_api.openstack_connection.connect"
+    ) as patched_connect:
+        pool.acquire("a")
+        pool.acquire("b")
+    patched_connect.assert_has_calls(
+        [mock.call(cloud="a"), mock.call(cloud="b")], any_order=True
+    )
+
+
+def test_pool_refreshes_stale_token(pool):
+    """
+    Tests that a connection with a token about to expire is re-authorized in place
+    """
+    with mock.patch(
+        "apis.openstack_api.openstack_connection.connect"
+    ) as patched_connect:
+        conn = patched_connect.return_value
+        conn.session.auth.auth_ref.will_expire_soon.return_value = True
+        conn = pool.acquire("a")
+        pool.release("a", conn)
+        pool.acquire("a")
+
+    conn.session.auth.auth_ref.will_expire_soon.assert_called_once_with(30)
+    conn.authorize.assert_called_once()
+    patched_connect.assert_called_once()
+
+
+def test_pool_replaces_unhealthy_connection(pool):
+    """
+    Tests that a connection which fails to re-authorize is closed and replaced
+    """
+    unhealthy, replacement = mock.MagicMock(), mock.MagicMock()
+    unhealthy.session.auth.auth_ref = None
+    unhealthy.authorize.side_effect = ConnectionError
+    with mock.patch(
+        "apis.openstack_api.openstack_connection.connect",
+        side_effect=[unhealthy, replacement],
+    ):
+        conn = pool.acquire("a")
+        pool.release("a", conn)
+        res = pool.acquire("a")
+
+    unhealthy.close.assert_called_once()
+    assert res == replacement
+
+
+def test_pool_evicts_idle_connections(pool):
+    """
+    Tests that connections unused for longer than the idle TTL are closed
+    """
+    with mock.patch(
+        "apis.openstack_api.openstack_connection.connect"
+    ) as patched_connect, mock.patch(
+        "apis.openstack_api.openstack_connection.time.monotonic"
+    ) as mock_time:
+        mock_time.return_value = 0
+        conn = pool.acquire("a")
+        pool.release("a", conn)
+        mock_time.return_value = 61
+        pool.acquire("b")
+
+    conn.close.assert_called_once()
+    assert patched_connect.call_count == 2
+
+
+def test_pool_does_not_evict_in_use_connections(pool):
+    """
+    Tests that a connection still held by a caller is never evicted
+    """
+    with mock.patch("apis.openstack_api.openstack_connection.connect"), mock.patch(
+        "apis.openstack_api.openstack_connection.time.monotonic"
+    ) as mock_time:
+        mock_time.return_value = 0
+        conn = pool.acquire("a")
+        mock_time.return_value = 61
+        pool.acquire("b")
+
+    conn.close.assert_not_called()
+
+
+def test_pool_close_all(pool):
+    """
+    Tests that close_all closes every pooled connection
+    """
+    conn_a, conn_b = mock.MagicMock(), mock.MagicMock()
+    with mock.patch(
+        "apis.openstack_api.openstack_connection.connect",
+        side_effect=[conn_a, conn_b],
+    ):
+        pool.acquire("a")
+        pool.acquire("b")
+    pool.close_all()
+    conn_a.close.assert_called_once()
+    conn_b.close.assert_called_once()
+
+
+def test_openstack_connection_pooled():
+    """
+    Tests that a pooled OpenstackConnection acquires from, and releases to,
+    the shared pool without closing the connection
+    """
+    with mock.patch(
+        "apis.openstack_api.openstack_connection.CONNECTION_POOL"
+    ) as mock_pool:
+        with OpenstackConnection("a", pooled=True) as instance:
+            mock_pool.acquire.assert_called_once_with("a")
+            assert instance == mock_pool.acquire.return_value
+        mock_pool.release.assert_called_once_with("a", instance, discard=False)
+        instance.close.assert_not_called()
+
+
+def test_openstack_connection_pooled_error():
+    """
+    Tests that a pooled connection is discarded when the block raises, so a broken
+    connection isn't reused
+    """
+    with mock.patch(
+        "apis.openstack_api.openstack_connection.CONNECTION_POOL"
+    ) as mock_pool:
+        with pytest.raises(ConnectionError):
+            with OpenstackConnection("a", pooled=True) as instance:
+                raise ConnectionError
+        mock_pool.release.assert_called_once_with("a", instance, discard=True)
+
+
+def test_pool_discards_connection(pool):
+    """
+    Tests that a discarded connection is no longer handed out, and is closed once nobody
+    is using it
+    """
+    broken, replacement = mock.MagicMock(), mock.MagicMock()
+    with mock.patch(
+        "apis.openstack_api.openstack_connection.connect",
+        side_effect=[broken, replacement],
+    ):
+        pool.acquire("a")
+        pool.acquire("a")
+        pool.release("a", broken, discard=True)
+        broken.close.assert_not_called()
+
+        assert pool.acquire("a") is replacement
+        pool.release("a", broken)
+        broken.close.assert_called_once()
+
+        pool.release("a", replacement)
+    replacement.close.assert_not_called()
@@ -0,0 +1,105 @@
+import threading
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+from apis.openstack_api.openstack_cross_cloud import fetch_from_clouds
+
+
+def _resource(name):
+    """
+    Make a mock resource with the given name
+    """
+    resource = MagicMock()
+    resource.name = name
+    return resource
+
+
+@pytest.fixture(name="mock_connections")
+def mock_connections_fixture():
+    """
+    Patch OpenstackConnection to return a source then a target connection
+    """
+    source_conn, target_conn = MagicMock(), MagicMock()
+    with patch(
+        "apis.openstack_api.openstack_cross_cloud.OpenstackConnection"
+    ) as mock_openstack_connection:
+        mock_openstack_connection.return_value.__enter__.side_effect = [
+            source_conn,
+            target_conn,
+        ]
+        yield mock_openstack_connection, source_conn, target_conn
+
+
+def test_fetch_from_clouds(mock_connections):
+    """
+    Test resources are listed from both clouds using pooled connections and indexed by name
+    """
+    mock_openstack_connection, source_conn, target_conn = mock_connections
+    source_conn.compute.aggregates.return_value = iter([_resource("agg1")])
+    target_conn.compute.aggregates.return_value = iter(
+        [_resource("agg1"), _resource("agg2")]
+    )
+
+    source, target = fetch_from_clouds(
+        "prod", "dev", lambda conn: conn.compute.aggregates()
+    )
+
+    mock_openstack_connection.assert_has_calls(
+        [call("prod", pooled=True), call("dev", pooled=True)], any_order=True
+    )
+    assert list(source) == ["agg1"]
+    assert list(target) == ["agg1", "agg2"]
+
+
+def test_fetch_from_clouds_target_fetch_and_key(mock_connections):
+    """
+    Test a separate target fetch function and custom key are used
+    """
+    _, source_conn, target_conn = mock_connections
+    source_conn.image.images.return_value = [{"id": "1"}]
+    target_conn.image.images.return_value = [{"id": "2"}]
+
+    source, target = fetch_from_clouds(
+        "prod",
+        "dev",
+        lambda conn: conn.image.images(status="active"),
+        lambda conn: conn.image.images(),
+        key=lambda image: image["id"],
+    )
+
+    source_conn.image.images.assert_called_once_with(status="active")
+    target_conn.image.images.assert_called_once_with()
+    assert source == {"1": {"id": "1"}}
+    assert target == {"2": {"id": "2"}}
+
+
+def test_fetch_from_clouds_concurrent(mock_connections):
+    """
+    Test both clouds are listed at the same time
+    """
+    _, source_conn, target_conn = mock_connections
+    # each listing waits for the other to start, so would time out if run one after the other
+    barrier = threading.Barrier(2, timeout=5)
+
+    def listing(name):
+        barrier.wait()
+        return [_resource(name)]
+
+    source_conn.list_flavors.side_effect = lambda: listing("flavor1")
+    target_conn.list_flavors.side_effect = lambda: listing("flavor2")
+
+    source, target = fetch_from_clouds("prod", "dev", lambda conn: conn.list_flavors())
+
+    assert list(source) == ["flavor1"]
+    assert list(target) == ["flavor2"]
+
+
+def test_fetch_from_clouds_error(mock_connections):
+    """
+    Test an error listing from either cloud is raised
+    """
+    _, _, target_conn = mock_connections
+    target_conn.list_flavors.side_effect = RuntimeError("target down")
+
+    with pytest.raises(RuntimeError, match="target down"):
+        fetch_from_clouds("prod", "dev", lambda conn: conn.list_flavors())
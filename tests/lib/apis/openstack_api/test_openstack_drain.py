@@ -0,0 +1,361 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from unittest.mock import MagicMock, patch
+
+import pytest
+from openstack.compute.v2.hypervisor import Hypervisor
+from openstack.placement.v1.resource_provider import ResourceProvider
+from openstack.placement.v1.resource_provider_inventory import (
+    ResourceProviderInventory,
+)
+
+from apis.openstack_api.openstack_drain import DrainEngine
+from apis.openstack_api.structs.migration_result import MigrationResult
+
+
+def _mock_server(server_id, vcpus, ram, flavor_name="l3.small", name=None):
+    """
+    Helper to create a mock server with a flavor of the given size
+    """
+    server = MagicMock()
+    server.id = server_id
+    server.name = name or f"server-{server_id}"
+    server.flavor.name = flavor_name
+    server.flavor.vcpus = vcpus
+    server.flavor.ram = ram
+    return server
+
+
+def _mock_hypervisor(
+    name,
+    vcpus,
+    memory_size,
+    status="enabled",
+    state="up",
+    vcpus_used=0,
+    allocation_ratio=1.0,
+):
+    """
+    Helper to create a hypervisor, as returned from microversion 2.88 without any
+    capacity fields, and its resource provider in Placement
+    """
+    hypervisor = Hypervisor(id=f"uuid-{name}", name=name, status=status, state=state)
+    provider = ResourceProvider(id=f"uuid-{name}", name=name)
+    inventories = [
+        ResourceProviderInventory(
+            resource_class="VCPU",
+            total=vcpus,
+            reserved=0,
+            allocation_ratio=allocation_ratio,
+        ),
+        ResourceProviderInventory(
+            resource_class="MEMORY_MB",
+            total=memory_size,
+            reserved=0,
+            allocation_ratio=1.0,
+        ),
+    ]
+    usages = {"VCPU": vcpus_used, "MEMORY_MB": 0}
+    return hypervisor, provider, inventories, usages
+
+
+def _mock_conn(servers_by_host, hypervisors):
+    """
+    Helper to create a mock connection listing the given servers and hypervisors, with the
+    capacity of each hypervisor in Placement
+    """
+    conn = MagicMock()
+    conn.compute.servers.side_effect = lambda all_projects, compute_host: iter(
+        servers_by_host.get(compute_host, [])
+    )
+    conn.compute.hypervisors.return_value = [
+        hypervisor for hypervisor, _, _, _ in hypervisors
+    ]
+    conn.placement.resource_providers.return_value = [
+        provider for _, provider, _, _ in hypervisors
+    ]
+    inventories = {provider.id: inventory for _, provider, inventory, _ in hypervisors}
+    usages = {provider.id: usage for _, provider, _, usage in hypervisors}
+    conn.placement.resource_provider_inventories.side_effect = lambda provider: iter(
+        inventories[provider.id]
+    )
+    conn.placement.fetch_resource_provider_usages.side_effect = (
+        lambda provider: ResourceProvider(
+            id=provider.id, name=provider.name, usages=usages[provider.id]
+        )
+    )
+    return conn
+
+
+@pytest.fixture(name="mock_flavor_index")
+def mock_flavor_index_fixture():
+    """
+    Fixture which patches the flavor index, with no flavors restricted to any hypervisor
+    """
+    with patch(
+        "apis.openstack_api.openstack_drain.HypervisorFlavorIndex"
+    ) as mock_flavor_index_cls:
+        mock_flavor_index = mock_flavor_index_cls.from_connection.return_value
+        mock_flavor_index.flavors_for.return_value = []
+        yield mock_flavor_index
+
+
+@pytest.fixture(name="mock_migrate")
+def mock_migrate_fixture():
+    """
+    Fixture which patches snapshot_and_migrate_server
+    """
+    with patch(
+        "apis.openstack_api.openstack_drain.snapshot_and_migrate_server"
+    ) as mock_migrate:
+        yield mock_migrate
+
+
+@pytest.mark.usefixtures("mock_flavor_index")
+def test_drain_largest_first_to_most_free_memory(mock_migrate):
+    """
+    Tests servers are migrated largest first, each to the destination with the most free memory
+    """
+    conn = _mock_conn(
+        {
+            "hv-src": [
+                _mock_server("small", 2, 2048),
+                _mock_server("large", 8, 16384),
+                _mock_server("medium", 4, 8192, name="amphora-1234"),
+            ]
+        },
+        [
+            _mock_hypervisor("hv-src", 64, 65536),
+            _mock_hypervisor("hv-a", 32, 20000),
+            _mock_hypervisor("hv-b", 32, 12000),
+            _mock_hypervisor("hv-disabled", 64, 65536, status="disabled"),
+            _mock_hypervisor("hv-down", 64, 65536, state="down"),
+        ],
+    )
+
+    results = DrainEngine(conn, max_migrations=1, live_migration=False).drain(
+        ["hv-src"]
+    )
+
+    migrations = [
+        (call.kwargs["server_id"], call.kwargs["dest_host"])
+        for call in mock_migrate.call_args_list
+    ]
+    # hv-a has most memory, so gets large (16384), then hv-b (12000) has more than hv-a (3616)
+    assert migrations == [("large", "hv-a"), ("medium", "hv-b"), ("small", "hv-b")]
+    assert all(
+        call.kwargs["live_migration"] is False for call in mock_migrate.call_args_list
+    )
+    snapshots = {
+        call.kwargs["server_id"]: call.kwargs["snapshot"]
+        for call in mock_migrate.call_args_list
+    }
+    assert snapshots == {"large": True, "medium": False, "small": True}
+    assert [result.server_id for result in results] == ["large", "medium", "small"]
+    assert all(result.success for result in results)
+    assert all(result.source_host == "hv-src" for result in results)
+
+
+def test_drain_respects_flavor_aggregates(mock_flavor_index, mock_migrate):
+    """
+    Tests servers are only migrated to hypervisors which can build their flavor
+    """
+    mock_flavor_index.flavors_for.side_effect = {
+        "hv-src": ["l6.c2"],
+        "hv-a": ["l3.small"],
+        "hv-b": ["l6.c2"],
+    }.get
+    conn = _mock_conn(
+        {"hv-src": [_mock_server("id1", 2, 2048, flavor_name="l6.c2")]},
+        [_mock_hypervisor("hv-a", 32, 65536), _mock_hypervisor("hv-b", 32, 8192)],
+    )
+
+    DrainEngine(conn).drain(["hv-src"])
+
+    mock_migrate.assert_called_once_with(
+        conn=conn,
+        server_id="id1",
+        snapshot=True,
+        live_migration=True,
+        dest_host="hv-b",
+    )
+
+
+@pytest.mark.usefixtures("mock_flavor_index")
+def test_drain_no_capacity(mock_migrate):
+    """
+    Tests servers which don't fit on any hypervisor are reported without being migrated
+    """
+    conn = _mock_conn(
+        {"hv-src": [_mock_server("id1", 64, 2048)]},
+        [_mock_hypervisor("hv-a", 32, 65536)],
+    )
+
+    results = DrainEngine(conn).drain(["hv-src"])
+
+    mock_migrate.assert_not_called()
+    assert results == [
+        MigrationResult(
+            server_id="id1",
+            server_name="server-id1",
+            source_host="hv-src",
+            error="No destination hypervisor has capacity for this server",
+        )
+    ]
+
+
+@pytest.mark.usefixtures("mock_flavor_index")
+def test_drain_capacity_from_placement(mock_migrate):
+    """
+    Tests destination capacity comes from Placement, using each hypervisor's allocation
+    ratio and usage, unless an allocation ratio is given
+    """
+    servers = {"hv-src": [_mock_server("id1", 8, 1024)]}
+    hypervisors = [
+        # 4 * 4.0 - 10 = 6 vcpus free
+        _mock_hypervisor("hv-a", 4, 65536, vcpus_used=10, allocation_ratio=4.0),
+        # 4 * 16.0 - 10 = 54 vcpus free
+        _mock_hypervisor("hv-b", 4, 32768, vcpus_used=10, allocation_ratio=16.0),
+    ]
+    conn = _mock_conn(servers, hypervisors)
+    # a hypervisor without a resource provider is skipped
+    conn.compute.hypervisors.return_value.append(
+        Hypervisor(name="hv-c", status="enabled", state="up")
+    )
+
+    results = DrainEngine(conn).drain(["hv-src"])
+
+    assert [result.dest_host for result in results] == ["hv-b"]
+    mock_migrate.reset_mock()
+
+    results = DrainEngine(
+        _mock_conn(servers, hypervisors), cpu_allocation_ratio=1.0
+    ).drain(["hv-src"])
+
+    mock_migrate.assert_not_called()
+    assert not results[0].success
+
+
+@pytest.mark.usefixtures("mock_flavor_index")
+def test_drain_failed_migration_releases_capacity(mock_migrate):
+    """
+    Tests a failed migration is reported, and the capacity it reserved can be used again
+    """
+    conn = _mock_conn(
+        {"hv-src": [_mock_server("id1", 16, 2048), _mock_server("id2", 16, 1024)]},
+        [_mock_hypervisor("hv-a", 16, 65536)],
+    )
+
+    def migrate(server_id, **_):
+        if server_id == "id1":
+            raise RuntimeError("Migration caused VM to enter unexpected state ERROR")
+
+    mock_migrate.side_effect = migrate
+    progress = []
+
+    results = DrainEngine(conn, progress_callback=progress.append).drain(["hv-src"])
+
+    assert mock_migrate.call_count == 2
+    assert [(result.server_id, result.success) for result in results] == [
+        ("id1", False),
+        ("id2", True),
+    ]
+    assert results[0].error == "Migration caused VM to enter unexpected state ERROR"
+    assert progress == results
+
+
+@pytest.mark.usefixtures("mock_flavor_index")
+def test_drain_concurrency_limits(mock_migrate):
+    """
+    Tests migrations run concurrently without exceeding the per source, per destination or total limits
+    """
+    conn = _mock_conn(
+        {
+            f"hv-src{i}": [_mock_server(f"src{i}-{j}", 1, 1024) for j in range(4)]
+            for i in range(3)
+        },
+        [_mock_hypervisor(f"hv-dest{i}", 64, 65536) for i in range(4)],
+    )
+    lock = threading.Lock()
+    running = defaultdict(int)
+    max_running = defaultdict(int)
+
+    def migrate(server_id, dest_host, **_):
+        keys = ("total", server_id.split("-")[0], dest_host)
+        with lock:
+            for key in keys:
+                running[key] += 1
+                max_running[key] = max(max_running[key], running[key])
+        time.sleep(0.02)
+        with lock:
+            for key in keys:
+                running[key] -= 1
+
+    mock_migrate.side_effect = migrate
+
+    results = DrainEngine(
+        conn, max_migrations=3, max_per_source=2, max_per_destination=1
+    ).drain([f"hv-src{i}" for i in range(3)])
+
+    assert len(results) == 12
+    assert all(result.success for result in results)
+    assert max_running["total"] == 3
+    assert all(max_running[f"src{i}"] <= 2 for i in range(3))
+    assert all(max_running[f"hv-dest{i}"] <= 1 for i in range(4))
+
+
+@pytest.mark.usefixtures("mock_flavor_index")
+def test_drain_resumes_from_checkpoint(mock_migrate, tmp_path):
+    """
+    Tests progress is saved to the checkpoint, and servers already migrated are skipped when resuming
+    """
+    checkpoint_path = str(tmp_path / "drain.json")
+    with open(checkpoint_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(
+            {
+                "id1": {
+                    "server_id": "id1",
+                    "server_name": "server-id1",
+                    "source_host": "hv-src",
+                    "dest_host": "hv-a",
+                    "success": True,
+                    "seconds": 60.0,
+                    "error": None,
+                }
+            },
+            checkpoint_file,
+        )
+    # id1 is still listed, i.e. nova hasn't caught up yet
+    conn = _mock_conn(
+        {"hv-src": [_mock_server("id1", 2, 2048), _mock_server("id2", 2, 2048)]},
+        [_mock_hypervisor("hv-a", 32, 65536)],
+    )
+
+    results = DrainEngine(conn, checkpoint_path=checkpoint_path).drain(["hv-src"])
+
+    mock_migrate.assert_called_once()
+    assert mock_migrate.call_args.kwargs["server_id"] == "id2"
+    assert [result.server_id for result in results] == ["id1", "id2"]
+    with open(checkpoint_path, "r", encoding="utf-8") as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    assert set(checkpoint) == {"id1", "id2"}
+    assert checkpoint["id2"]["success"] is True
+    assert checkpoint["id2"]["dest_host"] == "hv-a"
+
+
+@pytest.mark.parametrize(
+    "limits",
+    [
+        {"max_migrations": 0},
+        {"max_per_source": 0},
+        {"max_per_destination": 0},
+    ],
+)
+def test_drain_engine_invalid_limits(limits):
+    """
+    Tests an error is raised when a concurrency limit is less than 1
+    """
+    with pytest.raises(ValueError):
+        DrainEngine(MagicMock(), **limits)
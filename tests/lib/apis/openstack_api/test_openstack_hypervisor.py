@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock
 from apis.openstack_api.enums.hypervisor_states import HypervisorState
 from apis.openstack_api.openstack_hypervisor import (
+    HypervisorFlavorIndex,
     get_available_flavors,
     get_hypervisor_state,
     valid_state,
@@ -216,45 +217,112 @@ def test_missing():
     assert HypervisorState(mock_hv_state) == HypervisorState.UNKNOWN
 
 
-def test_avaliable_flavors():
+def _mock_aggregate(hosttype, local_storage_type, hosts):
     """
-    Test avaliable flavors
+    Helper to create a mock aggregate
     """
-    mock_conn = MagicMock()
-    mock_flavor_1 = MagicMock()
-    mock_flavor_2 = MagicMock()
-    mock_aggregate_1 = MagicMock()
-    mock_aggregate_2 = MagicMock()
-
-    mock_aggregate_1.metadata.return_value = {
-        "hosttype": "amdlocal",
-        "local-storage-type": "nvme",
+    mock_aggregate = MagicMock()
+    mock_aggregate.metadata = {
+        "hosttype": hosttype,
+        "local-storage-type": local_storage_type,
     }
-    mock_aggregate_1.hosts = ["hvabc.nubes.rl.ac.uk"]
-    mock_aggregate_2.metadata.return_value = {
-        "hosttype": "amdlocal",
-        "local-storage-type": "sas-ssd",
+    mock_aggregate.hosts = hosts
+    return mock_aggregate
+
+
+def _mock_flavor(name, hosttype, local_storage_type):
+    """
+    Helper to create a mock flavor with aggregate extra specs
+    """
+    mock_flavor = MagicMock()
+    mock_flavor.name = name
+    mock_flavor.extra_specs = {
+        "aggregate_instance_extra_specs:hosttype": hosttype,
+        "aggregate_instance_extra_specs:local-storage-type": local_storage_type,
     }
-    mock_aggregate_2.hosts = ["hvxyz.nubes.rl.ac.uk"]
+    return mock_flavor
+
 
-    mock_conn.compute.aggregates.return_value = [mock_aggregate_1, mock_aggregate_2]
-    mock_conn.compute.flavors.return_value = [mock_flavor_1, mock_flavor_2]
+@pytest.fixture(name="mock_aggregates_and_flavors")
+def mock_aggregates_and_flavors_fixture():
+    """
+    Fixture with two aggregates, each sharing a host, and flavors matching each
+    """
+    aggregates = [
+        _mock_aggregate("amdlocal", "nvme", ["hvabc.nubes.rl.ac.uk", "hvdef"]),
+        _mock_aggregate("amdlocal", "sas-ssd", ["hvxyz.nubes.rl.ac.uk", "hvdef"]),
+    ]
+    flavors = [
+        _mock_flavor("l6.c2", "amdlocal", "nvme"),
+        _mock_flavor("l6.c4", "amdlocal", "sas-ssd"),
+        _mock_flavor("l6.c8", "amdlocal", "sas-ssd"),
+        _mock_flavor("g-a100.x1", "a100", None),
+    ]
+    return aggregates, flavors
+
+
+def test_avaliable_flavors(mock_aggregates_and_flavors):
+    """
+    Test avaliable flavors lists aggregates and flavors once each
+    """
+    mock_conn = MagicMock()
+    aggregates, flavors = mock_aggregates_and_flavors
+    mock_conn.compute.aggregates.return_value = aggregates
+    mock_conn.compute.flavors.return_value = flavors
 
     res = get_available_flavors(mock_conn, "hvxyz.nubes.rl.ac.uk")
 
-    mock_conn.compute.aggregates.assert_called_once()
+    mock_conn.compute.aggregates.assert_called_once_with()
+    mock_conn.compute.flavors.assert_called_once_with(get_extra_specs=True)
+    assert res == ["l6.c4", "l6.c8"]
+
 
-    mock_aggregate_1.metadata.get.assert_any_call("hosttype")
-    mock_aggregate_1.metadata.get.assert_any_call("local-storage-type")
-    mock_aggregate_2.metadata.get.assert_any_call("hosttype")
-    mock_aggregate_2.metadata.get.assert_any_call("local-storage-type")
+def test_flavor_index(mock_aggregates_and_flavors):
+    """
+    Test the flavor index matches flavors to hypervisors across all their aggregates
+    """
+    index = HypervisorFlavorIndex(*mock_aggregates_and_flavors)
 
-    assert mock_aggregate_1.metadata.get.call_count == 2
-    assert mock_aggregate_2.metadata.get.call_count == 2
+    assert index.flavors_for("hvabc.nubes.rl.ac.uk") == ["l6.c2"]
+    assert index.flavors_for("hvxyz.nubes.rl.ac.uk") == ["l6.c4", "l6.c8"]
+    assert index.flavors_for("hvdef") == ["l6.c2", "l6.c4", "l6.c8"]
+    assert index.flavors_for("hvmissing") == []
+    assert index.aggregates_for("hvdef") == [
+        {"hosttype": "amdlocal", "local-storage-type": "nvme"},
+        {"hosttype": "amdlocal", "local-storage-type": "sas-ssd"},
+    ]
+    assert index.aggregates_for("hvmissing") == []
 
-    mock_conn.compute.flavors.assert_called_once()
 
-    assert res == [mock_flavor_1.name, mock_flavor_2.name]
+def test_flavor_index_missing_metadata():
+    """
+    Test aggregates without metadata only match flavors with extra specs for none of the
+    aggregate keys, and flavors without any extra specs don't match any aggregate
+    """
+    mock_aggregate = MagicMock()
+    mock_aggregate.metadata = None
+    mock_aggregate.hosts = ["hv1"]
+    mock_flavor_no_specs = MagicMock()
+    mock_flavor_no_specs.extra_specs = None
+    mock_flavor_empty_specs = MagicMock()
+    mock_flavor_empty_specs.extra_specs = {}
+    mock_flavor_other_specs = MagicMock()
+    mock_flavor_other_specs.name = "l3.nano"
+    mock_flavor_other_specs.extra_specs = {"hw:cpu_policy": "shared"}
+    mock_flavor_other = _mock_flavor("l6.c2", "amdlocal", "nvme")
+
+    index = HypervisorFlavorIndex(
+        [mock_aggregate, _mock_aggregate(None, None, ["hv2"])],
+        [
+            mock_flavor_no_specs,
+            mock_flavor_empty_specs,
+            mock_flavor_other_specs,
+            mock_flavor_other,
+        ],
+    )
+
+    assert index.flavors_for("hv1") == ["l3.nano"]
+    assert index.flavors_for("hv2") == ["l3.nano"]
 
 
 @pytest.mark.parametrize(
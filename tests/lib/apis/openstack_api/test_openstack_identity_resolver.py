@@ -0,0 +1,155 @@
+import gc
+import weakref
+from unittest.mock import MagicMock, patch
+
+import pytest
+from apis.openstack_api.openstack_identity_resolver import (
+    IdentityResolver,
+    get_identity_resolver,
+)
+from openstack import exceptions
+
+
+def _identity_object(object_id, name):
+    """
+    Make an identity object with the given ID and name
+    """
+    return {"id": object_id, "name": name}
+
+
+def test_find_is_cached():
+    """
+    Test an object is only looked up once, by name or by ID
+    """
+    mock_conn = MagicMock()
+    project = _identity_object("project-id", "foo")
+    mock_conn.identity.find_project.return_value = project
+    resolver = IdentityResolver(mock_conn)
+
+    assert resolver.find_project("foo", ignore_missing=False) is project
+    assert resolver.find_project("foo", ignore_missing=False) is project
+    assert resolver.find_project("project-id") is project
+
+    mock_conn.identity.find_project.assert_called_once_with("foo", ignore_missing=False)
+
+
+def test_find_filters_are_part_of_key():
+    """
+    Test lookups with different filters are cached separately
+    """
+    mock_conn = MagicMock()
+    resolver = IdentityResolver(mock_conn)
+
+    resolver.find_user("user1", domain_id="domain1")
+    resolver.find_user("user1", domain_id="domain2")
+    resolver.find_user("user1", domain_id="domain1")
+
+    assert mock_conn.identity.find_user.call_count == 2
+
+
+def test_find_missing_is_cached():
+    """
+    Test an object that doesn't exist is remembered, whether or not we ignore missing objects
+    """
+    mock_conn = MagicMock()
+    mock_conn.identity.find_role.side_effect = exceptions.ResourceNotFound("missing")
+    resolver = IdentityResolver(mock_conn)
+
+    with pytest.raises(exceptions.ResourceNotFound):
+        resolver.find_role("bar", ignore_missing=False)
+    with pytest.raises(exceptions.ResourceNotFound):
+        resolver.find_role("bar", ignore_missing=False)
+    assert resolver.find_role("bar") is None
+
+    mock_conn.identity.find_role.assert_called_once()
+
+
+def test_find_missing_expires():
+    """
+    Test missing objects are looked up again after the negative TTL
+    """
+    mock_conn = MagicMock()
+    mock_conn.identity.find_group.return_value = None
+    resolver = IdentityResolver(mock_conn, ttl=300, negative_ttl=30)
+
+    with patch(
+        "apis.openstack_api.openstack_identity_resolver.time.monotonic"
+    ) as mock_monotonic:
+        mock_monotonic.return_value = 100
+        assert resolver.find_group("group1") is None
+        mock_monotonic.return_value = 129
+        assert resolver.find_group("group1") is None
+        mock_monotonic.return_value = 131
+        mock_conn.identity.find_group.return_value = _identity_object("g", "group1")
+        assert resolver.find_group("group1") == _identity_object("g", "group1")
+
+    assert mock_conn.identity.find_group.call_count == 2
+
+
+def test_find_invalid_kind():
+    """
+    Test only identity objects can be resolved
+    """
+    with pytest.raises(ValueError):
+        IdentityResolver(MagicMock()).find("server", "foo")
+
+
+def test_invalidate():
+    """
+    Test invalidating an object by ID forgets lookups by its name too
+    """
+    mock_conn = MagicMock()
+    mock_conn.identity.find_project.return_value = _identity_object("id1", "foo")
+    resolver = IdentityResolver(mock_conn)
+    resolver.find_project("foo")
+    resolver.find_domain("foo")
+
+    resolver.invalidate("project", "id1")
+    resolver.find_project("foo")
+    resolver.find_domain("foo")
+
+    assert mock_conn.identity.find_project.call_count == 2
+    mock_conn.identity.find_domain.assert_called_once()
+
+
+def test_remember_replaces_missing():
+    """
+    Test remembering a new object replaces a lookup which found nothing
+    """
+    mock_conn = MagicMock()
+    mock_conn.identity.find_project.return_value = None
+    resolver = IdentityResolver(mock_conn)
+    assert resolver.find_project("foo") is None
+
+    project = _identity_object("id1", "foo")
+    resolver.remember("project", project)
+
+    assert resolver.find_project("foo") is project
+    assert resolver.find_project("id1") is project
+    mock_conn.identity.find_project.assert_called_once()
+
+
+def test_get_identity_resolver_per_connection():
+    """
+    Test each connection shares one resolver
+    """
+    conn1, conn2 = MagicMock(), MagicMock()
+    assert get_identity_resolver(conn1) is get_identity_resolver(conn1)
+    assert get_identity_resolver(conn1) is not get_identity_resolver(conn2)
+
+
+def test_get_identity_resolver_releases_connection():
+    """
+    Tests the shared resolver doesn't keep its connection alive
+    """
+    mock_conn = MagicMock()
+    resolver = get_identity_resolver(mock_conn)
+    assert resolver.conn is mock_conn
+    conn_ref = weakref.ref(mock_conn)
+
+    del mock_conn
+    gc.collect()
+
+    assert conn_ref() is None
+    with pytest.raises(ReferenceError):
+        _ = resolver.conn
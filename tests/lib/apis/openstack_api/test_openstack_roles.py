@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, call
 import pytest
 
 from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamError
@@ -6,6 +6,7 @@ from meta.exceptions.missing_mandatory_param_error import MissingMandatoryParamE
 from apis.openstack_api.enums.user_domains import UserDomains
 from apis.openstack_api.openstack_roles import (
     assign_role_to_user,
+    assign_role_to_users,
     remove_role_from_user,
     add_user_to_group,
     assign_group_role_to_project,
@@ -235,3 +236,123 @@ def test_remove_roles_successful():
         user=mock_conn.identity.find_user.return_value,
         role=mock_conn.identity.find_role.return_value,
     )
+
+
+def test_add_users_to_group_shares_lookups():
+    """
+    Tests that adding several users to a group only looks up the domain and group once
+    """
+    mock_conn = MagicMock()
+    for user in ["user1", "user2", "user3"]:
+        add_user_to_group(mock_conn, user, "domain", "group")
+
+    mock_conn.identity.find_domain.assert_called_once()
+    mock_conn.identity.find_group.assert_called_once()
+    assert mock_conn.identity.find_user.call_count == 3
+    assert mock_conn.identity.add_user_to_group.call_count == 3
+
+
+def _mock_user(user_id, name):
+    """
+    Make a mock user with the given ID and name
+    """
+    user = MagicMock()
+    user.id = user_id
+    user.name = name
+    return user
+
+
+def test_assign_role_to_users_shares_lookups():
+    """
+    Tests that assigning a role to several users looks up the project, role and domain once
+    """
+    mock_conn = MagicMock()
+    results = assign_role_to_users(
+        mock_conn, " bar ", "baz", ["user1", "user2", " user1 "], UserDomains.STFC
+    )
+
+    mock_conn.identity.find_project.assert_called_once_with("bar", ignore_missing=False)
+    mock_conn.identity.find_role.assert_called_once_with("baz", ignore_missing=False)
+    mock_conn.identity.find_domain.assert_called_once_with("stfc", ignore_missing=False)
+    assert mock_conn.identity.users.call_count == 2
+    assert mock_conn.identity.assign_project_role_to_user.call_count == 2
+    assert [result.user_identifier for result in results] == ["user1", "user2"]
+    assert all(result.assigned for result in results)
+
+
+def test_assign_role_to_users_finds_users_by_name():
+    """
+    Tests that each user is found with a listing of their domain filtered by name, and
+    identifiers which aren't a name are looked up as an ID
+    """
+    mock_conn = MagicMock()
+    users = {f"user{i}": _mock_user(f"id{i}", f"user{i}") for i in range(12)}
+    mock_conn.identity.users.side_effect = lambda domain_id, name: [
+        user for user_name, user in users.items() if user_name == name
+    ]
+    mock_conn.identity.find_user.return_value = users["user11"]
+    identifiers = [f"user{i}" for i in range(11)] + ["id11"]
+
+    results = assign_role_to_users(
+        mock_conn, "bar", "baz", identifiers, UserDomains.STFC
+    )
+
+    domain_id = mock_conn.identity.find_domain.return_value.id
+    mock_conn.identity.users.assert_has_calls(
+        [call(domain_id=domain_id, name=identifier) for identifier in identifiers],
+        any_order=True,
+    )
+    mock_conn.identity.find_user.assert_called_once_with(
+        "id11", ignore_missing=True, domain_id=domain_id
+    )
+    assert [result.user_id for result in results] == [f"id{i}" for i in range(12)]
+    assert all(result.assigned for result in results)
+
+
+def test_assign_role_to_users_reports_failures():
+    """
+    Tests that a user who can't be found or assigned doesn't stop the others
+    """
+    mock_conn = MagicMock()
+    found_users = {
+        "user1": _mock_user("id1", "user1"),
+        "user3": _mock_user("id3", "user3"),
+    }
+    mock_conn.identity.find_user.side_effect = lambda identifier, **_: found_users.get(
+        identifier
+    )
+
+    def assign(project, user, role):  # pylint:disable=unused-argument
+        if user.id == "id3":
+            raise RuntimeError("forbidden")
+
+    mock_conn.identity.assign_project_role_to_user.side_effect = assign
+
+    results = assign_role_to_users(
+        mock_conn, "bar", "baz", ["user1", "user2", "user3"], UserDomains.STFC
+    )
+
+    assert results[0].assigned
+    assert not results[1].assigned
+    assert results[1].error == "User user2 not found in domain STFC"
+    assert not results[2].assigned
+    assert results[2].user_id == "id3"
+    assert results[2].error == "forbidden"
+
+
+def test_assign_role_to_users_no_users():
+    """
+    Tests that nothing is looked up when there are no users to assign the role to
+    """
+    mock_conn = MagicMock()
+    assert not assign_role_to_users(mock_conn, "bar", "baz", [" "], UserDomains.STFC)
+    mock_conn.identity.find_project.assert_not_called()
+    mock_conn.identity.assign_project_role_to_user.assert_not_called()
+
+
+def test_assign_role_to_users_throws_missing_project():
+    """
+    Tests that an exception is thrown if the specified project is missing
+    """
+    with pytest.raises(MissingMandatoryParamError):
+        assign_role_to_users(MagicMock(), " ", "baz", ["user1"], UserDomains.STFC)
@@ -2,6 +2,7 @@ import re
 from unittest.mock import MagicMock, NonCallableMock
 
 import pytest
+from openstack import exceptions
 from apis.openstack_api.enums.ip_version import IPVersion
 from apis.openstack_api.enums.network_direction import NetworkDirection
 from apis.openstack_api.enums.protocol import Protocol
@@ -12,6 +13,7 @@ from apis.openstack_api.openstack_security_groups import (
     create_https_security_group,
     create_internal_security_group_rules,
     create_jasmin_security_group_rules,
+    create_security_group_rules,
     refresh_security_groups,
 )
 from apis.openstack_api.structs.security_group_rule_details import (
@@ -39,16 +41,17 @@ def run_create_security_group_rule_test():
             project_id=mock_conn.identity.find_project.return_value.id,
         )
 
-        mock_conn.network.create_security_group_rule.assert_any_call(
-            project_id=mock_conn.identity.find_project.return_value.id,
-            security_group_id=mock_conn.network.find_security_group.return_value.id,
-            direction=mock_details.direction.value.lower(),
-            ether_type=mock_details.ip_version.value.lower(),
-            protocol=mock_details.protocol.value.lower(),
-            remote_ip_prefix=mock_details.remote_ip_cidr,
-            port_range_min=start_port,
-            port_range_max=end_port,
-        )
+        mock_conn.network.create_security_group_rules.assert_called_once()
+        assert {
+            "project_id": mock_conn.identity.find_project.return_value.id,
+            "security_group_id": mock_conn.network.find_security_group.return_value.id,
+            "direction": mock_details.direction.value.lower(),
+            "ether_type": mock_details.ip_version.value.lower(),
+            "protocol": mock_details.protocol.value.lower(),
+            "remote_ip_prefix": mock_details.remote_ip_cidr,
+            "port_range_min": start_port,
+            "port_range_max": end_port,
+        } in mock_conn.network.create_security_group_rules.call_args.args[0]
 
     return test_case
 
@@ -339,7 +342,7 @@ def test_create_external_rules_tcp_udp_cidrs(cidr, create_security_group_rule_te
     """
     Tests that tcp and udp egress rules created for a set of cidrs
     """
-    mock_conn = NonCallableMock()
+    mock_conn = MagicMock()
     mock_project_identifier = NonCallableMock()
     mock_security_group_identifier = NonCallableMock()
 
@@ -369,7 +372,7 @@ def test_create_external_security_group_rules_invalid_project():
         create_external_security_group_rules(
             mock_conn, mock_project_identifier, mock_security_group_identifier
         )
-    mock_conn.network.create_security_group_rule.assert_not_called()
+    mock_conn.network.create_security_group_rules.assert_not_called()
 
 
 def test_create_external_security_group_rules_invalid_security_group():
@@ -381,7 +384,7 @@ def test_create_external_security_group_rules_invalid_security_group():
         create_external_security_group_rules(
             mock_conn, mock_project_identifier, mock_security_group_identifier
         )
-    mock_conn.network.create_security_group_rule.assert_not_called()
+    mock_conn.network.create_security_group_rules.assert_not_called()
 
 
 # pylint: disable=too-many-arguments
@@ -453,7 +456,7 @@ def test_create_internal_security_group_rules_invalid_project():
         create_internal_security_group_rules(
             mock_conn, mock_project_identifier, mock_security_group_identifier
         )
-    mock_conn.network.create_security_group_rule.assert_not_called()
+    mock_conn.network.create_security_group_rules.assert_not_called()
 
 
 def test_create_internal_security_group_rules_invalid_security_group():
@@ -465,7 +468,7 @@ def test_create_internal_security_group_rules_invalid_security_group():
         create_internal_security_group_rules(
             mock_conn, mock_project_identifier, mock_security_group_identifier
         )
-    mock_conn.network.create_security_group_rule.assert_not_called()
+    mock_conn.network.create_security_group_rules.assert_not_called()
 
 
 # pylint: disable=too-many-arguments
@@ -537,7 +540,7 @@ def test_create_jasmin_security_group_rules_invalid_project():
         create_jasmin_security_group_rules(
             mock_conn, mock_project_identifier, mock_security_group_identifier
         )
-    mock_conn.network.create_security_group_rule.assert_not_called()
+    mock_conn.network.create_security_group_rules.assert_not_called()
 
 
 def test_create_jasmin_security_group_rules_invalid_security_group():
@@ -549,7 +552,177 @@ def test_create_jasmin_security_group_rules_invalid_security_group():
         create_jasmin_security_group_rules(
             mock_conn, mock_project_identifier, mock_security_group_identifier
         )
+    mock_conn.network.create_security_group_rules.assert_not_called()
+
+
+def _rule_details(port, protocol=Protocol.TCP):
+    """
+    Make the details of an ingress rule on the given port
+    """
+    return SecurityGroupRuleDetails(
+        project_identifier="foo",
+        security_group_identifier="default",
+        direction=NetworkDirection.INGRESS,
+        ip_version=IPVersion.IPV4,
+        protocol=protocol,
+        remote_ip_cidr="0.0.0.0/0",
+        port_range=(port, port),
+    )
+
+
+def test_create_security_group_rules_looks_up_once():
+    """
+    Test the project and security group are only looked up once for many rules,
+    and the rules are created in a single bulk request
+    """
+    mock_conn = MagicMock()
+    mock_conn.network.security_group_rules.return_value = []
+
+    res = create_security_group_rules(
+        mock_conn, [_rule_details(str(port)) for port in range(80, 90)]
+    )
+
+    mock_conn.identity.find_project.assert_called_once_with("foo", ignore_missing=False)
+    mock_conn.network.find_security_group.assert_called_once_with(
+        "default",
+        ignore_missing=False,
+        project_id=mock_conn.identity.find_project.return_value.id,
+    )
+    mock_conn.network.security_group_rules.assert_called_once_with(
+        security_group_id=mock_conn.network.find_security_group.return_value.id
+    )
+    mock_conn.network.create_security_group_rules.assert_called_once()
+    rules = mock_conn.network.create_security_group_rules.call_args.args[0]
+    assert [rule["port_range_min"] for rule in rules] == [
+        str(port) for port in range(80, 90)
+    ]
     mock_conn.network.create_security_group_rule.assert_not_called()
+    assert res == list(mock_conn.network.create_security_group_rules.return_value)
+
+
+def test_create_security_group_rules_skips_existing():
+    """
+    Test rules which already exist, or are repeated, are not created again
+    """
+    mock_conn = MagicMock()
+    security_group_id = mock_conn.network.find_security_group.return_value.id
+    mock_conn.network.security_group_rules.return_value = [
+        {
+            "security_group_id": security_group_id,
+            "direction": "ingress",
+            "ether_type": "IPv4",
+            "protocol": "tcp",
+            "remote_ip_prefix": None,
+            "port_range_min": 22,
+            "port_range_max": 22,
+        }
+    ]
+
+    create_security_group_rules(
+        mock_conn,
+        [_rule_details("22"), _rule_details("80"), _rule_details("80")],
+    )
+
+    rules = mock_conn.network.create_security_group_rules.call_args.args[0]
+    assert [rule["port_range_min"] for rule in rules] == ["80"]
+
+
+def test_create_security_group_rules_all_existing():
+    """
+    Test nothing is created if every rule already exists
+    """
+    mock_conn = MagicMock()
+    security_group_id = mock_conn.network.find_security_group.return_value.id
+    mock_conn.network.security_group_rules.return_value = [
+        {
+            "security_group_id": security_group_id,
+            "direction": "ingress",
+            "ether_type": "IPv4",
+            "protocol": None,
+            "remote_ip_prefix": "0.0.0.0/0",
+            "port_range_min": None,
+            "port_range_max": None,
+        }
+    ]
+
+    res = create_security_group_rules(mock_conn, [_rule_details("*", Protocol.ANY)])
+
+    assert res == []
+    mock_conn.network.create_security_group_rules.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        exceptions.MethodNotSupported(MagicMock(), "bulk create"),
+        exceptions.BadRequestException(message="bulk not supported"),
+    ],
+)
+def test_create_security_group_rules_bulk_unsupported(error):
+    """
+    Test rules are created one at a time if bulk creation isn't supported
+    """
+    mock_conn = MagicMock()
+    mock_conn.network.security_group_rules.return_value = []
+    mock_conn.network.create_security_group_rules.side_effect = error
+    mock_conn.network.create_security_group_rule.side_effect = lambda **rule: rule[
+        "port_range_min"
+    ]
+
+    res = create_security_group_rules(
+        mock_conn, [_rule_details("80"), _rule_details("443")]
+    )
+
+    assert res == ["80", "443"]
+    assert mock_conn.network.create_security_group_rule.call_count == 2
+
+
+def test_create_security_group_rules_reports_failures():
+    """
+    Test rules created one at a time are all tried, with an error naming the rules which
+    were and weren't created
+    """
+    mock_conn = MagicMock()
+    mock_conn.network.security_group_rules.return_value = []
+    mock_conn.network.create_security_group_rules.side_effect = (
+        exceptions.BadRequestException(message="bulk not supported")
+    )
+
+    def create(**rule):
+        if rule["port_range_min"] == "443":
+            raise exceptions.ConflictException(message="quota exceeded")
+        return rule["port_range_min"]
+
+    mock_conn.network.create_security_group_rule.side_effect = create
+
+    with pytest.raises(RuntimeError) as exc_info:
+        create_security_group_rules(
+            mock_conn,
+            [
+                _rule_details("80"),
+                _rule_details("443"),
+                _rule_details("*", Protocol.ANY),
+            ],
+        )
+
+    assert str(exc_info.value) == (
+        "Failed to create 1 of 3 security group rules: "
+        "ingress tcp 0.0.0.0/0 443-443 (quota exceeded). "
+        "Created 2 rules: ingress tcp 0.0.0.0/0 80-80, ingress any 0.0.0.0/0 any"
+    )
+    assert mock_conn.network.create_security_group_rule.call_count == 3
+
+
+def test_create_security_group_rules_invalid_ports():
+    """
+    Test invalid ports are rejected before any rule is created
+    """
+    mock_conn = MagicMock()
+    with pytest.raises(ValueError):
+        create_security_group_rules(
+            mock_conn, [_rule_details("80"), _rule_details("foo")]
+        )
+    mock_conn.network.create_security_group_rules.assert_not_called()
 
 
 def test_refresh_security_groups():
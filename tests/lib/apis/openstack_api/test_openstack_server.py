@@ -12,7 +12,9 @@ from apis.openstack_api.openstack_server import (
     wait_for_image_status,
     wait_for_migration_status,
     shutoff_server,
+    shutoff_servers_on_hypervisor,
 )
+from openstack.compute.v2.migration import Migration
 from openstack.exceptions import ResourceFailure, ResourceTimeout
 
 
@@ -359,13 +361,14 @@ def test_wait_for_image_status_success():
     image = MagicMock(id="123", name="test-image", status="pending")
     image_final = MagicMock(id="123", name="test-image", status="active")
 
-    mock_conn.image.get_image.side_effect = [
-        MagicMock(id="123", name="test-image", status="pending"),
-        MagicMock(id="123", name="test-image", status="pending"),
-        image_final,
+    mock_conn.image.images.side_effect = [
+        [MagicMock(id="123", name="test-image", status="pending")],
+        [MagicMock(id="123", name="test-image", status="pending")],
+        [image_final],
     ]
     result = wait_for_image_status(mock_conn, image, "active", interval=0, timeout=10)
-    mock_conn.image.get_image.assert_called_with(image.id)
+    mock_conn.image.images.assert_called_with(id="in:123")
+    assert mock_conn.image.images.call_count == 3
     assert result == image_final
 
 
@@ -375,7 +378,7 @@ def test_wait_for_image_status_timeout():
     """
     mock_conn = MagicMock()
     image = MagicMock(id="123", name="test-image", status="pending")
-    mock_conn.image.get_image.side_effect = itertools.cycle([image])
+    mock_conn.image.images.side_effect = itertools.cycle([[image]])
     with pytest.raises(
         ResourceTimeout,
         match=f"Timeout waiting for image {image.name} to become active.",
@@ -391,7 +394,7 @@ def test_wait_for_image_status_immediate_success():
     image = MagicMock(id="123", name="test-image", status="active")
     result = wait_for_image_status(mock_conn, image, "active", interval=0, timeout=10)
     assert result == image
-    mock_conn.image.get_image.assert_not_called()
+    mock_conn.image.images.assert_not_called()
 
 
 def test_wait_for_image_status_error():
@@ -401,9 +404,9 @@ def test_wait_for_image_status_error():
     mock_conn = MagicMock()
     image_pending = MagicMock(id="123", name="test-image", status="pending")
     image_error = MagicMock(id="123", name="test-image", status="error")
-    mock_conn.image.get_image.side_effect = [
-        image_pending,
-        image_error,
+    mock_conn.image.images.side_effect = [
+        [image_pending],
+        [image_error],
     ]
     with pytest.raises(
         ResourceFailure, match=f"Image {image_error.name} failed to upload."
@@ -416,8 +419,8 @@ def test_wait_for_migration_status_success():
     Test wait_for_migration_status when it is a success
     """
     mock_conn = MagicMock()
-    migration_pending = MagicMock(status="pending")
-    migration_completed = MagicMock(status="completed")
+    migration_pending = Migration(status="pending", server_id="server_id")
+    migration_completed = Migration(status="completed", server_id="server_id")
 
     mock_conn.compute.migrations.side_effect = [
         iter([migration_pending]),
@@ -436,8 +439,8 @@ def test_wait_for_migration_status_timeout():
     Test wait_for_migration_status when it hits the timeout
     """
     mock_conn = MagicMock()
-    migration = MagicMock(status="pending")
-    mock_conn.compute.migrations.side_effect = itertools.cycle([migration])
+    migration = Migration(status="pending", server_id="server_id")
+    mock_conn.compute.migrations.side_effect = itertools.cycle([iter([migration])])
 
     with pytest.raises(
         ResourceTimeout, match="Timeout waiting for migration to become completed."
@@ -453,8 +456,8 @@ def test_wait_for_migration_status_error(bad_state):
     Test wait_for_migration_status when the migration status becomes error
     """
     mock_conn = MagicMock()
-    migration_pending = MagicMock(status="pending")
-    migration_error = MagicMock(status=bad_state)
+    migration_pending = Migration(status="pending", server_id="server_id")
+    migration_error = Migration(status=bad_state, server_id="server_id")
     mock_conn.compute.migrations.side_effect = [
         iter([migration_pending]),
         iter([migration_error]),
@@ -673,3 +676,99 @@ def test_with_empty_migration_list():
         wait_for_migration_status(
             mock_conn, "test-server-id", "should-timeout", interval=1, timeout=1
         )
+
+
+def _mock_servers(statuses):
+    """
+    Helper to create mock servers listed on a hypervisor, given a dict of ID to status
+    """
+    servers = []
+    for server_id, status in statuses.items():
+        mock_server = MagicMock()
+        mock_server.id = server_id
+        mock_server.status = status
+        servers.append(mock_server)
+    return servers
+
+
+def test_shutoff_servers_on_hypervisor():
+    """
+    Tests all servers are stopped before waiting, and a single listing is used per poll
+    """
+    mock_conn = MagicMock()
+    mock_conn.compute.servers.side_effect = [
+        _mock_servers({"id1": "ACTIVE", "id2": "ACTIVE", "id3": "SHUTOFF"}),
+        _mock_servers({"id1": "SHUTOFF", "id2": "ACTIVE", "id3": "SHUTOFF"}),
+        _mock_servers({"id1": "SHUTOFF", "id2": "shutoff", "id3": "SHUTOFF"}),
+    ]
+
+    res = shutoff_servers_on_hypervisor(mock_conn, "hv01", ["id1", "id2", "id3"])
+
+    assert mock_conn.compute.stop_server.call_count == 2
+    mock_conn.compute.stop_server.assert_any_call("id1")
+    mock_conn.compute.stop_server.assert_any_call("id2")
+    mock_conn.compute.wait_for_status.assert_not_called()
+    assert mock_conn.compute.servers.call_count == 3
+    mock_conn.compute.servers.assert_called_with(all_projects=True, compute_host="hv01")
+    assert [result.server_id for result in res] == ["id1", "id2", "id3"]
+    assert all(result.shut_off for result in res)
+    assert all(result.error is None for result in res)
+    assert all(result.status == "SHUTOFF" for result in res)
+
+
+def test_shutoff_servers_on_hypervisor_failures():
+    """
+    Tests servers which fail to stop, error, disappear or are missing are reported
+    """
+    mock_conn = MagicMock()
+    mock_conn.compute.servers.side_effect = [
+        _mock_servers(
+            {"id1": "ACTIVE", "id2": "ACTIVE", "id3": "ACTIVE", "id4": "ERROR"}
+        ),
+        _mock_servers({"id2": "ERROR", "id4": "ERROR"}),
+    ]
+
+    def stop_server(server_id):
+        if server_id == "id1":
+            raise ResourceFailure("Conflict")
+
+    mock_conn.compute.stop_server.side_effect = stop_server
+
+    res = shutoff_servers_on_hypervisor(
+        mock_conn, "hv01", ["id1", "id2", "id3", "id4", "id5"]
+    )
+
+    assert mock_conn.compute.stop_server.call_count == 3
+    assert [result.shut_off for result in res] == [False] * 5
+    assert [result.error for result in res] == [
+        "Failed to stop server: Conflict",
+        "Server went into ERROR status",
+        "Server is no longer on the hypervisor",
+        None,
+        "Server not found on hypervisor hv01",
+    ]
+    assert mock_conn.compute.servers.call_count == 2
+
+
+def test_shutoff_servers_on_hypervisor_timeout():
+    """
+    Tests servers which don't shut off within the timeout are reported
+    """
+    mock_conn = MagicMock()
+    mock_conn.compute.servers.return_value = _mock_servers({"id1": "ACTIVE"})
+
+    res = shutoff_servers_on_hypervisor(mock_conn, "hv01", ["id1"], timeout=0)
+
+    assert res[0].shut_off is False
+    assert res[0].status == "ACTIVE"
+    assert res[0].error == "Timed out after 0 seconds waiting for server to shut off"
+
+
+def test_shutoff_servers_on_hypervisor_invalid_concurrency():
+    """
+    Tests an error is raised when the concurrency limit is less than 1
+    """
+    with pytest.raises(ValueError):
+        shutoff_servers_on_hypervisor(
+            MagicMock(), "hv01", ["id1"], max_concurrent_stops=0
+        )
@@ -0,0 +1,171 @@
+import gc
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+from openstack.compute.v2.migration import Migration
+from openstack.exceptions import ResourceFailure, ResourceTimeout
+
+from apis.openstack_api.openstack_status_watcher import (
+    StatusWatcher,
+    get_status_watcher,
+)
+
+
+def test_get_status_watcher_per_connection():
+    """
+    Tests one status watcher is shared by everyone using the same connection
+    """
+    mock_conn_1 = MagicMock()
+    mock_conn_2 = MagicMock()
+    assert get_status_watcher(mock_conn_1) is get_status_watcher(mock_conn_1)
+    assert get_status_watcher(mock_conn_1) is not get_status_watcher(mock_conn_2)
+
+
+def test_get_status_watcher_releases_connection():
+    """
+    Tests the shared status watcher doesn't keep its connection alive
+    """
+    mock_conn = MagicMock()
+    watcher = get_status_watcher(mock_conn)
+    assert watcher.conn is mock_conn
+    conn_ref = weakref.ref(mock_conn)
+
+    del mock_conn
+    gc.collect()
+
+    assert conn_ref() is None
+    with pytest.raises(ReferenceError):
+        _ = watcher.conn
+
+
+def test_wait_for_migrations_polled_in_bulk():
+    """
+    Tests many waiters are served by a single migrations listing per tick,
+    using the latest migration for each server
+    """
+    mock_conn = MagicMock()
+    pending = [Migration(status="running", server_id=f"server{i}") for i in range(5)]
+    completed = [
+        Migration(status="completed", server_id=f"server{i}") for i in range(5)
+    ]
+    older = [Migration(status="error", server_id=f"server{i}") for i in range(5)]
+    watcher = StatusWatcher(mock_conn)
+
+    def list_migrations(**_):
+        # the first listing waits until everyone is waiting
+        if mock_conn.compute.migrations.call_count == 1:
+            deadline = time.monotonic() + 5
+            # pylint:disable=protected-access
+            while len(watcher._migration_waiters) < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            return iter(pending + older)
+        return iter(completed + older)
+
+    mock_conn.compute.migrations.side_effect = list_migrations
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [
+            executor.submit(
+                watcher.wait_for_migration,
+                f"server{i}",
+                "completed",
+                interval=0,
+                timeout=10,
+            )
+            for i in range(5)
+        ]
+    results = [future.result() for future in futures]
+
+    assert results == completed
+    assert mock_conn.compute.migrations.call_count == 2
+    assert "changes_since" in mock_conn.compute.migrations.call_args.kwargs
+
+
+def test_wait_for_migration_failure():
+    """
+    Tests a migration going into error raises ResourceFailure
+    """
+    mock_conn = MagicMock()
+    mock_conn.compute.migrations.side_effect = [
+        iter([Migration(status="failed", server_id="server1")])
+    ]
+    with pytest.raises(ResourceFailure):
+        StatusWatcher(mock_conn).wait_for_migration(
+            "server1", "completed", interval=0, timeout=10
+        )
+
+
+def test_wait_for_migration_poll_error():
+    """
+    Tests a failure listing migrations doesn't stop the watcher
+    """
+    mock_conn = MagicMock()
+    completed = Migration(status="completed", server_id="server1")
+    mock_conn.compute.migrations.side_effect = [
+        ConnectionError("Connection reset"),
+        iter([completed]),
+    ]
+    res = StatusWatcher(mock_conn).wait_for_migration(
+        "server1", "completed", interval=0, timeout=10
+    )
+    assert res == completed
+
+
+def test_wait_for_image():
+    """
+    Tests images are listed together and the waiter is given the image once it is active
+    """
+    mock_conn = MagicMock()
+    image_active = MagicMock(id="image1", status="active")
+    mock_conn.image.images.side_effect = [
+        [MagicMock(id="image1", status="queued")],
+        [image_active],
+    ]
+    res = StatusWatcher(mock_conn).wait_for_image(
+        "image1", "active", interval=0, timeout=10
+    )
+    assert res == image_active
+    mock_conn.image.images.assert_called_with(id="in:image1")
+    mock_conn.compute.migrations.assert_not_called()
+
+
+def test_wait_for_image_timeout():
+    """
+    Tests a ResourceTimeout is raised if the image doesn't reach the status in time,
+    and the watcher stops once nobody is waiting
+    """
+    mock_conn = MagicMock()
+    mock_conn.image.images.return_value = [MagicMock(id="image1", status="saving")]
+    watcher = StatusWatcher(mock_conn)
+    with pytest.raises(ResourceTimeout):
+        watcher.wait_for_image("image1", "active", interval=0.01, timeout=0.05)
+
+    thread = watcher._thread  # pylint:disable=protected-access
+    if thread:
+        thread.join(timeout=5)
+    assert watcher._thread is None  # pylint:disable=protected-access
+
+
+@pytest.mark.parametrize(
+    "interval, changed, expected",
+    [
+        # first tick uses the shortest interval asked for
+        (None, False, 5),
+        # backs off while nothing changes
+        (5, False, 7.5),
+        (7.5, False, 11.25),
+        # capped at max interval
+        (50, False, 60),
+        # resets once something changes
+        (50, True, 5),
+    ],
+)
+def test_next_interval(interval, changed, expected):
+    """
+    Tests the interval between ticks backs off while nothing changes
+    """
+    watcher = StatusWatcher(MagicMock(), max_interval=60, backoff=1.5)
+    # pylint:disable=protected-access
+    assert watcher._next_interval(interval, 5, changed) == expected
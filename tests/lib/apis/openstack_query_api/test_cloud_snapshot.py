@@ -0,0 +1,160 @@
+from unittest.mock import MagicMock, NonCallableMock, patch
+
+import pytest
+
+from apis.openstack_query_api.cloud_snapshot import (
+    CloudSnapshot,
+    clear_cloud_snapshots,
+    get_cloud_snapshot,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_snapshots_fixture():
+    """
+    Ensures each test starts without any shared snapshots
+    """
+    clear_cloud_snapshots()
+    yield
+    clear_cloud_snapshots()
+
+
+@patch("apis.openstack_query_api.cloud_snapshot.HypervisorQuery")
+def test_hypervisors_queried_once(mock_hypervisor_query):
+    """
+    Tests hypervisors are listed with a single query, shared by every view
+    """
+    mock_query = mock_hypervisor_query.return_value
+    mock_query.to_props.return_value = [
+        {
+            "hypervisor_name": "hv1",
+            "hypervisor_state": "up",
+            "hypervisor_status": "enabled",
+        },
+        {
+            "hypervisor_name": "hv2",
+            "hypervisor_state": "down",
+            "hypervisor_status": "enabled",
+        },
+        {
+            "hypervisor_name": "hv3",
+            "hypervisor_state": "up",
+            "hypervisor_status": "disabled",
+        },
+    ]
+    snapshot = CloudSnapshot("test-cloud")
+
+    assert snapshot.hypervisor_objects == mock_query.to_objects.return_value
+    assert [hv["hypervisor_name"] for hv in snapshot.hypervisors_by_state["up"]] == [
+        "hv1",
+        "hv3",
+    ]
+    assert [hv["hypervisor_name"] for hv in snapshot.hypervisors_by_state["down"]] == [
+        "hv2"
+    ]
+    assert [
+        hv["hypervisor_name"] for hv in snapshot.hypervisors_by_status["disabled"]
+    ] == ["hv3"]
+
+    mock_hypervisor_query.assert_called_once()
+    mock_query.select.assert_called_once_with(*CloudSnapshot.HYPERVISOR_PROPS)
+    mock_query.run.assert_called_once_with(
+        cloud_account="test-cloud", all_projects=True, as_admin=True
+    )
+    mock_query.to_props.assert_called_once()
+
+
+@patch("apis.openstack_query_api.cloud_snapshot.ServerQuery")
+def test_servers_by_hypervisor(mock_server_query):
+    """
+    Tests servers are listed with a single query and grouped by hypervisor
+    """
+    mock_query = mock_server_query.return_value
+    mock_query.to_props.return_value = [
+        {"server_id": "1", "hypervisor_name": "hv1"},
+        {"server_id": "2", "hypervisor_name": "hv2"},
+        {"server_id": "3", "hypervisor_name": "hv1"},
+    ]
+    snapshot = CloudSnapshot("test-cloud")
+
+    assert snapshot.server_count("hv1") == 2
+    assert snapshot.server_count("hv2") == 1
+    assert snapshot.server_count("hv3") == 0
+    assert [s["server_id"] for s in snapshot.servers_by_hypervisor["hv1"]] == [
+        "1",
+        "3",
+    ]
+
+    mock_server_query.assert_called_once()
+    mock_query.select.assert_called_once_with(*CloudSnapshot.SERVER_PROPS)
+    mock_query.run.assert_called_once_with(
+        cloud_account="test-cloud", all_projects=True, as_admin=True
+    )
+    mock_query.to_props.assert_called_once()
+
+
+@patch("apis.openstack_query_api.cloud_snapshot.OpenstackConnection")
+def test_flavors_and_aggregates(mock_openstack_connection):
+    """
+    Tests flavors and aggregates are each listed once
+    """
+    mock_conn = mock_openstack_connection.return_value.__enter__.return_value
+    mock_conn.compute.flavors.return_value = iter([NonCallableMock()])
+    mock_conn.compute.aggregates.return_value = iter([NonCallableMock()])
+    snapshot = CloudSnapshot("test-cloud")
+
+    flavors = snapshot.flavors
+    assert snapshot.flavors is flavors
+    assert len(flavors) == 1
+    assert len(snapshot.aggregates) == 1
+
+    mock_openstack_connection.assert_called_with("test-cloud")
+    mock_conn.compute.flavors.assert_called_once_with(get_extra_specs=True)
+    mock_conn.compute.aggregates.assert_called_once_with()
+
+
+@patch("apis.openstack_query_api.cloud_snapshot.HypervisorFlavorIndex")
+@patch("apis.openstack_query_api.cloud_snapshot.OpenstackConnection")
+def test_flavor_index(mock_openstack_connection, mock_flavor_index):
+    """
+    Tests the flavor index is built from the snapshot's aggregates and flavors
+    """
+    snapshot = CloudSnapshot("test-cloud")
+    assert snapshot.flavor_index == mock_flavor_index.return_value
+    assert snapshot.flavor_index == mock_flavor_index.return_value
+    mock_flavor_index.assert_called_once_with(snapshot.aggregates, snapshot.flavors)
+    assert mock_openstack_connection.call_count == 2
+
+
+@patch("apis.openstack_query_api.cloud_snapshot.CloudSnapshot")
+def test_get_cloud_snapshot_reused(mock_cloud_snapshot):
+    """
+    Tests the same snapshot is returned while it is younger than max_age
+    """
+    mock_cloud_snapshot.return_value.age = 10
+    res_1 = get_cloud_snapshot("test-cloud", max_age=60)
+    res_2 = get_cloud_snapshot("test-cloud", max_age=60)
+    mock_cloud_snapshot.assert_called_once_with("test-cloud")
+    assert res_1 == res_2
+
+
+@patch("apis.openstack_query_api.cloud_snapshot.CloudSnapshot")
+def test_get_cloud_snapshot_expired(mock_cloud_snapshot):
+    """
+    Tests a new snapshot is taken once the last is older than max_age
+    """
+    mock_cloud_snapshot.return_value.age = 61
+    get_cloud_snapshot("test-cloud", max_age=60)
+    get_cloud_snapshot("test-cloud", max_age=60)
+    assert mock_cloud_snapshot.call_count == 2
+
+
+@patch("apis.openstack_query_api.cloud_snapshot.CloudSnapshot")
+def test_get_cloud_snapshot_per_cloud(mock_cloud_snapshot):
+    """
+    Tests snapshots are kept separately for each cloud account
+    """
+    mock_cloud_snapshot.side_effect = [MagicMock(age=0), MagicMock(age=0)]
+    res_1 = get_cloud_snapshot("cloud-1")
+    res_2 = get_cloud_snapshot("cloud-2")
+    assert res_1 != res_2
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, NonCallableMock, patch
 
 from apis.openstack_query_api.hypervisor_queries import (
     query_hypervisor_state,
@@ -7,11 +7,19 @@ from apis.openstack_query_api.hypervisor_queries import (
 )
 
 
-@patch("apis.openstack_query_api.hypervisor_queries.ServerQuery")
+def _mock_snapshot(servers_by_hypervisor):
+    """
+    Helper to build a mock cloud snapshot with the given servers on each hypervisor
+    """
+    snapshot = MagicMock()
+    snapshot.server_count.side_effect = lambda name: len(
+        servers_by_hypervisor.get(name, [])
+    )
+    return snapshot
+
+
 @patch("apis.openstack_query_api.hypervisor_queries.HypervisorQuery")
-def test_basic_hypervisor_info_and_server_count(
-    mock_hv_query_cls, mock_server_query_cls
-):
+def test_basic_hypervisor_info_and_server_count(mock_hv_query_cls):
     hv_instance = MagicMock()
     hv_instance.to_props.return_value = [
         {
@@ -29,18 +37,10 @@ def test_basic_hypervisor_info_and_server_count(
             "disabled_reason": "maintenance",
         },
     ]
-    hv_instance.where.return_value = None
-    hv_instance.select.return_value = None
-    hv_instance.run.return_value = None
     mock_hv_query_cls.return_value = hv_instance
+    snapshot = _mock_snapshot({"hv1": [{"id": "srv-1"}, {"id": "srv-2"}]})
 
-    server_instance = MagicMock()
-    server_instance.group_by.return_value = None
-    server_instance.run.return_value = None
-    server_instance.to_props.return_value = {"hv1": [{"id": "srv-1"}, {"id": "srv-2"}]}
-    mock_server_query_cls.return_value = server_instance
-
-    result = query_hypervisor_state("test-cloud")
+    result = query_hypervisor_state("test-cloud", snapshot=snapshot)
 
     assert isinstance(result, list)
     assert len(result) == 2
@@ -63,35 +63,19 @@ def test_basic_hypervisor_info_and_server_count(
         "disabled_reason",
     )
     hv_instance.run.assert_called_once_with(
-        cloud_account="test-cloud", all_projects=True, as_admin=True
+        cloud_account="test-cloud", from_subset=snapshot.hypervisor_objects
     )
     hv_instance.to_props.assert_called_once()
 
-    mock_server_query_cls.assert_called_once()
-    server_instance.group_by.assert_called_once_with("hypervisor_name")
-    server_instance.run.assert_called_once_with(
-        cloud_account="test-cloud", all_projects=True, as_admin=True
-    )
-    server_instance.to_props.assert_called_once()
 
-
-@patch("apis.openstack_query_api.hypervisor_queries.ServerQuery")
 @patch("apis.openstack_query_api.hypervisor_queries.HypervisorQuery")
-def test_empty_hypervisor_list(mock_hv_query_cls, mock_server_query_cls):
+def test_empty_hypervisor_list(mock_hv_query_cls):
     hv_instance = MagicMock()
-    hv_instance.where.return_value = None
-    hv_instance.select.return_value = None
-    hv_instance.run.return_value = None
     hv_instance.to_props.return_value = []
     mock_hv_query_cls.return_value = hv_instance
+    snapshot = _mock_snapshot({"hv1": [{"id": "srv-1"}]})
 
-    server_instance = MagicMock()
-    server_instance.group_by.return_value = None
-    server_instance.run.return_value = None
-    server_instance.to_props.return_value = {"hv1": [{"id": "srv-1"}]}
-    mock_server_query_cls.return_value = server_instance
-
-    result = query_hypervisor_state("test-cloud")
+    result = query_hypervisor_state("test-cloud", snapshot=snapshot)
 
     assert result == []
 
@@ -99,19 +83,12 @@ def test_empty_hypervisor_list(mock_hv_query_cls, mock_server_query_cls):
     hv_instance.select.assert_called_once()
     hv_instance.run.assert_called_once()
     hv_instance.to_props.assert_called_once()
+    snapshot.server_count.assert_not_called()
 
-    server_instance.group_by.assert_called_once()
-    server_instance.run.assert_called_once()
-    server_instance.to_props.assert_called_once()
 
-
-@patch("apis.openstack_query_api.hypervisor_queries.ServerQuery")
 @patch("apis.openstack_query_api.hypervisor_queries.HypervisorQuery")
-def test_servers_missing_hypervisor_key(mock_hv_query_cls, mock_server_query_cls):
+def test_servers_missing_hypervisor_key(mock_hv_query_cls):
     hv_instance = MagicMock()
-    hv_instance.where.return_value = None
-    hv_instance.select.return_value = None
-    hv_instance.run.return_value = None
     hv_instance.to_props.return_value = [
         {
             "hypervisor_name": "orphan-hv",
@@ -123,23 +100,34 @@ def test_servers_missing_hypervisor_key(mock_hv_query_cls, mock_server_query_cls
     ]
     mock_hv_query_cls.return_value = hv_instance
 
-    server_instance = MagicMock()
-    server_instance.group_by.return_value = None
-    server_instance.run.return_value = None
-    server_instance.to_props.return_value = {}
-    mock_server_query_cls.return_value = server_instance
-
-    result = query_hypervisor_state("test-cloud")
+    result = query_hypervisor_state("test-cloud", snapshot=_mock_snapshot({}))
 
     assert len(result) == 1
     assert result[0]["hypervisor_server_count"] == 0
 
     hv_instance.to_props.assert_called_once()
-    server_instance.to_props.assert_called_once()
 
 
+@patch("apis.openstack_query_api.hypervisor_queries.get_cloud_snapshot")
 @patch("apis.openstack_query_api.hypervisor_queries.HypervisorQuery")
-def test_find_down_hypervisors_valid(mock_hypervisor_query):
+def test_query_hypervisor_state_uses_shared_snapshot(
+    mock_hv_query_cls, mock_get_cloud_snapshot
+):
+    """
+    Tests query_hypervisor_state gets the shared snapshot if one isn't given
+    """
+    mock_hv_query_cls.return_value.to_props.return_value = []
+    query_hypervisor_state("test-cloud")
+    mock_get_cloud_snapshot.assert_called_once_with("test-cloud")
+    mock_hv_query_cls.return_value.run.assert_called_once_with(
+        cloud_account="test-cloud",
+        from_subset=mock_get_cloud_snapshot.return_value.hypervisor_objects,
+    )
+
+
+@patch("apis.openstack_query_api.hypervisor_queries.get_cloud_snapshot")
+@patch("apis.openstack_query_api.hypervisor_queries.HypervisorQuery")
+def test_find_down_hypervisors_valid(mock_hypervisor_query, mock_get_cloud_snapshot):
     """
     Tests find_down_hypervisors() function
     """
@@ -147,8 +135,13 @@ def test_find_down_hypervisors_valid(mock_hypervisor_query):
 
     res = find_down_hypervisors("test-cloud-account")
 
+    mock_get_cloud_snapshot.assert_called_once_with("test-cloud-account")
+    mock_hypervisor_query_obj.where.assert_called_once_with(
+        "any_in", "hypervisor_state", values=["down"]
+    )
     mock_hypervisor_query_obj.run.assert_called_once_with(
         "test-cloud-account",
+        from_subset=mock_get_cloud_snapshot.return_value.hypervisor_objects,
     )
     mock_hypervisor_query_obj.select.assert_called_once_with(
         "hypervisor_id",
@@ -160,17 +153,25 @@ def test_find_down_hypervisors_valid(mock_hypervisor_query):
     assert res == mock_hypervisor_query_obj
 
 
+@patch("apis.openstack_query_api.hypervisor_queries.get_cloud_snapshot")
 @patch("apis.openstack_query_api.hypervisor_queries.HypervisorQuery")
-def test_find_disabled_hypervisors_valid(mock_hypervisor_query):
+def test_find_disabled_hypervisors_valid(
+    mock_hypervisor_query, mock_get_cloud_snapshot
+):
     """
-    Tests find_down_hypervisors() function
+    Tests find_disabled_hypervisors() function
     """
     mock_hypervisor_query_obj = mock_hypervisor_query.return_value
 
     res = find_disabled_hypervisors("test-cloud-account")
 
+    mock_get_cloud_snapshot.assert_called_once_with("test-cloud-account")
+    mock_hypervisor_query_obj.where.assert_called_once_with(
+        "any_in", "hypervisor_status", values=["disabled"]
+    )
     mock_hypervisor_query_obj.run.assert_called_once_with(
         "test-cloud-account",
+        from_subset=mock_get_cloud_snapshot.return_value.hypervisor_objects,
     )
     mock_hypervisor_query_obj.select.assert_called_once_with(
         "hypervisor_id",
@@ -180,3 +181,19 @@ def test_find_disabled_hypervisors_valid(mock_hypervisor_query):
     )
 
     assert res == mock_hypervisor_query_obj
+
+
+@patch("apis.openstack_query_api.hypervisor_queries.get_cloud_snapshot")
+@patch("apis.openstack_query_api.hypervisor_queries.HypervisorQuery")
+def test_find_hypervisors_given_snapshot(
+    mock_hypervisor_query, mock_get_cloud_snapshot
+):
+    """
+    Tests the shared snapshot isn't used when a snapshot is given
+    """
+    snapshot = NonCallableMock()
+    find_down_hypervisors("test-cloud-account", snapshot=snapshot)
+    find_disabled_hypervisors("test-cloud-account", snapshot=snapshot)
+    mock_get_cloud_snapshot.assert_not_called()
+    for run_call in mock_hypervisor_query.return_value.run.call_args_list:
+        assert run_call.kwargs["from_subset"] == snapshot.hypervisor_objects
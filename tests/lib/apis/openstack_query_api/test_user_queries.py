@@ -1,6 +1,13 @@
 from unittest.mock import patch, NonCallableMock
 
-from apis.openstack_query_api.user_queries import find_user_info
+import pytest
+
+from apis.openstack_query_api.user_queries import (
+    USER_INFO_CACHE_TTL,
+    clear_user_info_cache,
+    find_user_info,
+    find_user_info_bulk,
+)
 
 
 # pylint:disable=too-many-locals
@@ -80,3 +87,114 @@ def test_find_user_info_no_email_address(mock_user_query):
 
     assert res[0] == ""
     assert res[1] == mock_override_email
+
+
+@pytest.fixture(autouse=True)
+def clear_cache_fixture():
+    """
+    Ensures each test starts with an empty user info cache
+    """
+    clear_user_info_cache()
+    yield
+    clear_user_info_cache()
+
+
+@patch("apis.openstack_query_api.user_queries.UserQuery")
+def test_find_user_info_bulk(mock_user_query):
+    """
+    Tests find_user_info_bulk runs a single query for all users and maps
+    each user ID to its name and email address
+    """
+    mock_cloud_account = NonCallableMock()
+    mock_override_email = NonCallableMock()
+    mock_user_query.return_value.to_props.return_value = {
+        "user_id": ["id1", "id2"],
+        "user_name": ["foo", "bar"],
+        "user_email": ["foo@example.com", None],
+    }
+    res = find_user_info_bulk(
+        ["id1", "id2", "id3", "id1"], mock_cloud_account, mock_override_email
+    )
+    mock_user_query.assert_called_once()
+    mock_user_query.return_value.select.assert_called_once_with(
+        "id", "name", "email_address"
+    )
+    mock_user_query.return_value.where.assert_called_once_with(
+        "any_in", "id", values=["id1", "id2", "id3"]
+    )
+    mock_user_query.return_value.run.assert_called_once_with(
+        cloud_account=mock_cloud_account
+    )
+    mock_user_query.return_value.to_props.assert_called_once_with(flatten=True)
+
+    assert res == {
+        "id1": ("foo", "foo@example.com"),
+        "id2": ("", mock_override_email),
+        "id3": ("", mock_override_email),
+    }
+
+
+@patch("apis.openstack_query_api.user_queries.UserQuery")
+def test_find_user_info_bulk_no_results(mock_user_query):
+    """
+    Tests find_user_info_bulk returns the override email when no users are found
+    """
+    mock_override_email = NonCallableMock()
+    mock_user_query.return_value.to_props.return_value = []
+    res = find_user_info_bulk(["id1"], "cloud", mock_override_email)
+    assert res == {"id1": ("", mock_override_email)}
+
+
+@patch("apis.openstack_query_api.user_queries.UserQuery")
+def test_find_user_info_bulk_uses_cache(mock_user_query):
+    """
+    Tests find_user_info_bulk only queries for users not already cached
+    """
+    mock_user_query.return_value.to_props.side_effect = [
+        {"user_id": ["id1"], "user_name": ["foo"], "user_email": ["foo@example.com"]},
+        {"user_id": ["id2"], "user_name": ["bar"], "user_email": ["bar@example.com"]},
+    ]
+    find_user_info_bulk(["id1"], "cloud", "override")
+    res = find_user_info_bulk(["id1", "id2"], "cloud", "override")
+
+    assert mock_user_query.call_count == 2
+    mock_user_query.return_value.where.assert_called_with(
+        "any_in", "id", values=["id2"]
+    )
+    assert res == {
+        "id1": ("foo", "foo@example.com"),
+        "id2": ("bar", "bar@example.com"),
+    }
+
+
+@patch("apis.openstack_query_api.user_queries.UserQuery")
+def test_find_user_info_bulk_cache_expires(mock_user_query):
+    """
+    Tests find_user_info_bulk queries again once cached entries expire
+    """
+    mock_user_query.return_value.to_props.return_value = {
+        "user_id": ["id1"],
+        "user_name": ["foo"],
+        "user_email": ["foo@example.com"],
+    }
+    with patch("apis.openstack_query_api.user_queries.time.monotonic") as mock_time:
+        mock_time.return_value = 0
+        find_user_info_bulk(["id1"], "cloud", "override")
+        mock_time.return_value = USER_INFO_CACHE_TTL + 1
+        find_user_info_bulk(["id1"], "cloud", "override")
+    assert mock_user_query.call_count == 2
+
+
+@patch("apis.openstack_query_api.user_queries.UserQuery")
+def test_find_user_info_bulk_cache_per_cloud(mock_user_query):
+    """
+    Tests the cache is kept separately for each cloud account
+    """
+    mock_user_query.return_value.to_props.return_value = {
+        "user_id": ["id1"],
+        "user_name": ["foo"],
+        "user_email": ["foo@example.com"],
+    }
+    find_user_info_bulk(["id1"], "cloud1", "override")
+    find_user_info_bulk(["id1"], "cloud2", "override")
+    assert mock_user_query.call_count == 2
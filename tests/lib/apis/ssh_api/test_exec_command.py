@@ -1,9 +1,47 @@
+import os
 from unittest.mock import patch, MagicMock
 
 import pytest
 from paramiko.ssh_exception import SSHException
 
 from apis.ssh_api.exec_command import SSHConnection
+from apis.ssh_api.output_capture import OutputCapture
+from apis.ssh_api.structs.command_result import CommandResult
+
+
+@pytest.fixture(name="mock_channel")
+def mock_channel_fixture():
+    """
+    Returns a channel which sends two chunks of output then exits with 0
+    """
+    mock_channel = MagicMock()
+    chunks = [b"out", b"put"]
+    mock_channel.recv_ready.side_effect = lambda: bool(chunks)
+    mock_channel.recv.side_effect = lambda size: chunks.pop(0)
+    mock_channel.eof_received = True
+    mock_channel.recv_exit_status.return_value = 0
+    return mock_channel
+
+
+@pytest.fixture(name="mock_ssh_client")
+def mock_ssh_client_fixture(mock_channel):
+    """
+    Patches the paramiko client and key, returning the client. The client has no
+    connection until connect is called
+    """
+    with patch(
+        "apis.ssh_api.exec_command.paramiko.SSHClient"
+    ) as mock_ssh_client, patch("apis.ssh_api.exec_command.paramiko.RSAKey"), patch(
+        "apis.ssh_api.exec_command.select.select"
+    ):
+        client = mock_ssh_client.return_value
+        transport = MagicMock()
+        transport.open_session.return_value = mock_channel
+        client.get_transport.return_value = None
+        client.connect.side_effect = lambda *args, **kwargs: setattr(
+            client.get_transport, "return_value", transport
+        )
+        yield client
 
 
 @patch("apis.ssh_api.exec_command.paramiko.SSHClient")
@@ -16,6 +54,7 @@ def test_ssh_connection(mock_rsakey, mock_sshclient):
     mock_details.host = "example.com"
     mock_details.username = "foo"
     mock_details.private_key_path = "/home/bar"
+    mock_sshclient.return_value.get_transport.return_value = None
 
     with SSHConnection(mock_details) as client:
         mock_sshclient.assert_called_once()
@@ -31,79 +70,144 @@ def test_ssh_connection(mock_rsakey, mock_sshclient):
 
         assert client == mock_sshclient.return_value
 
+    mock_sshclient.return_value.close.assert_called_once()
 
-@patch("apis.ssh_api.exec_command.paramiko.SSHClient")
-@patch("apis.ssh_api.exec_command.paramiko.RSAKey")
-def test_run_command_on_host(mock_rsa_key, mock_ssh_client):
+
+@pytest.mark.usefixtures("mock_ssh_client")
+def test_run(mock_channel):
     """
-    Test execution of command on remote host
+    Test a command is run over a channel, returning its exit code and combined output
     """
-    mock_details = MagicMock()
-    mock_details.host = "example.com"
-    mock_details.username = "foo"
-    mock_details.private_key_path = "/home/bar"
+    on_output = MagicMock()
+    connection = SSHConnection(MagicMock(host="example.com"))
 
-    mock_rsa_key.return_value = "mock_key"
+    res = connection.run("ls", on_output=on_output)
 
-    mock_client_instance = MagicMock()
-    mock_ssh_client.return_value = mock_client_instance
-    mock_stdout = MagicMock()
-    mock_stderr = MagicMock()
-    mock_stdin = MagicMock()
+    assert res == CommandResult(
+        host="example.com", command="ls", exit_code=0, output="output"
+    )
+    assert res.succeeded
+    mock_channel.set_combine_stderr.assert_called_once_with(True)
+    mock_channel.exec_command.assert_called_once_with("ls")
+    mock_channel.recv.assert_called_with(32768)
+    mock_channel.close.assert_called_once()
+    assert [output_call.args[0] for output_call in on_output.call_args_list] == [
+        "out",
+        "put",
+    ]
+
+
+def test_run_reuses_connection(mock_ssh_client):
+    """
+    Test commands run on the same host share one connection
+    """
+    connection = SSHConnection(MagicMock())
 
-    mock_stdout.channel.recv_exit_status.return_value = 0
-    mock_stdout.channel.recv_ready.side_effect = [True, True, True, False, False]
-    mock_stdout.channel.exit_status_ready.side_effect = [False, True]
-    mock_stdout.channel.recv.return_value = b"output"
+    connection.run("patch")
+    connection.run("reboot")
 
-    mock_client_instance.exec_command.return_value = (
-        mock_stdin,
-        mock_stdout,
-        mock_stderr,
-    )
+    mock_ssh_client.connect.assert_called_once()
+    assert mock_ssh_client.get_transport.return_value.open_session.call_count == 2
+    mock_ssh_client.close.assert_not_called()
 
-    instance = SSHConnection(mock_details)
-    instance.run_command_on_host("ls")
 
-    mock_client_instance.exec_command.assert_called_once_with(command="ls")
+def test_run_reconnects(mock_ssh_client):
+    """
+    Test the host is connected to again if the connection was lost, i.e. after a reboot
+    """
+    connection = SSHConnection(MagicMock())
 
-    mock_stdout.channel.shutdown_read.assert_called_once()
+    connection.run("reboot")
+    mock_ssh_client.get_transport.return_value.is_active.return_value = False
+    connection.run("uptime")
 
-    mock_stdout.close.assert_called_once()
-    mock_stderr.close.assert_called_once()
+    assert mock_ssh_client.connect.call_count == 2
 
 
-@patch("apis.ssh_api.exec_command.paramiko.SSHClient")
-@patch("apis.ssh_api.exec_command.paramiko.RSAKey")
-def test_run_command_on_host_failure(mock_rsa_key, mock_ssh_client):
+@pytest.mark.usefixtures("mock_ssh_client")
+def test_run_multibyte_output(mock_channel):
     """
-    Test execution of command on remote host
+    Test characters split between reads are decoded whole
     """
-    mock_details = MagicMock()
-    mock_details.host = "example.com"
-    mock_details.username = "foo"
-    mock_details.private_key_path = "/home/bar"
+    chunks = ["é".encode("utf-8")[:1], "é".encode("utf-8")[1:]]
+    mock_channel.recv_ready.side_effect = lambda: bool(chunks)
+    mock_channel.recv.side_effect = lambda size: chunks.pop(0)
 
-    mock_rsa_key.return_value = "mock_key"
+    assert SSHConnection(MagicMock()).run("ls").output == "é"
 
-    mock_client_instance = MagicMock()
-    mock_ssh_client.return_value = mock_client_instance
-    mock_stdout = MagicMock()
-    mock_stderr = MagicMock()
-    mock_stdin = MagicMock()
 
-    mock_stdout.channel.recv_exit_status.return_value = 1
-    mock_stdout.channel.recv_ready.side_effect = [True, False, False]
-    mock_stdout.channel.exit_status_ready.side_effect = [False, False, False, True]
-    mock_stdout.channel.recv.return_value = b"output"
+@pytest.mark.usefixtures("mock_ssh_client")
+def test_run_command_on_host(capsys):
+    """
+    Test execution of command on remote host returns its output without printing it
+    """
+    res = SSHConnection(MagicMock()).run_command_on_host("ls")
 
-    mock_client_instance.exec_command.return_value = (
-        mock_stdin,
-        mock_stdout,
-        mock_stderr,
-    )
+    assert res.output == "output"
+    assert not capsys.readouterr().out
+
+
+@pytest.mark.usefixtures("mock_ssh_client")
+def test_run_command_on_host_on_output():
+    """
+    Test output of a command is passed to the given callback instead of being printed
+    """
+    on_output = MagicMock()
+
+    SSHConnection(MagicMock()).run_command_on_host("ls", on_output=on_output)
+
+    assert on_output.call_count == 2
+
+
+@pytest.mark.usefixtures("mock_ssh_client")
+def test_run_command_on_host_failure(mock_channel):
+    """
+    Test a command exiting with an error raises an SSHException
+    """
+    mock_channel.recv_exit_status.return_value = 1
+
+    with pytest.raises(SSHException, match="exit code 1\noutput"):
+        SSHConnection(MagicMock(host="example.com")).run_command_on_host("ls")
+
+
+@pytest.mark.usefixtures("mock_ssh_client")
+def test_run_timeout(mock_channel):
+    """
+    Test a command which doesn't finish in time is given up on without an exit code
+    """
+    mock_channel.recv_ready.side_effect = None
+    mock_channel.recv_ready.return_value = False
+    mock_channel.eof_received = False
+    mock_channel.closed = False
+
+    with patch("apis.ssh_api.exec_command.time.monotonic") as mock_monotonic:
+        mock_monotonic.side_effect = [100, 100, 101, 106]
+        res = SSHConnection(MagicMock()).run("sleep 60", timeout=5)
 
-    instance = SSHConnection(mock_details)
+    assert res.timed_out
+    assert res.exit_code is None
+    assert res.error == "Timed out after 5 seconds"
+    mock_channel.recv_exit_status.assert_not_called()
+    mock_channel.close.assert_called_once()
+
+
+@pytest.mark.usefixtures("mock_ssh_client")
+def test_run_bounded_output(mock_channel):
+    """
+    Test only the head and tail of a long output are kept, with all of it spilled to a file
+    """
+    chunks = [b"head", b"middle", b"tail"]
+    mock_channel.recv_ready.side_effect = lambda: bool(chunks)
+    mock_channel.recv.side_effect = lambda size: chunks.pop(0)
+
+    res = SSHConnection(MagicMock()).run(
+        "patch", capture=OutputCapture(head_size=4, tail_size=4, spill=True)
+    )
 
-    with pytest.raises(SSHException):
-        instance.run_command_on_host("ls")
+    assert res.truncated
+    assert res.output == "head\n... [6 characters omitted] ...\ntail"
+    try:
+        with open(res.output_path, encoding="utf-8") as output_file:
+            assert output_file.read() == "headmiddletail"
+    finally:
+        os.remove(res.output_path)
@@ -0,0 +1,31 @@
+from apis.ssh_api.output_capture import OutputCapture
+
+
+def test_output_capture_short():
+    """
+    Test output shorter than the head and tail is kept whole
+    """
+    capture = OutputCapture(head_size=5, tail_size=5)
+    capture.write("abc")
+    capture.write("defg")
+
+    assert capture.head == "abcde"
+    assert capture.tail == "fg"
+    assert not capture.truncated
+    assert capture.output == "abcdefg"
+    assert capture.spill_path is None
+
+
+def test_output_capture_truncated():
+    """
+    Test only the head and the most recent tail of a long output are kept
+    """
+    capture = OutputCapture(head_size=3, tail_size=4)
+    for chunk in ["ab", "cdef", "ghij", "k"]:
+        capture.write(chunk)
+
+    assert capture.head == "abc"
+    assert capture.tail == "hijk"
+    assert capture.length == 11
+    assert capture.truncated
+    assert capture.output == "abc\n... [4 characters omitted] ...\nhijk"
@@ -0,0 +1,121 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from paramiko.ssh_exception import SSHException
+
+from apis.ssh_api.ssh_executor import SSHExecutor
+from apis.ssh_api.structs.command_result import CommandResult
+from apis.ssh_api.structs.ssh_connection_details import SSHDetails
+
+
+@pytest.fixture(name="mock_ssh_conn")
+def mock_ssh_conn_fixture():
+    """
+    Patches SSHConnection so each host's command succeeds with its host name as output
+    """
+    with patch("apis.ssh_api.ssh_executor.SSHConnection") as mock_ssh_conn:
+
+        def connection(details):
+            mock_connection = MagicMock()
+            mock_connection.run.side_effect = lambda command, on_output=None: (
+                CommandResult(
+                    host=details.host,
+                    command=command,
+                    exit_code=0,
+                    output=details.host,
+                )
+            )
+            return mock_connection
+
+        mock_ssh_conn.side_effect = connection
+        yield mock_ssh_conn
+
+
+def test_run_reuses_connection(mock_ssh_conn):
+    """
+    Test one connection is made to each host and reused for every command
+    """
+    executor = SSHExecutor("stackstorm", "/home/stackstorm/.ssh/id_rsa")
+
+    executor.run("hv1", "patch")
+    executor.run("hv1", "reboot")
+    executor.run("hv2", "patch")
+
+    assert mock_ssh_conn.call_count == 2
+    mock_ssh_conn.assert_any_call(
+        SSHDetails(
+            host="hv1",
+            username="stackstorm",
+            private_key_path="/home/stackstorm/.ssh/id_rsa",
+        )
+    )
+    assert executor.connection("hv1").run.call_count == 2
+
+    connections = [executor.connection("hv1"), executor.connection("hv2")]
+    executor.close()
+    for connection in connections:
+        connection.close.assert_called_once()
+
+
+def test_run_connection_error(mock_ssh_conn):
+    """
+    Test a host which can't be connected to gives a result with the error
+    """
+    mock_ssh_conn.side_effect = SSHException("no route to host")
+
+    res = SSHExecutor("stackstorm", "key").run("hv1", "ls")
+
+    assert res.exit_code is None
+    assert not res.succeeded
+    assert "no route to host" in res.error
+
+
+@pytest.mark.usefixtures("mock_ssh_conn")
+def test_run_on_hosts():
+    """
+    Test a command is run on every host, returning each host's result
+    """
+    with SSHExecutor("stackstorm", "key") as executor:
+        res = executor.run_on_hosts(["hv1", "hv2", "hv1"], "ls")
+
+    assert {host: result.output for host, result in res.items()} == {
+        "hv1": "hv1",
+        "hv2": "hv2",
+    }
+
+
+def test_run_on_hosts_bounded(mock_ssh_conn):
+    """
+    Test a command is run on at most max_concurrent_hosts hosts at the same time
+    """
+    running = []
+    most_running = []
+    lock = threading.Lock()
+
+    def run(command, on_output=None):  # pylint:disable=unused-argument
+        with lock:
+            running.append(command)
+            most_running.append(len(running))
+        threading.Event().wait(0.01)
+        with lock:
+            running.pop()
+        return CommandResult(host="", command=command, exit_code=0)
+
+    mock_ssh_conn.side_effect = None
+    mock_ssh_conn.return_value.run.side_effect = run
+
+    SSHExecutor("stackstorm", "key", max_concurrent_hosts=2).run_on_hosts(
+        [f"hv{i}" for i in range(6)], "ls"
+    )
+
+    assert max(most_running) <= 2
+    assert mock_ssh_conn.return_value.run.call_count == 6
+
+
+def test_run_on_hosts_empty(mock_ssh_conn):
+    """
+    Test nothing is run when there are no hosts
+    """
+    assert not SSHExecutor("stackstorm", "key").run_on_hosts([], "ls")
+    mock_ssh_conn.assert_not_called()
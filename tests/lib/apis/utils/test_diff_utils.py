@@ -1,5 +1,12 @@
 import pytest
-from apis.utils.diff_utils import DiffUtils, _format_value, _normalize_path, get_diff
+from apis.utils.diff_utils import (
+    DiffUtils,
+    _format_path,
+    _format_value,
+    _normalize_path,
+    get_diff,
+    get_fingerprint,
+)
 
 # pylint:disable=protected-access
 
@@ -49,14 +56,32 @@ def test_normalize_path(inp, expected):
     assert _normalize_path(inp) == expected
 
 
+# -------------------- format_path --------------------
+
+
+@pytest.mark.parametrize(
+    "inp, expected",
+    [
+        ((), "root"),
+        (("a", 0), "root['a'][0]"),
+        (("x", None, "y"), "root['x'][?]['y']"),
+    ],
+)
+def test_format_path(inp, expected):
+    """Test that _format_path converts path tuples into bracket notation."""
+    assert _format_path(inp) == expected
+
+
 # -------------------- is_excluded --------------------
 
 
 def test_is_excluded_true_and_false():
     """Test that excluded paths are correctly matched or ignored."""
     du = DiffUtils(exclude_paths={"root['a'][*]", "root['x']"})
-    assert du._is_excluded("root['a'][0]") is True
-    assert du._is_excluded("root['b']") is False
+    assert du._is_excluded(("a", 0)) is True
+    assert du._is_excluded(("a", None, "b")) is True
+    assert du._is_excluded(("b",)) is False
+    assert DiffUtils()._is_excluded(("a",)) is False
 
 
 # -------------------- _get_diff_dict --------------------
@@ -67,7 +92,7 @@ def test_get_diff_dict_add_remove_and_queue():
     du = DiffUtils()
     src = {"a": 1}
     tgt = {"b": 2}
-    du._get_diff_dict(src, tgt, "root")
+    du._get_diff_dict(src, tgt, ())
 
     assert ["root['b']", "Not Present", "2"] in du.changes
     assert ["root['a']", "1", "Not Present"] in du.changes
@@ -78,7 +103,7 @@ def test_get_diff_dict_queue_added():
     du = DiffUtils()
     src = {"a": 1}
     tgt = {"a": 2}
-    du._get_diff_dict(src, tgt, "root")
+    du._get_diff_dict(src, tgt, ())
 
     assert du.queue  # queued, not directly added to changes
 
@@ -86,7 +111,7 @@ def test_get_diff_dict_queue_added():
 def test_get_diff_dict_with_excluded():
     """Test that excluded dict keys are skipped and produce no changes."""
     du = DiffUtils(exclude_paths={"root['x']"})
-    du._get_diff_dict({"x": 1}, {"x": 2}, "root")
+    du._get_diff_dict({"x": 1}, {"x": 2}, ())
     assert not du.changes
     assert not du.queue
 
@@ -97,7 +122,7 @@ def test_get_diff_dict_with_excluded():
 def test_get_diff_list_hashable_changes():
     """Test that hashable list elements are diffed using counts and reported correctly."""
     du = DiffUtils()
-    du._get_diff_list_hashable([1, 2], [2, 3], "root")
+    du._get_diff_list_hashable([1, 2], [2, 3], ())
     assert ["root[?]", "1", "Not Present"] in du.changes
     assert ["root[?]", "Not Present", "3"] in du.changes
 
@@ -108,32 +133,32 @@ def test_get_diff_list_hashable_changes():
 def test_get_diff_list_unhashable_perfect_match():
     """Test that identical unhashable list items (dicts) produce no changes."""
     du = DiffUtils()
-    du._get_diff_list_unhashable([{"a": 1}], [{"a": 1}], "root")
+    du._get_diff_list_unhashable([{"a": 1}], [{"a": 1}], ())
     assert du.changes == []
 
 
 def test_get_diff_list_unhashable_close_match():
     """Test that unhashable list items with nested diffs report sub-changes."""
     du = DiffUtils()
-    du._get_diff_list_unhashable([{"a": 1}], [{"a": 2}], "root")
+    du._get_diff_list_unhashable([{"a": 1}], [{"a": 2}], ())
     assert any("root[?]" in c[0] for c in du.changes)
 
 
 def test_get_diff_list_unhashable_unmatched_source_and_target():
     """Test that unmatched unhashable items are reported as missing in source or target."""
     du = DiffUtils()
-    du._get_diff_list_unhashable([{"a": 1}], [], "root")
+    du._get_diff_list_unhashable([{"a": 1}], [], ())
     assert ["root[?]", "dict: {'a': 1}...", "Not Present"] in du.changes
 
     du2 = DiffUtils()
-    du2._get_diff_list_unhashable([], [{"a": 2}], "root")
+    du2._get_diff_list_unhashable([], [{"a": 2}], ())
     assert ["root[?]", "Not Present", "dict: {'a': 2}..."] in du2.changes
 
 
 def test_get_diff_list_unhashable_second_pass_skip():
     """Test that unhashable list diff second-pass correctly reports extra unmatched targets."""
     du = DiffUtils()
-    du._get_diff_list_unhashable([{"a": 1}], [{"a": 2}, {"b": 3}], "root")
+    du._get_diff_list_unhashable([{"a": 1}], [{"a": 2}, {"b": 3}], ())
     assert any("Not Present" in c for c in du.changes)
 
 
@@ -142,18 +167,45 @@ def test_get_diff_list_unhashable_skips_already_matched():
     du = DiffUtils()
     src = [{"a": 1}, {"a": 1}]
     tgt = [{"a": 1}]
-    du._get_diff_list_unhashable(src, tgt, "root")
+    du._get_diff_list_unhashable(src, tgt, ())
 
     assert ["root[?]", "dict: {'a': 1}...", "Not Present"] in du.changes
 
 
+def test_get_diff_list_unhashable_pairs_most_similar():
+    """Test that unmatched items are diffed against the most similar target, not the first."""
+    du = DiffUtils()
+    src = [{"name": "b", "size": 2}]
+    tgt = [{"name": "a", "size": 1}, {"name": "b", "size": 3}]
+    du._get_diff_list_unhashable(src, tgt, ())
+    assert ["root[?]['size']", "2", "3"] in du.changes
+    assert ["root[?]", "Not Present", "dict: {'name': 'a', 'size': 1}..."] in du.changes
+
+
+def test_get_diff_list_unhashable_matches_duplicates_once():
+    """Test that identical items are matched one-to-one by their canonical form."""
+    du = DiffUtils()
+    du._get_diff_list_unhashable([{"a": [1, 2]}] * 2, [{"a": [2, 1]}] * 3, ())
+    assert du.changes == [["root[?]", "Not Present", "dict: {'a': [2, 1]}..."]]
+
+
+def test_get_diff_list_unhashable_circular_items():
+    """Test that circular references inside list items don't cause infinite recursion."""
+    a, b = {}, {}
+    a["self"] = a
+    b["self"] = b
+    du = DiffUtils()
+    du._get_diff_list_unhashable([a], [b], ())
+    assert not du.changes
+
+
 # -------------------- _get_diff_list_unordered --------------------
 
 
 def test_get_diff_list_unordered_mixed():
     """Test that unordered list diff detects differences for hashable and dict items."""
     du = DiffUtils()
-    du._get_diff_list_unordered([1, {"a": 1}], [2, {"a": 2}], "root")
+    du._get_diff_list_unordered([1, {"a": 1}], [2, {"a": 2}], ())
     assert any("Not Present" in c for c in du.changes)
 
 
@@ -163,19 +215,19 @@ def test_get_diff_list_unordered_mixed():
 def test_get_diff_list_ordered_extra_in_target_and_source():
     """Test that ordered list diff reports extra elements in either source or target."""
     du = DiffUtils()
-    du._get_diff_list_ordered([1], [1, 2], "root")
+    du._get_diff_list_ordered([1], [1, 2], ())
     assert ["root[1]", "Not Present", "2"] in du.changes
 
     du2 = DiffUtils()
-    du2._get_diff_list_ordered([1, 2], [1], "root")
+    du2._get_diff_list_ordered([1, 2], [1], ())
     assert ["root[1]", "2", "Not Present"] in du2.changes
 
 
 def test_get_diff_list_ordered_queue():
     """Test that differing elements in ordered lists are queued for deeper comparison."""
     du = DiffUtils()
-    du._get_diff_list_ordered([1], [2], "root")
-    assert (1, 2, "root[0]") in du.queue
+    du._get_diff_list_ordered([1], [2], ())
+    assert (1, 2, (0,)) in du.queue
 
 
 # -------------------- _get_diff_set --------------------
@@ -184,7 +236,7 @@ def test_get_diff_list_ordered_queue():
 def test_get_diff_set_changes():
     """Test that set differences report missing elements on each side."""
     du = DiffUtils()
-    du._get_diff_set({1}, {2}, "root")
+    du._get_diff_set({1}, {2}, ())
     assert ["root", "1", "Not Present in Set"] in du.changes
     assert ["root", "Not Present in Set", "2"] in du.changes
 
@@ -222,6 +274,32 @@ def test_get_diff_with_excluded_path():
     assert not changes
 
 
+def test_get_diff_nested_list_item_paths():
+    """Test that changes inside unordered lists of dicts are reported with their full path."""
+    obj1 = {"root": [{"a": 1}]}
+    obj2 = {"root": [{"a": 2}]}
+    changes = get_diff(obj1, obj2)
+    assert changes == [["root['root'][?]['a']", "1", "2"]]
+
+
+def test_get_diff_excluded_path_inside_list_items():
+    """Test that exclude patterns match fields of dicts inside unordered lists."""
+    obj1 = {"items": [{"ts": 1, "v": 1}]}
+    obj2 = {"items": [{"ts": 2, "v": 1}]}
+    assert not get_diff(obj1, obj2, exclude_paths={"root['items'][*]['ts']"})
+    assert get_diff(obj1, obj2)
+
+
+def test_get_diff_large_unordered_list_of_dicts():
+    """Test that large shuffled lists of dicts are matched up, reporting only real changes."""
+    src = [{"id": i, "meta": {"key": f"k{i}", "tags": [i, i + 1]}} for i in range(1000)]
+    tgt = [{"id": i, "meta": {"key": f"k{i}", "tags": [i + 1, i]}} for i in range(1000)]
+    tgt.reverse()
+    tgt[10]["meta"] = {"key": "changed", "tags": [989, 990]}
+    changes = get_diff({"items": src}, {"items": tgt})
+    assert changes == [["root['items'][?]['meta']['key']", "'k989'", "'changed'"]]
+
+
 def test_get_diff_circular_reference():
     """Test that circular references do not cause infinite recursion."""
     a, b = {}, {}
@@ -237,3 +315,36 @@ def test_get_diff_root_excluded_skips_completely():
     obj2 = {"a": 2}
     changes = get_diff(obj1, obj2, exclude_paths={"root"})
     assert changes == []
+
+
+# -------------------- fingerprint --------------------
+
+
+def test_fingerprint_equal_for_equal_objects():
+    """Test that objects get_diff finds no differences between share a fingerprint."""
+    obj1 = {"a": [1, 2, 3], "b": {"c": {1, 2}}, "d": None}
+    obj2 = {"d": None, "b": {"c": {2, 1}}, "a": [3, 2, 1]}
+    assert not get_diff(obj1, obj2)
+    assert get_fingerprint(obj1) == get_fingerprint(obj2)
+
+
+def test_fingerprint_changes_with_value():
+    """Test that changing a value changes the fingerprint."""
+    assert get_fingerprint({"a": 1}) != get_fingerprint({"a": 2})
+
+
+def test_fingerprint_respects_order_when_not_ignored():
+    """Test that list order changes the fingerprint only when ignore_order is False."""
+    assert get_fingerprint([1, 2], ignore_order=False) != get_fingerprint(
+        [2, 1], ignore_order=False
+    )
+    assert get_fingerprint([1, 2]) == get_fingerprint([2, 1])
+
+
+def test_fingerprint_ignores_excluded_paths():
+    """Test that excluded paths, including wildcards, don't affect the fingerprint."""
+    exclude = ["root['id']", "root['items'][*]['ts']"]
+    obj1 = {"id": 1, "name": "x", "items": [{"ts": 1, "v": 1}]}
+    obj2 = {"id": 2, "name": "x", "items": [{"ts": 2, "v": 1}]}
+    assert get_fingerprint(obj1, exclude) == get_fingerprint(obj2, exclude)
+    assert get_fingerprint(obj1) != get_fingerprint(obj2)
@@ -0,0 +1,100 @@
+import json
+import random
+
+import pytest
+
+from apis.utils.json_stream import iter_json_array
+
+
+def _chunks(text, size):
+    """
+    Split text into chunks of bytes of the given size
+    """
+    data = text.encode("utf-8")
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1024])
+def test_iter_json_array(size):
+    """
+    Tests iter_json_array() yields every item of the array whatever the chunk size,
+    including items split across chunks and multi-byte characters
+    """
+    results = [
+        {"attrs": {"name": "hv1", "state": 0}, "joins": {}},
+        {"attrs": {"name": "hév2", "state": 12345}, "joins": {"host": None}},
+        [1.5, "a,]}", True],
+        1234567,
+    ]
+    text = json.dumps({"status": "ok", "results": results, "extra": [1, 2]})
+
+    assert list(iter_json_array(_chunks(text, size), "results")) == results
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        ([b'{"results": [1697000000.', b"25]}"], [1697000000.25]),
+        ([b'{"results": [1', b"e", b"3, 2.5E", b"-1]}"], [1000.0, 0.25]),
+        ([b'{"results": [-', b"12]}"], [-12]),
+    ],
+)
+def test_iter_json_array_split_number(chunks, expected):
+    """
+    Tests iter_json_array() reads numbers split after their decimal point, exponent or sign
+    """
+    assert list(iter_json_array(chunks, "results")) == expected
+
+
+def test_iter_json_array_random_splits():
+    """
+    Tests iter_json_array() yields every item however the text is split into chunks
+    """
+    results = [
+        {"last_check": 1697000000.25 + i, "state": i, "ratio": -1.5e-3 * i}
+        for i in range(20)
+    ]
+    data = json.dumps({"results": results}).encode("utf-8")
+    rng = random.Random(0)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(data)), 30))
+        chunks = [data[i:j] for i, j in zip([0] + cuts, cuts + [len(data)])]
+        assert list(iter_json_array(chunks, "results")) == results
+
+
+def test_iter_json_array_is_lazy():
+    """
+    Tests iter_json_array() only reads as many chunks as needed for each item
+    """
+    read = []
+
+    def chunks():
+        for chunk in ['{"results": [', '{"a": 1}', ", ", '{"b": 2}', "]}"]:
+            read.append(chunk)
+            yield chunk
+
+    items = iter_json_array(chunks(), "results")
+    assert next(items) == {"a": 1}
+    assert read == ['{"results": [', '{"a": 1}']
+
+
+@pytest.mark.parametrize(
+    "text", ['{"results": []}', "{}", '{"error": 404, "status": "Not Found"}']
+)
+def test_iter_json_array_empty(text):
+    """
+    Tests iter_json_array() yields nothing when the array is empty or missing
+    """
+    assert not list(iter_json_array([text], "results"))
+
+
+@pytest.mark.parametrize(
+    "text", ['["results"]', '{"results": {}}', '{"results": [1, 2', ""]
+)
+def test_iter_json_array_invalid(text):
+    """
+    Tests iter_json_array() raises an error when the text is not an object containing
+    the array
+    """
+    with pytest.raises(ValueError):
+        list(iter_json_array([text], "results"))
@@ -0,0 +1,96 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from apis.utils.sensor_fingerprints import FingerprintStore
+
+
+@pytest.fixture(name="sensor_service")
+def sensor_service_fixture():
+    """
+    Fixture for a sensor service with nothing in the datastore
+    """
+    sensor_service = MagicMock()
+    sensor_service.get_value.return_value = None
+    return sensor_service
+
+
+def test_is_unchanged_unknown_resource(sensor_service):
+    """
+    Test a resource that was never recorded counts as changed
+    """
+    store = FingerprintStore(sensor_service, "test_fingerprints")
+    assert not store.is_unchanged("res1", "src", "tgt")
+    sensor_service.get_value.assert_called_once_with(
+        name="test_fingerprints", local=True
+    )
+
+
+def test_is_unchanged_after_record(sensor_service):
+    """
+    Test a recorded resource is unchanged only while both fingerprints match
+    """
+    store = FingerprintStore(sensor_service, "test_fingerprints")
+    store.record("res1", "src", "tgt", None)
+    assert store.is_unchanged("res1", "src", "tgt")
+    assert not store.is_unchanged("res1", "src", "tgt2")
+    assert not store.is_unchanged("res1", "src2", "tgt")
+
+
+def test_record_returns_true_only_for_new_mismatch(sensor_service):
+    """
+    Test record reports a mismatch once, and again only if it changes
+    """
+    store = FingerprintStore(sensor_service, "test_fingerprints")
+    assert not store.record("res1", "src", "tgt", [])
+    assert store.record("res1", "src", "tgt", [["root['a']", 1, 2]])
+    assert not store.record("res1", "src2", "tgt2", [["root['a']", 1, 2]])
+    assert store.record("res1", "src2", "tgt2", [["root['a']", 1, 3]])
+
+
+def test_record_reports_mismatch_again_after_it_is_fixed(sensor_service):
+    """
+    Test a mismatch that was fixed and then reappears is reported again
+    """
+    store = FingerprintStore(sensor_service, "test_fingerprints")
+    assert store.record("res1", "src", "tgt", [["root['a']", 1, 2]])
+    assert not store.record("res1", "src", "src", [])
+    assert store.record("res1", "src", "tgt", [["root['a']", 1, 2]])
+
+
+def test_save_prunes_unseen_resources(sensor_service):
+    """
+    Test save drops resources which weren't seen, then writes to the datastore
+    """
+    store = FingerprintStore(sensor_service, "test_fingerprints")
+    store.record("res1", "src", "tgt", None)
+    store.record("res2", "src", "tgt", None)
+    store.save(["res1"])
+
+    sensor_service.set_value.assert_called_once()
+    kwargs = sensor_service.set_value.call_args.kwargs
+    assert kwargs["name"] == "test_fingerprints"
+    assert kwargs["local"]
+    assert list(json.loads(kwargs["value"])) == ["res1"]
+
+
+def test_load_from_datastore(sensor_service):
+    """
+    Test fingerprints saved in the datastore are loaded once
+    """
+    sensor_service.get_value.return_value = json.dumps(
+        {"res1": {"source": "src", "target": "tgt", "mismatch": None}}
+    )
+    store = FingerprintStore(sensor_service, "test_fingerprints")
+    assert store.is_unchanged("res1", "src", "tgt")
+    assert store.is_unchanged("res1", "src", "tgt")
+    sensor_service.get_value.assert_called_once()
+
+
+def test_load_unreadable_value(sensor_service):
+    """
+    Test an unreadable datastore value is ignored
+    """
+    sensor_service.get_value.return_value = "not json"
+    store = FingerprintStore(sensor_service, "test_fingerprints")
+    assert not store.is_unchanged("res1", "src", "tgt")
@@ -11,7 +11,7 @@ from apis.openstack_api.structs.network_details import NetworkDetails
 from apis.openstack_api.structs.network_rbac import NetworkRbac
 from apis.openstack_api.structs.project_details import ProjectDetails
 from apis.openstack_api.structs.quota_details import QuotaDetails
-from apis.openstack_api.structs.role_details import RoleDetails
+from apis.openstack_api.structs.role_assignment_result import RoleAssignmentResult
 from apis.openstack_api.structs.router_details import RouterDetails
 from workflows.create_project import (
     create_project,
@@ -28,9 +28,9 @@ from workflows.create_project import (
 @patch("workflows.create_project.setup_external_networking")
 @patch("workflows.create_project.create_http_security_group")
 @patch("workflows.create_project.create_https_security_group")
-@patch("workflows.create_project.assign_role_to_user")
+@patch("workflows.create_project.assign_role_to_users")
 def test_create_project_external(
-    mock_assign_role_to_user,
+    mock_assign_role_to_users,
     mock_create_https_security_group,
     mock_create_http_security_group,
     mock_setup_external_networking,
@@ -118,51 +118,22 @@ def test_create_project_external(
         mock_conn, project_identifier="project-id"
     )
 
-    # Assert that roles were assigned to the admins
-    mock_assign_role_to_user.assert_any_call(
+    # Assert that roles were assigned to the admins and the stfc users in batches
+    mock_assign_role_to_users.assert_any_call(
         mock_conn,
-        RoleDetails(
-            user_identifier="admin1",
-            user_domain=UserDomains.DEFAULT,
-            project_identifier="project-id",
-            role_identifier="admin",
-        ),
+        project_identifier="project-id",
+        role_identifier="admin",
+        user_identifiers=["admin1", "admin2"],
+        user_domain=UserDomains.DEFAULT,
     )
-
-    mock_assign_role_to_user.assert_any_call(
+    mock_assign_role_to_users.assert_any_call(
         mock_conn,
-        RoleDetails(
-            user_identifier="admin2",
-            user_domain=UserDomains.DEFAULT,
-            project_identifier="project-id",
-            role_identifier="admin",
-        ),
+        project_identifier="project-id",
+        role_identifier="user",
+        user_identifiers=["user1", "user2"],
+        user_domain=UserDomains.STFC,
     )
-
-    # Assert that roles were assigned to the stfc users
-    mock_assign_role_to_user.assert_any_call(
-        mock_conn,
-        RoleDetails(
-            user_identifier="user1",
-            user_domain=UserDomains.STFC,
-            project_identifier="project-id",
-            role_identifier="user",
-        ),
-    )
-
-    mock_assign_role_to_user.assert_any_call(
-        mock_conn,
-        RoleDetails(
-            user_identifier="user2",
-            user_domain=UserDomains.STFC,
-            project_identifier="project-id",
-            role_identifier="user",
-        ),
-    )
-
-    # Verify assign_role_to_user was called four times
-    # (two for admin, two for stfc users)
-    assert mock_assign_role_to_user.call_count == 4
+    assert mock_assign_role_to_users.call_count == 2
 
 
 @patch("workflows.create_project.create_openstack_project")
@@ -171,9 +142,9 @@ def test_create_project_external(
 @patch("workflows.create_project.setup_internal_networking")
 @patch("workflows.create_project.create_http_security_group")
 @patch("workflows.create_project.create_https_security_group")
-@patch("workflows.create_project.assign_role_to_user")
+@patch("workflows.create_project.assign_role_to_users")
 def test_create_project_internal(
-    mock_assign_role_to_user,
+    mock_assign_role_to_users,
     mock_create_https_security_group,
     mock_create_http_security_group,
     mock_setup_internal_networking,
@@ -256,51 +227,22 @@ def test_create_project_internal(
         mock_conn, project_identifier="project-id"
     )
 
-    # Assert that roles were assigned to the admins
-    mock_assign_role_to_user.assert_any_call(
-        mock_conn,
-        RoleDetails(
-            user_identifier="admin1",
-            user_domain=UserDomains.DEFAULT,
-            project_identifier="project-id",
-            role_identifier="admin",
-        ),
-    )
-
-    mock_assign_role_to_user.assert_any_call(
+    # Assert that roles were assigned to the admins and the stfc users in batches
+    mock_assign_role_to_users.assert_any_call(
         mock_conn,
-        RoleDetails(
-            user_identifier="admin2",
-            user_domain=UserDomains.DEFAULT,
-            project_identifier="project-id",
-            role_identifier="admin",
-        ),
+        project_identifier="project-id",
+        role_identifier="admin",
+        user_identifiers=["admin1", "admin2"],
+        user_domain=UserDomains.DEFAULT,
     )
-
-    # Assert that roles were assigned to the stfc users
-    mock_assign_role_to_user.assert_any_call(
+    mock_assign_role_to_users.assert_any_call(
         mock_conn,
-        RoleDetails(
-            user_identifier="user1",
-            user_domain=UserDomains.STFC,
-            project_identifier="project-id",
-            role_identifier="user",
-        ),
+        project_identifier="project-id",
+        role_identifier="user",
+        user_identifiers=["user1", "user2"],
+        user_domain=UserDomains.STFC,
     )
-
-    mock_assign_role_to_user.assert_any_call(
-        mock_conn,
-        RoleDetails(
-            user_identifier="user2",
-            user_domain=UserDomains.STFC,
-            project_identifier="project-id",
-            role_identifier="user",
-        ),
-    )
-
-    # Verify assign_role_to_user was called four times
-    # (two for admin, two for stfc users)
-    assert mock_assign_role_to_user.call_count == 4
+    assert mock_assign_role_to_users.call_count == 2
 
 
 @patch("workflows.create_project.create_openstack_project")
@@ -309,9 +251,9 @@ def test_create_project_internal(
 @patch("workflows.create_project.setup_external_networking")
 @patch("workflows.create_project.create_http_security_group")
 @patch("workflows.create_project.create_https_security_group")
-@patch("workflows.create_project.assign_role_to_user")
+@patch("workflows.create_project.assign_role_to_users")
 def test_create_project_jasmin(
-    mock_assign_role_to_user,
+    mock_assign_role_to_users,
     mock_create_https_security_group,
     mock_create_http_security_group,
     mock_setup_external_networking,
@@ -399,51 +341,22 @@ def test_create_project_jasmin(
         mock_conn, project_identifier="project-id"
     )
 
-    # Assert that roles were assigned to the admins
-    mock_assign_role_to_user.assert_any_call(
-        mock_conn,
-        RoleDetails(
-            user_identifier="admin1",
-            user_domain=UserDomains.DEFAULT,
-            project_identifier="project-id",
-            role_identifier="admin",
-        ),
-    )
-
-    mock_assign_role_to_user.assert_any_call(
+    # Assert that roles were assigned to the admins and the jasmin users in batches
+    mock_assign_role_to_users.assert_any_call(
         mock_conn,
-        RoleDetails(
-            user_identifier="admin2",
-            user_domain=UserDomains.DEFAULT,
-            project_identifier="project-id",
-            role_identifier="admin",
-        ),
+        project_identifier="project-id",
+        role_identifier="admin",
+        user_identifiers=["admin1", "admin2"],
+        user_domain=UserDomains.DEFAULT,
     )
-
-    # Assert that roles were assigned to the stfc users
-    mock_assign_role_to_user.assert_any_call(
+    mock_assign_role_to_users.assert_any_call(
         mock_conn,
-        RoleDetails(
-            user_identifier="user1",
-            user_domain=UserDomains.JASMIN,
-            project_identifier="project-id",
-            role_identifier="user",
-        ),
+        project_identifier="project-id",
+        role_identifier="user",
+        user_identifiers=["user1", "user2"],
+        user_domain=UserDomains.JASMIN,
     )
-
-    mock_assign_role_to_user.assert_any_call(
-        mock_conn,
-        RoleDetails(
-            user_identifier="user2",
-            user_domain=UserDomains.JASMIN,
-            project_identifier="project-id",
-            role_identifier="user",
-        ),
-    )
-
-    # Verify assign_role_to_user was called four times
-    # (two for admin, two for stfc users)
-    assert mock_assign_role_to_user.call_count == 4
+    assert mock_assign_role_to_users.call_count == 2
 
 
 @patch("workflows.create_project.create_openstack_project")
@@ -452,9 +365,9 @@ def test_create_project_jasmin(
 @patch("workflows.create_project.setup_external_networking")
 @patch("workflows.create_project.create_http_security_group")
 @patch("workflows.create_project.create_https_security_group")
-@patch("workflows.create_project.assign_role_to_user")
+@patch("workflows.create_project.assign_role_to_users")
 def test_create_project_jasmin_no_users(
-    mock_assign_role_to_user,
+    mock_assign_role_to_users,
     mock_create_https_security_group,
     mock_create_http_security_group,
     mock_setup_external_networking,
@@ -542,8 +455,61 @@ def test_create_project_jasmin_no_users(
         mock_conn, project_identifier="project-id"
     )
 
-    # Verify assign_role_to_user was called 0 times
-    assert mock_assign_role_to_user.call_count == 0
+    # Verify no roles were assigned
+    for role_call in mock_assign_role_to_users.call_args_list:
+        assert role_call.kwargs["user_identifiers"] == []
+
+
+@patch("workflows.create_project.create_openstack_project")
+@patch("workflows.create_project.refresh_security_groups")
+@patch("workflows.create_project.set_quota")
+@patch("workflows.create_project.setup_external_networking")
+@patch("workflows.create_project.create_http_security_group")
+@patch("workflows.create_project.create_https_security_group")
+@patch("workflows.create_project.assign_role_to_users")
+def test_create_project_failed_role_assignments(
+    mock_assign_role_to_users,
+    _,
+    __,
+    ___,
+    ____,
+    _____,
+    mock_create_openstack_project,
+):
+    """
+    Test every user is tried before an error listing the users that couldn't be added is raised
+    """
+    mock_project = MagicMock()
+    mock_project.__getitem__.side_effect = lambda key: {"id": "project-id"}[key]
+    mock_create_openstack_project.return_value = mock_project
+    mock_assign_role_to_users.side_effect = [
+        [RoleAssignmentResult(user_identifier="admin1", error="admin1 not found")],
+        [
+            RoleAssignmentResult(user_identifier="user1", assigned=True),
+            RoleAssignmentResult(user_identifier="user2", error="forbidden"),
+        ],
+    ]
+
+    with pytest.raises(RuntimeError) as err:
+        create_project(
+            MagicMock(),
+            "Test Project",
+            "test@example.com",
+            "Test Description",
+            "stfc",
+            "External",
+            1,
+            200,
+            False,
+            None,
+            ["admin1"],
+            ["user1", "user2"],
+        )
+
+    assert mock_assign_role_to_users.call_count == 2
+    assert "admin1 (admin): admin1 not found" in str(err.value)
+    assert "user2 (user): forbidden" in str(err.value)
+    assert "user1" not in str(err.value)
 
 
 @patch("workflows.create_project.create_network")
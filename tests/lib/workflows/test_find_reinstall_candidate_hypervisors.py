@@ -6,10 +6,10 @@ from workflows.find_reinstall_candidate_hypervisors import (
 )
 
 
-@patch("workflows.find_reinstall_candidate_hypervisors.ServerQuery")
+@patch("workflows.find_reinstall_candidate_hypervisors.get_cloud_snapshot")
 @patch("workflows.find_reinstall_candidate_hypervisors.HypervisorQuery")
 def test_find_reinstall_candidate_hypervisors(
-    mock_hypervisor_query_class, mock_server_query_class
+    mock_hypervisor_query_class, mock_get_cloud_snapshot
 ):
     """Test find_reinstall_candidate_hypervisors using only required strings"""
     mock_hypervisor_query = MagicMock()
@@ -17,8 +17,8 @@ def test_find_reinstall_candidate_hypervisors(
 
     mock_hypervisor_query.to_string.return_value = "mock_string"
 
-    mock_server_query = MagicMock()
-    mock_server_query_class.return_value = mock_server_query
+    mock_snapshot = MagicMock()
+    mock_get_cloud_snapshot.return_value = mock_snapshot
 
     params = {
         "cloud_account": "test_cloud",
@@ -51,26 +51,28 @@ def test_find_reinstall_candidate_hypervisors(
         prop="ip",
         value=r"^172\.16\.(?:\d{1,3})\.(?:\d{1,3})$",
     )
-    mock_hypervisor_query.run.assert_called_once_with("test_cloud")
+    mock_hypervisor_query.run.assert_called_once_with(
+        "test_cloud", from_subset=mock_snapshot.hypervisor_objects
+    )
     mock_hypervisor_query.where(preset="EQUAL_TO", prop="state", value="up")
     mock_hypervisor_query.where(preset="EQUAL_TO", prop="status", value="enabled")
 
 
-@patch("workflows.find_reinstall_candidate_hypervisors.ServerQuery")
+@patch("workflows.find_reinstall_candidate_hypervisors.get_cloud_snapshot")
 @patch("workflows.find_reinstall_candidate_hypervisors.HypervisorQuery")
 @pytest.mark.parametrize(
     "output_type",
     ["to_html", "to_string", "to_objects", "to_props", "to_csv", "to_json"],
 )
 def test_find_reinstall_candidate_hypervisors_with_params(
-    mock_hypervisor_query_class, mock_server_query_class, output_type
+    mock_hypervisor_query_class, mock_get_cloud_snapshot, output_type
 ):
     """Test find_reinstall_candidate_hypervisors with all parameters"""
     mock_hypervisor_query = MagicMock()
-    mock_server_query = MagicMock()
+    mock_snapshot = MagicMock()
 
     mock_hypervisor_query_class.return_value = mock_hypervisor_query
-    mock_server_query_class.return_value = mock_server_query
+    mock_get_cloud_snapshot.return_value = mock_snapshot
 
     params = {
         "cloud_account": "test_cloud",
@@ -107,7 +109,9 @@ def test_find_reinstall_candidate_hypervisors_with_params(
         not in mock_hypervisor_query.where.call_args_list
     )
     mock_hypervisor_query.sort_by.assert_called_once_with(("vcpus_used", "asc"))
-    mock_hypervisor_query.run.assert_called_once_with("test_cloud")
+    mock_hypervisor_query.run.assert_called_once_with(
+        "test_cloud", from_subset=mock_snapshot.hypervisor_objects
+    )
 
     assert (
         result
@@ -133,15 +137,11 @@ def test_find_reinstall_candidate_hypervisors_with_params(
         (["small", "medium"], ["large"], ["hv1"]),
     ],
 )
-@patch("workflows.find_reinstall_candidate_hypervisors.OpenstackConnection")
-@patch("workflows.find_reinstall_candidate_hypervisors.get_available_flavors")
-@patch("workflows.find_reinstall_candidate_hypervisors.ServerQuery")
+@patch("workflows.find_reinstall_candidate_hypervisors.get_cloud_snapshot")
 @patch("workflows.find_reinstall_candidate_hypervisors.HypervisorQuery")
 def test_include_and_exclude_flavours_combined(
     mock_hypervisor_query_class,
-    mock_server_query_class,
-    mock_get_flavors,
-    mock_openstack_connection,
+    mock_get_cloud_snapshot,
     include_flavours,
     exclude_flavours,
     expected_allowed,
@@ -154,8 +154,8 @@ def test_include_and_exclude_flavours_combined(
         "hypervisor_name": ["hv1", "hv2", "hv3", "hv4"]
     }
 
-    mock_server_query = MagicMock()
-    mock_server_query_class.return_value = mock_server_query
+    mock_snapshot = MagicMock()
+    mock_get_cloud_snapshot.return_value = mock_snapshot
 
     flavors_per_hv = {
         "hv1": {"small", "medium"},
@@ -164,13 +164,7 @@ def test_include_and_exclude_flavours_combined(
         "hv4": {"small", "large"},
     }
 
-    def side_effect(_, hv_name):
-        return flavors_per_hv.get(hv_name)
-
-    mock_get_flavors.side_effect = side_effect
-
-    mock_conn = MagicMock()
-    mock_openstack_connection.return_value.__enter__.return_value = mock_conn
+    mock_snapshot.flavor_index.flavors_for.side_effect = flavors_per_hv.get
 
     params = {
         "cloud_account": "test_cloud",
@@ -187,11 +181,11 @@ def test_include_and_exclude_flavours_combined(
 
 
 # pylint: disable=protected-access
-@patch("workflows.find_reinstall_candidate_hypervisors.ServerQuery")
+@patch("workflows.find_reinstall_candidate_hypervisors.get_cloud_snapshot")
 @patch("workflows.find_reinstall_candidate_hypervisors.HypervisorQuery")
 def test_running_vms_filter_and_sort(
     mock_hypervisor_query_class,
-    mock_server_query_class,
+    mock_get_cloud_snapshot,
 ):
     """Test the running_vms property,
     and filtering/sorting by it"""
@@ -229,13 +223,13 @@ def test_running_vms_filter_and_sort(
 
     mock_hypervisor_query.run.side_effect = run_side_effect
 
-    mock_server_query = MagicMock()
-    mock_server_query_class.return_value = mock_server_query
-    mock_server_query.to_props.return_value = {
-        "hv1": ["vm1", "vm2"],  # 2 VMs (should remain)
-        "hv2": ["vm1"],  # 1 VM (should remain)
-        "hv3": ["vm1", "vm2", "vm3"],  # 3 VMs (should be filtered out)
-    }
+    mock_snapshot = MagicMock()
+    mock_get_cloud_snapshot.return_value = mock_snapshot
+    mock_snapshot.server_count.side_effect = {
+        "hv1": 2,  # 2 VMs (should remain)
+        "hv2": 1,  # 1 VM (should remain)
+        "hv3": 3,  # 3 VMs (should be filtered out)
+    }.get
 
     mock_hypervisor_query.to_string.return_value = "final_result"
 
@@ -249,6 +243,7 @@ def test_running_vms_filter_and_sort(
 
     result = find_reinstall_candidate_hypervisors(**params)
 
+    mock_get_cloud_snapshot.assert_called_once_with("test_cloud")
     hv_result1.update_forwarded_properties.assert_called_once_with({"running_vms": 2})
     hv_result2.update_forwarded_properties.assert_called_once_with({"running_vms": 1})
     hv_result3.update_forwarded_properties.assert_called_once_with({"running_vms": 3})
@@ -1,6 +1,11 @@
-from unittest.mock import MagicMock, patch
+import threading
+import time
+from collections import defaultdict
+from unittest.mock import MagicMock, call, patch
 import pytest
+from openstack.exceptions import ResourceFailure, ResourceTimeout
 
+from workflows.hv_create_test_server import create_test_server
 from workflows.hv_create_test_server import create_test_server_single_hypervisor
 from workflows.hv_create_test_server import _str_to_list
 
@@ -9,9 +14,9 @@ from workflows.hv_create_test_server import _str_to_list
 @patch("workflows.hv_create_test_server.delete_server")
 @patch("workflows.hv_create_test_server.build_server")
 @patch("workflows.hv_create_test_server.random")
-@patch("workflows.hv_create_test_server.get_available_flavors")
+@patch("workflows.hv_create_test_server.HypervisorFlavorIndex")
 def test_create_single_test_server(
-    mock_get_available_flavors,
+    mock_flavor_index_cls,
     mock_random,
     mock_build_server,
     mock_delete_server,
@@ -23,7 +28,8 @@ def test_create_single_test_server(
     mock_conn = MagicMock()
 
     mock_flavors = ["flavor1", "flavor2", "flavor3"]
-    mock_get_available_flavors.return_value = mock_flavors
+    mock_flavor_index = mock_flavor_index_cls.from_connection.return_value
+    mock_flavor_index.flavors_for.return_value = mock_flavors
 
     mock_random.choice.return_value = "flavor2"
 
@@ -32,13 +38,12 @@ def test_create_single_test_server(
 
     # call the function being tested and verify
     # all dependencies are called with the right arguments
-    create_test_server_single_hypervisor(
+    res = create_test_server_single_hypervisor(
         mock_conn, "hvxyz.nubes.rl.ac.uk", False, delete_error_server
     )
 
-    mock_get_available_flavors.assert_called_once_with(
-        mock_conn, "hvxyz.nubes.rl.ac.uk"
-    )
+    mock_flavor_index_cls.from_connection.assert_called_once_with(mock_conn)
+    mock_flavor_index.flavors_for.assert_called_once_with("hvxyz.nubes.rl.ac.uk")
     mock_build_server.assert_called_once_with(
         mock_conn,
         "stackstorm-test-server",
@@ -49,6 +54,8 @@ def test_create_single_test_server(
         delete_error_server,
     )
     mock_delete_server.assert_called_once_with(mock_conn, mock_server.id)
+    assert list(res) == ["flavor2"]
+    assert res["flavor2"]["success"] is True
 
 
 def test_create_test_server_raises_on_empty_hostname():
@@ -86,25 +93,25 @@ def test_create_test_server_single_hypervisor_raises_on_colon_in_hostname():
 
 @patch("workflows.hv_create_test_server.delete_server")
 @patch("workflows.hv_create_test_server.build_server")
-@patch("workflows.hv_create_test_server.get_available_flavors")
+@patch("workflows.hv_create_test_server.HypervisorFlavorIndex")
 def test_create_test_server_all_flavors(
-    mock_get_available_flavors, mock_build_server, mock_delete_server
+    mock_flavor_index_cls, mock_build_server, mock_delete_server
 ):
     """
     Test build all possible flavors on a hypervisor
     """
     mock_conn = MagicMock()
     mock_flavors = ["flavor1", "flavor2", "flavor3"]
-    mock_get_available_flavors.return_value = mock_flavors
+    mock_flavor_index = mock_flavor_index_cls.from_connection.return_value
+    mock_flavor_index.flavors_for.return_value = mock_flavors
 
     mock_server = MagicMock()
     mock_build_server.return_value = mock_server
 
     create_test_server_single_hypervisor(mock_conn, "hvxyz.nubes.rl.ac.uk", True, True)
 
-    mock_get_available_flavors.assert_called_once_with(
-        mock_conn, "hvxyz.nubes.rl.ac.uk"
-    )
+    mock_flavor_index_cls.from_connection.assert_called_once_with(mock_conn)
+    mock_flavor_index.flavors_for.assert_called_once_with("hvxyz.nubes.rl.ac.uk")
 
     for flavor in mock_flavors:
         mock_build_server.assert_any_call(
@@ -119,6 +126,193 @@ def test_create_test_server_all_flavors(
         mock_delete_server.assert_any_call(mock_conn, mock_server.id)
 
 
+@patch("workflows.hv_create_test_server.delete_server")
+@patch("workflows.hv_create_test_server.build_server")
+@patch("workflows.hv_create_test_server.HypervisorFlavorIndex")
+def test_create_single_test_server_given_flavor_index(
+    mock_flavor_index_cls, mock_build_server, mock_delete_server
+):
+    """
+    Test a given flavor index is used instead of listing flavors again
+    """
+    mock_conn = MagicMock()
+    mock_flavor_index = MagicMock()
+    mock_flavor_index.flavors_for.return_value = ["flavor1"]
+
+    create_test_server_single_hypervisor(
+        mock_conn, "hvxyz.nubes.rl.ac.uk", True, True, mock_flavor_index
+    )
+
+    mock_flavor_index_cls.from_connection.assert_not_called()
+    mock_flavor_index.flavors_for.assert_called_once_with("hvxyz.nubes.rl.ac.uk")
+    mock_build_server.assert_called_once()
+    mock_delete_server.assert_called_once()
+
+
+@patch("workflows.hv_create_test_server.delete_server")
+@patch("workflows.hv_create_test_server.build_server")
+@patch("workflows.hv_create_test_server.HypervisorFlavorIndex")
+def test_create_test_server_result_matrix(
+    mock_flavor_index_cls, mock_build_server, mock_delete_server
+):
+    """
+    Test the flavor index is built once, and results are returned for each hypervisor and flavor
+    """
+    mock_conn = MagicMock()
+    mock_flavor_index = mock_flavor_index_cls.from_connection.return_value
+    mock_flavor_index.flavors_for.side_effect = {
+        "hv1": ["flavor1", "flavor2"],
+        "hv2": ["flavor1"],
+    }.get
+
+    res = create_test_server(mock_conn, "hv1,hv2", True, True)
+
+    mock_flavor_index_cls.from_connection.assert_called_once_with(mock_conn)
+    mock_flavor_index.flavors_for.assert_has_calls([call("hv1"), call("hv2")])
+    assert mock_build_server.call_count == 3
+    assert mock_delete_server.call_count == 3
+    assert {hv: sorted(flavors) for hv, flavors in res.items()} == {
+        "hv1": ["flavor1", "flavor2"],
+        "hv2": ["flavor1"],
+    }
+    result = res["hv1"]["flavor2"]
+    assert result["hypervisor_name"] == "hv1"
+    assert result["flavor_name"] == "flavor2"
+    assert result["success"] is True
+    assert result["build_seconds"] >= 0
+    assert result["delete_seconds"] >= 0
+    assert result["error"] is None
+
+
+@pytest.mark.parametrize("raise_on_failure", [True, False])
+@patch("workflows.hv_create_test_server.delete_server")
+@patch("workflows.hv_create_test_server.build_server")
+@patch("workflows.hv_create_test_server.HypervisorFlavorIndex")
+def test_create_test_server_failures(
+    mock_flavor_index_cls, mock_build_server, mock_delete_server, raise_on_failure
+):
+    """
+    Test a failed build doesn't stop other builds, and is raised once all builds finish
+    """
+    mock_conn = MagicMock()
+    mock_flavor_index = mock_flavor_index_cls.from_connection.return_value
+    mock_flavor_index.flavors_for.return_value = ["flavor1", "flavor2"]
+
+    def build_server(_conn, _name, flavor, *_args):
+        if flavor == "flavor1":
+            raise ResourceFailure("No valid host was found")
+        return MagicMock()
+
+    mock_build_server.side_effect = build_server
+
+    if raise_on_failure:
+        with pytest.raises(RuntimeError, match="No valid host was found"):
+            create_test_server(mock_conn, "hv1", True, True)
+    else:
+        res = create_test_server(mock_conn, "hv1", True, True, raise_on_failure=False)
+        assert res["hv1"]["flavor1"]["success"] is False
+        assert "No valid host was found" in res["hv1"]["flavor1"]["error"]
+        assert res["hv1"]["flavor1"]["delete_seconds"] is None
+        assert res["hv1"]["flavor2"]["success"] is True
+
+    assert mock_build_server.call_count == 2
+    mock_delete_server.assert_called_once()
+
+
+@patch("workflows.hv_create_test_server.delete_server")
+@patch("workflows.hv_create_test_server.build_server")
+@patch("workflows.hv_create_test_server.HypervisorFlavorIndex")
+def test_create_test_server_delete_failure(
+    mock_flavor_index_cls, mock_build_server, mock_delete_server
+):
+    """
+    Test a server which was built but couldn't be deleted is reported as failed
+    """
+    mock_flavor_index_cls.from_connection.return_value.flavors_for.return_value = [
+        "flavor1"
+    ]
+    mock_delete_server.side_effect = ResourceTimeout("Timed out")
+
+    res = create_test_server(MagicMock(), "hv1", True, True, raise_on_failure=False)
+
+    assert res["hv1"]["flavor1"]["success"] is False
+    assert (
+        res["hv1"]["flavor1"]["error"]
+        == f"Failed to delete server {mock_build_server.return_value.id}: Timed out"
+    )
+
+
+@patch("workflows.hv_create_test_server.delete_server")
+@patch("workflows.hv_create_test_server.build_server")
+@patch("workflows.hv_create_test_server.HypervisorFlavorIndex")
+def test_create_test_server_concurrency_limits(
+    mock_flavor_index_cls, mock_build_server, mock_delete_server
+):
+    """
+    Test builds run concurrently without exceeding the global or per hypervisor limits
+    """
+    mock_flavor_index_cls.from_connection.return_value.flavors_for.return_value = [
+        f"flavor{i}" for i in range(4)
+    ]
+    lock = threading.Lock()
+    running = defaultdict(int)
+    max_running = defaultdict(int)
+
+    def build_server(_conn, _name, _flavor, _image, _network, hv_name, _delete):
+        with lock:
+            running[hv_name] += 1
+            running["total"] += 1
+            for key in (hv_name, "total"):
+                max_running[key] = max(max_running[key], running[key])
+        time.sleep(0.05)
+        with lock:
+            running[hv_name] -= 1
+            running["total"] -= 1
+        return MagicMock()
+
+    mock_build_server.side_effect = build_server
+
+    res = create_test_server(
+        MagicMock(),
+        "hv1,hv2,hv3",
+        True,
+        True,
+        max_concurrent_builds=4,
+        max_builds_per_hypervisor=2,
+    )
+
+    assert mock_build_server.call_count == 12
+    assert mock_delete_server.call_count == 12
+    assert all(len(flavors) == 4 for flavors in res.values())
+    assert max_running["total"] == 4
+    assert all(max_running[hv] <= 2 for hv in ("hv1", "hv2", "hv3"))
+
+
+@patch("workflows.hv_create_test_server.HypervisorFlavorIndex")
+def test_create_test_server_no_flavors(mock_flavor_index_cls):
+    """
+    Test an error is raised when a hypervisor has no flavors to test
+    """
+    mock_flavor_index_cls.from_connection.return_value.flavors_for.return_value = []
+    with pytest.raises(ValueError):
+        create_test_server(MagicMock(), "hv1", False, True)
+
+
+@pytest.mark.parametrize("max_concurrent_builds", [0, -1])
+@patch("workflows.hv_create_test_server.HypervisorFlavorIndex")
+def test_create_test_server_invalid_limit(mock_flavor_index_cls, max_concurrent_builds):
+    """
+    Test an error is raised when the concurrency limit is less than 1
+    """
+    mock_flavor_index_cls.from_connection.return_value.flavors_for.return_value = [
+        "flavor1"
+    ]
+    with pytest.raises(ValueError):
+        create_test_server(
+            MagicMock(), "hv1", False, True, max_concurrent_builds=max_concurrent_builds
+        )
+
+
 def test_single_hypervisor_name():
     """Test that a single hypervisor name returns a list with one element"""
     result = _str_to_list("hypervisor1")
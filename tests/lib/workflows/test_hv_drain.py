@@ -0,0 +1,107 @@
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+
+from apis.openstack_api.structs.migration_result import MigrationResult
+from workflows.hv_drain import drain_hypervisors
+
+
+@patch("workflows.hv_drain.DrainEngine")
+@patch("workflows.hv_drain.disable_service")
+def test_drain_hypervisors(mock_disable_service, mock_drain_engine):
+    """
+    Test hypervisors are disabled before their servers are migrated
+    """
+    mock_conn = MagicMock()
+    mock_drain_engine.return_value.drain.return_value = [
+        MigrationResult(
+            server_id="id1",
+            server_name="server1",
+            source_host="hv1",
+            dest_host="hv3",
+            success=True,
+            seconds=60.0,
+        )
+    ]
+
+    res = drain_hypervisors(
+        mock_conn,
+        [" hv1", "hv2 ", ""],
+        "Stackstorm: draining",
+        live_migration=False,
+        max_migrations=5,
+        max_migrations_per_source=2,
+        max_migrations_per_destination=3,
+        cpu_allocation_ratio=4.0,
+        checkpoint_path="/tmp/drain.json",
+    )
+
+    mock_disable_service.assert_has_calls(
+        [
+            call(
+                conn=mock_conn,
+                hypervisor_name=hv_name,
+                service_binary="nova-compute",
+                disabled_reason="Stackstorm: draining",
+            )
+            for hv_name in ["hv1", "hv2"]
+        ]
+    )
+    mock_drain_engine.assert_called_once_with(
+        mock_conn,
+        max_migrations=5,
+        max_per_source=2,
+        max_per_destination=3,
+        cpu_allocation_ratio=4.0,
+        live_migration=False,
+        checkpoint_path="/tmp/drain.json",
+    )
+    mock_drain_engine.return_value.drain.assert_called_once_with(["hv1", "hv2"])
+    assert res == [
+        {
+            "server_id": "id1",
+            "server_name": "server1",
+            "source_host": "hv1",
+            "dest_host": "hv3",
+            "success": True,
+            "seconds": 60.0,
+            "error": None,
+        }
+    ]
+
+
+@pytest.mark.parametrize("raise_on_failure", [True, False])
+@patch("workflows.hv_drain.DrainEngine")
+@patch("workflows.hv_drain.disable_service")
+def test_drain_hypervisors_failure(
+    _mock_disable_service, mock_drain_engine, raise_on_failure
+):
+    """
+    Test servers which could not be migrated are raised, unless raise_on_failure is False
+    """
+    mock_drain_engine.return_value.drain.return_value = [
+        MigrationResult(
+            server_id="id1",
+            server_name="server1",
+            source_host="hv1",
+            error="No destination hypervisor has capacity for this server",
+        )
+    ]
+    if raise_on_failure:
+        with pytest.raises(RuntimeError, match="id1: No destination hypervisor"):
+            drain_hypervisors(MagicMock(), ["hv1"], "Stackstorm: draining")
+    else:
+        res = drain_hypervisors(
+            MagicMock(), ["hv1"], "Stackstorm: draining", raise_on_failure=False
+        )
+        assert res[0]["success"] is False
+
+
+@patch("workflows.hv_drain.disable_service")
+def test_drain_hypervisors_no_hypervisors(mock_disable_service):
+    """
+    Test an error is raised when no hypervisors are given
+    """
+    with pytest.raises(ValueError):
+        drain_hypervisors(MagicMock(), [" "], "Stackstorm: draining")
+    mock_disable_service.assert_not_called()
@@ -1,11 +1,12 @@
 import datetime
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock, patch
 from paramiko import SSHException
 
 from apis.icinga_api.enums.icinga_objects import IcingaObject
 from apis.alertmanager_api.structs.alert_matcher_details import AlertMatcherDetails
 from apis.alertmanager_api.structs.silence_details import SilenceDetails
 from apis.icinga_api.structs.downtime_details import DowntimeDetails
+from apis.ssh_api.structs.command_result import CommandResult
 from apis.ssh_api.structs.ssh_connection_details import SSHDetails
 from workflows.hv_patch_and_reboot import patch_and_reboot
 import pytest
@@ -13,13 +14,13 @@ import pytest
 
 # pylint:disable=too-many-locals
 @pytest.mark.freeze_time
-@patch("workflows.hv_patch_and_reboot.schedule_silence")
+@patch("workflows.hv_patch_and_reboot.get_alertmanager_client")
 @patch("workflows.hv_patch_and_reboot.schedule_downtime")
 @patch("workflows.hv_patch_and_reboot.SSHConnection")
 def test_successful_patch_and_reboot(
     mock_ssh_conn,
     mock_schedule_downtime,
-    mock_schedule_silence,
+    mock_get_alertmanager_client,
 ):
     """
     Test successful running of patch and reboot workflow
@@ -32,10 +33,14 @@ def test_successful_patch_and_reboot(
     mock_end_time = mock_start_time + datetime.timedelta(hours=6)
     mock_start_timestamp = int(mock_start_time.timestamp())
     mock_end_timestamp = int(mock_end_time.timestamp())
-    mock_silence_id = "mock ID"
-    mock_schedule_silence.return_value = mock_silence_id
+    mock_client = mock_get_alertmanager_client.return_value
+    mock_client.schedule_silences.return_value = ["mock ID1", "mock ID2"]
     alertmanager_account = MagicMock()
-    patch_and_reboot(
+    mock_ssh_conn.return_value.run_command_on_host.side_effect = [
+        CommandResult(host=mock_hypervisor_name, command="patch", exit_code=0),
+        CommandResult(host=mock_hypervisor_name, command="reboot", exit_code=0),
+    ]
+    res = patch_and_reboot(
         alertmanager_account,
         icinga_account,
         hypervisor_name=mock_hypervisor_name,
@@ -67,11 +72,9 @@ def test_successful_patch_and_reboot(
         author="stackstorm",
         comment="Stackstorm: HV Patching",
     )
-    mock_schedule_silence.assert_has_calls(
-        [
-            call(alertmanager_account, mock_silence_details_instance),
-            call(alertmanager_account, mock_silence_details_hostname),
-        ]
+    mock_get_alertmanager_client.assert_called_once_with(alertmanager_account)
+    mock_client.schedule_silences.assert_called_once_with(
+        [mock_silence_details_instance, mock_silence_details_hostname]
     )
     mock_ssh_conn.assert_called_once_with(
         SSHDetails(
@@ -82,9 +85,12 @@ def test_successful_patch_and_reboot(
     )
     mock_ssh_conn.return_value.run_command_on_host.assert_any_call("patch")
     mock_ssh_conn.return_value.run_command_on_host.assert_any_call("reboot")
+    mock_ssh_conn.return_value.close.assert_called_once()
+    assert res["patch"]["command"] == "patch"
+    assert res["reboot"]["exit_code"] == 0
 
 
-@patch("workflows.hv_patch_and_reboot.schedule_silence")
+@patch("workflows.hv_patch_and_reboot.get_alertmanager_client")
 @patch("workflows.hv_patch_and_reboot.schedule_downtime")
 @patch("workflows.hv_patch_and_reboot.SSHConnection")
 @patch("workflows.hv_patch_and_reboot.remove_downtime")
@@ -92,7 +98,7 @@ def test_failed_schedule_downtime(
     mock_remove_downtime,
     mock_ssh_conn,
     mock_schedule_downtime,
-    mock_schedule_silence,
+    mock_get_alertmanager_client,
 ):
     """
     Test unsuccessful running of patch and reboot workflow - where the schedule
@@ -120,15 +126,14 @@ def test_failed_schedule_downtime(
             private_key_path=mock_private_key_path,
         )
     )
-    mock_schedule_silence.assert_not_called()
+    mock_get_alertmanager_client.return_value.schedule_silences.assert_not_called()
 
     mock_ssh_conn.return_value.run_command_on_host.assert_not_called()
     mock_remove_downtime.assert_not_called()
 
 
 @pytest.mark.freeze_time
-@patch("workflows.hv_patch_and_reboot.schedule_silence")
-@patch("workflows.hv_patch_and_reboot.remove_silence")
+@patch("workflows.hv_patch_and_reboot.get_alertmanager_client")
 @patch("workflows.hv_patch_and_reboot.remove_downtime")
 @patch("workflows.hv_patch_and_reboot.schedule_downtime")
 @patch("workflows.hv_patch_and_reboot.SSHConnection")
@@ -136,8 +141,7 @@ def test_failed_ssh(
     mock_ssh_conn,
     mock_schedule_downtime,
     mock_remove_downtime,
-    mock_remove_silence,
-    mock_schedule_silence,
+    mock_get_alertmanager_client,
 ):
     """
     Test unsuccessful running of patch and reboot workflow - where either ssh command
@@ -147,8 +151,9 @@ def test_failed_ssh(
     mock_hypervisor_name = "test_host"
     mock_private_key_path = "/home/stackstorm/.ssh/id_rsa"
     mock_ssh_conn.return_value.run_command_on_host.side_effect = SSHException
-    mock_silence_id = "mock_silence_id"
-    mock_schedule_silence.return_value = mock_silence_id
+    mock_silence_ids = ["mock_silence_id1", "mock_silence_id2"]
+    mock_client = mock_get_alertmanager_client.return_value
+    mock_client.schedule_silences.return_value = mock_silence_ids
     alertmanager_account = MagicMock()
 
     with pytest.raises(Exception):
@@ -196,11 +201,9 @@ def test_failed_ssh(
         author="stackstorm",
         comment="Stackstorm: HV Patching",
     )
-    mock_schedule_silence.assert_has_calls(
-        [
-            call(alertmanager_account, mock_silence_details_instance),
-            call(alertmanager_account, mock_silence_details_hostname),
-        ]
+    mock_get_alertmanager_client.assert_called_once_with(alertmanager_account)
+    mock_client.schedule_silences.assert_called_once_with(
+        [mock_silence_details_instance, mock_silence_details_hostname]
     )
 
     mock_remove_downtime.assert_called_once_with(
@@ -208,9 +211,4 @@ def test_failed_ssh(
         object_type=IcingaObject.HOST,
         object_name=mock_hypervisor_name,
     )
-    mock_remove_silence.assert_has_calls(
-        [
-            call(alertmanager_account, mock_silence_id),
-            call(alertmanager_account, mock_silence_id),
-        ]
-    )
+    mock_client.remove_silences.assert_called_once_with(mock_silence_ids)
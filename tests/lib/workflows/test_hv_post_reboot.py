@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock, patch
 import pytest
 
 from apis.icinga_api.enums.icinga_objects import IcingaObject
@@ -6,8 +6,7 @@ from apis.icinga_api.enums.icinga_objects import IcingaObject
 from workflows.hv_post_reboot import post_reboot
 
 
-@patch("workflows.hv_post_reboot.remove_silence")
-@patch("workflows.hv_post_reboot.get_hv_silences")
+@patch("workflows.hv_post_reboot.get_alertmanager_client")
 @patch("workflows.hv_post_reboot.enable_service")
 @patch("workflows.hv_post_reboot.create_test_server")
 @patch("workflows.hv_post_reboot.downtime.remove_downtime")
@@ -15,8 +14,7 @@ def test_successful_post_reboot(
     mock_remove_downtime,
     mock_create_test_server,
     mock_enable_service,
-    mock_get_hv_silences,
-    mock_remove_silence,
+    mock_get_alertmanager_client,
 ):
     """
     Test successfull running of the post reboot workflow.
@@ -25,11 +23,6 @@ def test_successful_post_reboot(
     mock_hv_name = "hvxyz"
     mock_conn = MagicMock()
     alertmanager_account = MagicMock()
-    mock_silences = {
-        "id1": {"state": "active", "details": "details"},
-        "id2": {"state": "active", "details": "details"},
-    }
-    mock_get_hv_silences.return_value = mock_silences
 
     post_reboot(
         alertmanager_account,
@@ -51,15 +44,13 @@ def test_successful_post_reboot(
     mock_enable_service.assert_called_once_with(
         conn=mock_conn, hypervisor_name=mock_hv_name, service_binary="nova-compute"
     )
-    mock_get_hv_silences.assert_called_once_with(alertmanager_account, mock_hv_name)
-    mock_remove_silence.assert_has_calls(
-        [call(alertmanager_account, "id1"), call(alertmanager_account, "id2")],
-        any_order=True,
+    mock_get_alertmanager_client.assert_called_once_with(alertmanager_account)
+    mock_get_alertmanager_client.return_value.remove_hv_silences.assert_called_once_with(
+        [mock_hv_name]
     )
 
 
-@patch("workflows.hv_post_reboot.remove_silence")
-@patch("workflows.hv_post_reboot.get_hv_silences")
+@patch("workflows.hv_post_reboot.get_alertmanager_client")
 @patch("workflows.hv_post_reboot.enable_service")
 @patch("workflows.hv_post_reboot.create_test_server")
 @patch("workflows.hv_post_reboot.downtime.remove_downtime")
@@ -67,8 +58,7 @@ def test_failed_post_reboot(
     mock_remove_downtime,
     mock_create_test_server,
     mock_enable_service,
-    mock_get_hv_silences,
-    mock_remove_silence,
+    mock_get_alertmanager_client,
 ):
     """
     Test unsuccessful running of the post reboot workflow, where create_test_server fails
@@ -77,11 +67,6 @@ def test_failed_post_reboot(
     mock_hv_name = "hvxyz"
     mock_conn = MagicMock()
     alertmanager_account = MagicMock()
-    mock_silences = {
-        "id1": {"state": "active", "details": "details"},
-        "id2": {"state": "active", "details": "details"},
-    }
-    mock_get_hv_silences.return_value = mock_silences
     mock_create_test_server.side_effect = Exception
 
     with pytest.raises(Exception):
@@ -105,5 +90,4 @@ def test_failed_post_reboot(
         test_all_flavors=False,
         delete_on_failure=True,
     )
-    mock_get_hv_silences.assert_not_called()
-    mock_remove_silence.assert_not_called()
+    mock_get_alertmanager_client.return_value.remove_hv_silences.assert_not_called()
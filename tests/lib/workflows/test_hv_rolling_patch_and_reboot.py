@@ -0,0 +1,333 @@
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+from paramiko import SSHException
+
+from apis.icinga_api.enums.icinga_objects import IcingaObject
+from apis.ssh_api.structs.command_result import CommandResult
+from apis.ssh_api.structs.ssh_connection_details import SSHDetails
+from workflows.hv_rolling_patch_and_reboot import (
+    BOOT_ID_COMMAND,
+    _wait_until_ready,
+    get_hostgroup_members,
+    rolling_patch_and_reboot,
+)
+
+
+@pytest.fixture(name="mock_sleep", autouse=True)
+def mock_sleep_fixture():
+    """
+    Patches sleeping between checks that a hypervisor is back from rebooting
+    """
+    with patch("workflows.hv_rolling_patch_and_reboot.time.sleep") as mock_sleep:
+        yield mock_sleep
+
+
+@pytest.fixture(name="mock_clients")
+def mock_clients_fixture():
+    """
+    Patches the Icinga and Alertmanager clients, returning them. Each silence scheduled is
+    given an ID of the hypervisor it silences and its matcher name
+    """
+    with patch(
+        "workflows.hv_rolling_patch_and_reboot.get_icinga_client"
+    ) as mock_get_icinga_client, patch(
+        "workflows.hv_rolling_patch_and_reboot.get_alertmanager_client"
+    ) as mock_get_alertmanager_client:
+        alertmanager_client = mock_get_alertmanager_client.return_value
+        alertmanager_client.schedule_silences.side_effect = lambda silences: [
+            f"{silence.matchers[0].value}-{silence.matchers[0].name}"
+            for silence in silences
+        ]
+        yield mock_get_icinga_client.return_value, alertmanager_client
+
+
+def _fail_on(*hypervisor_names):
+    """
+    Make a mock SSHConnection whose commands fail on the given hypervisors
+    """
+
+    def connection(details):
+        ssh_client = MagicMock()
+        if details.host in hypervisor_names:
+            ssh_client.run_command_on_host.side_effect = SSHException("failed")
+        return ssh_client
+
+    return MagicMock(side_effect=connection)
+
+
+@patch("workflows.hv_rolling_patch_and_reboot.SSHConnection")
+def test_rolling_patch_and_reboot(mock_ssh_conn, mock_clients):
+    """
+    Test hypervisors are patched in waves, with the downtimes and silences for each wave
+    scheduled together, and each hypervisor is waited for until it is back from rebooting
+    """
+    icinga_client, alertmanager_client = mock_clients
+
+    succeeded, res = rolling_patch_and_reboot(
+        MagicMock(),
+        MagicMock(),
+        private_key_path="/home/stackstorm/.ssh/id_rsa",
+        hypervisor_names=["hv1", "hv2", "hv3", "hv1"],
+        parallelism=2,
+    )
+
+    assert succeeded
+    assert not res["skipped"]
+    assert [wave["hypervisor_names"] for wave in res["waves"]] == [
+        ["hv1", "hv2"],
+        ["hv3"],
+    ]
+    assert all(host["succeeded"] for wave in res["waves"] for host in wave["hosts"])
+    assert icinga_client.schedule_downtimes.call_count == 2
+    assert [
+        details.object_name
+        for details in icinga_client.schedule_downtimes.call_args_list[0].args[0]
+    ] == ["hv1", "hv2"]
+    assert alertmanager_client.schedule_silences.call_count == 2
+    mock_ssh_conn.assert_any_call(
+        SSHDetails(
+            host="hv3",
+            username="stackstorm",
+            private_key_path="/home/stackstorm/.ssh/id_rsa",
+        )
+    )
+    assert [
+        command_call.args[0]
+        for command_call in mock_ssh_conn.return_value.run_command_on_host.call_args_list
+    ] == [BOOT_ID_COMMAND, "patch", "reboot"] * 3
+    assert mock_ssh_conn.return_value.run.call_count == 3
+    icinga_client.remove_downtimes.assert_not_called()
+    alertmanager_client.remove_silences.assert_not_called()
+
+
+def test_rolling_patch_and_reboot_failure_budget(mock_clients, capsys):
+    """
+    Test the downtime and silences of a failed hypervisor are removed, and no more waves
+    start once the failure budget is exceeded, still returning the results of each wave
+    """
+    icinga_client, alertmanager_client = mock_clients
+
+    with patch(
+        "workflows.hv_rolling_patch_and_reboot.SSHConnection", _fail_on("hv2", "hv3")
+    ):
+        succeeded, res = rolling_patch_and_reboot(
+            MagicMock(),
+            MagicMock(),
+            private_key_path="/home/stackstorm/.ssh/id_rsa",
+            hypervisor_names=["hv1", "hv2", "hv3", "hv4", "hv5"],
+            parallelism=2,
+            max_failures=1,
+        )
+
+    assert not succeeded
+    assert res["skipped"] == ["hv5"]
+    assert [
+        (host["hypervisor_name"], host["succeeded"])
+        for wave in res["waves"]
+        for host in wave["hosts"]
+    ] == [("hv1", True), ("hv2", False), ("hv3", False), ("hv4", True)]
+    assert res["waves"][0]["hosts"][1]["error"] == "SSHException('failed')"
+    assert capsys.readouterr().out.endswith(
+        "Failed to patch and reboot 2 hypervisors: hv2, hv3. "
+        "Skipped 1 hypervisors after exceeding the failure budget: hv5\n"
+    )
+    icinga_client.remove_downtimes.assert_has_calls(
+        [call(IcingaObject.HOST, ["hv2"]), call(IcingaObject.HOST, ["hv3"])]
+    )
+    alertmanager_client.remove_silences.assert_has_calls(
+        [
+            call(["hv2-instance", "hv2-hostname"]),
+            call(["hv3-instance", "hv3-hostname"]),
+        ]
+    )
+
+
+@patch("workflows.hv_rolling_patch_and_reboot.SSHConnection")
+def test_rolling_patch_and_reboot_silences_fail(mock_ssh_conn, mock_clients):
+    """
+    Test a wave whose silences can't be scheduled has its downtimes removed and fails
+    without any hypervisor being patched
+    """
+    icinga_client, alertmanager_client = mock_clients
+    alertmanager_client.schedule_silences.side_effect = RuntimeError("unavailable")
+
+    succeeded, res = rolling_patch_and_reboot(
+        MagicMock(),
+        MagicMock(),
+        private_key_path="/home/stackstorm/.ssh/id_rsa",
+        hypervisor_names=["hv1", "hv2", "hv3"],
+        parallelism=2,
+    )
+
+    assert not succeeded
+    assert res["skipped"] == ["hv3"]
+    assert res["waves"][0]["hosts"][0]["error"] == (
+        "Failed to schedule silences: RuntimeError('unavailable')"
+    )
+    icinga_client.remove_downtimes.assert_called_once_with(
+        IcingaObject.HOST, ["hv1", "hv2"]
+    )
+    alertmanager_client.remove_silences.assert_not_called()
+    mock_ssh_conn.assert_not_called()
+
+
+@patch("workflows.hv_rolling_patch_and_reboot._wait_until_ready")
+@patch("workflows.hv_rolling_patch_and_reboot.SSHConnection")
+def test_rolling_patch_and_reboot_not_ready(
+    mock_ssh_conn, mock_wait_until_ready, mock_clients
+):
+    """
+    Test a hypervisor which doesn't come back from rebooting counts toward the failure
+    budget before the next wave starts
+    """
+    icinga_client, _ = mock_clients
+    mock_wait_until_ready.side_effect = (
+        lambda hypervisor_name, *args, **kwargs: hypervisor_name != "hv2"
+    )
+
+    succeeded, res = rolling_patch_and_reboot(
+        MagicMock(),
+        MagicMock(),
+        private_key_path="/home/stackstorm/.ssh/id_rsa",
+        hypervisor_names=["hv1", "hv2", "hv3"],
+        parallelism=2,
+        ready_timeout=600,
+    )
+
+    assert not succeeded
+    assert res["skipped"] == ["hv3"]
+    assert res["waves"][0]["hosts"][1]["error"] == (
+        "Did not come back within 600 seconds of rebooting"
+    )
+    mock_wait_until_ready.assert_any_call(
+        "hv2",
+        "/home/stackstorm/.ssh/id_rsa",
+        mock_ssh_conn.return_value.run_command_on_host.return_value.output.strip.return_value,
+        timeout=600,
+        poll_interval=30,
+    )
+    icinga_client.remove_downtimes.assert_called_once_with(IcingaObject.HOST, ["hv2"])
+
+
+@patch("workflows.hv_rolling_patch_and_reboot.time.monotonic")
+@patch("workflows.hv_rolling_patch_and_reboot.SSHConnection")
+def test_wait_until_ready(mock_ssh_conn, mock_monotonic, mock_sleep):
+    """
+    Test a hypervisor is polled until it can be connected to again with a new boot ID
+    """
+    mock_monotonic.return_value = 0
+    mock_ssh_conn.return_value.run.side_effect = [
+        OSError("Connection refused"),
+        CommandResult(host="hv1", command=BOOT_ID_COMMAND, exit_code=0, output="old\n"),
+        CommandResult(host="hv1", command=BOOT_ID_COMMAND, exit_code=0, output="new\n"),
+    ]
+
+    assert _wait_until_ready("hv1", "/home/stackstorm/.ssh/id_rsa", "old", 600, 30)
+    mock_sleep.assert_has_calls([call(30)] * 3)
+    assert mock_ssh_conn.return_value.close.call_count == 3
+
+
+@patch("workflows.hv_rolling_patch_and_reboot.time.monotonic")
+@patch("workflows.hv_rolling_patch_and_reboot.SSHConnection")
+def test_wait_until_ready_timeout(mock_ssh_conn, mock_monotonic):
+    """
+    Test a hypervisor which still has the same boot ID once the timeout passes is not ready
+    """
+    mock_monotonic.side_effect = [0, 0, 601]
+    mock_ssh_conn.return_value.run.return_value = CommandResult(
+        host="hv1", command=BOOT_ID_COMMAND, exit_code=0, output="old\n"
+    )
+
+    assert not _wait_until_ready("hv1", "/home/stackstorm/.ssh/id_rsa", "old", 600, 30)
+    mock_ssh_conn.return_value.run.assert_called_once_with(BOOT_ID_COMMAND, timeout=60)
+
+
+@patch("workflows.hv_rolling_patch_and_reboot.get_hostgroup_members")
+@patch("workflows.hv_rolling_patch_and_reboot.SSHConnection")
+def test_rolling_patch_and_reboot_hostgroup(
+    mock_ssh_conn, mock_get_hostgroup_members, mock_clients
+):
+    """
+    Test the hypervisors in an Icinga host group are patched
+    """
+    icinga_account = MagicMock()
+    mock_get_hostgroup_members.return_value = ["hv1", "hv2"]
+
+    _, res = rolling_patch_and_reboot(
+        MagicMock(),
+        icinga_account,
+        private_key_path="/home/stackstorm/.ssh/id_rsa",
+        icinga_hostgroup="hypervisors",
+    )
+
+    mock_get_hostgroup_members.assert_called_once_with(icinga_account, "hypervisors")
+    assert res["waves"][0]["hypervisor_names"] == ["hv1", "hv2"]
+    # one connection each to patch and reboot, then one each to check it is back
+    assert mock_ssh_conn.call_count == 4
+    assert mock_clients[0].schedule_downtimes.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "hypervisor_names, icinga_hostgroup, parallelism",
+    [(None, None, 5), (["hv1"], "hypervisors", 5), (["hv1"], None, 0)],
+)
+def test_rolling_patch_and_reboot_invalid(
+    hypervisor_names, icinga_hostgroup, parallelism
+):
+    """
+    Test exactly one of hypervisor names or a host group must be given, and parallelism
+    must be positive
+    """
+    with pytest.raises(ValueError):
+        rolling_patch_and_reboot(
+            MagicMock(),
+            MagicMock(),
+            private_key_path="/home/stackstorm/.ssh/id_rsa",
+            hypervisor_names=hypervisor_names,
+            icinga_hostgroup=icinga_hostgroup,
+            parallelism=parallelism,
+        )
+
+
+@patch("workflows.hv_rolling_patch_and_reboot.get_icinga_client")
+def test_get_hostgroup_members(mock_get_icinga_client):
+    """
+    Test the hosts in a host group are found with a streamed query
+    """
+    mock_iter_objects = mock_get_icinga_client.return_value.iter_objects
+    mock_iter_objects.return_value = iter(
+        [{"attrs": {"name": "hv1"}}, {"attrs": {"name": "hv2"}}]
+    )
+
+    assert get_hostgroup_members(MagicMock(), "hypervisors") == ["hv1", "hv2"]
+    query = mock_iter_objects.call_args.args[0]
+    assert query.filter == "hostgroup in host.groups"
+    assert query.filter_vars == {"hostgroup": "hypervisors"}
+
+
+@patch("workflows.hv_rolling_patch_and_reboot.SSHConnection")
+def test_host_output_prefixed(mock_ssh_conn, mock_clients, capsys):
+    """
+    Test output from each hypervisor is printed a line at a time, prefixed with its name
+    """
+
+    def run_command_on_host(command, on_output=None):
+        if on_output is not None:
+            on_output(f"{command} sta")
+            on_output("rted\ndone")
+        return CommandResult(host="hv1", command=command, exit_code=0, output="old\n")
+
+    mock_ssh_conn.return_value.run_command_on_host.side_effect = run_command_on_host
+
+    rolling_patch_and_reboot(
+        MagicMock(),
+        MagicMock(),
+        private_key_path="/home/stackstorm/.ssh/id_rsa",
+        hypervisor_names=["hv1"],
+    )
+
+    assert capsys.readouterr().out.startswith(
+        "[hv1] patch started\n[hv1] donereboot started\n[hv1] done\n"
+    )
+    assert mock_clients[0].remove_downtimes.call_count == 0
@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock, patch
 import pytest
+from apis.openstack_api.structs.server_shutoff_result import ServerShutoffResult
 from workflows.hv_shutdown_servers import shutdown_all_servers_in_hypervisor
 
 
@@ -53,6 +54,95 @@ def test_shutoff_server_list_exception_is_reraised(
     mock_shutoff_list.side_effect = expected_exception
 
     with pytest.raises(Exception) as exc:
-        shutdown_all_servers_in_hypervisor(mock_conn, "hv1.example.com")
+        shutdown_all_servers_in_hypervisor(mock_conn, "hv1.example.com", batch=False)
 
     assert exc.value is expected_exception
+
+
+@patch("workflows.hv_shutdown_servers.find_servers_on_hv")
+@patch("workflows.hv_shutdown_servers.shutoff_servers_on_hypervisor")
+def test_shutdown_all_servers_in_hypervisor_batch(
+    mock_shutoff_servers, mock_find_servers
+):
+    """
+    Test servers are shut off in one batch and the results are returned
+    """
+    mock_conn = MagicMock()
+    mock_server = MagicMock()
+    mock_server.id = "server-123"
+    mock_find_servers.return_value.to_objects.return_value = [mock_server]
+    mock_shutoff_servers.return_value = [
+        ServerShutoffResult(
+            server_id="server-123", status="SHUTOFF", shut_off=True, seconds=5.0
+        )
+    ]
+
+    res = shutdown_all_servers_in_hypervisor(
+        mock_conn, "hv1.example.com", max_concurrent_stops=5, shutoff_timeout=60
+    )
+
+    mock_find_servers.assert_called_once_with(
+        cloud_account=mock_conn.name,
+        hypervisor_name="hv1.example.com",
+        from_projects=None,
+        webhook=None,
+    )
+    mock_shutoff_servers.assert_called_once_with(
+        mock_conn,
+        "hv1.example.com",
+        ["server-123"],
+        max_concurrent_stops=5,
+        timeout=60,
+    )
+    assert res == [
+        {
+            "server_id": "server-123",
+            "status": "SHUTOFF",
+            "shut_off": True,
+            "seconds": 5.0,
+            "error": None,
+        }
+    ]
+
+
+@pytest.mark.parametrize("raise_on_failure", [True, False])
+@patch("workflows.hv_shutdown_servers.find_servers_on_hv")
+@patch("workflows.hv_shutdown_servers.shutoff_servers_on_hypervisor")
+def test_shutdown_all_servers_in_hypervisor_batch_failure(
+    mock_shutoff_servers, mock_find_servers, raise_on_failure
+):
+    """
+    Test servers which could not be shut off are raised, unless raise_on_failure is False
+    """
+    mock_server = MagicMock()
+    mock_server.id = "server-123"
+    mock_find_servers.return_value.to_objects.return_value = [mock_server]
+    mock_shutoff_servers.return_value = [
+        ServerShutoffResult(
+            server_id="server-123",
+            status="ERROR",
+            error="Server went into ERROR status",
+        )
+    ]
+
+    if raise_on_failure:
+        with pytest.raises(RuntimeError, match="server-123: Server went into ERROR"):
+            shutdown_all_servers_in_hypervisor(MagicMock(), "hv1.example.com")
+    else:
+        res = shutdown_all_servers_in_hypervisor(
+            MagicMock(), "hv1.example.com", raise_on_failure=False
+        )
+        assert res[0]["error"] == "Server went into ERROR status"
+
+
+@patch("workflows.hv_shutdown_servers.find_servers_on_hv")
+@patch("workflows.hv_shutdown_servers.shutoff_servers_on_hypervisor")
+def test_shutdown_all_servers_in_hypervisor_no_servers(
+    mock_shutoff_servers, mock_find_servers
+):
+    """
+    Test nothing is shut off when there are no servers on the hypervisor
+    """
+    mock_find_servers.return_value.to_objects.return_value = []
+    assert shutdown_all_servers_in_hypervisor(MagicMock(), "hv1.example.com") == []
+    mock_shutoff_servers.assert_not_called()
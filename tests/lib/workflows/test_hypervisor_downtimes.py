@@ -1,5 +1,5 @@
 import datetime
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock, patch
 
 from apis.icinga_api.enums.icinga_objects import IcingaObject
 from apis.alertmanager_api.structs.alert_matcher_details import AlertMatcherDetails
@@ -25,11 +25,11 @@ from workflows.hypervisor_downtime import (
     ],
 )
 @pytest.mark.freeze_time
-@patch("workflows.hypervisor_downtime.schedule_silence")
+@patch("workflows.hypervisor_downtime.get_alertmanager_client")
 @patch("workflows.hypervisor_downtime.schedule_downtime")
 def test_successful_schedule_hypervisor_downtime(
     mock_schedule_downtime,
-    mock_schedule_silence,
+    mock_get_alertmanager_client,
     set_silence,
     set_downtime,
 ):
@@ -48,8 +48,8 @@ def test_successful_schedule_hypervisor_downtime(
     mock_end_time = mock_start_time + datetime.timedelta(hours=mock_duration)
     mock_start_timestamp = int(mock_start_time.timestamp())
     mock_end_timestamp = int(mock_end_time.timestamp())
-    mock_silence_id = "mock ID"
-    mock_schedule_silence.return_value = mock_silence_id
+    mock_schedule_silences = mock_get_alertmanager_client.return_value.schedule_silences
+    mock_schedule_silences.return_value = ["mock ID1", "mock ID2"]
     alertmanager_account = MagicMock()
     schedule_hypervisor_downtime(
         icinga_account,
@@ -76,12 +76,12 @@ def test_successful_schedule_hypervisor_downtime(
         comment=comment,
     )
     if set_silence:
-        mock_schedule_silence.assert_has_calls(
-            [
-                call(alertmanager_account, mock_silence_details_instance),
-                call(alertmanager_account, mock_silence_details_hostname),
-            ]
+        mock_get_alertmanager_client.assert_called_once_with(alertmanager_account)
+        mock_schedule_silences.assert_called_once_with(
+            [mock_silence_details_instance, mock_silence_details_hostname]
         )
+    else:
+        mock_get_alertmanager_client.assert_not_called()
     if set_downtime:
         mock_schedule_downtime.assert_called_once_with(
             icinga_account=icinga_account,
@@ -97,11 +97,11 @@ def test_successful_schedule_hypervisor_downtime(
         )
 
 
-@patch("workflows.hypervisor_downtime.schedule_silence")
+@patch("workflows.hypervisor_downtime.get_alertmanager_client")
 @patch("workflows.hypervisor_downtime.schedule_downtime")
 def test_unsuccessful_schedule_hypervisor_downtime(
     mock_schedule_downtime,
-    mock_schedule_silence,
+    mock_get_alertmanager_client,
 ):
     """
     Test unsuccessful running of schedule hypervisor downtime -
@@ -111,7 +111,7 @@ def test_unsuccessful_schedule_hypervisor_downtime(
     mock_hypervisor_name = "test_host"
     comment = f"starting downtime to patch and reboot host: {mock_hypervisor_name}"
     mock_duration = 7
-    mock_schedule_silence.side_effect = Exception
+    mock_get_alertmanager_client.return_value.schedule_silences.side_effect = Exception
     alertmanager_account = MagicMock()
     with pytest.raises(Exception):
         schedule_hypervisor_downtime(
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 import pytest
 
@@ -191,3 +191,101 @@ def test_generate_table(
     mock_create_joins_filter_functions.assert_called_once_with(mock_user_joins)
 
     mock_tabulate.assert_called_once()
+
+
+@patch("workflows.icinga_search.query_object_results")
+@pytest.mark.parametrize(
+    "output_type, expected",
+    [
+        (
+            "csv",
+            "Service Name,Service State,Host Name,Host State\r\n"
+            "ping6,UNKOWN,Host1,DOWN\r\n"
+            "disk /,WARNING,Host2,UP\r\n",
+        ),
+        (
+            "ndjson",
+            '{"Service Name": "ping6", "Service State": "UNKOWN", '
+            '"Host Name": "Host1", "Host State": "DOWN"}\n'
+            '{"Service Name": "disk /", "Service State": "WARNING", '
+            '"Host Name": "Host2", "Host State": "UP"}\n',
+        ),
+    ],
+)
+def test_search_by_state_streamed(
+    mock_query_object_results, mock_data, output_type, expected, capsys
+):
+    """
+    Tests search by state prints csv and ndjson from results streamed from the query,
+    returning the number of rows
+    """
+    icinga_account = MagicMock()
+    mock_query_object_results.return_value = iter(mock_data["results"])
+
+    res = search_by_state(
+        icinga_account,
+        object_type="Service",
+        state="Critical",
+        properties_to_select=["name", "state"],
+        output_type=output_type,
+        joins=["host.name", "host.state"],
+    )
+
+    mock_query_object_results.assert_called_once()
+    assert mock_query_object_results.call_args.args[1].filter_vars == {
+        "team": "cloud",
+        "state": 2,
+    }
+    assert res == 2
+    assert capsys.readouterr().out == expected
+
+
+@patch("workflows.icinga_search.tabulate")
+@patch("workflows.icinga_search.query_object_results")
+def test_search_by_name_paged_table(
+    mock_query_object_results, mock_tabulate, mock_data, capsys
+):
+    """
+    Tests search by name prints a table for each page of results streamed from the query
+    """
+    icinga_account = MagicMock()
+    mock_query_object_results.return_value = iter(mock_data["results"])
+    mock_tabulate.side_effect = ["page1", "page2"]
+
+    res = search_by_name(
+        icinga_account,
+        object_type="Service",
+        name="ping*",
+        properties_to_select=["name", "state"],
+        output_type="table",
+        page_size=1,
+    )
+
+    assert res == 2
+    assert capsys.readouterr().out == "page1\n\npage2\n"
+    mock_tabulate.assert_has_calls(
+        [
+            call(
+                tabular_data=[row],
+                headers=EXPECTED["headers"],
+                tablefmt="grid",
+            )
+            for row in EXPECTED["tabular_data"]
+        ]
+    )
+
+
+@patch("workflows.icinga_search.query_object_results")
+def test_search_by_name_invalid_output_type(mock_query_object_results):
+    """
+    Tests search by name raises an error for an unknown output type
+    """
+    with pytest.raises(ValueError):
+        search_by_name(
+            MagicMock(),
+            object_type="Host",
+            name="hv*",
+            properties_to_select=["name"],
+            output_type="xml",
+        )
+    mock_query_object_results.assert_not_called()
@@ -213,7 +213,7 @@ def test_build_params(mock_email_params, mock_email_template_details):
 @patch("workflows.send_decom_flavor_email.validate_flavor_input")
 @patch("workflows.send_decom_flavor_email.find_servers_with_flavors")
 @patch("workflows.send_decom_flavor_email.group_servers_by_user_id")
-@patch("workflows.send_decom_flavor_email.find_user_info")
+@patch("workflows.send_decom_flavor_email.find_user_info_bulk")
 @patch("workflows.send_decom_flavor_email.get_affected_flavors_plaintext")
 @patch("workflows.send_decom_flavor_email.build_email_params")
 @patch("workflows.send_decom_flavor_email.Emailer")
@@ -221,7 +221,7 @@ def test_send_decom_flavor_email_send_plaintext(
     mock_emailer,
     mock_build_email_params,
     mock_get_affected_flavors_plaintext,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
     mock_validate_flavor_input,
@@ -249,10 +249,10 @@ def test_send_decom_flavor_email_send_plaintext(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_decom_flavor_email(
         smtp_account=smtp_account,
@@ -276,11 +276,8 @@ def test_send_decom_flavor_email_send_plaintext(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -313,13 +310,9 @@ def test_send_decom_flavor_email_send_plaintext(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
@@ -328,7 +321,7 @@ def test_send_decom_flavor_email_send_plaintext(
 @patch("workflows.send_decom_flavor_email.validate_flavor_input")
 @patch("workflows.send_decom_flavor_email.find_servers_with_flavors")
 @patch("workflows.send_decom_flavor_email.group_servers_by_user_id")
-@patch("workflows.send_decom_flavor_email.find_user_info")
+@patch("workflows.send_decom_flavor_email.find_user_info_bulk")
 @patch("workflows.send_decom_flavor_email.get_affected_flavors_html")
 @patch("workflows.send_decom_flavor_email.build_email_params")
 @patch("workflows.send_decom_flavor_email.Emailer")
@@ -336,7 +329,7 @@ def test_send_decom_flavor_email_send_html(
     mock_emailer,
     mock_build_email_params,
     mock_get_affected_flavors_html,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
     mock_validate_flavor_input,
@@ -365,10 +358,10 @@ def test_send_decom_flavor_email_send_html(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_decom_flavor_email(
         smtp_account=smtp_account,
@@ -392,11 +385,8 @@ def test_send_decom_flavor_email_send_html(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -429,26 +419,22 @@ def test_send_decom_flavor_email_send_html(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
 @patch("workflows.send_decom_flavor_email.validate_flavor_input")
 @patch("workflows.send_decom_flavor_email.find_servers_with_flavors")
 @patch("workflows.send_decom_flavor_email.group_servers_by_user_id")
-@patch("workflows.send_decom_flavor_email.find_user_info")
+@patch("workflows.send_decom_flavor_email.find_user_info_bulk")
 @patch("workflows.send_decom_flavor_email.get_affected_flavors_plaintext")
 @patch("workflows.send_decom_flavor_email.print_email_params")
 def test_send_decom_flavor_email_print(
     mock_print_email_params,
     mock_get_affected_flavors_plaintext,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
     mock_validate_flavor_input,
@@ -477,10 +463,10 @@ def test_send_decom_flavor_email_print(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_decom_flavor_email(
         smtp_account=smtp_account,
@@ -504,11 +490,8 @@ def test_send_decom_flavor_email_print(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_print_email_params.assert_has_calls(
@@ -535,7 +518,7 @@ def test_send_decom_flavor_email_print(
 @patch("workflows.send_decom_flavor_email.validate_flavor_input")
 @patch("workflows.send_decom_flavor_email.find_servers_with_flavors")
 @patch("workflows.send_decom_flavor_email.group_servers_by_user_id")
-@patch("workflows.send_decom_flavor_email.find_user_info")
+@patch("workflows.send_decom_flavor_email.find_user_info_bulk")
 @patch("workflows.send_decom_flavor_email.get_affected_flavors_plaintext")
 @patch("workflows.send_decom_flavor_email.build_email_params")
 @patch("workflows.send_decom_flavor_email.Emailer")
@@ -543,7 +526,7 @@ def test_send_decom_flavor_email_use_override(
     mock_emailer,
     mock_build_email_params,
     mock_get_affected_flavors_plaintext,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
     mock_validate_flavor_input,
@@ -568,7 +551,7 @@ def test_send_decom_flavor_email_use_override(
     mock_grouped_query.to_props.return_value = {
         "user_id1": [],
     }
-    mock_find_user_info.return_value = ("user1", "user1@example.com")
+    mock_find_user_info_bulk.return_value = {"user_id1": ("user1", "user1@example.com")}
 
     send_decom_flavor_email(
         smtp_account=smtp_account,
@@ -593,8 +576,8 @@ def test_send_decom_flavor_email_use_override(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_called_once_with(
-        "user_id1", cloud_account, override_email
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1"], cloud_account, override_email
     )
 
     mock_build_email_params.assert_called_once_with(
@@ -606,9 +589,7 @@ def test_send_decom_flavor_email_use_override(
         email_cc=None,
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value]
     )
@@ -153,7 +153,7 @@ def test_build_params(mock_email_params, mock_email_template_details):
 @patch("workflows.send_decom_image_email.get_image_info")
 @patch("workflows.send_decom_image_email.find_servers_with_image")
 @patch("workflows.send_decom_image_email.group_servers_by_user_id")
-@patch("workflows.send_decom_image_email.find_user_info")
+@patch("workflows.send_decom_image_email.find_user_info_bulk")
 @patch("workflows.send_decom_image_email.get_affected_images_plaintext")
 @patch("workflows.send_decom_image_email.build_email_params")
 @patch("workflows.send_decom_image_email.Emailer")
@@ -161,7 +161,7 @@ def test_send_decom_image_email_send_plaintext(
     mock_emailer,
     mock_build_email_params,
     mock_get_affected_images_plaintext,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers_with_image,
     mock_get_image_info,
@@ -190,10 +190,10 @@ def test_send_decom_image_email_send_plaintext(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_decom_image_email(
         smtp_account=smtp_account,
@@ -218,11 +218,8 @@ def test_send_decom_image_email_send_plaintext(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -255,13 +252,9 @@ def test_send_decom_image_email_send_plaintext(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
@@ -270,7 +263,7 @@ def test_send_decom_image_email_send_plaintext(
 @patch("workflows.send_decom_image_email.get_image_info")
 @patch("workflows.send_decom_image_email.find_servers_with_image")
 @patch("workflows.send_decom_image_email.group_servers_by_user_id")
-@patch("workflows.send_decom_image_email.find_user_info")
+@patch("workflows.send_decom_image_email.find_user_info_bulk")
 @patch("workflows.send_decom_image_email.get_affected_images_html")
 @patch("workflows.send_decom_image_email.build_email_params")
 @patch("workflows.send_decom_image_email.Emailer")
@@ -278,7 +271,7 @@ def test_send_decom_image_email_send_html(
     mock_emailer,
     mock_build_email_params,
     mock_get_affected_images_html,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers_with_image,
     mock_get_image_info,
@@ -308,10 +301,10 @@ def test_send_decom_image_email_send_html(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_decom_image_email(
         smtp_account=smtp_account,
@@ -336,11 +329,8 @@ def test_send_decom_image_email_send_html(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -373,26 +363,22 @@ def test_send_decom_image_email_send_html(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
 @patch("workflows.send_decom_image_email.get_image_info")
 @patch("workflows.send_decom_image_email.find_servers_with_image")
 @patch("workflows.send_decom_image_email.group_servers_by_user_id")
-@patch("workflows.send_decom_image_email.find_user_info")
+@patch("workflows.send_decom_image_email.find_user_info_bulk")
 @patch("workflows.send_decom_image_email.get_affected_images_plaintext")
 @patch("workflows.send_decom_image_email.print_email_params")
 def test_send_decom_image_email_print(
     mock_print_email_params,
     mock_get_affected_images_plaintext,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers_with_image,
     mock_get_image_info,
@@ -422,10 +408,10 @@ def test_send_decom_image_email_print(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_decom_image_email(
         smtp_account=smtp_account,
@@ -450,11 +436,8 @@ def test_send_decom_image_email_print(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_print_email_params.assert_has_calls(
@@ -489,7 +472,7 @@ def test_send_decom_image_email_print(
 @patch("workflows.send_decom_image_email.get_image_info")
 @patch("workflows.send_decom_image_email.find_servers_with_image")
 @patch("workflows.send_decom_image_email.group_servers_by_user_id")
-@patch("workflows.send_decom_image_email.find_user_info")
+@patch("workflows.send_decom_image_email.find_user_info_bulk")
 @patch("workflows.send_decom_image_email.get_affected_images_plaintext")
 @patch("workflows.send_decom_image_email.build_email_params")
 @patch("workflows.send_decom_image_email.Emailer")
@@ -497,7 +480,7 @@ def test_send_decom_image_email_use_override(
     mock_emailer,
     mock_build_email_params,
     mock_get_affected_images_plaintext,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers_with_image,
     mock_get_image_info,
@@ -527,10 +510,10 @@ def test_send_decom_image_email_use_override(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_decom_image_email(
         smtp_account=smtp_account,
@@ -556,11 +539,8 @@ def test_send_decom_image_email_use_override(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, override_email_address),
-            call("user_id2", cloud_account, override_email_address),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, override_email_address
     )
 
     mock_build_email_params.assert_has_calls(
@@ -593,13 +573,9 @@ def test_send_decom_image_email_use_override(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
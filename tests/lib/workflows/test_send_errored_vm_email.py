@@ -75,13 +75,13 @@ def test_build_params(
 # pylint:disable=too-many-arguments
 @patch("workflows.send_errored_vm_email.find_servers_with_errored_vms")
 @patch("workflows.send_errored_vm_email.group_servers_by_user_id")
-@patch("workflows.send_errored_vm_email.find_user_info")
+@patch("workflows.send_errored_vm_email.find_user_info_bulk")
 @patch("workflows.send_errored_vm_email.build_email_params")
 @patch("workflows.send_errored_vm_email.Emailer")
 def test_send_errored_vm_email_send_plaintext(
     mock_emailer,
     mock_build_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -106,10 +106,10 @@ def test_send_errored_vm_email_send_plaintext(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_errored_vm_email(
         smtp_account=smtp_account,
@@ -127,11 +127,8 @@ def test_send_errored_vm_email_send_plaintext(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -164,26 +161,22 @@ def test_send_errored_vm_email_send_plaintext(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
 # pylint:disable=too-many-arguments
 @patch("workflows.send_errored_vm_email.find_servers_with_errored_vms")
 @patch("workflows.send_errored_vm_email.group_servers_by_user_id")
-@patch("workflows.send_errored_vm_email.find_user_info")
+@patch("workflows.send_errored_vm_email.find_user_info_bulk")
 @patch("workflows.send_errored_vm_email.build_email_params")
 @patch("workflows.send_errored_vm_email.Emailer")
 def test_send_errored_vm_email_send_html(
     mock_emailer,
     mock_build_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -208,10 +201,10 @@ def test_send_errored_vm_email_send_html(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_errored_vm_email(
         smtp_account=smtp_account,
@@ -229,11 +222,8 @@ def test_send_errored_vm_email_send_html(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -266,24 +256,20 @@ def test_send_errored_vm_email_send_html(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
 # pylint:disable=too-many-arguments
 @patch("workflows.send_errored_vm_email.find_servers_with_errored_vms")
 @patch("workflows.send_errored_vm_email.group_servers_by_user_id")
-@patch("workflows.send_errored_vm_email.find_user_info")
+@patch("workflows.send_errored_vm_email.find_user_info_bulk")
 @patch("workflows.send_errored_vm_email.print_email_params")
 def test_send_errored_vm_email_print(
     mock_print_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -308,10 +294,10 @@ def test_send_errored_vm_email_print(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_errored_vm_email(
         smtp_account=smtp_account,
@@ -329,11 +315,8 @@ def test_send_errored_vm_email_print(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_print_email_params.assert_has_calls(
@@ -366,13 +349,13 @@ def test_send_errored_vm_email_print(
 # pylint:disable=too-many-arguments
 @patch("workflows.send_errored_vm_email.find_servers_with_errored_vms")
 @patch("workflows.send_errored_vm_email.group_servers_by_user_id")
-@patch("workflows.send_errored_vm_email.find_user_info")
+@patch("workflows.send_errored_vm_email.find_user_info_bulk")
 @patch("workflows.send_errored_vm_email.build_email_params")
 @patch("workflows.send_errored_vm_email.Emailer")
 def test_send_errored_vm_email_use_override(
     mock_emailer,
     mock_build_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -398,10 +381,10 @@ def test_send_errored_vm_email_use_override(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_errored_vm_email(
         smtp_account=smtp_account,
@@ -420,11 +403,8 @@ def test_send_errored_vm_email_use_override(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, override_email_address),
-            call("user_id2", cloud_account, override_email_address),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, override_email_address
     )
 
     mock_build_email_params.assert_has_calls(
@@ -457,13 +437,9 @@ def test_send_errored_vm_email_use_override(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
@@ -103,13 +103,13 @@ def test_build_params(mock_email_params, mock_email_template_details):
 # pylint:disable=too-many-arguments
 @patch("workflows.send_hv_email.find_servers_on_hv")
 @patch("workflows.send_hv_email.group_servers_by_user_id")
-@patch("workflows.send_hv_email.find_user_info")
+@patch("workflows.send_hv_email.find_user_info_bulk")
 @patch("workflows.send_hv_email.build_email_params")
 @patch("workflows.send_hv_email.Emailer")
 def test_send_hv_email_send_plaintext(
     mock_emailer,
     mock_build_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -136,10 +136,10 @@ def test_send_hv_email_send_plaintext(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_hv_email(
         smtp_account=smtp_account,
@@ -161,11 +161,8 @@ def test_send_hv_email_send_plaintext(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -198,26 +195,22 @@ def test_send_hv_email_send_plaintext(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
 # pylint:disable=too-many-arguments
 @patch("workflows.send_hv_email.find_servers_on_hv")
 @patch("workflows.send_hv_email.group_servers_by_user_id")
-@patch("workflows.send_hv_email.find_user_info")
+@patch("workflows.send_hv_email.find_user_info_bulk")
 @patch("workflows.send_hv_email.build_email_params")
 @patch("workflows.send_hv_email.Emailer")
 def test_send_hv_email_send_html(
     mock_emailer,
     mock_build_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -244,10 +237,10 @@ def test_send_hv_email_send_html(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_hv_email(
         smtp_account=smtp_account,
@@ -269,11 +262,8 @@ def test_send_hv_email_send_html(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -306,24 +296,20 @@ def test_send_hv_email_send_html(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
 # pylint:disable=too-many-arguments
 @patch("workflows.send_hv_email.find_servers_on_hv")
 @patch("workflows.send_hv_email.group_servers_by_user_id")
-@patch("workflows.send_hv_email.find_user_info")
+@patch("workflows.send_hv_email.find_user_info_bulk")
 @patch("workflows.send_hv_email.print_email_params")
 def test_send_hv_email_print(
     mock_print_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -350,10 +336,10 @@ def test_send_hv_email_print(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_hv_email(
         smtp_account=smtp_account,
@@ -375,11 +361,8 @@ def test_send_hv_email_print(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_print_email_params.assert_has_calls(
@@ -410,13 +393,13 @@ def test_send_hv_email_print(
 # pylint:disable=too-many-arguments
 @patch("workflows.send_hv_email.find_servers_on_hv")
 @patch("workflows.send_hv_email.group_servers_by_user_id")
-@patch("workflows.send_hv_email.find_user_info")
+@patch("workflows.send_hv_email.find_user_info_bulk")
 @patch("workflows.send_hv_email.build_email_params")
 @patch("workflows.send_hv_email.Emailer")
 def test_send_hv_email_use_override(
     mock_emailer,
     mock_build_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -444,10 +427,10 @@ def test_send_hv_email_use_override(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_hv_email(
         smtp_account=smtp_account,
@@ -470,11 +453,8 @@ def test_send_hv_email_use_override(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, override_email_address),
-            call("user_id2", cloud_account, override_email_address),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, override_email_address
     )
 
     mock_build_email_params.assert_has_calls(
@@ -507,13 +487,9 @@ def test_send_hv_email_use_override(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
@@ -99,13 +99,13 @@ def test_build_params(mock_email_params, mock_email_template_details):
 # pylint:disable=too-many-arguments
 @patch("workflows.send_shutoff_vm_email.find_shutoff_servers")
 @patch("workflows.send_shutoff_vm_email.group_servers_by_user_id")
-@patch("workflows.send_shutoff_vm_email.find_user_info")
+@patch("workflows.send_shutoff_vm_email.find_user_info_bulk")
 @patch("workflows.send_shutoff_vm_email.build_email_params")
 @patch("workflows.send_shutoff_vm_email.Emailer")
 def test_send_shutoff_vm_email_send_plaintext(
     mock_emailer,
     mock_build_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -130,10 +130,10 @@ def test_send_shutoff_vm_email_send_plaintext(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_shutoff_vm_email(
         smtp_account=smtp_account,
@@ -151,11 +151,8 @@ def test_send_shutoff_vm_email_send_plaintext(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -188,26 +185,22 @@ def test_send_shutoff_vm_email_send_plaintext(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
 # pylint:disable=too-many-arguments
 @patch("workflows.send_shutoff_vm_email.find_shutoff_servers")
 @patch("workflows.send_shutoff_vm_email.group_servers_by_user_id")
-@patch("workflows.send_shutoff_vm_email.find_user_info")
+@patch("workflows.send_shutoff_vm_email.find_user_info_bulk")
 @patch("workflows.send_shutoff_vm_email.build_email_params")
 @patch("workflows.send_shutoff_vm_email.Emailer")
 def test_send_shutoff_vm_email_send_html(
     mock_emailer,
     mock_build_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -232,10 +225,10 @@ def test_send_shutoff_vm_email_send_html(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_shutoff_vm_email(
         smtp_account=smtp_account,
@@ -252,11 +245,8 @@ def test_send_shutoff_vm_email_send_html(
     mock_find_servers.assert_called_once_with(cloud_account, 60, limit_by_projects)
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_build_email_params.assert_has_calls(
@@ -289,24 +279,20 @@ def test_send_shutoff_vm_email_send_html(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
 # pylint:disable=too-many-arguments
 @patch("workflows.send_shutoff_vm_email.find_shutoff_servers")
 @patch("workflows.send_shutoff_vm_email.group_servers_by_user_id")
-@patch("workflows.send_shutoff_vm_email.find_user_info")
+@patch("workflows.send_shutoff_vm_email.find_user_info_bulk")
 @patch("workflows.send_shutoff_vm_email.print_email_params")
 def test_send_shutoff_vm_email_print(
     mock_print_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -331,10 +317,10 @@ def test_send_shutoff_vm_email_print(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_shutoff_vm_email(
         smtp_account=smtp_account,
@@ -352,11 +338,8 @@ def test_send_shutoff_vm_email_print(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, "cloud-support@stfc.ac.uk"),
-            call("user_id2", cloud_account, "cloud-support@stfc.ac.uk"),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, "cloud-support@stfc.ac.uk"
     )
 
     mock_print_email_params.assert_has_calls(
@@ -389,13 +372,13 @@ def test_send_shutoff_vm_email_print(
 # pylint:disable=too-many-arguments
 @patch("workflows.send_shutoff_vm_email.find_shutoff_servers")
 @patch("workflows.send_shutoff_vm_email.group_servers_by_user_id")
-@patch("workflows.send_shutoff_vm_email.find_user_info")
+@patch("workflows.send_shutoff_vm_email.find_user_info_bulk")
 @patch("workflows.send_shutoff_vm_email.build_email_params")
 @patch("workflows.send_shutoff_vm_email.Emailer")
 def test_send_shutoff_vm_email_use_override(
     mock_emailer,
     mock_build_email_params,
-    mock_find_user_info,
+    mock_find_user_info_bulk,
     mock_group_servers_by_user_id,
     mock_find_servers,
 ):
@@ -421,10 +404,10 @@ def test_send_shutoff_vm_email_use_override(
         "user_id1": [],
         "user_id2": [],
     }
-    mock_find_user_info.side_effect = [
-        ("user1", "user_email1"),
-        ("user2", "user_email2"),
-    ]
+    mock_find_user_info_bulk.return_value = {
+        "user_id1": ("user1", "user_email1"),
+        "user_id2": ("user2", "user_email2"),
+    }
 
     send_shutoff_vm_email(
         smtp_account=smtp_account,
@@ -443,11 +426,8 @@ def test_send_shutoff_vm_email_use_override(
     mock_query.to_props.assert_called_once()
     mock_group_servers_by_user_id.assert_called_once_with(mock_query)
     mock_grouped_query.to_props.assert_called_once()
-    mock_find_user_info.assert_has_calls(
-        [
-            call("user_id1", cloud_account, override_email_address),
-            call("user_id2", cloud_account, override_email_address),
-        ]
+    mock_find_user_info_bulk.assert_called_once_with(
+        ["user_id1", "user_id2"], cloud_account, override_email_address
     )
 
     mock_build_email_params.assert_has_calls(
@@ -480,13 +460,9 @@ def test_send_shutoff_vm_email_use_override(
         ]
     )
 
-    mock_emailer.assert_has_calls(
-        [
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-            call(smtp_account),
-            call().send_emails([mock_build_email_params.return_value]),
-        ]
+    mock_emailer.assert_called_once_with(smtp_account)
+    mock_emailer.return_value.send_emails.assert_called_once_with(
+        [mock_build_email_params.return_value, mock_build_email_params.return_value]
     )
 
 
@@ -1,7 +1,8 @@
 from unittest.mock import patch
 
+from apis.ssh_api.structs.command_result import CommandResult
 from apis.ssh_api.structs.ssh_connection_details import SSHDetails
-from workflows.ssh_remote_command import ssh_remote_command
+from workflows.ssh_remote_command import ssh_remote_command, ssh_remote_command_on_hosts
 
 
 @patch("workflows.ssh_remote_command.SSHConnection")
@@ -11,7 +12,11 @@ def test_remote_command(mock_ssh_conn):
     mock_private_key_path = "/home/stackstorm/.ssh/id_rsa"
     mock_command = "ls"
 
-    ssh_remote_command(
+    mock_ssh_conn.return_value.run_command_on_host.return_value = CommandResult(
+        host=mock_host, command=mock_command, exit_code=0, output="out"
+    )
+
+    res = ssh_remote_command(
         host=mock_host,
         username=mock_username,
         private_key_path=mock_private_key_path,
@@ -26,3 +31,75 @@ def test_remote_command(mock_ssh_conn):
         )
     )
     mock_ssh_conn.return_value.run_command_on_host.assert_called_once_with(mock_command)
+    mock_ssh_conn.return_value.close.assert_called_once()
+    assert res["exit_code"] == 0
+    assert res["output"] == "out"
+
+
+@patch("workflows.ssh_remote_command.SSHExecutor")
+def test_remote_command_on_hosts(mock_executor):
+    """
+    Test a command is run on many hosts, returning each host's result
+    """
+    executor = mock_executor.return_value.__enter__.return_value
+    executor.run_on_hosts.return_value = {
+        "hv1": CommandResult(host="hv1", command="ls", exit_code=0, output="out")
+    }
+
+    res = ssh_remote_command_on_hosts(
+        hosts=["hv1"],
+        username="stackstorm",
+        private_key_path="/home/stackstorm/.ssh/id_rsa",
+        command="ls",
+    )
+
+    mock_executor.assert_called_once_with(
+        "stackstorm", "/home/stackstorm/.ssh/id_rsa", 10
+    )
+    executor.run_on_hosts.assert_called_once_with(["hv1"], "ls")
+    assert res == (
+        True,
+        {
+            "hv1": {
+                "host": "hv1",
+                "command": "ls",
+                "exit_code": 0,
+                "output": "out",
+                "error": None,
+                "truncated": False,
+                "output_path": None,
+                "timed_out": False,
+            }
+        },
+    )
+
+
+@patch("workflows.ssh_remote_command.SSHExecutor")
+def test_remote_command_on_hosts_failure(mock_executor):
+    """
+    Test the action fails when the command failed on any host, still returning every
+    host's exit code and output
+    """
+    executor = mock_executor.return_value.__enter__.return_value
+    executor.run_on_hosts.return_value = {
+        "hv1": CommandResult(host="hv1", command="ls", exit_code=0, output="ok"),
+        "hv2": CommandResult(host="hv2", command="ls", exit_code=2, output="no"),
+        "hv3": CommandResult(host="hv3", command="ls", exit_code=None, error="timeout"),
+    }
+
+    succeeded, res = ssh_remote_command_on_hosts(
+        hosts=["hv1", "hv2", "hv3"],
+        username="stackstorm",
+        private_key_path="/home/stackstorm/.ssh/id_rsa",
+        command="ls",
+    )
+
+    assert not succeeded
+    assert {host: result["exit_code"] for host, result in res.items()} == {
+        "hv1": 0,
+        "hv2": 2,
+        "hv3": None,
+    }
+    assert res["hv1"]["output"] == "ok"
+    assert res["hv2"]["output"] == "no"
+    assert res["hv3"]["error"] == "timeout"
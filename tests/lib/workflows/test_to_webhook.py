@@ -1,61 +1,173 @@
 from unittest.mock import patch, MagicMock
 import os
 import json
+import threading
 
 import pytest
 import requests
 from workflows.to_webhook import to_webhook
 
 
+def _response(status_code):
+    """
+    Make a mock response with the given status code
+    """
+    mock_response = MagicMock()
+    mock_response.status_code = status_code
+    return mock_response
+
+
 @patch.dict(
     os.environ,
     {"ST2_ACTION_API_URL": "http://example.com", "ST2_ACTION_AUTH_TOKEN": "fake_token"},
 )
-@patch("requests.post")
+@patch("workflows.to_webhook.requests.Session.post", autospec=True)
 def test_to_webhook_success(mock_post):
     """
-    Test post is called with the correct parameters
+    Test post is called with the correct parameters on one shared session
     """
     webhook = "test_webhook"
     payload = [{"key1": "value1"}, {"key2": "value2"}]
-    mock_response = MagicMock()
-    mock_response.status_code = 202
-    mock_post.return_value = mock_response
+    mock_post.return_value = _response(202)
 
-    to_webhook(webhook, payload)
+    summary = to_webhook(webhook, payload)
 
     assert mock_post.call_count == 2
+    sessions = {post_call.args[0] for post_call in mock_post.call_args_list}
+    assert len(sessions) == 1
+    session = sessions.pop()
+    assert session.headers["X-Auth-Token"] == "fake_token"
+    assert session.verify is False
 
     mock_post.assert_any_call(
+        session,
         url="http://example.com/webhooks/test_webhook",
-        headers={"X-Auth-Token": "fake_token"},
         timeout=300,
         data=json.dumps({"key1": "value1"}),
-        verify=False,
     )
     mock_post.assert_any_call(
+        session,
         url="http://example.com/webhooks/test_webhook",
-        headers={"X-Auth-Token": "fake_token"},
         timeout=300,
         data=json.dumps({"key2": "value2"}),
-        verify=False,
     )
+    assert summary.delivered == 2
+    assert summary.failed == 0
 
 
 @patch.dict(
     os.environ,
     {"ST2_ACTION_API_URL": "http://example.com", "ST2_ACTION_AUTH_TOKEN": "fake_token"},
 )
-@patch("workflows.to_webhook.requests.post")
+@patch("workflows.to_webhook.requests.Session.post")
 def test_to_webhook_failure(mock_post):
     """
     Test exception is raised if post request doesn't succeed
     """
     webhook = "test_webhook"
     payload = [{"key1": "value1"}, {"key2": "value2"}]
-    mock_response = MagicMock()
-    mock_response.status_code = 500
-    mock_post.return_value = mock_response
+    mock_post.return_value = _response(500)
 
     with pytest.raises(requests.exceptions.HTTPError):
         to_webhook(webhook, payload)
+
+
+@patch.dict(
+    os.environ,
+    {"ST2_ACTION_API_URL": "http://example.com", "ST2_ACTION_AUTH_TOKEN": "fake_token"},
+)
+@patch("workflows.to_webhook.requests.Session.post")
+def test_to_webhook_summary(mock_post):
+    """
+    Test every row is tried and failures are counted when not raising
+    """
+    payload = [{"key": i} for i in range(5)]
+    mock_post.side_effect = lambda url, timeout, data: _response(
+        500 if json.loads(data)["key"] == 3 else 202
+    )
+
+    summary = to_webhook("test_webhook", payload, raise_on_failure=False)
+
+    assert mock_post.call_count == 5
+    assert summary.delivered == 4
+    assert summary.failed == 1
+    assert summary.errors == ["Webhook returned 500"]
+
+
+@patch.dict(
+    os.environ,
+    {"ST2_ACTION_API_URL": "http://example.com", "ST2_ACTION_AUTH_TOKEN": "fake_token"},
+)
+@patch("workflows.to_webhook.requests.Session.post")
+def test_to_webhook_batches(mock_post):
+    """
+    Test several rows are sent in each request when batching
+    """
+    payload = [{"key": i} for i in range(5)]
+    mock_post.return_value = _response(202)
+
+    summary = to_webhook("test_webhook", payload, batch_size=2)
+
+    sent = sorted(
+        (
+            json.loads(post_call.kwargs["data"])
+            for post_call in mock_post.call_args_list
+        ),
+        key=lambda batch: batch[0]["key"],
+    )
+    assert sent == [
+        [{"key": 0}, {"key": 1}],
+        [{"key": 2}, {"key": 3}],
+        [{"key": 4}],
+    ]
+    assert summary.delivered == 5
+
+
+@patch.dict(
+    os.environ,
+    {"ST2_ACTION_API_URL": "http://example.com", "ST2_ACTION_AUTH_TOKEN": "fake_token"},
+)
+@patch("workflows.to_webhook.requests.Session.post")
+def test_to_webhook_streams_generator(mock_post):
+    """
+    Test rows from a generator are sent before the generator finishes
+    """
+    first_row_sent = threading.Event()
+
+    def post(url, timeout, data):  # pylint:disable=unused-argument
+        first_row_sent.set()
+        return _response(202)
+
+    def rows():
+        yield {"key": 0}
+        # the generator is still producing rows while the first is sent
+        assert first_row_sent.wait(timeout=5)
+        yield {"key": 1}
+
+    mock_post.side_effect = post
+
+    summary = to_webhook("test_webhook", rows(), max_concurrent_posts=1)
+
+    assert summary.delivered == 2
+
+
+@patch.dict(
+    os.environ,
+    {"ST2_ACTION_API_URL": "http://example.com", "ST2_ACTION_AUTH_TOKEN": "fake_token"},
+)
+def test_to_webhook_retries():
+    """
+    Test the session retries retryable statuses with backoff, but not read errors where the
+    rows may already have been accepted
+    """
+    with patch("workflows.to_webhook.requests.Session.post") as mock_post:
+        mock_post.return_value = _response(202)
+        with patch("workflows.to_webhook.HTTPAdapter") as mock_adapter:
+            to_webhook("test_webhook", [{"key": 1}], max_retries=5, backoff_factor=2)
+
+    retry = mock_adapter.call_args.kwargs["max_retries"]
+    assert retry.total == 5
+    assert retry.read == 0
+    assert retry.backoff_factor == 2
+    assert 503 in retry.status_forcelist
+    assert "POST" in retry.allowed_methods
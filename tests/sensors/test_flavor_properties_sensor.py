@@ -1,8 +1,10 @@
-from unittest.mock import MagicMock, patch
+from itertools import cycle
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 import tabulate
 
+from apis.utils.diff_utils import get_diff
 from sensors.src.flavor_properties_sensor import FlavorPropertiesSensor
 
 
@@ -11,8 +13,10 @@ def flavor_properties_sensor_fixture():
     """
     Fixture for sensor config.
     """
+    sensor_service = MagicMock()
+    sensor_service.get_value.return_value = None
     return FlavorPropertiesSensor(
-        sensor_service=MagicMock(),
+        sensor_service=sensor_service,
         config={
             "flavor_sensor": {
                 "source_cloud_account": "prod",
@@ -24,7 +28,7 @@ def flavor_properties_sensor_fixture():
 
 
 @patch("sensors.src.flavor_properties_sensor.get_diff")
-@patch("sensors.src.flavor_properties_sensor.OpenstackConnection")
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
 def test_poll_flavor_mismatch(mock_openstack_connection, mock_get_diff, sensor):
     """
     Test detecting a mismatch between the source and target flavor.
@@ -84,7 +88,7 @@ def test_poll_flavor_mismatch(mock_openstack_connection, mock_get_diff, sensor):
 
 
 @patch("sensors.src.flavor_properties_sensor.get_diff")
-@patch("sensors.src.flavor_properties_sensor.OpenstackConnection")
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
 def test_poll_flavor_not_in_target(mock_openstack_connection, mock_get_diff, sensor):
     """
     Test detecting that the source flavor does not exist in the target.
@@ -136,7 +140,7 @@ def test_poll_flavor_not_in_target(mock_openstack_connection, mock_get_diff, sen
 
 
 @patch("sensors.src.flavor_properties_sensor.get_diff")
-@patch("sensors.src.flavor_properties_sensor.OpenstackConnection")
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
 def test_poll_flavor_match(mock_openstack_connection, mock_get_diff, sensor):
     """
     Test detecting no mismatch between the source and target flavor.
@@ -168,3 +172,92 @@ def test_poll_flavor_match(mock_openstack_connection, mock_get_diff, sensor):
     mock_source_conn.list_flavors.assert_called_once()
     mock_target_conn.list_flavors.assert_called_once()
     sensor.sensor_service.dispatch.assert_not_called()
+
+
+def _setup_flavors(mock_openstack_connection, source_specs, target_specs):
+    """
+    Make each poll list one flavor in each cloud with the given specs
+    """
+    source_conn = MagicMock()
+    target_conn = MagicMock()
+    mock_openstack_connection.return_value.__enter__.side_effect = cycle(
+        [source_conn, target_conn]
+    )
+    for conn, specs, flavor_id in [
+        (source_conn, source_specs, "0000"),
+        (target_conn, target_specs, "9999"),
+    ]:
+        flavor = MagicMock()
+        flavor.name = "test_flavor"
+        flavor.id = flavor_id
+        flavor.to_dict.return_value = {"id": flavor_id, **specs}
+        conn.list_flavors.return_value = [flavor]
+    return source_conn, target_conn
+
+
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
+def test_poll_unchanged_flavor_not_rediffed(mock_openstack_connection, sensor):
+    """
+    Test a flavor that hasn't changed since the last poll isn't diffed or dispatched again
+    """
+    _setup_flavors(mock_openstack_connection, {"ram": 1}, {"ram": 2})
+
+    with patch(
+        "sensors.src.flavor_properties_sensor.get_diff", wraps=get_diff
+    ) as mock_get_diff:
+        sensor.poll()
+        sensor.poll()
+
+    mock_get_diff.assert_called_once()
+    sensor.sensor_service.dispatch.assert_called_once()
+    sensor.sensor_service.set_value.assert_called_with(
+        name="flavor_fingerprints", value=ANY, local=True
+    )
+
+
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
+def test_poll_same_mismatch_not_redispatched(mock_openstack_connection, sensor):
+    """
+    Test a flavor which changes but still has the same mismatch isn't dispatched again,
+    but is dispatched when the mismatch changes
+    """
+    _setup_flavors(
+        mock_openstack_connection, {"ram": 1, "disk": 1}, {"ram": 2, "disk": 1}
+    )
+    sensor.poll()
+    # disk changes on both sides, so the flavors are diffed again but the mismatch is the same
+    _setup_flavors(
+        mock_openstack_connection, {"ram": 1, "disk": 2}, {"ram": 2, "disk": 2}
+    )
+    sensor.poll()
+    assert sensor.sensor_service.dispatch.call_count == 1
+
+    _setup_flavors(
+        mock_openstack_connection, {"ram": 1, "disk": 2}, {"ram": 3, "disk": 2}
+    )
+    sensor.poll()
+    assert sensor.sensor_service.dispatch.call_count == 2
+
+
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
+def test_poll_fingerprints_loaded_from_datastore(mock_openstack_connection, sensor):
+    """
+    Test fingerprints saved by a previous sensor process are used after a restart
+    """
+    _setup_flavors(mock_openstack_connection, {"ram": 1}, {"ram": 2})
+    sensor.poll()
+    saved = sensor.sensor_service.set_value.call_args.kwargs["value"]
+
+    restarted = FlavorPropertiesSensor(
+        sensor_service=MagicMock(),
+        config=sensor.config,
+        poll_interval=10,
+    )
+    restarted.sensor_service.get_value.return_value = saved
+    _setup_flavors(mock_openstack_connection, {"ram": 1}, {"ram": 2})
+    restarted.poll()
+
+    restarted.sensor_service.get_value.assert_called_once_with(
+        name="flavor_fingerprints", local=True
+    )
+    restarted.sensor_service.dispatch.assert_not_called()
@@ -10,8 +10,10 @@ def aggregate_sensor_fixture():
     """
     Fixture for sensor config.
     """
+    sensor_service = MagicMock()
+    sensor_service.get_value.return_value = None
     return HostAggregateSensor(
-        sensor_service=MagicMock(),
+        sensor_service=sensor_service,
         config={
             "sensor_source_cloud": "dev",
             "sensor_dest_cloud": "prod",
@@ -22,7 +24,7 @@ def aggregate_sensor_fixture():
 
 @patch("sensors.src.host_aggregate_metadata_sensor.tabulate")
 @patch("sensors.src.host_aggregate_metadata_sensor.get_diff")
-@patch("sensors.src.host_aggregate_metadata_sensor.OpenstackConnection")
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
 def test_poll_mismatch(mock_openstack_connection, mock_get_diff, mock_tabulate, sensor):
     """
     Test main function of sensor, polling the dev cloud aggregates and their properties.
@@ -67,7 +69,7 @@ def test_poll_mismatch(mock_openstack_connection, mock_get_diff, mock_tabulate,
     )
 
 
-@patch("sensors.src.host_aggregate_metadata_sensor.OpenstackConnection")
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
 def test_poll_match(mock_openstack_connection, sensor):
     """
     Test main function of sensor, polling the dev cloud aggregates and their properties.
@@ -95,7 +97,7 @@ def test_poll_match(mock_openstack_connection, sensor):
     sensor.sensor_service.dispatch.assert_not_called()
 
 
-@patch("sensors.src.host_aggregate_metadata_sensor.OpenstackConnection")
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
 def test_poll_not_exist_in_target(mock_openstack_connection, sensor):
     """
     Test main function of sensor, polling the dev cloud aggregates and their properties.
@@ -11,8 +11,10 @@ def metadata_sensor_fixture():
     """
     Fixture for sensor config.
     """
+    sensor_service = MagicMock()
+    sensor_service.get_value.return_value = None
     return ImageMetadataSensor(
-        sensor_service=MagicMock(),
+        sensor_service=sensor_service,
         config={
             "image_sensor": {
                 "source_cloud_account": "dev",
@@ -24,7 +26,7 @@ def metadata_sensor_fixture():
 
 
 @patch("sensors.src.image_metadata_sensor.get_diff")
-@patch("sensors.src.image_metadata_sensor.OpenstackConnection")
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
 def test_poll_metadata_mismatch(mock_openstack_connection, mock_get_diff, sensor):
     """
     Test that metadata mismatch between source and target triggers dispatch
@@ -73,7 +75,7 @@ def test_poll_metadata_mismatch(mock_openstack_connection, mock_get_diff, sensor
 
 
 @patch("sensors.src.image_metadata_sensor.get_diff")
-@patch("sensors.src.image_metadata_sensor.OpenstackConnection")
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
 def test_poll_image_not_in_target(mock_openstack_connection, mock_get_diff, sensor):
     """
     Test that image exists in source but not in target triggers no dispatch
@@ -100,7 +102,7 @@ def test_poll_image_not_in_target(mock_openstack_connection, mock_get_diff, sens
 
 
 @patch("sensors.src.image_metadata_sensor.get_diff")
-@patch("sensors.src.image_metadata_sensor.OpenstackConnection")
+@patch("apis.openstack_api.openstack_cross_cloud.OpenstackConnection")
 def test_poll_metadata_match(mock_openstack_connection, mock_get_diff, sensor):
     """
     Test that metadata match between source and target triggers no dispatch
@@ -46,3 +46,12 @@ def test_poll(mock_openstack_connection, mock_check_for_internal_routers, sensor
         trigger="stackstorm_openstack.openstack_router_issue",
         payload=expected_payload,
     )
+
+
+@patch("sensors.src.openstack_router_sensor.CONNECTION_POOL")
+def test_cleanup(mock_connection_pool, sensor):
+    """
+    Test cleanup closes the pooled Openstack connections
+    """
+    sensor.cleanup()
+    mock_connection_pool.close_all.assert_called_once()